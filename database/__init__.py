@@ -1,6 +1,6 @@
 # database/__init__.py
 
-from .database import DatabaseManager
+from .database import DatabaseManager, TransactionAborted
 from .models import (
     BaseModel, Person, Device, Reception, Repair, Part,
     WarehouseManager, Invoice, AccountManager, CheckManager,
@@ -10,6 +10,7 @@ from .models import (
 
 __all__ = [
     'DatabaseManager',
+    'TransactionAborted',
     'BaseModel',
     'Person',
     'Device',
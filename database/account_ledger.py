@@ -0,0 +1,480 @@
+# account_ledger.py - دفتر موجودی حساب‌ها (ledger) با مانده جاری
+"""
+دفتر افزایشی موجودی حساب‌ها
+
+هر تغییر موجودی یک حساب یک ردیف در AccountLedger است که مبلغ تغییر (مثبت یا
+منفی) و مانده حساب پس از آن (balance_after) را نگه می‌دارد. ترتیب ردیف‌های
+هر حساب (entry_date, id) است، پس:
+
+- مانده در یک تاریخ = balance_after آخرین ردیف قبل از آن تاریخ؛ با ایندکس
+  (account_id, entry_date) فقط یک جستجوی O(log n) است.
+- نمودار تاریخچه موجودی مستقیماً از ردیف‌های بازه خوانده می‌شود و لازم نیست
+  کل تراکنش‌های حساب از ابتدا جمع زده شوند.
+
+قواعد اثر تراکنش‌ها روی موجودی همان قواعد _update_account_balances است:
+انتقال (کسر از مبدا و افزودن به مقصد)، دریافت (افزودن به مقصد) و پرداخت
+(کسر از مبدا). همه تغییرات موجودی باید از post() بگذرند تا به‌روزرسانی
+Accounts.current_balance و ثبت در دفتر در یک تراکنش انجام شود.
+
+ردیف افتتاحیه هر حساب تازه با تریگر روی Accounts ثبت می‌شود و همیشه اولین
+ردیف حساب است: اگر تراکنشی با تاریخ قبل از آن ثبت شود، post() تاریخ ردیف
+افتتاحیه را به روز همان تراکنش می‌برد تا مانده ردیف‌های قبلی موجودی اولیه را
+از قلم نیندازد. برای
+دیتابیس‌های قدیمی، دفتر یک بار از روی تراکنش‌های موجود ساخته می‌شود و اگر
+نتیجه با current_balance یکی نباشد، یک ردیف اصلاحی اختلاف را ثبت می‌کند.
+بررسی و تطبیق دوباره با دستور زیر انجام می‌شود:
+
+    python -m database.account_ledger [مسیر دیتابیس]
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+
+from . import date_filters
+
+
+ENTRY_OPENING = 'افتتاحیه'
+ENTRY_TRANSACTION = 'تراکنش'
+ENTRY_ADJUSTMENT = 'اصلاح'
+
+# اختلاف کمتر از این مقدار (ریال) خطای گرد کردن است و ناهماهنگی حساب نمی‌شود
+BALANCE_TOLERANCE = 0.01
+
+LEDGER_TABLE = """
+    CREATE TABLE IF NOT EXISTS AccountLedger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_id INTEGER NOT NULL,
+        entry_date TEXT NOT NULL,
+        amount REAL NOT NULL,
+        balance_after REAL NOT NULL,
+        transaction_id INTEGER,
+        entry_type TEXT NOT NULL DEFAULT 'تراکنش',
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+LEDGER_INDEXES = [
+    # rowid (id) انتهای ایندکس است، پس ORDER BY entry_date DESC, id DESC هم از همین ایندکس می‌آید
+    "CREATE INDEX IF NOT EXISTS idx_account_ledger_account_date ON AccountLedger(account_id, entry_date)",
+    "CREATE INDEX IF NOT EXISTS idx_account_ledger_transaction ON AccountLedger(transaction_id)",
+]
+
+OPENING_TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS trg_accounts_ledger_opening
+    AFTER INSERT ON Accounts
+    BEGIN
+        INSERT INTO AccountLedger (account_id, entry_date, amount, balance_after, entry_type, description)
+        VALUES (
+            NEW.id,
+            COALESCE(date(NEW.created_at), date('now', 'localtime')),
+            COALESCE(NEW.current_balance, NEW.initial_balance, 0),
+            COALESCE(NEW.current_balance, NEW.initial_balance, 0),
+            '{ENTRY_OPENING}',
+            'موجودی اولیه'
+        );
+    END
+"""
+
+
+def last_balance_sql(account_column, date_operator=None):
+    """
+    زیرکوئری مانده آخرین ردیف دفتر یک حساب (برای استفاده داخل SELECT دیگر)
+
+    با date_operator ('<' یا '<=') یک پارامتر ? برای مرز تاریخ می‌گیرد.
+    """
+    date_sql = f" AND l.entry_date {date_operator} ?" if date_operator else ""
+    return f"""(
+        SELECT l.balance_after FROM AccountLedger l
+        WHERE l.account_id = {account_column}{date_sql}
+        ORDER BY l.entry_date DESC, l.id DESC
+        LIMIT 1
+    )"""
+
+
+def balance_changes(transaction_type, from_account_id, to_account_id, amount):
+    """لیست (حساب، تغییر موجودی) یک تراکنش بر اساس نوع آن"""
+    if transaction_type == 'انتقال' and from_account_id and to_account_id:
+        return [(from_account_id, -amount), (to_account_id, amount)]
+    if transaction_type == 'دریافت' and to_account_id:
+        return [(to_account_id, amount)]
+    if transaction_type == 'پرداخت' and from_account_id:
+        return [(from_account_id, -amount)]
+    return []
+
+
+# ---------- ساخت و بازسازی ----------
+
+# حرکت‌های موجودی هر حساب بر اساس همان قواعد balance_changes
+_MOVEMENTS_SQL = """
+    SELECT to_account_id AS account_id, transaction_date AS entry_date,
+           COALESCE(amount, 0) AS amount, id AS transaction_id
+    FROM AccountingTransactions
+    WHERE transaction_type IN ('انتقال', 'دریافت') AND to_account_id IS NOT NULL
+        AND (transaction_type = 'دریافت' OR from_account_id IS NOT NULL)
+        AND date(transaction_date) IS NOT NULL
+    UNION ALL
+    SELECT from_account_id, transaction_date, -COALESCE(amount, 0), id
+    FROM AccountingTransactions
+    WHERE transaction_type IN ('انتقال', 'پرداخت') AND from_account_id IS NOT NULL
+        AND (transaction_type = 'پرداخت' OR to_account_id IS NOT NULL)
+        AND date(transaction_date) IS NOT NULL
+"""
+
+_BACKFILL_SQL = f"""
+    WITH movements AS (
+        SELECT * FROM ({_MOVEMENTS_SQL})
+        WHERE account_id IN (SELECT id FROM Accounts)
+    ),
+    first_days AS (
+        SELECT account_id, date(MIN(entry_date)) AS first_day
+        FROM movements
+        GROUP BY account_id
+    ),
+    entries AS (
+        SELECT a.id AS account_id,
+               CASE
+                   WHEN date(a.created_at) IS NULL THEN COALESCE(f.first_day, date('now', 'localtime'))
+                   WHEN f.first_day IS NULL OR date(a.created_at) <= f.first_day THEN date(a.created_at)
+                   ELSE f.first_day
+               END AS entry_date,
+               COALESCE(a.initial_balance, 0) AS amount,
+               NULL AS transaction_id, 0 AS seq, '{ENTRY_OPENING}' AS entry_type
+        FROM Accounts a
+        LEFT JOIN first_days f ON f.account_id = a.id
+        UNION ALL
+        SELECT account_id, entry_date, amount, transaction_id, 1, '{ENTRY_TRANSACTION}'
+        FROM movements
+    )
+    INSERT INTO AccountLedger (account_id, entry_date, amount, balance_after, transaction_id, entry_type)
+    SELECT account_id, entry_date, amount,
+           SUM(amount) OVER (
+               PARTITION BY account_id ORDER BY entry_date, seq, transaction_id
+               ROWS UNBOUNDED PRECEDING
+           ),
+           transaction_id, entry_type
+    FROM entries
+    ORDER BY account_id, entry_date, seq, transaction_id
+"""
+
+_MISMATCH_SQL = f"""
+    SELECT account_id, account_name, current_balance, ledger_balance, last_entry_date,
+           current_balance - ledger_balance AS difference
+    FROM (
+        SELECT a.id AS account_id, a.account_name,
+               COALESCE(a.current_balance, 0) AS current_balance,
+               COALESCE({last_balance_sql('a.id')}, 0) AS ledger_balance,
+               (SELECT MAX(l.entry_date) FROM AccountLedger l WHERE l.account_id = a.id) AS last_entry_date
+        FROM Accounts a
+    )
+    WHERE abs(current_balance - ledger_balance) > {BALANCE_TOLERANCE}
+    ORDER BY account_id
+"""
+
+# ردیف‌های افتتاحیه‌ای که ردیف دیگری از همان حساب قبل از آن‌ها قرار گرفته است
+_MISPLACED_OPENINGS_SQL = f"""
+    SELECT o.id, o.account_id, o.entry_date,
+           (SELECT MIN(l.entry_date) FROM AccountLedger l WHERE l.account_id = o.account_id) AS first_entry_date
+    FROM AccountLedger o
+    WHERE o.entry_type = '{ENTRY_OPENING}'
+        AND EXISTS (
+            SELECT 1 FROM AccountLedger l
+            WHERE l.account_id = o.account_id
+                AND (l.entry_date < o.entry_date OR (l.entry_date = o.entry_date AND l.id < o.id))
+        )
+    ORDER BY o.account_id
+"""
+
+_MOVE_OPENINGS_SQL = f"""
+    UPDATE AccountLedger
+    SET entry_date = (
+        SELECT date(MIN(l.entry_date)) FROM AccountLedger l
+        WHERE l.account_id = AccountLedger.account_id
+    )
+    WHERE id IN (SELECT id FROM ({_MISPLACED_OPENINGS_SQL}))
+"""
+
+# محاسبه دوباره balance_after ردیف‌های حساب‌های داده شده با جمع جاری مبالغ
+_RUNNING_BALANCE_SQL = """
+    UPDATE AccountLedger
+    SET balance_after = r.running_balance
+    FROM (
+        SELECT id, SUM(amount) OVER (
+                   PARTITION BY account_id ORDER BY entry_date, id
+                   ROWS UNBOUNDED PRECEDING
+               ) AS running_balance
+        FROM AccountLedger
+        WHERE account_id IN ({placeholders})
+    ) r
+    WHERE AccountLedger.id = r.id
+"""
+
+# ردیف اصلاحی بعد از آخرین ردیف حساب (حتی اگر تاریخ آن در آینده باشد) ثبت می‌شود
+_ADJUSTMENT_SQL = f"""
+    INSERT INTO AccountLedger (account_id, entry_date, amount, balance_after, entry_type, description)
+    SELECT account_id,
+           MAX(datetime('now', 'localtime'), COALESCE(last_entry_date, '')),
+           difference, current_balance, '{ENTRY_ADJUSTMENT}', 'تطبیق با موجودی فعلی حساب'
+    FROM ({_MISMATCH_SQL})
+"""
+
+
+def _existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_ledger_table(cursor):
+    """
+    ایجاد جدول دفتر، ایندکس‌ها و تریگر افتتاحیه روی cursor داده شده
+
+    اگر جدول تازه ساخته شود، دفتر از روی تراکنش‌های موجود پر می‌شود.
+    خروجی: True اگر دفتر ساخته شد.
+    """
+    existing = _existing_tables(cursor)
+    if not {'Accounts', 'AccountingTransactions'} <= existing:
+        return False
+
+    created = 'AccountLedger' not in existing
+    cursor.execute(LEDGER_TABLE)
+    for index_sql in LEDGER_INDEXES:
+        cursor.execute(index_sql)
+    cursor.execute(OPENING_TRIGGER)
+
+    if created:
+        rebuild(cursor)
+    return created
+
+
+def rebuild(cursor):
+    """
+    بازسازی کامل دفتر از موجودی اولیه حساب‌ها و تراکنش‌ها
+
+    اختلاف نهایی هر حساب با current_balance (مثلاً تغییرات دستی قدیمی) با یک
+    ردیف اصلاحی ثبت می‌شود تا مانده دفتر با موجودی فعلی یکی باشد.
+    """
+    cursor.execute("DELETE FROM AccountLedger")
+    cursor.execute(_BACKFILL_SQL)
+    cursor.execute(_ADJUSTMENT_SQL)
+
+
+def fix_openings(cursor):
+    """
+    انتقال ردیف‌های افتتاحیه‌ای که اولین ردیف حساب خود نیستند به روز اولین ردیف
+    و محاسبه دوباره balance_after ردیف‌های همان حساب‌ها
+
+    (دفترهایی که پیش از جابه‌جایی افتتاحیه در post() تراکنش عقب‌تاریخ گرفته‌اند)
+    خروجی: لیست (id، account_id، entry_date، first_entry_date) ردیف‌های جابه‌جا شده.
+    """
+    cursor.execute(_MISPLACED_OPENINGS_SQL)
+    misplaced = cursor.fetchall()
+    if not misplaced:
+        return []
+
+    account_ids = sorted({row[1] for row in misplaced})
+    cursor.execute(_MOVE_OPENINGS_SQL)
+    cursor.execute(
+        _RUNNING_BALANCE_SQL.format(placeholders=', '.join('?' for _ in account_ids)),
+        account_ids
+    )
+    return misplaced
+
+
+# ---------- ثبت تغییر موجودی ----------
+
+def post(db, account_id, amount, entry_date=None, transaction_id=None,
+         entry_type=ENTRY_TRANSACTION, description=None):
+    """
+    اعمال تغییر موجودی یک حساب و ثبت آن در دفتر در یک تراکنش
+
+    entry_date تاریخ اثر تغییر است (پیش‌فرض اکنون). اگر تاریخ گذشته باشد،
+    مانده ردیف‌های بعدی همان حساب هم به همان اندازه جابه‌جا می‌شود؛ برای
+    ثبت‌های عادی (تاریخ امروز) این به‌روزرسانی هیچ ردیفی را لمس نمی‌کند.
+    اگر entry_date قبل از ردیف افتتاحیه حساب باشد، ردیف افتتاحیه به روز
+    entry_date منتقل می‌شود تا همچنان اولین ردیف حساب بماند.
+    داخل db.transaction() بیرونی، به همان تراکنش می‌پیوندد.
+    """
+    if not account_id or not amount:
+        return True
+
+    entry_date = _entry_date(entry_date)
+    with db.transaction():
+        db.execute_query(
+            "UPDATE Accounts SET current_balance = current_balance + ? WHERE id = ?",
+            (amount, account_id)
+        )
+
+        # تراکنش عقب‌تاریخ: افتتاحیه اول روز همین ردیف می‌آید (date(?) < ?)
+        db.execute_query(
+            "UPDATE AccountLedger SET entry_date = date(?) "
+            "WHERE account_id = ? AND entry_type = ? AND entry_date > ?",
+            (entry_date, account_id, ENTRY_OPENING, entry_date)
+        )
+
+        # مانده قبل از این ردیف (ردیف‌های هم‌تاریخ قبلی id کوچکتری دارند)
+        previous = db.fetch_one(
+            f"SELECT COALESCE({last_balance_sql('?', '<=')}, 0) AS balance",
+            (account_id, entry_date)
+        )
+        balance_after = (previous['balance'] if previous else 0) + amount
+
+        db.execute_query(
+            "UPDATE AccountLedger SET balance_after = balance_after + ? "
+            "WHERE account_id = ? AND entry_date > ?",
+            (amount, account_id, entry_date)
+        )
+        db.execute_query("""
+            INSERT INTO AccountLedger (
+                account_id, entry_date, amount, balance_after,
+                transaction_id, entry_type, description
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (account_id, entry_date, amount, balance_after,
+              transaction_id, entry_type, description))
+    return True
+
+
+def post_transaction(db, transaction_id, transaction_type, from_account_id, to_account_id,
+                     amount, entry_date=None):
+    """اعمال اثر یک تراکنش حسابداری روی موجودی حساب‌های آن (با قواعد balance_changes)"""
+    changes = balance_changes(transaction_type, from_account_id, to_account_id, float(amount or 0))
+    with db.transaction():
+        for account_id, change in changes:
+            post(db, account_id, change, entry_date, transaction_id)
+    return changes
+
+
+def _entry_date(value):
+    """تاریخ ردیف به صورت رشته ISO میلادی (تاریخ شمسی تبدیل می‌شود)"""
+    if not value:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    text = str(value).strip()
+    year = text[:4]
+    if len(text) >= 10 and year.isdigit() and int(year) > 1500 and text[4] == '-':
+        return text
+    return date_filters.day_start(text)
+
+
+# ---------- خواندن ----------
+
+def balance_as_of(db, account_id, day):
+    """مانده حساب در پایان روز day (میلادی یا شمسی)"""
+    row = db.fetch_one(
+        f"SELECT COALESCE({last_balance_sql('?', '<')}, 0) AS balance",
+        (account_id, date_filters.next_day_start(day))
+    )
+    return row['balance'] if row else 0
+
+
+def balances_as_of(db, day, account_types=None, active_only=True):
+    """مانده همه حساب‌ها در پایان روز day (ستون‌ها: id، account_name، account_type و balance)"""
+    conditions = ["a.is_active = 1"] if active_only else []
+    params = [date_filters.next_day_start(day)]
+    if account_types:
+        conditions.append(f"a.account_type IN ({', '.join('?' for _ in account_types)})")
+        params.extend(account_types)
+
+    where_sql = " AND ".join(conditions) or "1=1"
+    return db.fetch_all(f"""
+        SELECT a.id, a.account_name, a.account_type,
+               COALESCE({last_balance_sql('a.id', '<')}, 0) AS balance
+        FROM Accounts a
+        WHERE {where_sql}
+        ORDER BY a.id
+    """, params)
+
+
+def balance_history(db, account_id, start_day, end_day):
+    """
+    مانده پایان روز و تغییر خالص هر روز بازه (فقط روزهای دارای ردیف)
+
+    ستون‌ها: date، daily_change و balance. مانده ابتدای بازه با
+    balance_as_of(روز قبل از start_day) به دست می‌آید.
+    """
+    start, end = date_filters.days_bounds(start_day, end_day)
+    date_sql, params = date_filters.range_condition('entry_date', start, end)
+    return db.fetch_all(f"""
+        SELECT day AS date, daily_change, balance
+        FROM (
+            SELECT date(entry_date) AS day,
+                   SUM(amount) OVER (PARTITION BY date(entry_date)) AS daily_change,
+                   balance_after AS balance,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY date(entry_date) ORDER BY entry_date DESC, id DESC
+                   ) AS day_rank
+            FROM AccountLedger
+            WHERE account_id = ? AND {date_sql}
+        )
+        WHERE day_rank = 1
+        ORDER BY day
+    """, (account_id, *params))
+
+
+# ---------- بررسی سازگاری ----------
+
+def find_mismatches(db):
+    """حساب‌هایی که مانده دفترشان با Accounts.current_balance یکی نیست"""
+    return db.fetch_all(_MISMATCH_SQL)
+
+
+def find_misplaced_openings(db):
+    """ردیف‌های افتتاحیه‌ای که ردیف دیگری از همان حساب قبل از آن‌ها قرار گرفته است"""
+    return db.fetch_all(_MISPLACED_OPENINGS_SQL)
+
+
+def find_broken_entries(db, account_id=None):
+    """ردیف‌هایی که balance_after آن‌ها با جمع جاری مبالغ دفتر یکی نیست"""
+    account_sql = "WHERE account_id = ?" if account_id is not None else ""
+    params = (account_id,) if account_id is not None else ()
+    return db.fetch_all(f"""
+        SELECT id, account_id, entry_date, amount, balance_after, running_balance
+        FROM (
+            SELECT id, account_id, entry_date, amount, balance_after,
+                   SUM(amount) OVER (
+                       PARTITION BY account_id ORDER BY entry_date, id
+                       ROWS UNBOUNDED PRECEDING
+                   ) AS running_balance
+            FROM AccountLedger
+            {account_sql}
+        )
+        WHERE abs(balance_after - running_balance) > {BALANCE_TOLERANCE}
+        ORDER BY account_id, entry_date, id
+    """, params)
+
+
+def reconcile(db):
+    """
+    تطبیق دفتر با Accounts.current_balance
+
+    ابتدا ردیف‌های افتتاحیه جابه‌جا شده (find_misplaced_openings) به اول حساب
+    برمی‌گردند، سپس برای هر حساب ناهماهنگ یک ردیف اصلاحی ثبت می‌شود؛ خود
+    current_balance تغییر نمی‌کند. خروجی: لیست حساب‌های ناهماهنگ پیش از تطبیق.
+    """
+    with db.transaction() as connection:
+        fix_openings(connection.cursor())
+        mismatches = find_mismatches(db)
+        if mismatches:
+            db.execute_query(_ADJUSTMENT_SQL)
+    return mismatches
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        cursor = connection.cursor()
+        if not create_ledger_table(cursor):
+            for _, account_id, entry_date, first_entry_date in fix_openings(cursor):
+                print(f"⚠️ حساب {account_id}: ردیف افتتاحیه از {entry_date} به {first_entry_date[:10]} منتقل شد")
+            cursor.execute(_MISMATCH_SQL)
+            mismatches = cursor.fetchall()
+            for account_id, name, current, ledger, _, difference in mismatches:
+                print(f"⚠️ حساب {account_id} ({name}): موجودی {current:,.0f} / دفتر {ledger:,.0f} / اختلاف {difference:,.0f}")
+            cursor.execute(_ADJUSTMENT_SQL)
+        connection.commit()
+        print(f"✅ دفتر موجودی حساب‌های {db_path} با موجودی فعلی تطبیق داده شد")
+    finally:
+        connection.close()
@@ -0,0 +1,342 @@
+# audit_log.py - ثبت دسته‌ای لاگ حسابرسی (Logs) در نخ پس‌زمینه
+"""
+لاگ حسابرسی و امنیتی (جدول Logs)
+
+- نوشتن: AuditLogWriter.log فقط رویداد را (با زمان همان لحظه) به یک صف حلقوی
+  در حافظه اضافه می‌کند و فوراً برمی‌گردد. نخ نویسنده پس‌زمینه هر batch_size
+  رویداد یا هر flush_interval_ms (هر کدام زودتر) صف را با یک executemany و یک
+  commit در Logs می‌نویسد؛ نخ GUI دیگر برای هر عملیات یک INSERT و commit انجام
+  نمی‌دهد.
+- فشار برگشتی: اگر صف پر باشد (buffer_capacity)، log تا backpressure_ms صبر
+  می‌کند تا نویسنده جا باز کند؛ اگر باز هم پر بود قدیمی‌ترین رویداد صف کنار
+  گذاشته و شمرده می‌شود (dropped) تا برنامه هیچ‌وقت روی لاگ قفل نشود.
+- خروج: close (aboutToQuit و atexit) نخ را متوقف و باقی‌مانده صف را همان‌جا
+  می‌نویسد؛ flush برای وقتی است که باید رویدادهای صف قبل از خواندن Logs نوشته
+  شده باشند (مثلاً نمایش لاگ فعالیت).
+- خواندن: PAGE_QUERY صفحه‌بندی keyset روی (created_at, id) با ایندکس
+  idx_logs_created_at؛ فیلتر کاربر از idx_logs_user_created استفاده می‌کند.
+- نگهداری: purge_before لاگ‌های قبل از یک روز را از قدیمی‌ترین به جدیدترین و در
+  تکه‌های purge_chunk_size ردیفی حذف می‌کند؛ هر تکه تراکنش کوتاه خودش را دارد و
+  نوشتن‌های دیگر بین تکه‌ها منتظر نمی‌مانند.
+
+تنظیمات در بخش [AUDIT] فایل config.ini است.
+
+حذف لاگ‌های قدیمی‌تر از N روز:
+
+    python -m database.audit_log [مسیر دیتابیس] [--purge N]
+"""
+
+import atexit
+import collections
+import configparser
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+from . import date_filters, pagination
+
+
+DEFAULT_AUDIT_SETTINGS = {
+    'batch_size': 200,           # حداکثر رویداد در هر نوشتن
+    'flush_interval_ms': 1000,   # حداکثر تأخیر نوشتن یک رویداد
+    'buffer_capacity': 5000,     # ظرفیت صف حلقوی
+    'backpressure_ms': 50,       # حداکثر انتظار log وقتی صف پر است
+    'purge_chunk_size': 5000,    # تعداد ردیف‌های حذف شده در هر تراکنش پاکسازی
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LOG_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_logs_created_at ON Logs(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_logs_user_created ON Logs(user_id, created_at)",
+    # تاریخچه یک رکورد (جزئیات تراکنش)
+    "CREATE INDEX IF NOT EXISTS idx_logs_table_record ON Logs(table_name, record_id)",
+]
+
+INSERT_SQL = """
+    INSERT INTO Logs (user_id, action, table_name, record_id, details, ip_address, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_PURGE_CHUNK_SQL = """
+    DELETE FROM Logs WHERE id IN (
+        SELECT id FROM Logs WHERE created_at < ? ORDER BY created_at LIMIT ?
+    )
+"""
+
+
+def load_audit_settings(config_path="config.ini"):
+    """خواندن تنظیمات لاگ حسابرسی از بخش [AUDIT] فایل config.ini"""
+    settings = dict(DEFAULT_AUDIT_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('AUDIT'):
+        return settings
+
+    section = parser['AUDIT']
+    try:
+        for name, default in DEFAULT_AUDIT_SETTINGS.items():
+            settings[name] = section.getint(name, fallback=default)
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [AUDIT]: {e}")
+
+    return settings
+
+
+def create_log_indexes(cursor):
+    """ایجاد ایندکس‌های جدول Logs روی cursor داده شده؛ False اگر جدول وجود نداشته باشد"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Logs'")
+    if cursor.fetchone() is None:
+        return False
+    for index_sql in LOG_INDEXES:
+        cursor.execute(index_sql)
+    return True
+
+
+# ---------- نوشتن ----------
+
+class AuditLogWriter:
+    """صف حلقوی رویدادهای لاگ و نخ نویسنده دسته‌ای پس‌زمینه"""
+
+    def __init__(self, db, batch_size=200, flush_interval_ms=1000, buffer_capacity=5000,
+                 backpressure_ms=50, purge_chunk_size=5000):
+        self.db = db
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(10, int(flush_interval_ms)) / 1000
+        self.capacity = max(self.batch_size, int(buffer_capacity))
+        self.backpressure = max(0, int(backpressure_ms)) / 1000
+        self.purge_chunk_size = max(1, int(purge_chunk_size))
+
+        self._buffer = collections.deque()
+        self._condition = threading.Condition()
+        self._in_flight = 0          # رویدادهایی که از صف برداشته شده و در حال نوشتن هستند
+        self._flush_requested = False
+        self._closed = False
+
+        # آمار
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(target=self._run, name="AuditLogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user_id, action, table_name=None, record_id=None, details="",
+            ip_address="127.0.0.1"):
+        """افزودن یک رویداد به صف (بدون دسترسی به دیتابیس)"""
+        entry = (user_id, action, table_name, record_id, details, ip_address,
+                 datetime.now().strftime(TIMESTAMP_FORMAT))
+        with self._condition:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                if len(self._buffer) >= self.capacity:
+                    self._condition.notify_all()
+                    self._condition.wait_for(lambda: len(self._buffer) < self.capacity,
+                                             self.backpressure)
+                    if len(self._buffer) >= self.capacity:
+                        self._buffer.popleft()
+                        self.dropped += 1
+                self._buffer.append(entry)
+                if len(self._buffer) >= self.batch_size:
+                    self._condition.notify_all()
+        if closed:
+            # بعد از close (مثلاً رویدادهای هنگام خروج) مستقیم نوشته می‌شود
+            return self._write([entry])
+        return True
+
+    def flush(self, timeout=5.0):
+        """صبر تا نوشته شدن همه رویدادهای فعلی صف؛ False اگر timeout برسد"""
+        with self._condition:
+            if self._closed or not self._thread.is_alive():
+                return not self._buffer
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._buffer and not self._in_flight, timeout
+            )
+
+    def close(self, timeout=5.0):
+        """توقف نخ نویسنده و نوشتن باقی‌مانده صف (چند بار صدا زدن بی‌خطر است)"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+        # اگر نخ در زمان مقرر تمام نشد باقی‌مانده روی همین نخ نوشته می‌شود
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                break
+            self._write(batch)
+            with self._condition:
+                self._in_flight -= len(batch)
+
+        if self.dropped or self.failed:
+            print(f"⚠️ لاگ حسابرسی: {self.dropped} رویداد به دلیل پر بودن صف و "
+                  f"{self.failed} رویداد به دلیل خطای نوشتن ثبت نشد")
+
+    def purge_before(self, day):
+        """نوشتن صف و سپس حذف تکه‌تکه لاگ‌های قبل از روز day (تابع purge_before)"""
+        self.flush()
+        return purge_before(self.db, day, self.purge_chunk_size)
+
+    def stats(self):
+        with self._condition:
+            queued = len(self._buffer) + self._in_flight
+        return {'queued': queued, 'written': self.written,
+                'dropped': self.dropped, 'failed': self.failed}
+
+    def _take_batch(self):
+        """برداشتن حداکثر batch_size رویداد از ابتدای صف (داخل قفل)"""
+        count = min(self.batch_size, len(self._buffer))
+        batch = [self._buffer.popleft() for _ in range(count)]
+        self._in_flight += count
+        if batch:
+            # جا باز شد؛ log های منتظر فشار برگشتی ادامه می‌دهند
+            self._condition.notify_all()
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (self._closed or self._flush_requested
+                             or len(self._buffer) >= self.batch_size),
+                    self.flush_interval
+                )
+                batch = self._take_batch()
+                if not self._buffer:
+                    self._flush_requested = False
+                if not batch and self._closed:
+                    return
+
+            if batch:
+                self._write(batch)
+                with self._condition:
+                    self._in_flight -= len(batch)
+                    self._condition.notify_all()
+
+    def _write(self, batch):
+        if self.db.execute_many(INSERT_SQL, batch, chunk_size=self.batch_size):
+            self.written += len(batch)
+            return True
+        self.failed += len(batch)
+        return False
+
+
+# ---------- نگهداری ----------
+
+def purge_before(db, day, chunk_size=DEFAULT_AUDIT_SETTINGS['purge_chunk_size']):
+    """
+    حذف لاگ‌های ثبت شده قبل از روز day (میلادی یا شمسی) در تکه‌های chunk_size ردیفی
+
+    خروجی: تعداد ردیف‌های حذف شده، یا None اگر خطایی رخ دهد (تکه‌های قبلی حذف شده می‌مانند).
+    """
+    cutoff = date_filters.day_start(day)
+    chunk_size = max(1, int(chunk_size))
+    total = 0
+    try:
+        while True:
+            with db.transaction() as connection:
+                deleted = connection.execute(_PURGE_CHUNK_SQL, (cutoff, chunk_size)).rowcount
+            total += deleted
+            if deleted < chunk_size:
+                return total
+    except sqlite3.Error as e:
+        print(f"❌ خطا در پاکسازی لاگ‌ها: {e}")
+        return None
+
+
+def retention_cutoff(retention_days, today=None):
+    """اولین روزی که لاگ‌هایش با نگهداری retention_days روزه باقی می‌مانند"""
+    return ((today or date.today()) - timedelta(days=int(retention_days))).isoformat()
+
+
+# ---------- خواندن ----------
+
+PAGE_QUERY = pagination.PageQuery(
+    select_sql="""
+    SELECT
+        l.id,
+        l.created_at,
+        u.username,
+        l.action,
+        l.table_name,
+        l.record_id,
+        l.ip_address,
+        l.details,
+        CASE
+            WHEN l.action LIKE '%ناموفق%' THEN 'ناموفق'
+            WHEN l.action LIKE '%حذف%' THEN 'حذف'
+            WHEN l.action LIKE '%ایجاد%' THEN 'ایجاد'
+            WHEN l.action LIKE '%ویرایش%' THEN 'ویرایش'
+            WHEN l.action LIKE '%ورود%' THEN 'ورود'
+            WHEN l.action LIKE '%خروج%' THEN 'خروج'
+            ELSE 'سایر'
+        END as action_type
+    FROM Logs l
+    LEFT JOIN Users u ON l.user_id = u.id
+    """,
+    from_sql="FROM Logs l",
+    sorts={
+        'date': [('l.created_at', 'created_at'), ('l.id', 'id')],
+    },
+    default_sort='date',
+    filters={
+        # زمان‌ها به صورت YYYY-MM-DD HH:MM:SS و هر دو مرز شامل
+        'from_time': "l.created_at >= ?",
+        'to_time': "l.created_at <= ?",
+        'username': "l.user_id IN (SELECT id FROM Users WHERE username = ?)",
+        'action': "l.action = ?",
+    },
+)
+
+
+def get_logs_page(db, filters=None, cursor=None, page_size=pagination.DEFAULT_PAGE_SIZE):
+    """یک صفحه از لاگ‌ها (جدیدترین اول)"""
+    return PAGE_QUERY.fetch_page(db, filters, cursor=cursor, page_size=page_size)
+
+
+def count_logs(db, filters=None):
+    """تعداد لاگ‌های فیلتر شده: (تعداد، تخمینی بودن)"""
+    return PAGE_QUERY.count(db, filters)
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    purge_days = None
+    if "--purge" in arguments:
+        position = arguments.index("--purge")
+        purge_days = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    db_path = arguments[0] if arguments else "data/repair_shop.db"
+
+    connection = sqlite3.connect(db_path)
+    try:
+        create_log_indexes(connection.cursor())
+        connection.commit()
+    finally:
+        connection.close()
+
+    if purge_days is not None:
+        from .database import DatabaseManager
+
+        deleted = purge_before(DatabaseManager(db_path), retention_cutoff(purge_days))
+        print(f"✅ {deleted} لاگ قدیمی‌تر از {purge_days} روز از {db_path} حذف شد")
@@ -0,0 +1,397 @@
+# connection_pool.py - استخر اتصال‌های ماندگار SQLite
+"""
+مدیریت اتصال‌های ماندگار به دیتابیس
+
+- نخ اصلی (GUI) یک اتصال ماندگار دارد که در تمام عمر برنامه باز می‌ماند.
+- نخ‌های کارگر (QThread مثل ReportDataLoader و CheckReportWorker) از یک
+  مجموعه محدود اتصال قرض می‌گیرند و پس از پایان کار آن را پس می‌دهند.
+- در پروفایل performance (حالت WAL) اتصال‌های بالا فقط‌خواندنی هستند و تمام
+  نوشتن‌ها از یک اتصال نویسنده واحد عبور می‌کنند.
+"""
+
+import configparser
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_POOL_SETTINGS = {
+    'pool_enabled': True,            # استفاده از اتصال ماندگار
+    'pool_max_workers': 4,           # حداکثر اتصال همزمان برای نخ‌های کارگر
+    'pool_timeout': 10.0,            # حداکثر زمان انتظار برای گرفتن اتصال (ثانیه)
+    'health_check_interval': 60.0,   # فاصله بررسی سلامت اتصال‌های بیکار (ثانیه)
+    'statement_cache_size': 512,     # تعداد دستورات آماده نگه داشته شده برای هر اتصال
+}
+
+
+def load_pool_settings(config_path="config.ini"):
+    """خواندن تنظیمات استخر اتصال از بخش [DATABASE] فایل config.ini"""
+    settings = dict(DEFAULT_POOL_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('DATABASE'):
+        return settings
+
+    section = parser['DATABASE']
+    try:
+        settings['pool_enabled'] = section.getboolean('pool_enabled', fallback=settings['pool_enabled'])
+        settings['pool_max_workers'] = section.getint('pool_max_workers', fallback=settings['pool_max_workers'])
+        settings['pool_timeout'] = section.getfloat('pool_timeout', fallback=settings['pool_timeout'])
+        settings['health_check_interval'] = section.getfloat(
+            'health_check_interval', fallback=settings['health_check_interval']
+        )
+        settings['statement_cache_size'] = section.getint(
+            'statement_cache_size', fallback=settings['statement_cache_size']
+        )
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [DATABASE]: {e}")
+
+    return settings
+
+
+# پروفایل‌های قابل انتخاب در بخش [DATABASE_PROFILE]
+DEFAULT_PROFILE_SETTINGS = {
+    'profile': 'default',            # default = رفتار قبلی، performance = WAL و PRAGMAهای بهینه
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,          # 256 مگابایت
+    'cache_size': -20000,            # مقدار منفی = کیلوبایت (حدود 20 مگابایت)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,            # میلی‌ثانیه
+    'read_write_split': True,        # خواندن از اتصال‌های جدا، نوشتن از یک نویسنده
+}
+
+_ALLOWED_PRAGMA_VALUES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+
+
+def load_profile_settings(config_path="config.ini"):
+    """خواندن پروفایل عملکرد دیتابیس از بخش [DATABASE_PROFILE] فایل config.ini"""
+    settings = dict(DEFAULT_PROFILE_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('DATABASE_PROFILE'):
+        return settings
+
+    section = parser['DATABASE_PROFILE']
+    profile = section.get('profile', fallback=settings['profile']).strip().lower()
+    if profile not in ('default', 'performance'):
+        print(f"⚠️ پروفایل دیتابیس نامعتبر '{profile}' - از پروفایل default استفاده می‌شود")
+        profile = 'default'
+    settings['profile'] = profile
+
+    for key, allowed in _ALLOWED_PRAGMA_VALUES.items():
+        value = section.get(key, fallback=settings[key]).strip().upper()
+        if value in allowed:
+            settings[key] = value
+        else:
+            print(f"⚠️ مقدار نامعتبر برای {key}: {value}")
+
+    try:
+        settings['mmap_size'] = section.getint('mmap_size', fallback=settings['mmap_size'])
+        settings['cache_size'] = section.getint('cache_size', fallback=settings['cache_size'])
+        settings['busy_timeout'] = section.getint('busy_timeout', fallback=settings['busy_timeout'])
+        settings['read_write_split'] = section.getboolean(
+            'read_write_split', fallback=settings['read_write_split']
+        )
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [DATABASE_PROFILE]: {e}")
+
+    return settings
+
+
+def apply_profile_pragmas(connection, settings, readonly=False):
+    """اعمال PRAGMAهای پروفایل انتخاب شده روی یک اتصال تازه"""
+    if not settings or settings.get('profile') != 'performance':
+        return
+
+    try:
+        connection.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    except sqlite3.OperationalError as e:
+        # اگر اتصال دیگری تراکنش باز داشته باشد تغییر حالت ژورنال ممکن نیست
+        print(f"⚠️ تنظیم journal_mode ممکن نشد: {e}")
+
+    connection.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    connection.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    connection.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    connection.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    connection.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+
+    if readonly:
+        connection.execute("PRAGMA query_only = ON")
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """هیچ اتصال آزادی در زمان مقرر پیدا نشد"""
+
+
+class ConnectionPool:
+    """استخر اتصال: یک اتصال ماندگار برای نخ اصلی و مجموعه‌ای محدود برای نخ‌های کارگر"""
+
+    def __init__(self, db_name, max_workers=4, timeout=10.0, health_check_interval=60.0,
+                 on_connect=None, read_write_split=False, cached_statements=512):
+        self.db_name = db_name
+        self.cached_statements = cached_statements
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect  # تابع تنظیم اتصال تازه: on_connect(connection, readonly)
+        self.read_write_split = read_write_split
+
+        self._owner_thread = threading.get_ident()
+        self._main_connection = None
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._idle = queue.LifoQueue()
+        self._worker_slots = threading.BoundedSemaphore(self.max_workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._last_check = {}
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # ساخت و بررسی اتصال
+    # ------------------------------------------------------------------
+
+    def _create_connection(self, readonly=False):
+        """ایجاد یک اتصال جدید و اعمال تنظیمات اولیه"""
+        connection = sqlite3.connect(
+            self.db_name,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        if self.on_connect:
+            self.on_connect(connection, readonly)
+
+        with self._lock:
+            self._connections.add(connection)
+            self._last_check[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection):
+        """بستن و حذف اتصال خراب"""
+        with self._lock:
+            self._connections.discard(connection)
+            self._last_check.pop(id(connection), None)
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    def _is_healthy(self, connection):
+        """بررسی زنده بودن اتصال با یک کوئری ساده"""
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _checked(self, connection, readonly=False):
+        """بررسی سلامت اتصالی که مدتی بیکار بوده و جایگزینی در صورت خرابی"""
+        now = time.monotonic()
+        last = self._last_check.get(id(connection), 0)
+        if now - last < self.health_check_interval:
+            return connection
+
+        if self._is_healthy(connection):
+            self._last_check[id(connection)] = now
+            return connection
+
+        print("⚠️ اتصال دیتابیس از دسترس خارج شده بود؛ اتصال جدید ایجاد شد")
+        self._discard(connection)
+        return self._create_connection(readonly)
+
+    # ------------------------------------------------------------------
+    # گرفتن و پس دادن اتصال
+    # ------------------------------------------------------------------
+
+    def is_owner_thread(self):
+        """آیا نخ فعلی همان نخ اصلی برنامه است؟"""
+        return threading.get_ident() == self._owner_thread
+
+    def _acquire_main(self):
+        # در حالت تفکیک خواندن/نوشتن، اتصال ماندگار نخ اصلی فقط‌خواندنی است
+        readonly = self.read_write_split
+        if self._main_connection is None:
+            self._main_connection = self._create_connection(readonly)
+        else:
+            self._main_connection = self._checked(self._main_connection, readonly)
+        return self._main_connection
+
+    def _acquire_writer(self):
+        if self._writer is None:
+            self._writer = self._create_connection()
+        else:
+            self._writer = self._checked(self._writer)
+        return self._writer
+
+    def _acquire_worker(self):
+        if not self._worker_slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f"اتصال آزادی برای نخ کارگر پیدا نشد (حداکثر {self.max_workers} اتصال)"
+            )
+        try:
+            readonly = self.read_write_split
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create_connection(readonly)
+            return self._checked(connection, readonly)
+        except Exception:
+            self._worker_slots.release()
+            raise
+
+    def _release_worker(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+        if self._closed:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+        self._worker_slots.release()
+
+    @contextmanager
+    def connection(self, readonly=False):
+        """
+        گرفتن اتصال نخ فعلی
+
+        در نخ اصلی همیشه همان اتصال ماندگار برمی‌گردد. در نخ‌های کارگر اتصال
+        از مجموعه قرض گرفته می‌شود و با خروج از آخرین بلوک تو در تو پس داده می‌شود.
+        با تفکیک خواندن/نوشتن، درخواست‌های غیرفقط‌خواندنی از هر نخی که باشند
+        به نوبت از اتصال نویسنده واحد استفاده می‌کنند.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("استخر اتصال بسته شده است")
+
+        if self.read_write_split and not readonly:
+            with self._writer_lock:
+                yield self._acquire_writer()
+            return
+
+        if self.is_owner_thread():
+            yield self._acquire_main()
+            return
+
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.connection = self._acquire_worker()
+        self._local.depth = depth + 1
+        try:
+            yield self._local.connection
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection = self._local.connection
+                self._local.connection = None
+                self._release_worker(connection)
+
+    # ------------------------------------------------------------------
+    # سلامت و خاموشی
+    # ------------------------------------------------------------------
+
+    def health_check(self):
+        """بررسی سلامت تمام اتصال‌های بیکار و گزارش وضعیت استخر"""
+        healthy = 0
+        replaced = 0
+
+        with self._writer_lock:
+            if self._writer is not None:
+                if self._is_healthy(self._writer):
+                    healthy += 1
+                else:
+                    self._discard(self._writer)
+                    self._writer = None
+                    replaced += 1
+
+        if self._main_connection is not None and self.is_owner_thread():
+            if self._is_healthy(self._main_connection):
+                healthy += 1
+            else:
+                self._discard(self._main_connection)
+                self._main_connection = None
+                replaced += 1
+
+        idle_connections = []
+        while True:
+            try:
+                idle_connections.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        for connection in idle_connections:
+            if self._is_healthy(connection):
+                healthy += 1
+                self._last_check[id(connection)] = time.monotonic()
+                self._idle.put(connection)
+            else:
+                self._discard(connection)
+                replaced += 1
+
+        with self._lock:
+            open_connections = len(self._connections)
+
+        return {
+            'healthy': healthy,
+            'replaced': replaced,
+            'open_connections': open_connections,
+            'idle_workers': self._idle.qsize(),
+            'max_workers': self.max_workers,
+            'read_write_split': self.read_write_split,
+        }
+
+    def close_all(self):
+        """بستن تمام اتصال‌ها هنگام خروج از برنامه"""
+        self._closed = True
+
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+            self._last_check.clear()
+
+        for connection in connections:
+            try:
+                if connection.in_transaction:
+                    connection.rollback()
+                connection.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ خطا در بستن اتصال دیتابیس: {e}")
+
+        self._main_connection = None
+        self._writer = None
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+    def reopen(self):
+        """باز کردن دوباره استخر پس از بستن (مثلاً بعد از بازیابی نسخه پشتیبان)"""
+        self.close_all()
+        self._closed = False
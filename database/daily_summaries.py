@@ -0,0 +1,337 @@
+# daily_summaries.py - جداول خلاصه روزانه (rollup) برای گزارش‌های مالی و فروش
+"""
+خلاصه‌های روزانه از پیش تجمیع شده
+
+گزارش‌های روزانه، هفتگی، ماهانه و گردش نقدی به جای تجمیع دوباره همه ردیف‌های
+AccountingTransactions و Invoices در هر بار باز شدن، از این جداول می‌خوانند:
+
+- DailyTransactionSummary: هر روز × نوع تراکنش (تعداد و جمع مبلغ)
+- DailyAccountSummary: هر روز × حساب (ورودی، خروجی و تعداد)
+- DailyInvoiceSummary: هر روز × نوع فاکتور (تعداد، جمع کل، پرداخت شده و مانده)
+
+جداول با تریگرهای SQL روی جداول اصلی به‌صورت افزایشی به‌روز می‌مانند (درج،
+ویرایش و حذف)، پس نوشتن از هر اتصالی آن‌ها را درست نگه می‌دارد. اگر به هر دلیل
+ناهماهنگ شوند، rebuild() آن‌ها را از روی داده اصلی از نو می‌سازد:
+
+    python -m database.daily_summaries [مسیر دیتابیس]
+
+ردیف‌هایی که ستون تاریخشان قابل تبدیل با date() نیست (مثلاً تاریخ شمسی متنی)
+در خلاصه‌ها شمرده نمی‌شوند.
+"""
+
+import sqlite3
+import sys
+
+from . import date_filters
+
+
+SUMMARY_TABLES = {
+    'DailyTransactionSummary': """
+        CREATE TABLE IF NOT EXISTS DailyTransactionSummary (
+            summary_date TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (summary_date, transaction_type)
+        ) WITHOUT ROWID
+    """,
+    'DailyAccountSummary': """
+        CREATE TABLE IF NOT EXISTS DailyAccountSummary (
+            summary_date TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            inflow REAL NOT NULL DEFAULT 0,
+            outflow REAL NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (summary_date, account_id)
+        ) WITHOUT ROWID
+    """,
+    'DailyInvoiceSummary': """
+        CREATE TABLE IF NOT EXISTS DailyInvoiceSummary (
+            summary_date TEXT NOT NULL,
+            invoice_type TEXT NOT NULL,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            paid_amount REAL NOT NULL DEFAULT 0,
+            remaining_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (summary_date, invoice_type)
+        ) WITHOUT ROWID
+    """,
+}
+
+SUMMARY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_daily_account_summary_account ON DailyAccountSummary(account_id, summary_date)",
+]
+
+
+# ---------- تریگرهای نگهداری افزایشی ----------
+
+def _transaction_delta(row, sign):
+    """دستورات اعمال یک ردیف تراکنش (NEW با sign=1 و OLD با sign=-1) روی خلاصه‌ها"""
+    return f"""
+        INSERT INTO DailyTransactionSummary (summary_date, transaction_type, tx_count, total_amount)
+        SELECT date({row}.transaction_date), COALESCE({row}.transaction_type, ''),
+               {sign}, {sign} * COALESCE({row}.amount, 0)
+        WHERE date({row}.transaction_date) IS NOT NULL
+        ON CONFLICT (summary_date, transaction_type) DO UPDATE SET
+            tx_count = tx_count + excluded.tx_count,
+            total_amount = total_amount + excluded.total_amount;
+
+        INSERT INTO DailyAccountSummary (summary_date, account_id, inflow, outflow, tx_count)
+        SELECT date({row}.transaction_date), {row}.to_account_id,
+               {sign} * COALESCE({row}.amount, 0), 0, {sign}
+        WHERE {row}.to_account_id IS NOT NULL AND date({row}.transaction_date) IS NOT NULL
+        ON CONFLICT (summary_date, account_id) DO UPDATE SET
+            inflow = inflow + excluded.inflow,
+            tx_count = tx_count + excluded.tx_count;
+
+        INSERT INTO DailyAccountSummary (summary_date, account_id, inflow, outflow, tx_count)
+        SELECT date({row}.transaction_date), {row}.from_account_id,
+               0, {sign} * COALESCE({row}.amount, 0), {sign}
+        WHERE {row}.from_account_id IS NOT NULL AND date({row}.transaction_date) IS NOT NULL
+        ON CONFLICT (summary_date, account_id) DO UPDATE SET
+            outflow = outflow + excluded.outflow,
+            tx_count = tx_count + excluded.tx_count;
+    """
+
+
+def _invoice_delta(row, sign):
+    """دستور اعمال یک ردیف فاکتور روی خلاصه روزانه فاکتورها"""
+    return f"""
+        INSERT INTO DailyInvoiceSummary
+            (summary_date, invoice_type, invoice_count, total_amount, paid_amount, remaining_amount)
+        SELECT date({row}.invoice_date), COALESCE({row}.invoice_type, ''), {sign},
+               {sign} * COALESCE({row}.total, 0),
+               {sign} * COALESCE({row}.paid_amount, 0),
+               {sign} * COALESCE({row}.remaining_amount, 0)
+        WHERE date({row}.invoice_date) IS NOT NULL
+        ON CONFLICT (summary_date, invoice_type) DO UPDATE SET
+            invoice_count = invoice_count + excluded.invoice_count,
+            total_amount = total_amount + excluded.total_amount,
+            paid_amount = paid_amount + excluded.paid_amount,
+            remaining_amount = remaining_amount + excluded.remaining_amount;
+    """
+
+
+# (جدول منبع، ستون‌هایی که تغییرشان خلاصه را عوض می‌کند، سازنده دستورات)
+_SOURCES = [
+    ('AccountingTransactions',
+     'transaction_date, transaction_type, amount, from_account_id, to_account_id',
+     _transaction_delta),
+    ('Invoices',
+     'invoice_date, invoice_type, total, paid_amount, remaining_amount',
+     _invoice_delta),
+]
+
+
+def _trigger_statements():
+    for table, columns, delta in _SOURCES:
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_summary_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            {delta('NEW', 1)}
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_summary_update
+        AFTER UPDATE OF {columns} ON {table}
+        BEGIN
+            {delta('OLD', -1)}
+            {delta('NEW', 1)}
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_summary_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            {delta('OLD', -1)}
+        END
+        """
+
+
+# ---------- ساخت و بازسازی ----------
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM DailyTransactionSummary",
+    """
+    INSERT INTO DailyTransactionSummary (summary_date, transaction_type, tx_count, total_amount)
+    SELECT date(transaction_date), COALESCE(transaction_type, ''), COUNT(*), SUM(COALESCE(amount, 0))
+    FROM AccountingTransactions
+    WHERE date(transaction_date) IS NOT NULL
+    GROUP BY 1, 2
+    """,
+    "DELETE FROM DailyAccountSummary",
+    """
+    INSERT INTO DailyAccountSummary (summary_date, account_id, inflow, outflow, tx_count)
+    SELECT summary_date, account_id, SUM(inflow), SUM(outflow), COUNT(*)
+    FROM (
+        SELECT date(transaction_date) as summary_date, to_account_id as account_id,
+               COALESCE(amount, 0) as inflow, 0 as outflow
+        FROM AccountingTransactions
+        WHERE to_account_id IS NOT NULL
+        UNION ALL
+        SELECT date(transaction_date), from_account_id, 0, COALESCE(amount, 0)
+        FROM AccountingTransactions
+        WHERE from_account_id IS NOT NULL
+    )
+    WHERE summary_date IS NOT NULL
+    GROUP BY summary_date, account_id
+    """,
+    "DELETE FROM DailyInvoiceSummary",
+    """
+    INSERT INTO DailyInvoiceSummary
+        (summary_date, invoice_type, invoice_count, total_amount, paid_amount, remaining_amount)
+    SELECT date(invoice_date), COALESCE(invoice_type, ''), COUNT(*),
+           SUM(COALESCE(total, 0)), SUM(COALESCE(paid_amount, 0)), SUM(COALESCE(remaining_amount, 0))
+    FROM Invoices
+    WHERE date(invoice_date) IS NOT NULL
+    GROUP BY 1, 2
+    """,
+]
+
+
+def _existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_summary_tables(cursor):
+    """
+    ایجاد جداول خلاصه و تریگرهای آن‌ها روی cursor داده شده
+
+    اگر جدولی تازه ساخته شود، خلاصه‌ها از روی داده موجود پر می‌شوند.
+    خروجی: True اگر بازسازی انجام شد.
+    """
+    existing = _existing_tables(cursor)
+    if not all(table in existing for table, _, _ in _SOURCES):
+        return False
+
+    created = False
+    for table, create_sql in SUMMARY_TABLES.items():
+        if table not in existing:
+            created = True
+        cursor.execute(create_sql)
+    for index_sql in SUMMARY_INDEXES:
+        cursor.execute(index_sql)
+    for trigger_sql in _trigger_statements():
+        cursor.execute(trigger_sql)
+
+    if created:
+        rebuild(cursor)
+    return created
+
+
+def rebuild(cursor):
+    """بازسازی کامل خلاصه‌ها از جداول اصلی (برای ترمیم)"""
+    for statement in REBUILD_STATEMENTS:
+        cursor.execute(statement)
+
+
+# ---------- خواندن خلاصه‌ها ----------
+# start/end مرزهای نیمه‌باز میلادی هستند (مثل خروجی date_filters.*_bounds)
+
+def transaction_summary(db, start, end):
+    """تعداد و جمع مبلغ هر نوع تراکنش در بازه (هم‌شکل GROUP BY transaction_type)"""
+    date_sql, params = date_filters.range_condition('summary_date', start, end)
+    return db.fetch_all(f"""
+        SELECT
+            NULLIF(transaction_type, '') as transaction_type,
+            SUM(tx_count) as count,
+            SUM(total_amount) as total_amount
+        FROM DailyTransactionSummary
+        WHERE {date_sql}
+        GROUP BY transaction_type
+        HAVING SUM(tx_count) != 0
+        ORDER BY transaction_type
+    """, params)
+
+
+def invoice_summary(db, start, end):
+    """تعداد و جمع مبالغ هر نوع فاکتور در بازه (هم‌شکل GROUP BY invoice_type)"""
+    date_sql, params = date_filters.range_condition('summary_date', start, end)
+    return db.fetch_all(f"""
+        SELECT
+            NULLIF(invoice_type, '') as invoice_type,
+            SUM(invoice_count) as count,
+            SUM(total_amount) as total_amount,
+            SUM(paid_amount) as total_paid,
+            SUM(remaining_amount) as total_remaining
+        FROM DailyInvoiceSummary
+        WHERE {date_sql}
+        GROUP BY invoice_type
+        HAVING SUM(invoice_count) != 0
+        ORDER BY invoice_type
+    """, params)
+
+
+def daily_cash_series(db, start, end, income_types=('دریافت',), expense_types=('پرداخت',)):
+    """
+    ورودی، خروجی و تعداد تراکنش هر روز بازه (فقط روزهای دارای تراکنش)
+
+    ستون‌ها: date، income، expense، total_amount (همه انواع) و count
+    """
+    date_sql, params = date_filters.range_condition('summary_date', start, end)
+    income_marks = ", ".join("?" for _ in income_types)
+    expense_marks = ", ".join("?" for _ in expense_types)
+    return db.fetch_all(f"""
+        SELECT
+            summary_date as date,
+            SUM(CASE WHEN transaction_type IN ({income_marks}) THEN total_amount ELSE 0 END) as income,
+            SUM(CASE WHEN transaction_type IN ({expense_marks}) THEN total_amount ELSE 0 END) as expense,
+            SUM(total_amount) as total_amount,
+            SUM(tx_count) as count
+        FROM DailyTransactionSummary
+        WHERE {date_sql}
+        GROUP BY summary_date
+        HAVING SUM(tx_count) != 0
+        ORDER BY summary_date
+    """, (*income_types, *expense_types, *params))
+
+
+def daily_invoice_series(db, start, end):
+    """تعداد و جمع مبالغ فاکتورهای هر روز بازه (ستون‌ها: date، count، total_amount و total_paid)"""
+    date_sql, params = date_filters.range_condition('summary_date', start, end)
+    return db.fetch_all(f"""
+        SELECT
+            summary_date as date,
+            SUM(invoice_count) as count,
+            SUM(total_amount) as total_amount,
+            SUM(paid_amount) as total_paid
+        FROM DailyInvoiceSummary
+        WHERE {date_sql}
+        GROUP BY summary_date
+        HAVING SUM(invoice_count) != 0
+        ORDER BY summary_date
+    """, params)
+
+
+def account_flows(db, start, end, account_id=None):
+    """ورودی و خروجی هر حساب در بازه (یا فقط یک حساب)"""
+    date_sql, params = date_filters.range_condition('summary_date', start, end)
+    if account_id is not None:
+        date_sql += " AND account_id = ?"
+        params.append(account_id)
+    return db.fetch_all(f"""
+        SELECT
+            account_id,
+            SUM(inflow) as inflow,
+            SUM(outflow) as outflow,
+            SUM(tx_count) as count
+        FROM DailyAccountSummary
+        WHERE {date_sql}
+        GROUP BY account_id
+        ORDER BY account_id
+    """, params)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        cursor = connection.cursor()
+        if not create_summary_tables(cursor):
+            rebuild(cursor)
+        connection.commit()
+        print(f"✅ خلاصه‌های روزانه {db_path} بازسازی شد")
+    finally:
+        connection.close()
@@ -1,15 +1,45 @@
 ﻿# database.py - نسخه کامل با پشتیبانی تاریخ شمسی
 import sqlite3
 import os  # 🔴 ایمپورت os
+import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, date
 from PySide6.QtCore import QObject, Signal
 import jdatetime
 
+from .connection_pool import (
+    ConnectionPool, load_pool_settings, load_profile_settings, apply_profile_pragmas
+)
+from .statements import StatementCache, map_rows, map_row, row_factory_for
+from .profiler import QueryProfiler, load_profiler_settings
+from . import jalali_calendar
+from . import daily_summaries
+from . import account_ledger
+from . import migrations
+
+
+class TransactionAborted(sqlite3.DatabaseError):
+    """یکی از دستورات داخل db.transaction() شکست خورد و کل واحد کار برگشت خورد"""
+
+
+# نام جدول/ستون در bulk_insert مستقیماً داخل SQL قرار می‌گیرد
+_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_CONFLICT_CLAUSES = {
+    None: 'INSERT',
+    'abort': 'INSERT OR ABORT',
+    'ignore': 'INSERT OR IGNORE',
+    'replace': 'INSERT OR REPLACE',
+}
+BULK_CHUNK_SIZE = 500
+
+
 class DatabaseManager(QObject):
     database_initialized = Signal(bool)
     error_occurred = Signal(str)
     
-    def __init__(self, db_name="data/repair_shop.db"):  # 🔴 تغییر مسیر پیش‌فرض
+    def __init__(self, db_name="data/repair_shop.db", config_path="config.ini"):  # 🔴 تغییر مسیر پیش‌فرض
         super().__init__()
         self.db_name = db_name
         self.connection = None
@@ -17,6 +47,31 @@ class DatabaseManager(QObject):
         
         # 🔴 ایجاد پوشه data اگر وجود ندارد
         self.ensure_data_directory()
+
+        # پروفایل عملکرد (بخش [DATABASE_PROFILE]) و استخر اتصال‌های ماندگار (بخش [DATABASE])
+        self.profile_settings = load_profile_settings(config_path)
+        self.pool_settings = load_pool_settings(config_path)
+        self.statements = StatementCache(self.pool_settings['statement_cache_size'])
+        # پروفایلر کوئری‌ها (بخش [PROFILER]) - پیش‌فرض خاموش
+        self.profiler = QueryProfiler(load_profiler_settings(config_path))
+        # تراکنش باز هر نخ (اتصال، عمق تو در تو بودن و وضعیت شکست)
+        self._transaction_state = threading.local()
+        self.pool = None
+        if self.pool_settings['pool_enabled']:
+            read_write_split = (
+                self.profile_settings['profile'] == 'performance'
+                and self.profile_settings['journal_mode'] == 'WAL'
+                and self.profile_settings['read_write_split']
+            )
+            self.pool = ConnectionPool(
+                self.db_name,
+                max_workers=self.pool_settings['pool_max_workers'],
+                timeout=self.pool_settings['pool_timeout'],
+                health_check_interval=self.pool_settings['health_check_interval'],
+                on_connect=self._configure_connection,
+                read_write_split=read_write_split,
+                cached_statements=self.pool_settings['statement_cache_size']
+            )
     
     def ensure_data_directory(self):
         """ایجاد پوشه data در صورت عدم وجود"""
@@ -29,166 +84,380 @@ class DatabaseManager(QObject):
                 print(f"⚠️ خطا در ایجاد پوشه: {e}")
 
         
+    def _configure_connection(self, connection, readonly=False):
+        """اعمال PRAGMAهای پروفایل انتخاب شده روی اتصال تازه"""
+        apply_profile_pragmas(connection, self.profile_settings, readonly)
+
     def connect(self):
-        """اتصال به دیتابیس"""
+        """اتصال اختصاصی به دیتابیس (برای مهاجرت‌ها و کدهایی که مستقیماً با cursor کار می‌کنند)"""
         try:
             self.connection = sqlite3.connect(self.db_name)
             self.connection.execute("PRAGMA foreign_keys = ON")
+            self._configure_connection(self.connection)
             self.cursor = self.connection.cursor()
             self.connection.row_factory = sqlite3.Row
             return True
         except Exception as e:
             self.error_occurred.emit(f"خطا در اتصال به دیتابیس: {str(e)}")
             return False
+
+    @contextmanager
+    def connection_scope(self, readonly=False):
+        """
+        گرفتن اتصال برای نخ فعلی
+
+        با استخر فعال، نخ اصلی اتصال ماندگار خود را می‌گیرد و نخ‌های کارگر یک اتصال
+        از استخر قرض می‌گیرند؛ کارگرهایی که چند کوئری پشت سر هم اجرا می‌کنند می‌توانند
+        کل کار را داخل این بلوک قرار دهند تا یک اتصال را تا پایان نگه دارند.
+        در پروفایل performance، readonly=True اتصال خواننده و در غیر این صورت
+        اتصال نویسنده واحد را برمی‌گرداند.
+        بدون استخر، مثل قبل یک اتصال موقت باز و بسته می‌شود.
+        داخل db.transaction() همیشه اتصال همان تراکنش برگردانده می‌شود.
+        """
+        transaction_connection = getattr(self._transaction_state, 'connection', None)
+        if transaction_connection is not None:
+            yield transaction_connection
+            return
+
+        if self.pool is not None:
+            with self.pool.connection(readonly=readonly) as connection:
+                yield connection
+            return
+
+        connection = sqlite3.connect(self.db_name)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._configure_connection(connection)
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        واحد کار تراکنشی برای عملیات چند دستوری
+
+        تمام execute_query/fetch_* داخل بلوک روی یک اتصال اجرا می‌شوند و در پایان
+        فقط یک commit انجام می‌شود:
+
+            with db.transaction():
+                db.execute_query(...)
+                db.execute_query(...)
+
+        اگر داخل بلوک استثنا رخ دهد یا یکی از execute_queryها شکست بخورد، کل
+        تغییرات rollback می‌شود؛ در حالت دوم TransactionAborted پرتاب می‌شود.
+        بلوک‌های تو در تو به تراکنش بیرونی می‌پیوندند.
+        """
+        state = self._transaction_state
+        if getattr(state, 'connection', None) is not None:
+            state.depth += 1
+            try:
+                yield state.connection
+            finally:
+                state.depth -= 1
+            return
+
+        with self.connection_scope() as connection:
+            if connection.in_transaction:
+                # تغییرات نیمه‌کاره قبلی روی این اتصال نباید با این واحد کار commit شوند
+                connection.rollback()
+            connection.execute("BEGIN IMMEDIATE")
+            state.connection = connection
+            state.depth = 1
+            state.failed = False
+            try:
+                yield connection
+            except BaseException:
+                connection.rollback()
+                raise
+            else:
+                if state.failed:
+                    connection.rollback()
+                    raise TransactionAborted("یکی از دستورات تراکنش شکست خورد؛ تغییرات برگشت داده شد")
+                connection.commit()
+            finally:
+                state.connection = None
+                state.depth = 0
+                state.failed = False
+
+    def in_transaction(self):
+        """آیا نخ فعلی داخل db.transaction() است؟"""
+        return getattr(self._transaction_state, 'connection', None) is not None
+
+    def get_effective_pragmas(self):
+        """دریافت مقادیر واقعی PRAGMAهای اتصال‌های خواننده و نویسنده"""
+        names = ['journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                 'temp_store', 'busy_timeout', 'foreign_keys', 'query_only']
+        report = {}
+        for role, readonly in (('writer', False), ('reader', True)):
+            values = {}
+            try:
+                with self.connection_scope(readonly=readonly) as connection:
+                    for name in names:
+                        row = connection.execute(f"PRAGMA {name}").fetchone()
+                        values[name] = row[0] if row else None
+            except sqlite3.Error as e:
+                values['error'] = str(e)
+            report[role] = values
+        return report
+
+    def print_startup_report(self):
+        """چاپ گزارش پروفایل دیتابیس و PRAGMAهای موثر هنگام راه‌اندازی"""
+        split = bool(self.pool and self.pool.read_write_split)
+        print(f"🗄️ پروفایل دیتابیس: {self.profile_settings['profile']} | "
+              f"استخر اتصال: {'فعال' if self.pool else 'غیرفعال'} | "
+              f"تفکیک خواندن/نوشتن: {'فعال' if split else 'غیرفعال'}")
+        for role, values in self.get_effective_pragmas().items():
+            pairs = ", ".join(f"{name}={value}" for name, value in values.items())
+            print(f"   {role}: {pairs}")
+
+    def checkpoint(self):
+        """انتقال محتوای فایل WAL به فایل اصلی دیتابیس (قبل از کپی فایل)"""
+        try:
+            with self.connection_scope() as connection:
+                mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+                if str(mode).lower() == 'wal':
+                    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ خطا در checkpoint دیتابیس: {e}")
+            return False
+
+    def pool_health_check(self):
+        """بررسی سلامت اتصال‌های استخر"""
+        if self.pool is None:
+            return {'pool_enabled': False}
+        status = self.pool.health_check()
+        status['pool_enabled'] = True
+        return status
+
+    def close(self):
+        """بستن تمام اتصال‌ها هنگام خروج از برنامه"""
+        if self.pool is not None:
+            self.pool.close_all()
+        if self.connection:
+            try:
+                self.connection.close()
+            except sqlite3.Error:
+                pass
+            self.connection = None
+            self.cursor = None
     
     # در کلاس DatabaseManager در database.py
 
-    def fetch_all(self, query, params=()):
-        """دریافت تمام ردیف‌های یک کوئری"""
+    def fetch_all(self, query, params=(), row_type='dict'):
+        """
+        دریافت تمام ردیف‌های یک کوئری
+
+        row_type: 'dict' (پیش‌فرض)، 'tuple'، 'row' (sqlite3.Row) یا 'record' (ردیف سبک با __slots__)
+        """
+        # متن تمیز شده (حذف کامنت‌های فارسی) و نام ستون‌ها از جدول دستورات خوانده می‌شود
+        statement = self.statements.get(query)
+        started = time.perf_counter() if self.profiler.enabled else None
         try:
-            # حذف کامنت‌های فارسی از کوئری
-            clean_query = query.replace('#', '--')
-            self.connect()
-            self.cursor.execute(clean_query, params)
-            rows = self.cursor.fetchall()
-            
-            # تبدیل به لیست دیکشنری
-            result = []
-            for row in rows:
-                row_dict = {}
-                for idx, col in enumerate(self.cursor.description):
-                    row_dict[col[0]] = row[idx]
-                result.append(row_dict)
-            return result
+            with self.connection_scope(readonly=statement.reader_safe) as connection:
+                cursor = connection.cursor()
+                cursor.row_factory = row_factory_for(row_type)
+                cursor.execute(statement.sql, params)
+                rows = cursor.fetchall()
+                if started is not None:
+                    self.profiler.record('fetch_all', statement.sql, params, started, len(rows), connection)
+                
+                if cursor.description is None:
+                    return []
+                if row_type == 'row':
+                    return rows
+                return map_rows(rows, statement.resolve_columns(cursor.description), row_type)
             
         except Exception as e:
             print(f"خطا در fetch_all: {e}")
             print(f"کوئری اصلی: {query}")
-            print(f"کوئری تمیز شده: {clean_query}")
+            print(f"کوئری تمیز شده: {statement.sql}")
             return []
-        finally:
-            if self.connection:
-                self.connection.close()
 
 
-    def fetch_one(self, query, params=()):
-        """دریافت یک ردیف از کوئری"""
+    def fetch_one(self, query, params=(), row_type='dict'):
+        """دریافت یک ردیف از کوئری (row_type مثل fetch_all)"""
+        # متن تمیز شده (جایگزینی # با --) از جدول دستورات خوانده می‌شود
+        statement = self.statements.get(query)
+        started = time.perf_counter() if self.profiler.enabled else None
         try:
-            # حذف کامنت‌های فارسی از کوئری (جایگزینی # با --)
-            clean_query = query.replace('#', '--')
-            self.connect()
-            self.cursor.execute(clean_query, params)
-            row = self.cursor.fetchone()
-            
-            if row:
-                row_dict = {}
-                for idx, col in enumerate(self.cursor.description):
-                    row_dict[col[0]] = row[idx]
-                return row_dict
-            return None
+            with self.connection_scope(readonly=statement.reader_safe) as connection:
+                cursor = connection.cursor()
+                cursor.row_factory = row_factory_for(row_type)
+                cursor.execute(statement.sql, params)
+                row = cursor.fetchone()
+                if started is not None:
+                    self.profiler.record('fetch_one', statement.sql, params, started, int(row is not None), connection)
+                
+                if row is None or cursor.description is None:
+                    return None
+                if row_type == 'row':
+                    return row
+                return map_row(row, statement.resolve_columns(cursor.description), row_type)
             
         except Exception as e:
             print(f"خطا در fetch_one: {e}")
             print(f"کوئری اصلی: {query}")
-            print(f"کوئری تمیز شده: {clean_query}")
+            print(f"کوئری تمیز شده: {statement.sql}")
             print(f"پارامترها: {params}")
             return None
-        finally:
-            if self.connection:
-                self.connection.close()
 
 
     def execute_query(self, query, params=()):
         """اجرای کوئری INSERT/UPDATE/DELETE"""
+        started = time.perf_counter() if self.profiler.enabled else None
         try:
-            self.connect()
-
-            
-            self.cursor.execute(query, params)
-            self.connection.commit()
-            return True
+            with self.connection_scope() as connection:
+                if self.in_transaction():
+                    # داخل واحد کار: commit/rollback با خود db.transaction() است
+                    try:
+                        cursor = connection.execute(query, params)
+                        if started is not None:
+                            self.profiler.record('execute_query', query, params, started, cursor.rowcount, connection)
+                        return True
+                    except Exception:
+                        self._transaction_state.failed = True
+                        raise
+                try:
+                    cursor = connection.execute(query, params)
+                    connection.commit()
+                    if started is not None:
+                        self.profiler.record('execute_query', query, params, started, cursor.rowcount, connection)
+                    return True
+                except Exception:
+                    connection.rollback()
+                    raise
             
         except sqlite3.Error as e:
             print(f"❌ خطای SQLite در execute_query: {e}")
             print(f"   کوئری: {query}")
             print(f"   پارامترها: {params}")
-            if self.connection:
-                self.connection.rollback()
             return False
         except Exception as e:
             print(f"❌ خطای عمومی در execute_query: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
-        finally:
-            if self.connection:
-                self.connection.close()
+
+    def _mark_transaction_failed(self):
+        """علامت‌گذاری تراکنش باز نخ فعلی برای rollback (خطایی که اینجا بلعیده شده)"""
+        if self.in_transaction():
+            self._transaction_state.failed = True
+
+    @staticmethod
+    def _chunks(items, chunk_size):
+        for start in range(0, len(items), chunk_size):
+            yield items[start:start + chunk_size]
+
+    def execute_many(self, query, params_list, chunk_size=BULK_CHUNK_SIZE):
+        """
+        اجرای یک کوئری INSERT/UPDATE/DELETE برای لیستی از پارامترها با executemany
+
+        هر بسته chunk_size تایی در یک تراکنش و با یک commit اجرا می‌شود؛ داخل
+        db.transaction() همه بسته‌ها جزو همان تراکنش بیرونی هستند.
+        """
+        params_list = list(params_list)
+        if not params_list:
+            return True
+        started = time.perf_counter() if self.profiler.enabled else None
+        try:
+            for chunk in self._chunks(params_list, max(1, chunk_size)):
+                with self.transaction() as connection:
+                    connection.executemany(query, chunk)
+            if started is not None:
+                self.profiler.record('execute_many', query, (), started, len(params_list))
+            return True
+
+        except sqlite3.Error as e:
+            self._mark_transaction_failed()
+            print(f"❌ خطای SQLite در execute_many: {e}")
+            print(f"   کوئری: {query}")
+            print(f"   تعداد ردیف‌ها: {len(params_list)}")
+            return False
+        except Exception as e:
+            self._mark_transaction_failed()
+            print(f"❌ خطای عمومی در execute_many: {e}")
+            return False
+
+    def bulk_insert(self, table, rows, on_conflict=None, chunk_size=BULK_CHUNK_SIZE, return_ids=True):
+        """
+        درج گروهی ردیف‌ها (لیست dict) در یک جدول
+
+        ستون‌ها از کلید‌های ردیف اول خوانده می‌شوند و کلیدهای غایب در بقیه ردیف‌ها NULL
+        درج می‌شوند. on_conflict یکی از None، 'abort'، 'ignore' یا 'replace' است.
+        هر بسته chunk_size تایی در یک تراکنش با یک commit درج می‌شود.
+
+        خروجی: لیست شناسه‌های درج شده به ترتیب ردیف‌ها (برای ردیف‌هایی که با
+        on_conflict='ignore' نادیده گرفته شده‌اند None)، یا None در صورت خطا.
+        با return_ids=False از executemany استفاده می‌شود و لیست خالی برمی‌گردد.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+
+        columns = list(rows[0].keys())
+        if on_conflict not in _CONFLICT_CLAUSES:
+            print(f"❌ مقدار نامعتبر on_conflict: {on_conflict}")
+            return None
+        for name in [table] + columns:
+            if not _IDENTIFIER_RE.match(name):
+                print(f"❌ نام نامعتبر جدول/ستون در bulk_insert: {name}")
+                return None
+
+        query = (
+            f"{_CONFLICT_CLAUSES[on_conflict]} INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        params_list = [tuple(row.get(column) for column in columns) for row in rows]
+
+        if not return_ids:
+            return [] if self.execute_many(query, params_list, chunk_size) else None
+
+        ids = []
+        started = time.perf_counter() if self.profiler.enabled else None
+        try:
+            for chunk in self._chunks(params_list, max(1, chunk_size)):
+                with self.transaction() as connection:
+                    cursor = connection.cursor()
+                    for params in chunk:
+                        cursor.execute(query, params)
+                        ids.append(cursor.lastrowid if cursor.rowcount > 0 else None)
+            if started is not None:
+                self.profiler.record('bulk_insert', query, (), started, len(ids))
+            return ids
+
+        except sqlite3.Error as e:
+            self._mark_transaction_failed()
+            print(f"❌ خطای SQLite در bulk_insert ({table}): {e}")
+            print(f"   تعداد ردیف‌ها: {len(rows)}")
+            return None
+        except Exception as e:
+            self._mark_transaction_failed()
+            print(f"❌ خطای عمومی در bulk_insert ({table}): {e}")
+            return None
 
     # در کلاس DatabaseManager، این توابع را اضافه یا اصلاح کنید:
 
     def gregorian_to_jalali(self, gregorian_date, format_str="%Y/%m/%d"):
         """تبدیل تاریخ میلادی به شمسی (برای نمایش)"""
-        if not gregorian_date:
-            return ""
-        
-        try:
-            if isinstance(gregorian_date, str):
-                # اگر رشته تاریخ میلادی است
-                for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"]:
-                    try:
-                        date_obj = datetime.strptime(gregorian_date, fmt)
-                        jalali = jdatetime.date.fromgregorian(date=date_obj.date())
-                        return jalali.strftime(format_str)
-                    except:
-                        continue
-            
-            elif isinstance(gregorian_date, date):
-                # اگر شیء date است
-                jalali = jdatetime.date.fromgregorian(date=gregorian_date)
-                return jalali.strftime(format_str)
-                
-        except Exception as e:
-            print(f"خطا در تبدیل تاریخ میلادی به شمسی: {e}")
-        
-        return str(gregorian_date)
+        return jalali_calendar.to_jalali(gregorian_date, format_str)
 
     def jalali_to_gregorian(self, jalali_date_str, format_str="%Y-%m-%d"):
         """تبدیل تاریخ شمسی به میلادی (برای ذخیره در دیتابیس)"""
         if not jalali_date_str:
             return None
         
-        try:
-            # حذف فاصله و نویسه‌های اضافی
-            jalali_date_str = str(jalali_date_str).strip()
-            
-            # اگر تاریخ میلادی است، برگردان
-            if '-' in jalali_date_str and len(jalali_date_str.split('-')) == 3:
-                parts = jalali_date_str.split('-')
-                if len(parts[0]) == 4 and int(parts[0]) > 1500:
-                    return jalali_date_str  # احتمالاً میلادی است
-            
-            # فرض می‌کنیم تاریخ شمسی است
-            # حذف کاراکترهای غیرعددی
-            import re
-            numbers = re.findall(r'\d+', jalali_date_str)
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                # تشخیص اینکه آیا تاریخ شمسی است (سال بین 1300-1500)
-                if 1300 <= year <= 1500:
-                    jalali = jdatetime.date(year, month, day)
-                    gregorian = jalali.togregorian()
-                    return gregorian.strftime(format_str)
-                else:
-                    # احتمالاً میلادی است
-                    return f"{year:04d}-{month:02d}-{day:02d}"
-                    
-        except Exception as e:
-            print(f"خطا در تبدیل تاریخ شمسی به میلادی: {e}")
-            print(f"ورودی: {jalali_date_str}")
+        jalali_date_str = str(jalali_date_str).strip()
+        
+        # اگر تاریخ میلادی است (احتمالاً همراه زمان)، همان را برگردان
+        parts = jalali_date_str.split('-')
+        if len(parts) == 3 and len(parts[0]) == 4 and parts[0].isdigit() and int(parts[0]) > 1500:
+            return jalali_date_str
         
-        return jalali_date_str
+        gregorian = jalali_calendar.to_gregorian(jalali_date_str, format_str)
+        if gregorian is None:
+            print(f"خطا در تبدیل تاریخ شمسی به میلادی - ورودی: {jalali_date_str}")
+            return jalali_date_str
+        return gregorian
 
   
     def get_current_jalali_date(self):
@@ -381,763 +650,739 @@ class DatabaseManager(QObject):
                 self.connection.close()
 
     def initialize_database(self):
-        """ایجاد جداول دیتابیس"""
+        """
+        ایجاد یا به‌روزرسانی ساختار دیتابیس با مهاجرت‌های نسخه‌دار (database.migrations)
+
+        اگر نسخه دیتابیس (PRAGMA user_version) آخرین نسخه باشد فقط همان یک خواندن انجام
+        می‌شود؛ در غیر این صورت مراحل باقی‌مانده به ترتیب اجرا و زمان هر کدام چاپ می‌شود.
+        """
         try:
-            self.connect()
-            
-            # ایجاد جدول تنظیمات
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                app_name TEXT DEFAULT 'سیستم مدیریت تعمیرگاه لوازم خانگی',
-                company_name TEXT,
-                company_address TEXT,
-                company_phone TEXT,
-                company_email TEXT,
-                logo_path TEXT,
-                date_format TEXT DEFAULT 'شمسی',
-                language TEXT DEFAULT 'فارسی',
-                theme TEXT DEFAULT 'dark',
-                font_name TEXT DEFAULT 'B Nazanin',
-                font_size INTEGER DEFAULT 11,
-                bg_color TEXT DEFAULT '#000000',      # 🔴 سیاه
-                text_color TEXT DEFAULT '#FFFFFF',    # 🔴 سفید
-                default_currency TEXT DEFAULT 'تومان',
-                tax_percentage REAL DEFAULT 9.0,
-                auto_backup INTEGER DEFAULT 1,
-                backup_path TEXT DEFAULT 'data/backup/',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+            if not migrations.migrate(self):
+                self.error_occurred.emit("خطا در مهاجرت ساختار دیتابیس")
+                return False
+            self.database_initialized.emit(True)
+            return True
             
-            # ایجاد جدول اشخاص
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Persons (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                person_type TEXT CHECK(person_type IN ('مشتری', 'تامین کننده', 'تعمیرکار بیرونی', 'شریک', 'کارمند')),
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                full_name TEXT GENERATED ALWAYS AS (first_name || ' ' || last_name) VIRTUAL,
-                mobile TEXT UNIQUE,
-                phone TEXT,
-                address TEXT,
-                national_id TEXT,
-                economic_code TEXT,
-                registration_date DATE DEFAULT CURRENT_DATE,
-                is_active BOOLEAN DEFAULT 1,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+        except Exception as e:
+            self.error_occurred.emit(f"خطا در ایجاد دیتابیس: {str(e)}")
+            return False
 
-            # در تابع initialize_database() فایل database.py، جایی نزدیک به انتهای لیست CREATE TABLEها:
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS LookupValues (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL,       -- دسته: 'device_type', 'device_brand'
-                value TEXT NOT NULL,          -- مقدار: 'یخچال', 'ال جی'
-                display_order INTEGER DEFAULT 0, -- ترتیب نمایش
-                is_active BOOLEAN DEFAULT 1,     -- فعال/غیرفعال
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(category, value)          -- جلوگیری از تکرار
-            )
-            ''')
+    def create_base_schema(self):
+        """ایجاد جداول پایه و مقادیر پیش‌فرض روی اتصال فعلی (self.cursor) - مرحله 1 مهاجرت"""
+        # ایجاد جدول تنظیمات
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            app_name TEXT DEFAULT 'سیستم مدیریت تعمیرگاه لوازم خانگی',
+            company_name TEXT,
+            company_address TEXT,
+            company_phone TEXT,
+            company_email TEXT,
+            logo_path TEXT,
+            date_format TEXT DEFAULT 'شمسی',
+            language TEXT DEFAULT 'فارسی',
+            theme TEXT DEFAULT 'dark',
+            font_name TEXT DEFAULT 'B Nazanin',
+            font_size INTEGER DEFAULT 11,
+            bg_color TEXT DEFAULT '#000000',      -- 🔴 سیاه
+            text_color TEXT DEFAULT '#FFFFFF',    -- 🔴 سفید
+            default_currency TEXT DEFAULT 'تومان',
+            tax_percentage REAL DEFAULT 9.0,
+            auto_backup INTEGER DEFAULT 1,
+            backup_path TEXT DEFAULT 'data/backup/',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # ایجاد جدول اشخاص
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Persons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            person_type TEXT CHECK(person_type IN ('مشتری', 'تامین کننده', 'تعمیرکار بیرونی', 'شریک', 'کارمند')),
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            full_name TEXT GENERATED ALWAYS AS (first_name || ' ' || last_name) VIRTUAL,
+            mobile TEXT UNIQUE,
+            phone TEXT,
+            address TEXT,
+            national_id TEXT,
+            economic_code TEXT,
+            registration_date DATE DEFAULT CURRENT_DATE,
+            is_active BOOLEAN DEFAULT 1,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS LookupValues (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,       -- دسته: 'device_type', 'device_brand'
+            value TEXT NOT NULL,          -- مقدار: 'یخچال', 'ال جی'
+            display_order INTEGER DEFAULT 0, -- ترتیب نمایش
+            is_active BOOLEAN DEFAULT 1,     -- فعال/غیرفعال
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(category, value)          -- جلوگیری از تکرار
+        )
+        ''')
 
-            # ایجاد جدول دستگاه‌ها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Devices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                device_type TEXT NOT NULL,
-                brand TEXT NOT NULL,
-                model TEXT NOT NULL,
-                serial_number TEXT UNIQUE,
-                production_year INTEGER,
-                purchase_date DATE,
-                warranty_status BOOLEAN DEFAULT 0,
-                warranty_end_date DATE,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
 
-            # در فایل database.py، در تابع initialize_database()، بعد از جدول LookupValues اضافه کنید:
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS DeviceCategories_name (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+        # ایجاد جدول دستگاه‌ها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Devices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_type TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            model TEXT NOT NULL,
+            serial_number TEXT UNIQUE,
+            production_year INTEGER,
+            purchase_date DATE,
+            warranty_status BOOLEAN DEFAULT 0,
+            warranty_end_date DATE,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
 
-            # درج چند دسته‌بندی پیش‌فرض
-            default_categories = [
-                'سشوار',
-                'لباسشویی', 
-                'جاروبرقی',
-                'پنکه',
-                'یخچال',
-                'فریزر',
-                'ماشین ظرفشویی',
-                'مایکروویو',
-                'اجاق گاز',
-                'هود',
-                'کولر',
-                'بخاری',
-                'آبسردکن',
-                'آبگرمکن',
-                'اتو',
-                'چرخ گوشت',
-                'مخلوط کن',
-                'آسیاب',
-                'قهوه ساز',
-                'سایر'
-            ]
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS DeviceCategories_name (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
-            for category in default_categories:
-                self.cursor.execute('''
-                INSERT OR IGNORE INTO DeviceCategories_name (name) 
-                VALUES (?)
-                ''', (category,))
+        # درج چند دسته‌بندی پیش‌فرض
+        default_categories = [
+            'سشوار',
+            'لباسشویی', 
+            'جاروبرقی',
+            'پنکه',
+            'یخچال',
+            'فریزر',
+            'ماشین ظرفشویی',
+            'مایکروویو',
+            'اجاق گاز',
+            'هود',
+            'کولر',
+            'بخاری',
+            'آبسردکن',
+            'آبگرمکن',
+            'اتو',
+            'چرخ گوشت',
+            'مخلوط کن',
+            'آسیاب',
+            'قهوه ساز',
+            'سایر'
+        ]
 
-            #جدول معرفی برندها
+        for category in default_categories:
             self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Brands (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+            INSERT OR IGNORE INTO DeviceCategories_name (name) 
+            VALUES (?)
+            ''', (category,))
 
-            # ایجاد جدول پذیرش
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Receptions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                reception_number TEXT UNIQUE NOT NULL,
-                customer_id INTEGER NOT NULL,
-                device_id INTEGER NOT NULL,
-                reception_date DATE DEFAULT CURRENT_DATE,
-                reception_time TIME DEFAULT CURRENT_TIME,
-                problem_description TEXT NOT NULL,
-                device_condition TEXT,
-                accessories TEXT,
-                estimated_cost DECIMAL(15, 2) DEFAULT 0,
-                estimated_delivery_date DATE,
-                priority TEXT CHECK(priority IN ('عادی', 'فوری', 'خیلی فوری')) DEFAULT 'عادی',
-                status TEXT CHECK(status IN ('در انتظار', 'در حال تعمیر', 'تعمیر شده', 'تحویل داده شده', 'لغو شده')) DEFAULT 'در انتظار',
-                reception_employee TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES Persons(id) ON DELETE CASCADE,
-                FOREIGN KEY (device_id) REFERENCES Devices(id) ON DELETE CASCADE
-            )
-            ''')
-            
-            # ایجاد جدول تعمیرات
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Repairs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                reception_id INTEGER NOT NULL,
-                repair_date DATE DEFAULT CURRENT_DATE,
-                technician_id INTEGER,
-                repair_type TEXT CHECK(repair_type IN ('داخلی', 'بیرون سپاری')) DEFAULT 'داخلی',
-                outsourced_to INTEGER,
-                outsourced_cost DECIMAL(15, 2) DEFAULT 0,
-                outsourced_description TEXT,  -- ✅ اضافه شد
-                labor_cost DECIMAL(15, 2) DEFAULT 0,
-                total_cost DECIMAL(15, 2) DEFAULT 0,
-                repair_description TEXT,
-                used_parts TEXT,
-                start_time DATETIME,
-                end_time DATETIME,
-                status TEXT CHECK(status IN ('شروع شده', 'در حال انجام', 'تمام شده', 'متوقف شده')) DEFAULT 'شروع شده',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (reception_id) REFERENCES Receptions(id) ON DELETE CASCADE,
-                FOREIGN KEY (technician_id) REFERENCES Persons(id),
-                FOREIGN KEY (outsourced_to) REFERENCES Persons(id)
-            )
-            ''')
-            
+        #جدول معرفی برندها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Brands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Repair_Services (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                repair_id INTEGER NOT NULL,
-                service_id INTEGER NOT NULL,  -- ارجاع به ServiceFees
-                quantity DECIMAL(5, 2) DEFAULT 1.0,
-                unit_price DECIMAL(15, 2) NOT NULL,
-                total_price DECIMAL(15, 2) NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (repair_id) REFERENCES Repairs(id) ON DELETE CASCADE,
-                FOREIGN KEY (service_id) REFERENCES ServiceFees(id)
-            )
-            ''')
+        # ایجاد جدول پذیرش
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Receptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reception_number TEXT UNIQUE NOT NULL,
+            customer_id INTEGER NOT NULL,
+            device_id INTEGER NOT NULL,
+            reception_date DATE DEFAULT CURRENT_DATE,
+            reception_time TIME DEFAULT CURRENT_TIME,
+            problem_description TEXT NOT NULL,
+            device_condition TEXT,
+            accessories TEXT,
+            estimated_cost DECIMAL(15, 2) DEFAULT 0,
+            estimated_delivery_date DATE,
+            priority TEXT CHECK(priority IN ('عادی', 'فوری', 'خیلی فوری')) DEFAULT 'عادی',
+            status TEXT CHECK(status IN ('در انتظار', 'در حال تعمیر', 'تعمیر شده', 'تحویل داده شده', 'لغو شده')) DEFAULT 'در انتظار',
+            reception_employee TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES Persons(id) ON DELETE CASCADE,
+            FOREIGN KEY (device_id) REFERENCES Devices(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # ایجاد جدول تعمیرات
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Repairs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reception_id INTEGER NOT NULL,
+            repair_date DATE DEFAULT CURRENT_DATE,
+            technician_id INTEGER,
+            repair_type TEXT CHECK(repair_type IN ('داخلی', 'بیرون سپاری')) DEFAULT 'داخلی',
+            outsourced_to INTEGER,
+            outsourced_cost DECIMAL(15, 2) DEFAULT 0,
+            outsourced_description TEXT,  -- ✅ اضافه شد
+            labor_cost DECIMAL(15, 2) DEFAULT 0,
+            total_cost DECIMAL(15, 2) DEFAULT 0,
+            repair_description TEXT,
+            used_parts TEXT,
+            start_time DATETIME,
+            end_time DATETIME,
+            status TEXT CHECK(status IN ('شروع شده', 'در حال انجام', 'تمام شده', 'متوقف شده')) DEFAULT 'شروع شده',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (reception_id) REFERENCES Receptions(id) ON DELETE CASCADE,
+            FOREIGN KEY (technician_id) REFERENCES Persons(id),
+            FOREIGN KEY (outsourced_to) REFERENCES Persons(id)
+        )
+        ''')
+        
 
-            # قطعات مصرفی تعمیر
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Repair_Parts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                repair_id INTEGER NOT NULL,
-                part_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL,
-                unit_price DECIMAL(15, 2) NOT NULL,
-                total_price DECIMAL(15, 2) NOT NULL,
-                warehouse_type TEXT CHECK(warehouse_type IN ('قطعات نو', 'قطعات دست دوم')),
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (repair_id) REFERENCES Repairs(id) ON DELETE CASCADE,
-                FOREIGN KEY (part_id) REFERENCES Parts(id)
-            )
-            ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Repair_Services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repair_id INTEGER NOT NULL,
+            service_id INTEGER NOT NULL,  -- ارجاع به ServiceFees
+            quantity DECIMAL(5, 2) DEFAULT 1.0,
+            unit_price DECIMAL(15, 2) NOT NULL,
+            total_price DECIMAL(15, 2) NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (repair_id) REFERENCES Repairs(id) ON DELETE CASCADE,
+            FOREIGN KEY (service_id) REFERENCES ServiceFees(id)
+        )
+        ''')
 
-            # ایجاد جدول قطعات
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Parts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                part_code TEXT UNIQUE NOT NULL,
-                part_name TEXT NOT NULL,
-                category TEXT,
-                brand TEXT,
-                model TEXT,
-                unit TEXT CHECK(unit IN ('عدد', 'متر', 'کیلو', 'لیتر', 'ست')) DEFAULT 'عدد',
-                min_stock INTEGER DEFAULT 5,
-                max_stock INTEGER DEFAULT 100,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # ایجاد جدول اجرت‌های استاندارد (تعرفه خدمات)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ServiceFees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                service_code TEXT UNIQUE NOT NULL,
-                service_name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                default_fee DECIMAL(15, 2) NOT NULL,
-                estimated_hours DECIMAL(5, 2) DEFAULT 1.0,
-                difficulty_level INTEGER DEFAULT 1 CHECK(difficulty_level BETWEEN 1 AND 5),
-                description TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+        # قطعات مصرفی تعمیر
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Repair_Parts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repair_id INTEGER NOT NULL,
+            part_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price DECIMAL(15, 2) NOT NULL,
+            total_price DECIMAL(15, 2) NOT NULL,
+            warehouse_type TEXT CHECK(warehouse_type IN ('قطعات نو', 'قطعات دست دوم')),
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (repair_id) REFERENCES Repairs(id) ON DELETE CASCADE,
+            FOREIGN KEY (part_id) REFERENCES Parts(id)
+        )
+        ''')
 
+        # ایجاد جدول قطعات
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Parts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_code TEXT UNIQUE NOT NULL,
+            part_name TEXT NOT NULL,
+            category TEXT,
+            brand TEXT,
+            model TEXT,
+            unit TEXT CHECK(unit IN ('عدد', 'متر', 'کیلو', 'لیتر', 'ست')) DEFAULT 'عدد',
+            min_stock INTEGER DEFAULT 5,
+            max_stock INTEGER DEFAULT 100,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # ایجاد جدول اجرت‌های استاندارد (تعرفه خدمات)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ServiceFees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service_code TEXT UNIQUE NOT NULL,
+            service_name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            default_fee DECIMAL(15, 2) NOT NULL,
+            estimated_hours DECIMAL(5, 2) DEFAULT 1.0,
+            difficulty_level INTEGER DEFAULT 1 CHECK(difficulty_level BETWEEN 1 AND 5),
+            description TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
 
-            # ایجاد جدول انبار قطعات نو
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS NewPartsWarehouse (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                part_id INTEGER NOT NULL,
-                quantity INTEGER DEFAULT 0,
-                purchase_price DECIMAL(15, 2) NOT NULL,
-                sale_price DECIMAL(15, 2) NOT NULL,
-                supplier_id INTEGER,
-                purchase_date DATE DEFAULT CURRENT_DATE,
-                batch_number TEXT,
-                location TEXT,
-                expiration_date DATE,
-                status TEXT CHECK(status IN ('موجود', 'ناموجود', 'در حال سفارش', 'منقضی شده')) DEFAULT 'موجود',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (part_id) REFERENCES Parts(id) ON DELETE CASCADE,
-                FOREIGN KEY (supplier_id) REFERENCES Persons(id)
-            )
-            ''')
-            
-            # ایجاد جدول انبار قطعات دست دوم
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS UsedPartsWarehouse (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                part_id INTEGER NOT NULL,
-                quantity INTEGER DEFAULT 0,
-                purchase_price DECIMAL(15, 2) NOT NULL,
-                sale_price DECIMAL(15, 2) NOT NULL,
-                source_device TEXT,
-                condition TEXT CHECK(condition IN ('عالی', 'خوب', 'متوسط', 'ضعیف')) DEFAULT 'خوب',
-                purchase_date DATE DEFAULT CURRENT_DATE,
-                warranty_days INTEGER DEFAULT 30,
-                location TEXT,
-                status TEXT CHECK(status IN ('موجود', 'ناموجود', 'اسقاط')) DEFAULT 'موجود',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (part_id) REFERENCES Parts(id) ON DELETE CASCADE
-            )
-            ''')
-            
-            # ایجاد جدول انبار لوازم خانگی نو
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS NewAppliancesWarehouse (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                device_type_id INTEGER NOT NULL,          
-                brand_id INTEGER NOT NULL,                 
-                model TEXT NOT NULL,                      
-                serial_number TEXT,                       
-                production_year INTEGER,                  
-                quantity INTEGER DEFAULT 0,
-                purchase_price DECIMAL(15, 2) NOT NULL,
-                sale_price DECIMAL(15, 2) NOT NULL,
-                supplier_id INTEGER NOT NULL,
-                purchase_date DATE DEFAULT CURRENT_DATE,
-                warranty_months INTEGER DEFAULT 12,
-                location TEXT,
-                status TEXT CHECK(status IN ('موجود', 'ناموجود', 'رزرو شده', 'فروخته شده')) DEFAULT 'موجود',
-                description TEXT,                         
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (device_type_id) REFERENCES DeviceCategories_name(id),
-                FOREIGN KEY (brand_id) REFERENCES Brands(id),
-                FOREIGN KEY (supplier_id) REFERENCES Persons(id)
-            )
-            ''')
 
-            self.migrate_new_appliances_warehouse()
-            
-            # ایجاد جدول انبار لوازم خانگی دست دوم
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS UsedAppliancesWarehouse (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                
-                -- حالت 1: دستگاه از مشتری خریداری شده (بعد از تعمیر یا قبل از تعمیر)
-                -- حالت 2: دستگاه از بیرون خریداری شده
-                
-                -- **مشخصات دستگاه**
-                device_type_id INTEGER NOT NULL,  -- نوع دستگاه (از DeviceCategories_name)
-                brand_id INTEGER NOT NULL,        -- برند (از Brands)
-                model TEXT NOT NULL,              -- مدل
-                serial_number TEXT UNIQUE,        -- شماره سریال
-                production_year INTEGER,          -- سال تولید
-                
-                -- **منبع دستگاه**
-                source_type TEXT CHECK(source_type IN ('مشتری', 'تامین کننده', 'تعویض شده')) DEFAULT 'مشتری',
-                source_person_id INTEGER,         -- آیدی شخص (مشتری یا تامین کننده)
-                original_reception_id INTEGER,    -- اگر از مشتری خریداری شده، آیدی پذیرش اصلی
-                
-                -- **وضعیت فنی**
-                condition TEXT CHECK(condition IN ('در حد نو', 'خیلی خوب', 'خوب', 'متوسط', 'نیاز به تعمیر جزئی', 'نیاز به تعمیر اساسی')),
-                technical_status TEXT,            -- وضعیت فنی دقیق (JSON یا متن)
-                last_repair_date DATE,           -- تاریخ آخرین تعمیر
-                repair_history TEXT,              -- تاریخچه تعمیرات
-                
-                -- **اطلاعات خرید**
-                purchase_price DECIMAL(15, 2) NOT NULL,  -- قیمت خرید
-                purchase_date DATE DEFAULT CURRENT_DATE, -- تاریخ خرید
-                purchase_document TEXT,          -- شماره سند خرید
-                
-                -- **اطلاعات فروش**
-                sale_price DECIMAL(15, 2) NOT NULL,      -- قیمت پیشنهادی فروش
-                expected_profit DECIMAL(15, 2) GENERATED ALWAYS AS (sale_price - purchase_price) VIRTUAL,
-                
-                -- **گارانتی**
-                warranty_type TEXT CHECK(warranty_type IN ('گارانتی فروشگاه', 'گارانتی کارخانه', 'فاقد گارانتی')) DEFAULT 'گارانتی فروشگاه',
-                warranty_days INTEGER DEFAULT 90,        -- روزهای گارانتی
-                warranty_description TEXT,               -- توضیحات گارانتی
-                
-                -- **انبارداری**
-                quantity INTEGER DEFAULT 0,
-                location TEXT,                           -- محل انبار
-                status TEXT CHECK(status IN ('موجود', 'ناموجود', 'فروخته شده', 'در حال تعمیر', 'رزرو شده', 'اسقاط')) DEFAULT 'موجود',
-                
-                -- **اطلاعات تکمیلی**
-                accessories TEXT,                        -- لوازم همراه (مدارک، ریموت، ...)
-                description TEXT,                        -- توضیحات
-                photos_path TEXT,                        -- مسیر عکس‌ها (JSON)
-                
-                -- **زمان‌بندی**
-                entry_date DATE DEFAULT CURRENT_DATE,    -- تاریخ ورود به انبار
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                -- **کلیدهای خارجی**
-                FOREIGN KEY (device_type_id) REFERENCES DeviceCategories_name(id),
-                FOREIGN KEY (brand_id) REFERENCES Brands(id),
-                FOREIGN KEY (source_person_id) REFERENCES Persons(id),
-                FOREIGN KEY (original_reception_id) REFERENCES Receptions(id)
-            )
-            ''')
+        # ایجاد جدول انبار قطعات نو
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS NewPartsWarehouse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_id INTEGER NOT NULL,
+            quantity INTEGER DEFAULT 0,
+            purchase_price DECIMAL(15, 2) NOT NULL,
+            sale_price DECIMAL(15, 2) NOT NULL,
+            supplier_id INTEGER,
+            purchase_date DATE DEFAULT CURRENT_DATE,
+            batch_number TEXT,
+            location TEXT,
+            expiration_date DATE,
+            status TEXT CHECK(status IN ('موجود', 'ناموجود', 'در حال سفارش', 'منقضی شده')) DEFAULT 'موجود',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (part_id) REFERENCES Parts(id) ON DELETE CASCADE,
+            FOREIGN KEY (supplier_id) REFERENCES Persons(id)
+        )
+        ''')
+        
+        # ایجاد جدول انبار قطعات دست دوم
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS UsedPartsWarehouse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_id INTEGER NOT NULL,
+            quantity INTEGER DEFAULT 0,
+            purchase_price DECIMAL(15, 2) NOT NULL,
+            sale_price DECIMAL(15, 2) NOT NULL,
+            source_device TEXT,
+            condition TEXT CHECK(condition IN ('عالی', 'خوب', 'متوسط', 'ضعیف')) DEFAULT 'خوب',
+            purchase_date DATE DEFAULT CURRENT_DATE,
+            warranty_days INTEGER DEFAULT 30,
+            location TEXT,
+            status TEXT CHECK(status IN ('موجود', 'ناموجود', 'اسقاط')) DEFAULT 'موجود',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (part_id) REFERENCES Parts(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # ایجاد جدول انبار لوازم خانگی نو
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS NewAppliancesWarehouse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_type_id INTEGER NOT NULL,          
+            brand_id INTEGER NOT NULL,                 
+            model TEXT NOT NULL,                      
+            serial_number TEXT,                       
+            production_year INTEGER,                  
+            quantity INTEGER DEFAULT 0,
+            purchase_price DECIMAL(15, 2) NOT NULL,
+            sale_price DECIMAL(15, 2) NOT NULL,
+            supplier_id INTEGER NOT NULL,
+            purchase_date DATE DEFAULT CURRENT_DATE,
+            warranty_months INTEGER DEFAULT 12,
+            location TEXT,
+            status TEXT CHECK(status IN ('موجود', 'ناموجود', 'رزرو شده', 'فروخته شده')) DEFAULT 'موجود',
+            description TEXT,                         
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (device_type_id) REFERENCES DeviceCategories_name(id),
+            FOREIGN KEY (brand_id) REFERENCES Brands(id),
+            FOREIGN KEY (supplier_id) REFERENCES Persons(id)
+        )
+        ''')
 
-                        
-            # ایجاد جدول تراکنش‌های انبار
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS InventoryTransactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_type TEXT CHECK(transaction_type IN ('خرید', 'فروش', 'استفاده در تعمیر', 'برگشت', 'تعدیل', 'ضایعات', 'انتقال')),
-                warehouse_type TEXT CHECK(warehouse_type IN ('قطعات نو', 'قطعات دست دوم', 'لوازم نو', 'لوازم دست دوم')),
-                item_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL,
-                unit_price DECIMAL(15, 2) NOT NULL,
-                total_price DECIMAL(15, 2) NOT NULL,
-                transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                related_document TEXT,
-                related_reception INTEGER,
-                description TEXT,
-                employee TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (related_reception) REFERENCES Receptions(id)
-            )
-            ''')
-            
-            # ایجاد جدول فاکتورها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Invoices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_number TEXT UNIQUE NOT NULL,
-                invoice_type TEXT CHECK(invoice_type IN ('فروش', 'خدمات', 'بیرون سپاری', 'خرید', 'مرجوعی')),
-                customer_id INTEGER,
-                reception_id INTEGER,
-                invoice_date DATE DEFAULT CURRENT_DATE,
-                due_date DATE,
-                subtotal DECIMAL(15, 2) DEFAULT 0,
-                discount DECIMAL(15, 2) DEFAULT 0,
-                tax DECIMAL(15, 2) DEFAULT 0,
-                total DECIMAL(15, 2) DEFAULT 0,
-                paid_amount DECIMAL(15, 2) DEFAULT 0,
-                remaining_amount DECIMAL(15, 2) DEFAULT 0,
-                payment_status TEXT CHECK(payment_status IN ('پرداخت شده', 'نقدی', 'نسیه', 'چک', 'کارت')) DEFAULT 'نقدی',
-                payment_method TEXT,
-                description TEXT,
-                outsourced_to INTEGER,
-                outsourced_cost DECIMAL(15, 2) DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES Persons(id),
-                FOREIGN KEY (reception_id) REFERENCES Receptions(id),
-                FOREIGN KEY (outsourced_to) REFERENCES Persons(id)
-            )
-            ''')
-            
-            # ایجاد جدول اقلام فاکتور
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS InvoiceItems (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER NOT NULL,
-                item_type TEXT CHECK(item_type IN ('قطعه', 'خدمات', 'دستگاه', 'اجرت')),
-                item_id INTEGER,
-                item_name TEXT NOT NULL,
-                quantity INTEGER DEFAULT 1,
-                unit_price DECIMAL(15, 2) NOT NULL,
-                total_price DECIMAL(15, 2) NOT NULL,
-                description TEXT,
-                partner_percentage DECIMAL(5, 2) DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (invoice_id) REFERENCES Invoices(id) ON DELETE CASCADE
-            )
-            ''')
-            
-            # ایجاد جدول شرکا
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Partners (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                person_id INTEGER NOT NULL,
-                partnership_start DATE DEFAULT CURRENT_DATE,
-                partnership_end DATE,
-                active BOOLEAN DEFAULT 1,
-                capital DECIMAL(15, 2) DEFAULT 0,
-                profit_percentage DECIMAL(5, 2) DEFAULT 0,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (person_id) REFERENCES Persons(id) ON DELETE CASCADE
-            )
-            ''')
-            
-            # ایجاد جدول سهم شرکا
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS PartnerShares (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                partner_id INTEGER NOT NULL,
-                transaction_type TEXT CHECK(transaction_type IN ('فروش قطعات نو', 'فروش قطعات دست دوم', 'فروش لوازم نو', 'فروش لوازم دست دوم', 'خدمات تعمیر', 'بیرون سپاری')),
-                transaction_id INTEGER NOT NULL,
-                share_percentage DECIMAL(5, 2) NOT NULL,
-                share_amount DECIMAL(15, 2) NOT NULL,
-                calculation_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (partner_id) REFERENCES Partners(id) ON DELETE CASCADE
-            )
-            ''')
-            
-            # ایجاد جدول حساب‌ها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account_number TEXT UNIQUE NOT NULL,
-                account_name TEXT NOT NULL,
-                account_type TEXT CHECK(account_type IN ('جاری', 'پس‌انداز', 'صندوق', 'بانکی', 'نقدی')),
-                bank_name TEXT,
-                initial_balance DECIMAL(15, 2) DEFAULT 0,
-                current_balance DECIMAL(15, 2) DEFAULT 0,
-                owner_name TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # ایجاد جدول تراکنش‌های حسابداری
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS AccountingTransactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                transaction_type TEXT CHECK(transaction_type IN ('دریافت', 'پرداخت', 'انتقال', 'سود', 'هزینه', 'درآمد')),
-                from_account_id INTEGER,
-                to_account_id INTEGER,
-                amount DECIMAL(15, 2) NOT NULL,
-                description TEXT NOT NULL,
-                reference_id INTEGER,
-                reference_type TEXT,
-                employee TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (from_account_id) REFERENCES Accounts(id),
-                FOREIGN KEY (to_account_id) REFERENCES Accounts(id)
-            )
-            ''')
-            
-            # ایجاد جدول چک‌ها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Checks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                check_number TEXT NOT NULL,
-                bank_name TEXT NOT NULL,
-                branch TEXT,
-                account_number TEXT,
-                amount DECIMAL(15, 2) NOT NULL,
-                issue_date DATE,
-                due_date DATE NOT NULL,
-                drawer TEXT NOT NULL,
-                payee TEXT NOT NULL,
-                status TEXT CHECK(status IN ('وصول نشده', 'وصول شده', 'برگشتی', 'پاس شده', 'پاس نشده', 'بلوکه شده')) DEFAULT 'وصول نشده',
-                check_type TEXT CHECK(check_type IN ('دریافتی', 'پرداختی')) DEFAULT 'دریافتی',
-                related_invoice INTEGER,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (related_invoice) REFERENCES Invoices(id)
-            )
-            ''')
-            
-            # ایجاد جدول پنل پیامکی
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS SMSPanel (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                panel_name TEXT NOT NULL,
-                api_url TEXT,
-                api_key TEXT,
-                username TEXT,
-                password TEXT,
-                line_number TEXT,
-                is_active BOOLEAN DEFAULT 0,
-                balance INTEGER DEFAULT 0,
-                last_update DATETIME,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # ایجاد جدول پیام‌ها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                reception_id INTEGER,
-                customer_id INTEGER NOT NULL,
-                message_type TEXT CHECK(message_type IN ('ورود دستگاه', 'آماده شدن', 'تحویل', 'تاخیر', 'پیام عمومی', 'اعلان')),
-                message_text TEXT NOT NULL,
-                send_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                send_status TEXT CHECK(send_status IN ('ارسال شده', 'در صف', 'خطا', 'ذخیره شده')) DEFAULT 'ذخیره شده',
-                response TEXT,
-                mobile_number TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (reception_id) REFERENCES Receptions(id),
-                FOREIGN KEY (customer_id) REFERENCES Persons(id)
-            )
-            ''')
-            
-            # ایجاد جدول کاربران سیستم
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                person_id INTEGER,
-                role TEXT CHECK(role IN ('مدیر', 'اپراتور', 'انباردار', 'حسابدار', 'مشاهده‌گر')) DEFAULT 'اپراتور',
-                is_active BOOLEAN DEFAULT 1,
-                last_login DATETIME,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (person_id) REFERENCES Persons(id)
-            )
-            ''')
-            
-            # ایجاد جدول تنظیمات امنیتی
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS SecuritySettings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                max_login_attempts INTEGER DEFAULT 3,
-                lockout_minutes INTEGER DEFAULT 15,
-                session_timeout_minutes INTEGER DEFAULT 30,
-                force_logout BOOLEAN DEFAULT 1,
-                remember_me BOOLEAN DEFAULT 1,
-                min_password_length INTEGER DEFAULT 8,
-                password_expiry_days INTEGER DEFAULT 90,
-                password_history_count INTEGER DEFAULT 5,
-                require_uppercase BOOLEAN DEFAULT 1,
-                require_lowercase BOOLEAN DEFAULT 1,
-                require_numbers BOOLEAN DEFAULT 1,
-                require_special BOOLEAN DEFAULT 0,
-                enable_2fa BOOLEAN DEFAULT 0,
-                twofa_method TEXT DEFAULT 'پیامک',
-                twofa_force_admin BOOLEAN DEFAULT 1,
-                twofa_force_all BOOLEAN DEFAULT 0,
-                encrypt_passwords BOOLEAN DEFAULT 1,
-                encrypt_financial BOOLEAN DEFAULT 1,
-                encrypt_personal BOOLEAN DEFAULT 0,
-                encrypt_backups BOOLEAN DEFAULT 1,
-                encryption_key_hash TEXT,
-                ssl_required BOOLEAN DEFAULT 0,
-                block_external BOOLEAN DEFAULT 1,
-                firewall_level TEXT DEFAULT 'متوسط',
-                allowed_ips TEXT,
-                audit_log BOOLEAN DEFAULT 1,
-                auto_logout BOOLEAN DEFAULT 1,
-                inactivity_minutes INTEGER DEFAULT 10,
-                show_warnings BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+        # ایجاد جدول انبار لوازم خانگی دست دوم
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS UsedAppliancesWarehouse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            
+            -- حالت 1: دستگاه از مشتری خریداری شده (بعد از تعمیر یا قبل از تعمیر)
+            -- حالت 2: دستگاه از بیرون خریداری شده
+            
+            -- **مشخصات دستگاه**
+            device_type_id INTEGER NOT NULL,  -- نوع دستگاه (از DeviceCategories_name)
+            brand_id INTEGER NOT NULL,        -- برند (از Brands)
+            model TEXT NOT NULL,              -- مدل
+            serial_number TEXT UNIQUE,        -- شماره سریال
+            production_year INTEGER,          -- سال تولید
+            
+            -- **منبع دستگاه**
+            source_type TEXT CHECK(source_type IN ('مشتری', 'تامین کننده', 'تعویض شده')) DEFAULT 'مشتری',
+            source_person_id INTEGER,         -- آیدی شخص (مشتری یا تامین کننده)
+            original_reception_id INTEGER,    -- اگر از مشتری خریداری شده، آیدی پذیرش اصلی
+            
+            -- **وضعیت فنی**
+            condition TEXT CHECK(condition IN ('در حد نو', 'خیلی خوب', 'خوب', 'متوسط', 'نیاز به تعمیر جزئی', 'نیاز به تعمیر اساسی')),
+            technical_status TEXT,            -- وضعیت فنی دقیق (JSON یا متن)
+            last_repair_date DATE,           -- تاریخ آخرین تعمیر
+            repair_history TEXT,              -- تاریخچه تعمیرات
+            
+            -- **اطلاعات خرید**
+            purchase_price DECIMAL(15, 2) NOT NULL,  -- قیمت خرید
+            purchase_date DATE DEFAULT CURRENT_DATE, -- تاریخ خرید
+            purchase_document TEXT,          -- شماره سند خرید
+            
+            -- **اطلاعات فروش**
+            sale_price DECIMAL(15, 2) NOT NULL,      -- قیمت پیشنهادی فروش
+            expected_profit DECIMAL(15, 2) GENERATED ALWAYS AS (sale_price - purchase_price) VIRTUAL,
+            
+            -- **گارانتی**
+            warranty_type TEXT CHECK(warranty_type IN ('گارانتی فروشگاه', 'گارانتی کارخانه', 'فاقد گارانتی')) DEFAULT 'گارانتی فروشگاه',
+            warranty_days INTEGER DEFAULT 90,        -- روزهای گارانتی
+            warranty_description TEXT,               -- توضیحات گارانتی
+            
+            -- **انبارداری**
+            quantity INTEGER DEFAULT 0,
+            location TEXT,                           -- محل انبار
+            status TEXT CHECK(status IN ('موجود', 'ناموجود', 'فروخته شده', 'در حال تعمیر', 'رزرو شده', 'اسقاط')) DEFAULT 'موجود',
+            
+            -- **اطلاعات تکمیلی**
+            accessories TEXT,                        -- لوازم همراه (مدارک، ریموت، ...)
+            description TEXT,                        -- توضیحات
+            photos_path TEXT,                        -- مسیر عکس‌ها (JSON)
+            
+            -- **زمان‌بندی**
+            entry_date DATE DEFAULT CURRENT_DATE,    -- تاریخ ورود به انبار
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            
+            -- **کلیدهای خارجی**
+            FOREIGN KEY (device_type_id) REFERENCES DeviceCategories_name(id),
+            FOREIGN KEY (brand_id) REFERENCES Brands(id),
+            FOREIGN KEY (source_person_id) REFERENCES Persons(id),
+            FOREIGN KEY (original_reception_id) REFERENCES Receptions(id)
+        )
+        ''')
 
-            # درج تنظیمات پیش‌فرض
-            self.cursor.execute('''
-            INSERT OR IGNORE INTO SecuritySettings (id) VALUES (1)
-            ''')
+                    
+        # ایجاد جدول تراکنش‌های انبار
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS InventoryTransactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_type TEXT CHECK(transaction_type IN ('خرید', 'فروش', 'استفاده در تعمیر', 'برگشت', 'تعدیل', 'ضایعات', 'انتقال')),
+            warehouse_type TEXT CHECK(warehouse_type IN ('قطعات نو', 'قطعات دست دوم', 'لوازم نو', 'لوازم دست دوم')),
+            item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price DECIMAL(15, 2) NOT NULL,
+            total_price DECIMAL(15, 2) NOT NULL,
+            transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            related_document TEXT,
+            related_reception INTEGER,
+            description TEXT,
+            employee TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (related_reception) REFERENCES Receptions(id)
+        )
+        ''')
+        
+        # ایجاد جدول فاکتورها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT UNIQUE NOT NULL,
+            invoice_type TEXT CHECK(invoice_type IN ('فروش', 'خدمات', 'بیرون سپاری', 'خرید', 'مرجوعی')),
+            customer_id INTEGER,
+            reception_id INTEGER,
+            invoice_date DATE DEFAULT CURRENT_DATE,
+            due_date DATE,
+            subtotal DECIMAL(15, 2) DEFAULT 0,
+            discount DECIMAL(15, 2) DEFAULT 0,
+            tax DECIMAL(15, 2) DEFAULT 0,
+            total DECIMAL(15, 2) DEFAULT 0,
+            paid_amount DECIMAL(15, 2) DEFAULT 0,
+            remaining_amount DECIMAL(15, 2) DEFAULT 0,
+            payment_status TEXT CHECK(payment_status IN ('پرداخت شده', 'نقدی', 'نسیه', 'چک', 'کارت')) DEFAULT 'نقدی',
+            payment_method TEXT,
+            description TEXT,
+            outsourced_to INTEGER,
+            outsourced_cost DECIMAL(15, 2) DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES Persons(id),
+            FOREIGN KEY (reception_id) REFERENCES Receptions(id),
+            FOREIGN KEY (outsourced_to) REFERENCES Persons(id)
+        )
+        ''')
+        
+        # ایجاد جدول اقلام فاکتور
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS InvoiceItems (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            item_type TEXT CHECK(item_type IN ('قطعه', 'خدمات', 'دستگاه', 'اجرت')),
+            item_id INTEGER,
+            item_name TEXT NOT NULL,
+            quantity INTEGER DEFAULT 1,
+            unit_price DECIMAL(15, 2) NOT NULL,
+            total_price DECIMAL(15, 2) NOT NULL,
+            description TEXT,
+            partner_percentage DECIMAL(5, 2) DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (invoice_id) REFERENCES Invoices(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # ایجاد جدول شرکا
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Partners (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            person_id INTEGER NOT NULL,
+            partnership_start DATE DEFAULT CURRENT_DATE,
+            partnership_end DATE,
+            active BOOLEAN DEFAULT 1,
+            capital DECIMAL(15, 2) DEFAULT 0,
+            profit_percentage DECIMAL(5, 2) DEFAULT 0,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (person_id) REFERENCES Persons(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # ایجاد جدول سهم شرکا
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS PartnerShares (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            partner_id INTEGER NOT NULL,
+            transaction_type TEXT CHECK(transaction_type IN ('فروش قطعات نو', 'فروش قطعات دست دوم', 'فروش لوازم نو', 'فروش لوازم دست دوم', 'خدمات تعمیر', 'بیرون سپاری')),
+            transaction_id INTEGER NOT NULL,
+            share_percentage DECIMAL(5, 2) NOT NULL,
+            share_amount DECIMAL(15, 2) NOT NULL,
+            calculation_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (partner_id) REFERENCES Partners(id) ON DELETE CASCADE
+        )
+        ''')
+        
+        # ایجاد جدول حساب‌ها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_number TEXT UNIQUE NOT NULL,
+            account_name TEXT NOT NULL,
+            account_type TEXT CHECK(account_type IN ('جاری', 'پس‌انداز', 'صندوق', 'بانکی', 'نقدی')),
+            bank_name TEXT,
+            initial_balance DECIMAL(15, 2) DEFAULT 0,
+            current_balance DECIMAL(15, 2) DEFAULT 0,
+            owner_name TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # ایجاد جدول تراکنش‌های حسابداری
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS AccountingTransactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            transaction_type TEXT CHECK(transaction_type IN ('دریافت', 'پرداخت', 'انتقال', 'سود', 'هزینه', 'درآمد')),
+            from_account_id INTEGER,
+            to_account_id INTEGER,
+            amount DECIMAL(15, 2) NOT NULL,
+            description TEXT NOT NULL,
+            reference_id INTEGER,
+            reference_type TEXT,
+            employee TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (from_account_id) REFERENCES Accounts(id),
+            FOREIGN KEY (to_account_id) REFERENCES Accounts(id)
+        )
+        ''')
+        
+        # ایجاد جدول چک‌ها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            check_number TEXT NOT NULL,
+            bank_name TEXT NOT NULL,
+            branch TEXT,
+            account_number TEXT,
+            amount DECIMAL(15, 2) NOT NULL,
+            issue_date DATE,
+            due_date DATE NOT NULL,
+            drawer TEXT NOT NULL,
+            payee TEXT NOT NULL,
+            status TEXT CHECK(status IN ('وصول نشده', 'وصول شده', 'برگشتی', 'پاس شده', 'پاس نشده', 'بلوکه شده')) DEFAULT 'وصول نشده',
+            check_type TEXT CHECK(check_type IN ('دریافتی', 'پرداختی')) DEFAULT 'دریافتی',
+            related_invoice INTEGER,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (related_invoice) REFERENCES Invoices(id)
+        )
+        ''')
+        
+        # ایجاد جدول پنل پیامکی
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS SMSPanel (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            panel_name TEXT NOT NULL,
+            api_url TEXT,
+            api_key TEXT,
+            username TEXT,
+            password TEXT,
+            line_number TEXT,
+            is_active BOOLEAN DEFAULT 0,
+            balance INTEGER DEFAULT 0,
+            last_update DATETIME,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # ایجاد جدول پیام‌ها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reception_id INTEGER,
+            customer_id INTEGER NOT NULL,
+            message_type TEXT CHECK(message_type IN ('ورود دستگاه', 'آماده شدن', 'تحویل', 'تاخیر', 'پیام عمومی', 'اعلان')),
+            message_text TEXT NOT NULL,
+            send_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            send_status TEXT CHECK(send_status IN ('ارسال شده', 'در صف', 'خطا', 'ذخیره شده')) DEFAULT 'ذخیره شده',
+            response TEXT,
+            mobile_number TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (reception_id) REFERENCES Receptions(id),
+            FOREIGN KEY (customer_id) REFERENCES Persons(id)
+        )
+        ''')
+        
+        # ایجاد جدول کاربران سیستم
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            person_id INTEGER,
+            role TEXT CHECK(role IN ('مدیر', 'اپراتور', 'انباردار', 'حسابدار', 'مشاهده‌گر')) DEFAULT 'اپراتور',
+            is_active BOOLEAN DEFAULT 1,
+            last_login DATETIME,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (person_id) REFERENCES Persons(id)
+        )
+        ''')
+        
+        # ایجاد جدول تنظیمات امنیتی
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS SecuritySettings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            max_login_attempts INTEGER DEFAULT 3,
+            lockout_minutes INTEGER DEFAULT 15,
+            session_timeout_minutes INTEGER DEFAULT 30,
+            force_logout BOOLEAN DEFAULT 1,
+            remember_me BOOLEAN DEFAULT 1,
+            min_password_length INTEGER DEFAULT 8,
+            password_expiry_days INTEGER DEFAULT 90,
+            password_history_count INTEGER DEFAULT 5,
+            require_uppercase BOOLEAN DEFAULT 1,
+            require_lowercase BOOLEAN DEFAULT 1,
+            require_numbers BOOLEAN DEFAULT 1,
+            require_special BOOLEAN DEFAULT 0,
+            enable_2fa BOOLEAN DEFAULT 0,
+            twofa_method TEXT DEFAULT 'پیامک',
+            twofa_force_admin BOOLEAN DEFAULT 1,
+            twofa_force_all BOOLEAN DEFAULT 0,
+            encrypt_passwords BOOLEAN DEFAULT 1,
+            encrypt_financial BOOLEAN DEFAULT 1,
+            encrypt_personal BOOLEAN DEFAULT 0,
+            encrypt_backups BOOLEAN DEFAULT 1,
+            encryption_key_hash TEXT,
+            ssl_required BOOLEAN DEFAULT 0,
+            block_external BOOLEAN DEFAULT 1,
+            firewall_level TEXT DEFAULT 'متوسط',
+            allowed_ips TEXT,
+            audit_log BOOLEAN DEFAULT 1,
+            auto_logout BOOLEAN DEFAULT 1,
+            inactivity_minutes INTEGER DEFAULT 10,
+            show_warnings BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
-            # ایجاد جدول لاگ‌ها
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                table_name TEXT,
-                record_id INTEGER,
-                details TEXT,
-                ip_address TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(id)
-            )
-            ''')
-            
-            # درج تنظیمات پیش‌فرض با تاریخ شمسی
-            self.cursor.execute('''
-            INSERT OR IGNORE INTO Settings (id, app_name, date_format) 
-            VALUES (1, 'سیستم مدیریت تعمیرگاه لوازم خانگی', 'شمسی')
-            ''')
-            
+        # درج تنظیمات پیش‌فرض
+        self.cursor.execute('''
+        INSERT OR IGNORE INTO SecuritySettings (id) VALUES (1)
+        ''')
 
-            self.cursor.execute('''
-            INSERT OR IGNORE INTO Users (username, password, role) 
-            VALUES ('admin', 'admin123', 'مدیر')
-            ''')
+        # ایجاد جدول لاگ‌ها
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            table_name TEXT,
+            record_id INTEGER,
+            details TEXT,
+            ip_address TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES Users(id)
+        )
+        ''')
+        
+        # درج تنظیمات پیش‌فرض با تاریخ شمسی
+        self.cursor.execute('''
+        INSERT OR IGNORE INTO Settings (id, app_name, date_format) 
+        VALUES (1, 'سیستم مدیریت تعمیرگاه لوازم خانگی', 'شمسی')
+        ''')
+        
 
-            # جدول ثبت حذف انبار 
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS InventoryDeleteTransactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                warehouse_type TEXT NOT NULL,
-                item_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                unit_price REAL NOT NULL DEFAULT 0,
-                total_price REAL NOT NULL DEFAULT 0,
-                deletion_date TEXT NOT NULL,
-                deletion_reason TEXT,
-                description TEXT,
-                deleted_by TEXT DEFAULT 'سیستم',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+        self.cursor.execute('''
+        INSERT OR IGNORE INTO Users (username, password, role) 
+        VALUES ('admin', 'admin123', 'مدیر')
+        ''')
 
-                # جدول حذف‌های نرم
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS InventorySoftDeletions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                warehouse_type TEXT NOT NULL,
-                item_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                unit_price REAL NOT NULL DEFAULT 0,
-                total_price REAL NOT NULL DEFAULT 0,
-                deletion_date TEXT NOT NULL,
-                deletion_reason TEXT,
-                original_status TEXT NOT NULL,
-                new_status TEXT NOT NULL,
-                description TEXT,
-                deleted_by TEXT DEFAULT 'سیستم',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
+        # جدول ثبت حذف انبار 
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS InventoryDeleteTransactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            warehouse_type TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            unit_price REAL NOT NULL DEFAULT 0,
+            total_price REAL NOT NULL DEFAULT 0,
+            deletion_date TEXT NOT NULL,
+            deletion_reason TEXT,
+            description TEXT,
+            deleted_by TEXT DEFAULT 'سیستم',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
-            self.migrate_missing_columns()
-            # ایجاد ایندکس‌ها برای بهبود عملکرد
-            self.create_indexes()
-            
-            self.connection.commit()
-            self.database_initialized.emit(True)
-            return True
-            
-        except Exception as e:
-            self.error_occurred.emit(f"خطا در ایجاد دیتابیس: {str(e)}")
-            return False
-        finally:
-            if self.connection:
-                self.connection.close()
+        # جدول حذف‌های نرم
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS InventorySoftDeletions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            warehouse_type TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            unit_price REAL NOT NULL DEFAULT 0,
+            total_price REAL NOT NULL DEFAULT 0,
+            deletion_date TEXT NOT NULL,
+            deletion_reason TEXT,
+            original_status TEXT NOT NULL,
+            new_status TEXT NOT NULL,
+            description TEXT,
+            deleted_by TEXT DEFAULT 'سیستم',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
 
     def migrate_missing_columns(self):
-        """اضافه کردن ستون‌های گمشده به جداول"""
-        try:
-            self.connect()
-            
-            # 1. بررسی و اضافه کردن issue_date به جدول Checks (اگر وجود ندارد)
-            self.cursor.execute("PRAGMA table_info(Checks)")
-            check_columns = [col[1] for col in self.cursor.fetchall()]
-            
-            if 'issue_date' not in check_columns:
-                print("🔧 افزودن ستون issue_date به جدول Checks")
-                self.cursor.execute("ALTER TABLE Checks ADD COLUMN issue_date DATE DEFAULT CURRENT_DATE")
-                self.connection.commit()
-            
-            # 2. بررسی و اضافه کردن invoice_date به جدول Invoices (اگر وجود ندارد)
-            self.cursor.execute("PRAGMA table_info(Invoices)")
-            invoice_columns = [col[1] for col in self.cursor.fetchall()]
-            
-            if 'invoice_date' not in invoice_columns:
-                print("🔧 افزودن ستون invoice_date به جدول Invoices")
-                self.cursor.execute("ALTER TABLE Invoices ADD COLUMN invoice_date DATE DEFAULT CURRENT_DATE")
-                self.connection.commit()
-            
-            # 3. بروزرسانی داده‌های قدیمی
-            print("🔄 بروزرسانی داده‌های قدیمی...")
-            
-            # برای Checks: اگر issue_date خالی است، از due_date استفاده کن
-            self.cursor.execute("UPDATE Checks SET issue_date = due_date WHERE issue_date IS NULL")
-            
-            # برای Invoices: اگر invoice_date خالی است، از created_at استفاده کن
-            self.cursor.execute("UPDATE Invoices SET invoice_date = date(created_at) WHERE invoice_date IS NULL")
-            
-            self.connection.commit()
-            print("✅ مهاجرت ستون‌های گمشده انجام شد")
-            return True
-            
-        except Exception as e:
-            print(f"⚠️ خطا در مهاجرت ستون‌های گمشده: {e}")
-            return False
-        finally:
-            if self.connection:
-                self.connection.close()
-
+        """اضافه کردن ستون‌های تاریخ گمشده به جداول روی اتصال فعلی (self.cursor) - مرحله 2 مهاجرت"""
+        # ستون‌هایی که در دیتابیس‌های قدیمی نبودند: (جدول، ستون، مقدار اولیه ردیف‌های قدیمی)
+        # ALTER TABLE پیش‌فرض غیرثابت (CURRENT_DATE) را نمی‌پذیرد، پس مقدار اولیه با UPDATE پر می‌شود
+        columns = [
+            ('Checks', 'issue_date', 'due_date'),
+            ('Checks', 'check_date', 'due_date'),
+            ('Invoices', 'invoice_date', 'date(created_at)'),
+        ]
+        
+        for table, column, initial_value in columns:
+            self.cursor.execute(f"PRAGMA table_info({table})")
+            existing = [col[1] for col in self.cursor.fetchall()]
+            if not existing:
+                continue
+            
+            if column not in existing:
+                print(f"➕ افزودن {column} به {table}")
+                self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} DATE")
+            
+            # بروزرسانی داده‌های قدیمی
+            self.cursor.execute(
+                f"UPDATE {table} SET {column} = {initial_value} WHERE {column} IS NULL"
+            )
 
     def create_indexes(self):
-        """ایجاد ایندکس‌های مهم برای بهبود عملکرد"""
+        """ایجاد ایندکس‌های مهم برای بهبود عملکرد روی اتصال فعلی (self.cursor) - مرحله 3 مهاجرت"""
         indexes = [
             # ایندکس برای جدول پذیرش
             "CREATE INDEX IF NOT EXISTS idx_receptions_customer ON Receptions(customer_id)",
@@ -1189,6 +1434,179 @@ class DatabaseManager(QObject):
         for index_sql in indexes:
             self.cursor.execute(index_sql)
     
+    # ایندکس‌های جستجوی پذیرش‌ها (SmartSearchDialog و Reception.PAGE_QUERY)
+    SEARCH_INDEXES = [
+        "CREATE INDEX IF NOT EXISTS idx_persons_mobile ON Persons(mobile)",
+        "CREATE INDEX IF NOT EXISTS idx_persons_name ON Persons(last_name, first_name)",
+        "CREATE INDEX IF NOT EXISTS idx_receptions_number ON Receptions(reception_number)",
+        # مرتب‌سازی جدیدترین پذیرش‌ها با LIMIT بدون مرتب‌سازی کل جدول
+        "CREATE INDEX IF NOT EXISTS idx_receptions_date_time ON Receptions(reception_date, reception_time)",
+        "CREATE INDEX IF NOT EXISTS idx_receptions_status_date ON Receptions(status, reception_date, reception_time)",
+    ]
+    
+    # ایندکس ستون‌های تاریخ برای شرط‌های بازه‌ای date_filters (col >= ? AND col < ?)
+    DATE_INDEXES = [
+        "CREATE INDEX IF NOT EXISTS idx_invoices_date ON Invoices(invoice_date)",
+        "CREATE INDEX IF NOT EXISTS idx_checks_status_due ON Checks(status, due_date)",
+        "CREATE INDEX IF NOT EXISTS idx_acc_trans_date ON AccountingTransactions(transaction_date)",
+        "CREATE INDEX IF NOT EXISTS idx_persons_type_registration ON Persons(person_type, registration_date)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_trans_date ON InventoryTransactions(transaction_date)",
+        "CREATE INDEX IF NOT EXISTS idx_delete_date ON InventoryDeleteTransactions(deletion_date)",
+        "CREATE INDEX IF NOT EXISTS idx_soft_delete_date ON InventorySoftDeletions(deletion_date)",
+        "CREATE INDEX IF NOT EXISTS idx_partner_shares_date ON PartnerShares(calculation_date)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_date ON Messages(send_date)",
+        # صفحه‌بندی keyset لیست‌های فیلتر شده (database.pagination): فیلتر برابری + ترتیب تاریخ
+        "CREATE INDEX IF NOT EXISTS idx_acc_trans_type_date ON AccountingTransactions(transaction_type, transaction_date)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_status_date ON Invoices(payment_status, invoice_date)",
+    ]
+    
+    # کلید ماه شمسی (jalali_ym = سال * 100 + ماه) که با تریگر از ستون تاریخ پر می‌شود؛
+    # گزارش‌های ماهانه به جای تبدیل بازه ماه شمسی به میلادی روی همین کلید گروه‌بندی می‌کنند
+    JALALI_YM_COLUMNS = {
+        'AccountingTransactions': 'transaction_date',
+        'Invoices': 'invoice_date',
+        'Receptions': 'reception_date',
+        'PartnerShares': 'calculation_date',
+    }
+    
+    # ایندکس‌های پوششی: تجمیع‌های ماهانه بدون مراجعه به جدول اصلی اجرا می‌شوند
+    JALALI_YM_INDEXES = [
+        "CREATE INDEX IF NOT EXISTS idx_acc_trans_jalali_ym ON AccountingTransactions(jalali_ym, transaction_type, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_jalali_ym ON Invoices(jalali_ym, invoice_type, payment_status, total, paid_amount)",
+        "CREATE INDEX IF NOT EXISTS idx_receptions_jalali_ym ON Receptions(jalali_ym, status, customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_partner_shares_jalali_ym ON PartnerShares(jalali_ym, share_amount, share_percentage)",
+    ]
+    
+    # مقدار jalali_ym برای یک عبارت تاریخ: مقدار شمسی (سال تا 1500) مستقیماً خوانده می‌شود
+    # و مقدار میلادی با جستجو در جدول JalaliMonths (اول هر ماه شمسی به میلادی)
+    _JALALI_YM_EXPRESSION = """CASE
+            WHEN {value} IS NULL OR {value} = '' THEN NULL
+            WHEN CAST(substr({value}, 1, 4) AS INTEGER) BETWEEN 1300 AND 1500
+                THEN CAST(substr({value}, 1, 4) AS INTEGER) * 100 + CAST(substr({value}, 6, 2) AS INTEGER)
+            WHEN CAST(substr({value}, 1, 4) AS INTEGER) > 1500
+                THEN (SELECT jm.jalali_ym FROM JalaliMonths jm
+                      WHERE jm.start_date <= replace(substr({value}, 1, 10), '/', '-')
+                      ORDER BY jm.start_date DESC LIMIT 1)
+        END"""
+    
+    def _create_index_list(self, indexes, title):
+        """ایجاد لیستی از ایندکس‌ها روی اتصال فعلی (self.cursor)"""
+        for index_sql in indexes:
+            try:
+                self.cursor.execute(index_sql)
+            except sqlite3.Error as e:
+                print(f"⚠️ خطا در ایجاد ایندکس {title}: {e}")
+    
+    def create_search_indexes(self):
+        """ایجاد ایندکس‌های جستجو روی اتصال فعلی (self.cursor)"""
+        self._create_index_list(self.SEARCH_INDEXES, "جستجو")
+    
+    def create_date_indexes(self):
+        """ایجاد ایندکس‌های ستون‌های تاریخ روی اتصال فعلی (self.cursor)"""
+        self._create_index_list(self.DATE_INDEXES, "تاریخ")
+    
+    def create_jalali_months_table(self):
+        """جدول مرجع اول ماه‌های شمسی 1300 تا 1500 به میلادی روی اتصال فعلی (self.cursor)"""
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS JalaliMonths (
+            jalali_ym INTEGER PRIMARY KEY,
+            start_date TEXT NOT NULL UNIQUE
+        )
+        """)
+        
+        expected = (jalali_calendar.JALALI_MAX_YEAR - jalali_calendar.JALALI_MIN_YEAR + 1) * 12
+        self.cursor.execute("SELECT COUNT(*) FROM JalaliMonths")
+        if self.cursor.fetchone()[0] == expected:
+            return
+        
+        rows = [
+            (year * 100 + month,
+             date.fromordinal(jalali_calendar.jalali_to_ordinal(year, month, 1)).isoformat())
+            for year in range(jalali_calendar.JALALI_MIN_YEAR, jalali_calendar.JALALI_MAX_YEAR + 1)
+            for month in range(1, 13)
+        ]
+        self.cursor.executemany(
+            "INSERT OR REPLACE INTO JalaliMonths (jalali_ym, start_date) VALUES (?, ?)", rows
+        )
+    
+    def create_jalali_month_columns(self):
+        """
+        ستون jalali_ym، تریگرهای نگهداری و ایندکس‌های پوششی آن روی اتصال فعلی (self.cursor)
+        
+        تریگرها فقط SQL هستند (بدون تابع پایتونی)، پس نوشتن از هر اتصالی ستون را به‌روز نگه می‌دارد.
+        ردیف‌های قدیمی که هنوز کلید ندارند در همین مرحله پر می‌شوند.
+        """
+        try:
+            self.create_jalali_months_table()
+        except sqlite3.Error as e:
+            print(f"⚠️ خطا در ایجاد جدول ماه‌های شمسی: {e}")
+            return
+        
+        for table, date_column in self.JALALI_YM_COLUMNS.items():
+            try:
+                self.cursor.execute(f"PRAGMA table_info({table})")
+                columns = [col[1] for col in self.cursor.fetchall()]
+                if not columns:
+                    continue
+                
+                if 'jalali_ym' not in columns:
+                    print(f"➕ افزودن jalali_ym به {table}")
+                    self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN jalali_ym INTEGER")
+                
+                new_value = self._JALALI_YM_EXPRESSION.format(value=f"NEW.{date_column}")
+                self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_jalali_ym_insert
+                AFTER INSERT ON {table}
+                FOR EACH ROW WHEN NEW.{date_column} IS NOT NULL
+                BEGIN
+                    UPDATE {table} SET jalali_ym = {new_value} WHERE id = NEW.id;
+                END
+                """)
+                self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_jalali_ym_update
+                AFTER UPDATE OF {date_column} ON {table}
+                FOR EACH ROW
+                BEGIN
+                    UPDATE {table} SET jalali_ym = {new_value} WHERE id = NEW.id;
+                END
+                """)
+                
+                self.cursor.execute(f"""
+                UPDATE {table}
+                SET jalali_ym = {self._JALALI_YM_EXPRESSION.format(value=date_column)}
+                WHERE jalali_ym IS NULL AND {date_column} IS NOT NULL
+                """)
+                if self.cursor.rowcount > 0:
+                    print(f"🔄 مقداردهی jalali_ym برای {self.cursor.rowcount} ردیف {table}")
+            except sqlite3.Error as e:
+                print(f"⚠️ خطا در ایجاد ستون ماه شمسی {table}: {e}")
+        
+        self._create_index_list(self.JALALI_YM_INDEXES, "ماه شمسی")
+    
+    def rebuild_daily_summaries(self):
+        """بازسازی کامل خلاصه‌های روزانه از داده اصلی (برای ترمیم)"""
+        try:
+            with self.transaction() as connection:
+                daily_summaries.rebuild(connection.cursor())
+            print("✅ خلاصه‌های روزانه بازسازی شد")
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ خطا در بازسازی خلاصه‌های روزانه: {e}")
+            return False
+    
+    def reconcile_account_ledger(self):
+        """تطبیق دفتر موجودی با Accounts.current_balance؛ خروجی: حساب‌های ناهماهنگ"""
+        try:
+            for item in account_ledger.find_misplaced_openings(self):
+                print(f"⚠️ ردیف افتتاحیه حساب {item['account_id']} بعد از اولین ردیف آن است ({item['entry_date']})")
+            mismatches = account_ledger.reconcile(self)
+            for item in mismatches:
+                print(f"⚠️ اختلاف دفتر حساب {item['account_id']}: {item['difference']:,.0f} ریال")
+            return mismatches
+        except sqlite3.Error as e:
+            print(f"⚠️ خطا در تطبیق دفتر موجودی حساب‌ها: {e}")
+            return []
+    
     def get_table_structure(self):
         """دریافت ساختار تمام جداول"""
         try:
@@ -1219,8 +1637,9 @@ class DatabaseManager(QObject):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 backup_path = f"backup_repair_shop_{timestamp}.db"
             
-            # ایجاد کپی از فایل دیتابیس
+            # انتقال تغییرات WAL به فایل اصلی و ایجاد کپی از فایل دیتابیس
             import shutil
+            self.checkpoint()
             shutil.copy2(self.db_name, backup_path)
             return backup_path
             
@@ -1234,15 +1653,16 @@ class DatabaseManager(QObject):
             if not os.path.exists(backup_file):
                 return False
             
-            # بستن اتصال فعلی
-            if self.connection:
-                self.connection.close()
+            # بستن اتصال فعلی و اتصال‌های استخر
+            self.close()
             
             # جایگزینی فایل دیتابیس
             import shutil
             shutil.copy2(backup_file, self.db_name)
             
             # اتصال مجدد
+            if self.pool is not None:
+                self.pool.reopen()
             self.connect()
             return True
             
@@ -0,0 +1,165 @@
+# date_filters.py - شرط‌های بازه تاریخ قابل استفاده با ایندکس
+"""
+ساخت شرط‌های بازه‌ای نیمه‌باز برای ستون‌های تاریخ
+
+تاریخ‌ها در دیتابیس به صورت ISO ذخیره می‌شوند (YYYY-MM-DD یا
+YYYY-MM-DD HH:MM:SS) و ترتیب رشته‌ای آن‌ها همان ترتیب زمانی است؛ پس به جای
+DATE(col) = ? یا strftime('%Y-%m', col) = ? که ایندکس ستون را بی‌اثر می‌کنند،
+شرط col >= start AND col < end ساخته می‌شود که SQLite با SEARCH روی ایندکس
+اجرا می‌کند و مقادیر همراه با زمان را هم درست در بر می‌گیرد.
+
+ورودی روزها می‌تواند date/datetime، رشته میلادی یا رشته شمسی باشد.
+"""
+
+from datetime import date, timedelta
+
+from . import jalali_calendar
+
+
+def to_iso_day(value):
+    """تبدیل روز (میلادی یا شمسی) به رشته YYYY-MM-DD؛ برای ورودی نامعتبر None"""
+    if value is None or value == "":
+        return None
+    return jalali_calendar.to_gregorian(value)
+
+
+def _next_day(iso_day):
+    return (date.fromisoformat(iso_day) + timedelta(days=1)).isoformat()
+
+
+def day_start(day):
+    """
+    مرز پایین روز (جایگزین DATE(col) >= ?)
+
+    مقدار غیرقابل تبدیل همان‌طور که هست برگردانده می‌شود.
+    """
+    iso_day = to_iso_day(day)
+    return iso_day if iso_day is not None else str(day)
+
+
+def next_day_start(day):
+    """مرز بالای انحصاری روز (جایگزین DATE(col) <= ? با col < ?)"""
+    iso_day = to_iso_day(day)
+    return _next_day(iso_day) if iso_day is not None else str(day)
+
+
+# ---------- مرزهای نیمه‌باز [start, end) ----------
+
+def day_bounds(day):
+    """بازه یک روز"""
+    return day_start(day), next_day_start(day)
+
+
+def days_bounds(start_day=None, end_day=None):
+    """بازه روزهای start_day تا end_day (هر دو شامل)؛ مرز خالی None می‌ماند"""
+    start = day_start(start_day) if start_day else None
+    end = next_day_start(end_day) if end_day else None
+    return start, end
+
+
+def month_bounds(year, month):
+    """بازه یک ماه میلادی"""
+    year, month = int(year), int(month)
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+
+def year_bounds(year):
+    """بازه یک سال میلادی"""
+    year = int(year)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def recent_months_start(months, today=None):
+    """اول ماه میلادی months-1 ماه قبل (شروع پنجره months ماه اخیر شامل ماه جاری)"""
+    today = today or date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}-01"
+
+
+def jalali_month_bounds(year, month):
+    """بازه میلادی یک ماه شمسی"""
+    year, month = int(year), int(month)
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return (
+        jalali_calendar.to_gregorian(f"{year}/{month}/1"),
+        jalali_calendar.to_gregorian(f"{next_year}/{next_month}/1"),
+    )
+
+
+def jalali_year_bounds(year):
+    """بازه میلادی یک سال شمسی"""
+    year = int(year)
+    return (
+        jalali_calendar.to_gregorian(f"{year}/1/1"),
+        jalali_calendar.to_gregorian(f"{year + 1}/1/1"),
+    )
+
+
+# ---------- کلید ماه شمسی (ستون jalali_ym) ----------
+
+def jalali_ym(year, month):
+    """کلید عددی ماه شمسی: سال * 100 + ماه (مثلاً 140307)"""
+    return int(year) * 100 + int(month)
+
+
+def split_jalali_ym(key):
+    """(سال، ماه) از کلید jalali_ym"""
+    return divmod(int(key), 100)
+
+
+def jalali_ym_of(value):
+    """کلید ماه شمسی یک تاریخ میلادی یا شمسی؛ برای ورودی نامعتبر None"""
+    parts = jalali_calendar.jalali_parts(value) if value else None
+    return jalali_ym(parts[0], parts[1]) if parts else None
+
+
+def shift_jalali_ym(key, months):
+    """کلید ماه شمسی months ماه بعد (یا قبل با مقدار منفی)"""
+    year, month = split_jalali_ym(key)
+    month_index = year * 12 + month - 1 + months
+    return jalali_ym(month_index // 12, month_index % 12 + 1)
+
+
+def recent_jalali_ym_start(months, today=None):
+    """کلید اولین ماه شمسی در پنجره months ماه اخیر (شامل ماه جاری)"""
+    return shift_jalali_ym(jalali_ym_of(today or date.today()), -(months - 1))
+
+
+# ---------- شرط‌های SQL ----------
+
+def range_condition(column, start=None, end=None):
+    """
+    شرط نیمه‌باز column >= start AND column < end
+
+    خروجی (sql, params) است؛ اگر هر دو مرز خالی باشند sql برابر '1=1' است.
+    """
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{column} < ?")
+        params.append(end)
+    return (" AND ".join(conditions) or "1=1"), params
+
+
+def day_condition(column, day):
+    """جایگزین DATE(column) = ?"""
+    return range_condition(column, *day_bounds(day))
+
+
+def days_condition(column, start_day=None, end_day=None):
+    """جایگزین DATE(column) BETWEEN ? AND ? (یا >= / <= جداگانه)"""
+    return range_condition(column, *days_bounds(start_day, end_day))
+
+
+def month_condition(column, year, month):
+    """جایگزین strftime('%Y-%m', column) = ?"""
+    return range_condition(column, *month_bounds(year, month))
+
+
+def year_condition(column, year):
+    """جایگزین strftime('%Y', column) = ?"""
+    return range_condition(column, *year_bounds(year))
@@ -0,0 +1,187 @@
+# inventory_ledger.py - دفتر یکپارچه تراکنش‌های انبار
+"""
+دفتر یکپارچه حرکت‌های انبار (InventoryLedger)
+
+تراکنش‌های انبار در سه جدول ثبت می‌شوند: InventoryTransactions (خرید، فروش،
+برگشت، بازیابی و ...)، InventoryDeleteTransactions (حذف) و
+InventorySoftDeletions (حذف نرم). به جای UNION این سه جدول در هر بار خواندن،
+هر ردیف آن‌ها با تریگر در InventoryLedger هم ثبت می‌شود:
+
+- نویسنده‌ها (_add_inventory_transaction، _record_delete_transaction،
+  _record_soft_delete_transaction، _log_restoration_transaction و ...) تغییری
+  لازم ندارند؛ درج، ویرایش و حذف هر ردیف منبع از هر اتصالی در دفتر اعمال می‌شود.
+- (source, source_id) ردیف منبع را مشخص می‌کند و شرح ردیف‌های حذف همان
+  متنی است که فرم‌ها قبلاً از UNION می‌گرفتند.
+- خواندن بازه تاریخ و صفحه‌بندی روی ایندکس‌های (transaction_date)،
+  (warehouse_type, transaction_date) و (item_id, transaction_date) انجام می‌شود.
+
+اگر دفتر با جداول منبع ناهماهنگ شود، rebuild() آن را از نو می‌سازد:
+
+    python -m database.inventory_ledger [مسیر دیتابیس]
+"""
+
+import sqlite3
+import sys
+
+
+SOURCE_MAIN = 'main'
+SOURCE_DELETE = 'delete'
+SOURCE_SOFT_DELETE = 'soft_delete'
+
+LEDGER_TABLE = """
+    CREATE TABLE IF NOT EXISTS InventoryLedger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        transaction_type TEXT,
+        warehouse_type TEXT,
+        item_id INTEGER,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        unit_price REAL NOT NULL DEFAULT 0,
+        total_price REAL NOT NULL DEFAULT 0,
+        transaction_date TEXT NOT NULL,
+        related_document TEXT,
+        description TEXT,
+        employee TEXT,
+        created_at TIMESTAMP
+    )
+"""
+
+LEDGER_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_ledger_source ON InventoryLedger(source, source_id)",
+    # rowid (id) انتهای هر ایندکس است، پس ORDER BY transaction_date DESC, id DESC هم از ایندکس می‌آید
+    "CREATE INDEX IF NOT EXISTS idx_inventory_ledger_date ON InventoryLedger(transaction_date)",
+    "CREATE INDEX IF NOT EXISTS idx_inventory_ledger_warehouse_date ON InventoryLedger(warehouse_type, transaction_date)",
+    "CREATE INDEX IF NOT EXISTS idx_inventory_ledger_item_date ON InventoryLedger(item_id, transaction_date)",
+]
+
+_COLUMNS = """source, source_id, transaction_type, warehouse_type, item_id, quantity,
+    unit_price, total_price, transaction_date, related_document, description, employee, created_at"""
+
+
+# ستون‌های دفتر برای یک ردیف هر جدول منبع ({row} یعنی NEW در تریگر یا نام جدول در بازسازی)
+def _main_values(row):
+    return f"""
+        '{SOURCE_MAIN}', {row}.id, {row}.transaction_type, {row}.warehouse_type, {row}.item_id,
+        COALESCE({row}.quantity, 0), COALESCE({row}.unit_price, 0), COALESCE({row}.total_price, 0),
+        COALESCE({row}.transaction_date, {row}.created_at, ''),
+        {row}.related_document, {row}.description, {row}.employee, {row}.created_at
+    """
+
+
+def _delete_values(row):
+    return f"""
+        '{SOURCE_DELETE}', {row}.id, 'حذف', {row}.warehouse_type, {row}.item_id,
+        COALESCE({row}.quantity, 0), COALESCE({row}.unit_price, 0), COALESCE({row}.total_price, 0),
+        COALESCE({row}.deletion_date, {row}.created_at, ''),
+        'حذف دستی',
+        CASE
+            WHEN {row}.description IS NOT NULL THEN 'حذف - ' || {row}.description
+            ELSE 'حذف - ' || {row}.deletion_reason
+        END,
+        {row}.deleted_by, {row}.created_at
+    """
+
+
+def _soft_delete_values(row):
+    return f"""
+        '{SOURCE_SOFT_DELETE}', {row}.id, 'حذف نرم', {row}.warehouse_type, {row}.item_id,
+        COALESCE({row}.quantity, 0), COALESCE({row}.unit_price, 0), COALESCE({row}.total_price, 0),
+        COALESCE({row}.deletion_date, {row}.created_at, ''),
+        'حذف نرم',
+        CASE
+            WHEN {row}.description IS NOT NULL THEN 'حذف نرم - ' || {row}.description
+            ELSE 'حذف نرم - ' || {row}.deletion_reason || ' (از ' || {row}.original_status || ' به ' || {row}.new_status || ')'
+        END,
+        {row}.deleted_by, {row}.created_at
+    """
+
+
+_SOURCES = [
+    ('InventoryTransactions', SOURCE_MAIN, _main_values),
+    ('InventoryDeleteTransactions', SOURCE_DELETE, _delete_values),
+    ('InventorySoftDeletions', SOURCE_SOFT_DELETE, _soft_delete_values),
+]
+
+
+def _trigger_statements():
+    for table, source, values in _SOURCES:
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_ledger_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT OR REPLACE INTO InventoryLedger ({_COLUMNS})
+            VALUES ({values('NEW')});
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_ledger_update
+        AFTER UPDATE ON {table}
+        BEGIN
+            DELETE FROM InventoryLedger WHERE source = '{source}' AND source_id = OLD.id;
+            INSERT INTO InventoryLedger ({_COLUMNS})
+            VALUES ({values('NEW')});
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_ledger_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM InventoryLedger WHERE source = '{source}' AND source_id = OLD.id;
+        END
+        """
+
+
+# ---------- ساخت و بازسازی ----------
+
+def _existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_ledger_table(cursor):
+    """
+    ایجاد جدول دفتر، ایندکس‌ها و تریگرهای آن روی cursor داده شده
+
+    اگر جدول تازه ساخته شود، دفتر از روی سه جدول منبع پر می‌شود.
+    خروجی: True اگر دفتر ساخته شد.
+    """
+    existing = _existing_tables(cursor)
+    if not all(table in existing for table, _, _ in _SOURCES):
+        return False
+
+    created = 'InventoryLedger' not in existing
+    cursor.execute(LEDGER_TABLE)
+    for index_sql in LEDGER_INDEXES:
+        cursor.execute(index_sql)
+    for trigger_sql in _trigger_statements():
+        cursor.execute(trigger_sql)
+
+    if created:
+        rebuild(cursor)
+    return created
+
+
+def rebuild(cursor):
+    """بازسازی کامل دفتر از جداول منبع (به ترتیب تاریخ، تا id دفتر هم زمانی باشد)"""
+    cursor.execute("DELETE FROM InventoryLedger")
+    selects = " UNION ALL ".join(
+        f"SELECT {values(table)} FROM {table}" for table, _, values in _SOURCES
+    )
+    cursor.execute(f"""
+        INSERT INTO InventoryLedger ({_COLUMNS})
+        SELECT * FROM ({selects}) ORDER BY 9, 1, 2
+    """)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        cursor = connection.cursor()
+        if not create_ledger_table(cursor):
+            rebuild(cursor)
+        connection.commit()
+        print(f"✅ دفتر تراکنش‌های انبار {db_path} بازسازی شد")
+    finally:
+        connection.close()
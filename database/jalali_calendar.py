@@ -0,0 +1,289 @@
+# jalali_calendar.py - موتور مشترک تبدیل تاریخ میلادی و شمسی
+"""
+تبدیل سریع تاریخ میلادی ↔ شمسی برای کل برنامه
+
+- برای سال‌های شمسی 1300 تا 1500 یک جدول از پیش محاسبه شده (شماره روز
+  میلادی اول فروردین هر سال) ساخته می‌شود؛ تبدیل در این بازه فقط چند عمل
+  حسابی و یک جستجوی دودویی است و به jdatetime نیازی ندارد.
+- تجزیه رشته‌های تاریخ با یک LRU محدود کش می‌شود، چون ستون‌های جدول‌ها
+  معمولاً تاریخ‌های تکراری زیادی دارند.
+- تابع‌های دسته‌ای (to_jalali_many / convert_column) کل یک ستون را یک‌جا
+  تبدیل می‌کنند و هر مقدار تکراری را فقط یک بار محاسبه می‌کنند.
+
+قاعده تشخیص: سال بین 1300 و 1500 شمسی و سال بزرگتر از 1500 میلادی در نظر
+گرفته می‌شود (همان قاعده‌ای که فرم‌های برنامه از قبل استفاده می‌کردند).
+"""
+
+import re
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+
+import jdatetime
+
+
+JALALI_MIN_YEAR = 1300
+JALALI_MAX_YEAR = 1500
+
+DISPLAY_FORMAT = "%Y/%m/%d"      # نمایش تاریخ شمسی
+STORAGE_FORMAT = "%Y-%m-%d"      # ذخیره تاریخ میلادی در دیتابیس
+
+PARSE_CACHE_SIZE = 4096
+
+_NUMBERS_RE = re.compile(r'\d+')
+
+# روز شروع هر ماه شمسی از ابتدای سال (شش ماه اول 31 روزه، پنج ماه بعد 30 روزه)
+_MONTH_OFFSETS = tuple(
+    (month - 1) * 31 if month <= 7 else 186 + (month - 7) * 30
+    for month in range(1, 13)
+)
+
+
+def _build_year_starts():
+    """شماره روز (ordinal میلادی) اول فروردین هر سال از 1300 تا 1501"""
+    return tuple(
+        jdatetime.date(year, 1, 1).togregorian().toordinal()
+        for year in range(JALALI_MIN_YEAR, JALALI_MAX_YEAR + 2)
+    )
+
+
+_YEAR_STARTS = _build_year_starts()
+_FIRST_ORDINAL = _YEAR_STARTS[0]
+_LAST_ORDINAL = _YEAR_STARTS[-1] - 1
+
+
+# ---------- تبدیل عددی ----------
+
+def jalali_to_ordinal(year, month, day):
+    """شماره روز میلادی یک تاریخ شمسی؛ برای تاریخ نامعتبر None"""
+    if not 1 <= month <= 12 or day < 1:
+        return None
+
+    if JALALI_MIN_YEAR <= year <= JALALI_MAX_YEAR:
+        index = year - JALALI_MIN_YEAR
+        year_length = _YEAR_STARTS[index + 1] - _YEAR_STARTS[index]
+        month_length = 31 if month <= 6 else 30 if month <= 11 else year_length - 336
+        if day > month_length:
+            return None
+        return _YEAR_STARTS[index] + _MONTH_OFFSETS[month - 1] + day - 1
+
+    try:
+        return jdatetime.date(year, month, day).togregorian().toordinal()
+    except (ValueError, OverflowError):
+        return None
+
+
+def ordinal_to_jalali(ordinal):
+    """تاریخ شمسی (سال، ماه، روز) برای یک شماره روز میلادی"""
+    if _FIRST_ORDINAL <= ordinal <= _LAST_ORDINAL:
+        index = bisect_right(_YEAR_STARTS, ordinal) - 1
+        day_of_year = ordinal - _YEAR_STARTS[index]
+        if day_of_year < 186:
+            month, day = divmod(day_of_year, 31)
+        else:
+            month, day = divmod(day_of_year - 186, 30)
+            month += 6
+        return JALALI_MIN_YEAR + index, month + 1, day + 1
+
+    jalali = jdatetime.date.fromgregorian(date=date.fromordinal(ordinal))
+    return jalali.year, jalali.month, jalali.day
+
+
+# ---------- تجزیه رشته ----------
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date_parts(text):
+    """
+    استخراج (سال، ماه، روز) از رشته تاریخ
+
+    فرمت‌های YYYY-MM-DD و YYYY/MM/DD (با یا بدون بخش زمان) و DD/MM/YYYY
+    پذیرفته می‌شوند. برای رشته نامعتبر None برمی‌گردد.
+    """
+    numbers = _NUMBERS_RE.findall(text)
+    if len(numbers) < 3:
+        return None
+
+    if len(numbers[0]) <= 2 and len(numbers[2]) == 4:
+        day, month, year = map(int, numbers[:3])
+    else:
+        year, month, day = map(int, numbers[:3])
+    return year, month, day
+
+
+def _date_parts(value):
+    """(سال، ماه، روز) از رشته، date/datetime یا jdatetime"""
+    if isinstance(value, str):
+        return parse_date_parts(value.strip())
+    if isinstance(value, (date, jdatetime.date)):
+        return value.year, value.month, value.day
+    return None
+
+
+def _format(year, month, day, format_str, jalali):
+    if format_str == DISPLAY_FORMAT:
+        return f"{year:04d}/{month:02d}/{day:02d}"
+    if format_str == STORAGE_FORMAT:
+        return f"{year:04d}-{month:02d}-{day:02d}"
+    if jalali:
+        return jdatetime.date(year, month, day).strftime(format_str)
+    return date(year, month, day).strftime(format_str)
+
+
+def _is_jalali_year(year):
+    return JALALI_MIN_YEAR <= year <= JALALI_MAX_YEAR
+
+
+# ---------- میلادی به شمسی ----------
+
+def jalali_parts(value):
+    """(سال، ماه، روز) شمسی برای یک تاریخ میلادی یا شمسی؛ در صورت خطا None"""
+    if isinstance(value, jdatetime.date):
+        return value.year, value.month, value.day
+    if isinstance(value, date):
+        return ordinal_to_jalali(value.toordinal())
+
+    parts = _date_parts(value)
+    if parts is None:
+        return None
+
+    year, month, day = parts
+    if year <= JALALI_MAX_YEAR:
+        # از قبل شمسی است
+        if jalali_to_ordinal(year, month, day) is None:
+            return None
+        return parts
+
+    try:
+        ordinal = date(year, month, day).toordinal()
+    except ValueError:
+        return None
+    return ordinal_to_jalali(ordinal)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _text_to_jalali(text, format_str):
+    parts = jalali_parts(text)
+    if parts is None:
+        return None
+    return _format(*parts, format_str, jalali=True)
+
+
+def to_jalali(value, format_str=DISPLAY_FORMAT):
+    """
+    تبدیل تاریخ میلادی (رشته، date یا datetime) به رشته شمسی برای نمایش
+
+    مقدار خالی رشته خالی و مقدار غیرقابل تبدیل همان متن ورودی را برمی‌گرداند.
+    """
+    if value is None or value == "":
+        return ""
+
+    if isinstance(value, str):
+        converted = _text_to_jalali(value.strip(), format_str)
+    else:
+        parts = jalali_parts(value)
+        converted = _format(*parts, format_str, jalali=True) if parts else None
+
+    return str(value) if converted is None else converted
+
+
+def to_jalali_date(value):
+    """تبدیل تاریخ میلادی به شیء jdatetime.date؛ در صورت خطا None"""
+    parts = jalali_parts(value)
+    return jdatetime.date(*parts) if parts else None
+
+
+def to_jalali_many(values, format_str=DISPLAY_FORMAT):
+    """تبدیل دسته‌ای یک ستون تاریخ میلادی به شمسی (هر مقدار تکراری یک بار)"""
+    converted = {}
+    result = []
+    for value in values:
+        if value not in converted:
+            converted[value] = to_jalali(value, format_str)
+        result.append(converted[value])
+    return result
+
+
+# ---------- شمسی به میلادی ----------
+
+def gregorian_parts(value):
+    """(سال، ماه، روز) میلادی برای یک تاریخ شمسی یا میلادی؛ در صورت خطا None"""
+    parts = _date_parts(value)
+    if parts is None:
+        return None
+
+    year, month, day = parts
+    if isinstance(value, jdatetime.date) or _is_jalali_year(year):
+        ordinal = jalali_to_ordinal(year, month, day)
+        if ordinal is None:
+            return None
+        gregorian = date.fromordinal(ordinal)
+        return gregorian.year, gregorian.month, gregorian.day
+
+    # از قبل میلادی است
+    try:
+        date(year, month, day)
+    except ValueError:
+        return None
+    return parts
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _text_to_gregorian(text, format_str):
+    parts = gregorian_parts(text)
+    if parts is None:
+        return None
+    return _format(*parts, format_str, jalali=False)
+
+
+def to_gregorian(value, format_str=STORAGE_FORMAT):
+    """
+    تبدیل تاریخ شمسی (رشته یا jdatetime) به رشته میلادی برای ذخیره
+
+    برای مقدار خالی یا نامعتبر None برمی‌گردد تا فراخواننده رفتار خود را انتخاب کند.
+    """
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, str):
+        return _text_to_gregorian(value.strip(), format_str)
+
+    parts = gregorian_parts(value)
+    return _format(*parts, format_str, jalali=False) if parts else None
+
+
+def to_gregorian_date(value):
+    """تبدیل تاریخ شمسی به شیء datetime.date؛ در صورت خطا None"""
+    parts = gregorian_parts(value)
+    return date(*parts) if parts else None
+
+
+def to_gregorian_many(values, format_str=STORAGE_FORMAT):
+    """تبدیل دسته‌ای یک ستون تاریخ شمسی به میلادی (هر مقدار تکراری یک بار)"""
+    converted = {}
+    result = []
+    for value in values:
+        if value not in converted:
+            converted[value] = to_gregorian(value, format_str)
+        result.append(converted[value])
+    return result
+
+
+def convert_column(rows, key, target_key=None, format_str=DISPLAY_FORMAT, to_shamsi=True):
+    """
+    تبدیل یک ستون از لیست دیکشنری‌ها در جا
+
+    مقدار تبدیل شده در target_key (پیش‌فرض همان key) نوشته می‌شود و rows برگردانده می‌شود.
+    """
+    convert_many = to_jalali_many if to_shamsi else to_gregorian_many
+    values = convert_many((row.get(key) for row in rows), format_str)
+    target_key = target_key or key
+    for row, value in zip(rows, values):
+        row[target_key] = value
+    return rows
+
+
+def clear_cache():
+    """پاک کردن کش تجزیه و تبدیل رشته‌ها"""
+    parse_date_parts.cache_clear()
+    _text_to_jalali.cache_clear()
+    _text_to_gregorian.cache_clear()
@@ -0,0 +1,188 @@
+# migrations.py - مهاجرت‌های نسخه‌دار ساختار دیتابیس
+"""
+مهاجرت‌های نسخه‌دار ساختار دیتابیس
+
+نسخه ساختار هر دیتابیس در PRAGMA user_version (سرآیند فایل) نگهداری می‌شود.
+مراحل MIGRATIONS به ترتیب نسخه اجرا می‌شوند و بعد از هر مرحله موفق، نسخه
+دیتابیس همان شماره مرحله می‌شود:
+
+- دیتابیس به‌روز: فقط یک خواندن user_version؛ هیچ DDL یا PRAGMA table_info اجرا نمی‌شود.
+- دیتابیس قدیمی (نسخه 0، قبل از این ماژول) یا تازه: همه مراحل یک بار اجرا می‌شوند.
+  مراحل با IF NOT EXISTS و بررسی ستون‌ها نوشته شده‌اند، پس اجرای دوباره آن‌ها روی
+  دیتابیسی که بخشی از ساختار را دارد بی‌خطر است.
+- هر مرحله داخل یک تراکنش صریح (BEGIN IMMEDIATE) اجرا می‌شود و نسخه در همان تراکنش
+  ثبت می‌شود؛ اگر مرحله‌ای خطا بدهد، همه تغییرات آن (از جمله CREATE/ALTER) برگردانده
+  می‌شوند، نسخه روی آخرین مرحله موفق می‌ماند و اجرای بعدی از همان مرحله ادامه می‌دهد.
+  (sqlite3 پایتون برای DDL تراکنش ضمنی باز نمی‌کند، پس BEGIN صریح لازم است و مراحل
+  نباید خودشان commit کنند.)
+
+زمان اجرای هر مرحله و کل مهاجرت چاپ می‌شود.
+
+تغییر ساختار جدید: تابع مرحله را اضافه کنید و آن را با شماره بعدی در انتهای
+MIGRATIONS بگذارید (شماره‌ها و ترتیب مراحل قبلی نباید تغییر کنند).
+
+نمایش نسخه و مراحل باقی‌مانده یا اجرای آن‌ها:
+
+    python -m database.migrations [مسیر دیتابیس] [--run]
+"""
+
+import sqlite3
+import sys
+import time
+
+from . import daily_summaries
+from . import account_ledger
+from . import inventory_ledger
+from . import part_stock
+from . import search_index
+from . import audit_log
+from . import sms_outbox
+
+
+# ---------- مراحل (هر مرحله روی اتصال db.cursor اجرا می‌شود) ----------
+
+def _base_schema(db):
+    db.create_base_schema()
+
+
+def _missing_columns(db):
+    db.migrate_missing_columns()
+
+
+def _base_indexes(db):
+    db.create_indexes()
+
+
+def _search_and_date_indexes(db):
+    db.create_search_indexes()
+    db.create_date_indexes()
+
+
+def _jalali_month_columns(db):
+    db.create_jalali_month_columns()
+
+
+def _daily_summaries(db):
+    if daily_summaries.create_summary_tables(db.cursor):
+        print("🔄 خلاصه‌های روزانه از روی تراکنش‌ها و فاکتورها ساخته شد")
+
+
+def _account_ledger(db):
+    if account_ledger.create_ledger_table(db.cursor):
+        print("🔄 دفتر موجودی حساب‌ها از روی تراکنش‌ها ساخته شد")
+
+
+def _account_ledger_openings(db):
+    moved = account_ledger.fix_openings(db.cursor)
+    if moved:
+        print(f"🔄 ردیف افتتاحیه {len(moved)} حساب به اول دفتر موجودی منتقل شد")
+
+
+def _inventory_ledger(db):
+    if inventory_ledger.create_ledger_table(db.cursor):
+        print("🔄 دفتر تراکنش‌های انبار از روی جداول تراکنش و حذف ساخته شد")
+
+
+def _part_stock(db):
+    if part_stock.create_stock_table(db.cursor):
+        print("🔄 موجودی جاری قطعات از روی انبارهای قطعات ساخته شد")
+
+
+def _search_index(db):
+    created = search_index.create_search_tables(db.cursor)
+    if created:
+        print(f"🔄 ایندکس جستجوی {', '.join(created)} ساخته شد")
+
+
+def _log_indexes(db):
+    audit_log.create_log_indexes(db.cursor)
+
+
+def _sms_outbox(db):
+    sms_outbox.create_outbox_table(db.cursor)
+
+
+# (نسخه، عنوان، تابع مرحله) - فقط به انتها اضافه شود
+MIGRATIONS = [
+    (1, "جداول پایه و مقادیر پیش‌فرض", _base_schema),
+    (2, "ستون‌های تاریخ چک‌ها و فاکتورها", _missing_columns),
+    (3, "ایندکس‌های پایه", _base_indexes),
+    (4, "ایندکس‌های جستجو و ستون‌های تاریخ", _search_and_date_indexes),
+    (5, "کلید ماه شمسی (jalali_ym)", _jalali_month_columns),
+    (6, "خلاصه‌های روزانه", _daily_summaries),
+    (7, "دفتر موجودی حساب‌ها", _account_ledger),
+    (8, "دفتر یکپارچه تراکنش‌های انبار", _inventory_ledger),
+    (9, "موجودی جاری قطعات", _part_stock),
+    (10, "ایندکس جستجوی تمام‌متن", _search_index),
+    (11, "ایندکس‌های لاگ حسابرسی", _log_indexes),
+    (12, "صف ماندگار ارسال پیامک", _sms_outbox),
+    (13, "ردیف افتتاحیه دفتر حساب‌ها قبل از تراکنش‌های عقب‌تاریخ", _account_ledger_openings),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(db_path):
+    """نسخه ساختار دیتابیس (PRAGMA user_version)؛ 0 برای دیتابیس تازه یا قدیمی"""
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def pending_migrations(version):
+    """مراحلی که هنوز روی دیتابیس با نسخه version اجرا نشده‌اند"""
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def migrate(db):
+    """
+    اجرای مراحل باقی‌مانده روی دیتابیس db (DatabaseManager)
+
+    خروجی: True اگر دیتابیس به آخرین نسخه رسید (یا از قبل به‌روز بود).
+    """
+    version = schema_version(db.db_name)
+    pending = pending_migrations(version)
+    if not pending:
+        return True
+
+    print(f"🔧 مهاجرت دیتابیس از نسخه {version} به {LATEST_VERSION}...")
+    started = time.perf_counter()
+    if not db.connect():
+        return False
+    try:
+        for number, title, step in pending:
+            step_started = time.perf_counter()
+            try:
+                # بدون BEGIN صریح، DDL مرحله خارج از تراکنش اجرا و با rollback برگردانده نمی‌شود
+                db.cursor.execute("BEGIN IMMEDIATE")
+                step(db)
+                db.cursor.execute(f"PRAGMA user_version = {int(number)}")
+                db.connection.commit()
+            except Exception as e:
+                db.connection.rollback()
+                print(f"❌ خطا در مرحله {number} ({title}): {e}")
+                return False
+            elapsed = (time.perf_counter() - step_started) * 1000
+            print(f"   ✅ {number}. {title}: {elapsed:.0f} ms")
+    finally:
+        db.connection.close()
+
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"✅ دیتابیس به نسخه {LATEST_VERSION} رسید ({elapsed:.0f} ms)")
+    return True
+
+
+if __name__ == "__main__":
+    from .database import DatabaseManager
+
+    arguments = [argument for argument in sys.argv[1:] if argument != "--run"]
+    db_path = arguments[0] if arguments else "data/repair_shop.db"
+    version = schema_version(db_path)
+    print(f"نسخه ساختار {db_path}: {version} (آخرین نسخه: {LATEST_VERSION})")
+    for number, title, _ in pending_migrations(version):
+        print(f"   ⏳ {number}. {title}")
+
+    if "--run" in sys.argv[1:]:
+        migrate(DatabaseManager(db_path))
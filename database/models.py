@@ -1,7 +1,9 @@
 ﻿# models.py
 from PySide6.QtCore import QObject, Signal, QDate, QDateTime
 from datetime import datetime, date
-from .database import DatabaseManager
+from .database import DatabaseManager, TransactionAborted
+from . import date_filters, account_ledger, inventory_ledger, part_stock, pagination, search_index
+from . import audit_log
 import sqlite3
 import json
 import jdatetime
@@ -34,23 +36,50 @@ class BaseModel(QObject):
             print(f"کوئری: {query}")
             return False
     
-    def fetch_all(self, query, params=()):
+    def fetch_all(self, query, params=(), row_type='dict'):
         """دریافت تمام ردیف‌ها"""
         try:
-            return self.db.fetch_all(query, params)
+            return self.db.fetch_all(query, params, row_type)
         except Exception as e:
             print(f"خطا در fetch_all: {str(e)}")
             print(f"کوئری: {query}")
             return []
     
-    def fetch_one(self, query, params=()):
+    def fetch_one(self, query, params=(), row_type='dict'):
         """دریافت یک ردیف"""
         try:
-            return self.db.fetch_one(query, params)
+            return self.db.fetch_one(query, params, row_type)
         except Exception as e:
             print(f"خطا در fetch_one: {str(e)}")
             print(f"کوئری: {query}")
             return None
+    
+    # ---------- صفحه‌بندی (keyset) ----------
+    
+    def fetch_page(self, page_query, filters=None, sort=None, cursor=None,
+                   page_size=pagination.DEFAULT_PAGE_SIZE, prepare=None):
+        """
+        یک صفحه از لیست page_query (pagination.PageQuery) به ترتیب sort و بعد از cursor
+        
+        خروجی: {'rows', 'next_cursor', 'has_more'}
+        """
+        try:
+            return page_query.fetch_page(self.db, filters, sort, cursor, page_size, prepare)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"خطا در fetch_page: {str(e)}")
+            return {'rows': [], 'next_cursor': None, 'has_more': False}
+    
+    def count_rows(self, page_query, filters=None, limit=pagination.COUNT_LIMIT):
+        """تعداد ردیف‌های فیلتر شده لیست page_query: (تعداد، تخمینی بودن)"""
+        try:
+            return page_query.count(self.db, filters, limit)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"خطا در count_rows: {str(e)}")
+            return 0, False
         
         
 
@@ -133,15 +162,17 @@ class Person(BaseModel):
         query = f"SELECT * FROM {self.table_name} WHERE id = ?"
         return self.fetch_one(query, (person_id,))
     
-    def search_persons(self, keyword):
-        """جستجوی اشخاص"""
-        query = f"""
-        SELECT * FROM {self.table_name} 
-        WHERE first_name LIKE ? OR last_name LIKE ? OR mobile LIKE ? OR national_id LIKE ?
-        ORDER BY last_name, first_name
-        """
-        search_term = f"%{keyword}%"
-        return self.fetch_all(query, (search_term, search_term, search_term, search_term))
+    def search_persons(self, keyword, person_type=None, limit=200):
+        """جستجوی اشخاص (نام، موبایل، تلفن و کد ملی) به ترتیب میزان تطابق"""
+        conditions, params = [], []
+        if person_type:
+            conditions.append("t.person_type = ?")
+            params.append(person_type)
+        try:
+            return search_index.search(self.db, self.table_name, keyword, conditions, params, limit)
+        except Exception as e:
+            print(f"خطا در جستجوی اشخاص: {e}")
+            return []
 
     def get_all_persons(self):
         """دریافت تمام اشخاص"""
@@ -256,10 +287,57 @@ class Device(BaseModel):
         """دریافت دستگاه‌ها بر اساس نوع"""
         query = f"SELECT * FROM {self.table_name} WHERE device_type = ? ORDER BY brand, model"
         return self.fetch_all(query, (device_type,))
+    
+    def search_devices(self, keyword, limit=50):
+        """جستجوی دستگاه‌ها (نوع، برند، مدل و سریال) به ترتیب میزان تطابق"""
+        try:
+            return search_index.search(self.db, self.table_name, keyword, limit=limit)
+        except Exception as e:
+            print(f"خطا در جستجوی دستگاه‌ها: {e}")
+            return []
+
+def _customer_mobile_condition(mobile):
+    """شرط موبایل مشتری پذیرش (روی ایندکس idx_persons_mobile)"""
+    if mobile.startswith('0'):
+        # شماره از ابتدا وارد شده: بازه پیشوندی روی ایندکس
+        return ("r.customer_id IN (SELECT id FROM Persons WHERE mobile >= ? AND mobile < ?)",
+                [mobile, mobile + chr(0x10FFFF)])
+    # بخشی از شماره (مثلاً چند رقم آخر)
+    return "r.customer_id IN (SELECT id FROM Persons WHERE mobile LIKE ?)", [f"%{mobile}%"]
+
 
 class Reception(BaseModel):
     """مدل مدیریت پذیرش دستگاه‌ها"""
     
+    # لیست صفحه‌بندی شده پذیرش‌ها (جدیدترین اول)
+    PAGE_QUERY = pagination.PageQuery(
+        select_sql="""
+        SELECT r.*, p.first_name || ' ' || p.last_name as customer_name, p.mobile,
+               d.device_type, d.brand, d.model
+        FROM Receptions r
+        JOIN Persons p ON r.customer_id = p.id
+        JOIN Devices d ON r.device_id = d.id
+        """,
+        from_sql="FROM Receptions r",
+        sorts={
+            'date': [('r.reception_date', 'reception_date'), ('r.reception_time', 'reception_time'),
+                     ('r.id', 'id')],
+            'number': [('r.reception_number', 'reception_number'), ('r.id', 'id')],
+        },
+        default_sort='date',
+        filters={
+            'status': "r.status = ?",
+            'customer_id': "r.customer_id = ?",
+            'reception_number': lambda value: ("r.reception_number LIKE ?", [f"%{value}%"]),
+            'mobile': _customer_mobile_condition,
+            'name': lambda value: search_index.match_condition('Persons', 'r.customer_id', value),
+            'start_date': lambda value: date_filters.range_condition(
+                'r.reception_date', date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                'r.reception_date', None, date_filters.next_day_start(value)),
+        },
+    )
+    
     def __init__(self, db_manager):
         super().__init__(db_manager)
         self.table_name = "Receptions"
@@ -270,12 +348,13 @@ class Reception(BaseModel):
         month = QDate.currentDate().month()
         
         # شماره گذاری به صورت: سال-ماه-شماره
+        month_sql, month_params = date_filters.month_condition('reception_date', year, month)
         query = f"""
         SELECT COUNT(*) as count FROM {self.table_name} 
-        WHERE strftime('%Y', reception_date) = ? AND strftime('%m', reception_date) = ?
+        WHERE {month_sql}
         """
         
-        result = self.fetch_one(query, (str(year), f"{month:02d}"))
+        result = self.fetch_one(query, tuple(month_params))
         count = result['count'] + 1 if result else 1
         
         return f"{year}{month:02d}{count:04d}"
@@ -351,6 +430,30 @@ class Reception(BaseModel):
             """
             return self.fetch_all(query)
     
+    def get_receptions_page(self, filters=None, sort=None, cursor=None,
+                            page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از پذیرش‌ها با صفحه‌بندی keyset
+        
+        filters: status، customer_id، reception_number، mobile، name، start_date، end_date
+        sort: 'date' (پیش‌فرض، جدیدترین اول) یا 'number'، یا (نام، descending)
+        """
+        return self.fetch_page(self.PAGE_QUERY, filters, sort, cursor, page_size)
+    
+    def count_receptions(self, filters=None):
+        """تعداد پذیرش‌های فیلتر شده: (تعداد، تخمینی بودن)"""
+        return self.count_rows(self.PAGE_QUERY, filters)
+    
+    def iter_receptions(self, filters=None, sort=None, page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه پذیرش‌های فیلتر شده، صفحه به صفحه و فقط به اندازه نیاز"""
+        return pagination.iter_rows(self.get_receptions_page, filters=filters, sort=sort,
+                                    page_size=page_size)
+    
+    def count_receptions_by_status(self):
+        """تعداد دقیق پذیرش‌های هر وضعیت (روی ایندکس وضعیت)"""
+        query = f"SELECT status, COUNT(*) as count FROM {self.table_name} GROUP BY status"
+        return {row['status']: row['count'] for row in self.fetch_all(query)}
+    
     def get_reception_by_id(self, reception_id):
         """دریافت پذیرش با شناسه"""
         query = f"""
@@ -484,6 +587,21 @@ class Repair(BaseModel):
         params = (repair_id, service_id, quantity, unit_price, total_price, description)
         return self.execute_query(query, params)
     
+    def add_repair_services(self, repair_id, services):
+        """افزودن گروهی خدمات به تعمیر (لیست dict با service_id، quantity، unit_price و description)"""
+        rows = [
+            {
+                'repair_id': repair_id,
+                'service_id': service['service_id'],
+                'quantity': service['quantity'],
+                'unit_price': service['unit_price'],
+                'total_price': service['quantity'] * service['unit_price'],
+                'description': service.get('description', '')
+            }
+            for service in services
+        ]
+        return self.db.bulk_insert('Repair_Services', rows) is not None
+    
     def delete_repair_services(self, repair_id):
         """حذف تمام خدمات یک تعمیر"""
         query = "DELETE FROM Repair_Services WHERE repair_id = ?"
@@ -557,6 +675,22 @@ class Repair(BaseModel):
             print(f"خطا در افزودن قطعه به تعمیر: {e}")
             return False
     
+    def add_repair_parts(self, repair_id, parts):
+        """افزودن گروهی قطعات به تعمیر (لیست dict با part_id، quantity، unit_price، warehouse_type و description)"""
+        rows = [
+            {
+                'repair_id': repair_id,
+                'part_id': part['part_id'],
+                'quantity': part['quantity'],
+                'unit_price': part['unit_price'],
+                'total_price': part['quantity'] * part['unit_price'],
+                'warehouse_type': part['warehouse_type'],
+                'description': part.get('description', '')
+            }
+            for part in parts
+        ]
+        return self.db.bulk_insert('Repair_Parts', rows) is not None
+    
     def delete_repair_parts(self, repair_id):
         """حذف تمام قطعات یک تعمیر"""
         query = "DELETE FROM Repair_Parts WHERE repair_id = ?"
@@ -635,8 +769,8 @@ class Part(BaseModel):
         return self.fetch_one(query, (part_code,))
     
     def get_low_stock_parts(self):
-        """دریافت قطعات با موجودی کم - نسخه اصلاح شده"""
-        query = """
+        """دریافت قطعات با موجودی کمتر از حداقل (از جدول PartStock)"""
+        query = f"""
         SELECT 
             p.id,
             p.part_code,
@@ -648,74 +782,175 @@ class Part(BaseModel):
             p.min_stock,
             p.max_stock,
             p.description,
-            COALESCE(new_stock.new_quantity, 0) as new_quantity,
-            COALESCE(used_stock.used_quantity, 0) as used_quantity,
-            (COALESCE(new_stock.new_quantity, 0) + COALESCE(used_stock.used_quantity, 0)) as total_quantity
-        FROM Parts p
-        LEFT JOIN (
-            SELECT 
-                part_id, 
-                SUM(quantity) as new_quantity
-            FROM NewPartsWarehouse 
-            WHERE status = 'موجود' 
-            GROUP BY part_id
-        ) new_stock ON p.id = new_stock.part_id
-        LEFT JOIN (
-            SELECT 
-                part_id, 
-                SUM(quantity) as used_quantity
-            FROM UsedPartsWarehouse 
-            WHERE status = 'موجود' 
-            GROUP BY part_id
-        ) used_stock ON p.id = used_stock.part_id
-        WHERE 
-            (COALESCE(new_stock.new_quantity, 0) + COALESCE(used_stock.used_quantity, 0)) < p.min_stock
-            OR (new_stock.new_quantity IS NULL AND used_stock.used_quantity IS NULL)
+            s.new_qty as new_quantity,
+            s.used_qty as used_quantity,
+            (s.new_qty + s.used_qty) as total_quantity,
+            s.value as stock_value,
+            s.last_movement
+        FROM PartStock s
+        JOIN Parts p ON p.id = s.part_id
+        WHERE {part_stock.shortage_sql('s')} > 0
         ORDER BY p.part_name
         """
         return self.fetch_all(query)
     
+    def count_low_stock_parts(self):
+        """تعداد قطعات با موجودی کمتر از حداقل"""
+        result = self.fetch_one(
+            f"SELECT COUNT(*) as count FROM PartStock s WHERE {part_stock.shortage_sql('s')} > 0"
+        )
+        return result['count'] if result else 0
+    
     def get_part_stock(self, part_id):
-        """دریافت موجودی یک قطعه خاص"""
-        query_new = """
-        SELECT COALESCE(SUM(quantity), 0) as total 
-        FROM NewPartsWarehouse 
-        WHERE part_id = ? AND status = 'موجود'
-        """
-        
-        query_used = """
-        SELECT COALESCE(SUM(quantity), 0) as total
-        FROM UsedPartsWarehouse 
-        WHERE part_id = ? AND status = 'موجود'
-        """
-        
+        """دریافت موجودی یک قطعه خاص (جستجوی کلید اصلی در PartStock)"""
         try:
-            new_stock = self.fetch_one(query_new, (part_id,))
-            used_stock = self.fetch_one(query_used, (part_id,))
-            
-            total_new = new_stock['total'] if new_stock else 0
-            total_used = used_stock['total'] if used_stock else 0
+            stock = self.fetch_one(
+                "SELECT new_qty, used_qty, value FROM PartStock WHERE part_id = ?", (part_id,)
+            )
+            if not stock:
+                return {'new_parts': 0, 'used_parts': 0, 'total': 0, 'value': 0}
             
             return {
-                'new_parts': total_new,
-                'used_parts': total_used,
-                'total': total_new + total_used
+                'new_parts': stock['new_qty'],
+                'used_parts': stock['used_qty'],
+                'total': stock['new_qty'] + stock['used_qty'],
+                'value': stock['value']
             }
         except Exception as e:
             print(f"خطا در دریافت موجودی قطعه {part_id}: {e}")
-            return {'new_parts': 0, 'used_parts': 0, 'total': 0}
+            return {'new_parts': 0, 'used_parts': 0, 'total': 0, 'value': 0}
         
 # models.py - کلاس WarehouseManager کامل و اصلاح شده
 
 from PySide6.QtCore import QDateTime
 
+def _stock_page_query(select_sql, alias, date_column):
+    """PageQuery لیست موجودی یک انبار (جدیدترین ورود اول)"""
+    date_key = f"{alias}.{date_column}"
+    return pagination.PageQuery(
+        select_sql=select_sql,
+        from_sql=select_sql[select_sql.index("FROM"):],
+        sorts={
+            'date': [(date_key, date_column), (f"{alias}.id", 'id')],
+            'id': [(f"{alias}.id", 'id')],
+        },
+        default_sort='date',
+        filters={
+            'status': f"{alias}.status = ?",
+            'start_date': lambda value: date_filters.range_condition(
+                date_key, date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                date_key, None, date_filters.next_day_start(value)),
+        },
+    )
+
+
+def _inventory_search_condition(text):
+    """جستجوی متن در شرح، کارمند و شناسه آیتم تراکنش انبار"""
+    pattern = f"%{text}%"
+    return "(l.description LIKE ? OR l.employee LIKE ? OR CAST(l.item_id AS TEXT) LIKE ?)", [pattern] * 3
+
+
 class WarehouseManager(BaseModel):
     """مدل مدیریت انبارهای مختلف - نسخه کامل و اصلاح شده"""
     
-    def __init__(self, db_manager):
-        super().__init__(db_manager)
-        self.ensure_inventory_tables_exist()
-
+    # لیست‌های صفحه‌بندی شده موجودی هر انبار
+    STOCK_PAGES = {
+        'لوازم نو': _stock_page_query("""
+            SELECT 
+                naw.*,
+                dc.name as device_type_name,
+                b.name as brand_name,
+                p.full_name as supplier_name
+            FROM NewAppliancesWarehouse naw
+            LEFT JOIN DeviceCategories_name dc ON naw.device_type_id = dc.id
+            LEFT JOIN Brands b ON naw.brand_id = b.id
+            LEFT JOIN Persons p ON naw.supplier_id = p.id
+            """, 'naw', 'purchase_date'),
+        'لوازم دست دوم': _stock_page_query("""
+            SELECT 
+                uaw.*,
+                dc.name as device_type_name,
+                b.name as brand_name,
+                p.full_name as source_name,
+                r.reception_number,
+                CASE 
+                    WHEN uaw.source_type = 'مشتری' THEN 'خرید از مشتری'
+                    WHEN uaw.source_type = 'تامین کننده' THEN 'خرید از تامین‌کننده'
+                    WHEN uaw.source_type = 'تعویض شده' THEN 'تعویض شده'
+                    ELSE uaw.source_type
+                END as source_type_fa
+            FROM UsedAppliancesWarehouse uaw
+            LEFT JOIN DeviceCategories_name dc ON uaw.device_type_id = dc.id
+            LEFT JOIN Brands b ON uaw.brand_id = b.id
+            LEFT JOIN Persons p ON uaw.source_person_id = p.id
+            LEFT JOIN Receptions r ON uaw.original_reception_id = r.id
+            """, 'uaw', 'entry_date'),
+        'قطعات نو': _stock_page_query("""
+            SELECT 
+                npw.*,
+                p.part_code,
+                p.part_name,
+                p.category,
+                p.brand,
+                p.unit,
+                per.full_name as supplier_name
+            FROM NewPartsWarehouse npw
+            LEFT JOIN Parts p ON npw.part_id = p.id
+            LEFT JOIN Persons per ON npw.supplier_id = per.id
+            """, 'npw', 'purchase_date'),
+        'قطعات دست دوم': _stock_page_query("""
+            SELECT 
+                upw.*,
+                p.part_code,
+                p.part_name,
+                p.category,
+                p.brand,
+                p.unit
+            FROM UsedPartsWarehouse upw
+            LEFT JOIN Parts p ON upw.part_id = p.id
+            """, 'upw', 'purchase_date'),
+    }
+    
+    # تراکنش‌های انبار (شامل حذف‌ها) از دفتر یکپارچه inventory_ledger، جدیدترین اول؛
+    # id شناسه ردیف در جدول منبع (source) است و ledger_id کلید یکتای صفحه‌بندی
+    TRANSACTIONS_PAGE = pagination.PageQuery(
+        select_sql="""
+        SELECT 
+            l.id as ledger_id,
+            l.source,
+            l.source_id as id,
+            l.transaction_type,
+            l.warehouse_type,
+            l.item_id,
+            l.quantity,
+            l.unit_price,
+            l.total_price,
+            l.transaction_date,
+            l.related_document,
+            l.description,
+            l.employee,
+            l.created_at
+        FROM InventoryLedger l
+        """,
+        from_sql="FROM InventoryLedger l",
+        sorts={
+            'date': [('l.transaction_date', 'transaction_date'), ('l.id', 'ledger_id')],
+            'amount': [('l.total_price', 'total_price'), ('l.id', 'ledger_id')],
+        },
+        default_sort='date',
+        filters={
+            'warehouse_type': "l.warehouse_type = ?",
+            'transaction_type': "l.transaction_type = ?",
+            'item_id': "l.item_id = ?",
+            'start_date': lambda value: date_filters.range_condition(
+                'l.transaction_date', date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                'l.transaction_date', None, date_filters.next_day_start(value)),
+            'search': _inventory_search_condition,
+        },
+    )
+    
     def ensure_inventory_tables_exist(self):
         """بررسی و ایجاد جداول مربوط به تراکنش‌های حذف در صورت عدم وجود"""
         try:
@@ -768,6 +1003,11 @@ class WarehouseManager(BaseModel):
                 '''
                 if self.execute_query(create_query):
                     print("✅ جدول InventorySoftDeletions ایجاد شد.")
+            
+            # دفتر یکپارچه تراکنش‌ها (اگر جداول حذف تازه ساخته شده باشند، هنوز وجود ندارد)
+            with self.db.transaction() as connection:
+                if inventory_ledger.create_ledger_table(connection.cursor()):
+                    print("🔄 دفتر تراکنش‌های انبار ساخته شد")
                     
         except Exception as e:
             print(f"⚠️ خطا در بررسی/ایجاد جداول حذف: {e}")
@@ -864,12 +1104,14 @@ class WarehouseManager(BaseModel):
             
             # اجرای کوئری (فقط برای انواعی که در این تابع پیاده‌سازی شده‌اند)
             if warehouse_type != 'لوازم دست دوم':  # لوازم دست دوم با توابع جداگانه مدیریت می‌شود
-                if self.execute_query(query, params):
-                    self.data_changed.emit(table_name)
+                # ثبت کالا و تراکنش انبار در یک واحد کار با یک commit
+                with self.db.transaction():
+                    if not self.execute_query(query, params):
+                        return False
                     # ثبت تراکنش انبار
                     self._add_inventory_transaction(warehouse_type, 'خرید', data)
-                    return True
-                return False
+                self.data_changed.emit(table_name)
+                return True
             else:
                 return True  # لوازم دست دوم قبلاً در توابع جداگانه ثبت شده
                 
@@ -925,6 +1167,105 @@ class WarehouseManager(BaseModel):
             print(f"❌ خطا در ثبت تراکنش: {e}")
             return False
     
+    def add_many_to_warehouse(self, warehouse_type, items):
+        """
+        ورود گروهی کالا به انبار (مثلاً یک محموله چند صد قطعه‌ای از تامین کننده)
+
+        ردیف‌های انبار و تراکنش‌های خرید با درج گروهی و در یک واحد کار ثبت می‌شوند.
+        لوازم دست دوم به دلیل منطق جداگانه مشتری/تامین کننده پشتیبانی نمی‌شود.
+        خروجی: لیست شناسه ردیف‌های انبار یا None در صورت خطا
+        """
+        table_map = {
+            'قطعات نو': 'NewPartsWarehouse',
+            'قطعات دست دوم': 'UsedPartsWarehouse',
+            'لوازم نو': 'NewAppliancesWarehouse'
+        }
+        
+        table_name = table_map.get(warehouse_type)
+        if not table_name:
+            print(f"⚠️ ورود گروهی برای انبار {warehouse_type} پشتیبانی نمی‌شود")
+            return None
+        if not items:
+            return []
+        
+        if warehouse_type == 'لوازم نو':
+            rows = [{
+                'device_type_id': data.get('device_type_id'),
+                'brand_id': data.get('brand_id'),
+                'model': data.get('model', ''),
+                'serial_number': data.get('serial_number', ''),
+                'production_year': data.get('production_year'),
+                'quantity': data.get('quantity', 1),
+                'purchase_price': data.get('purchase_price', 0),
+                'sale_price': data.get('sale_price', 0),
+                'supplier_id': data.get('supplier_id'),
+                'purchase_date': data.get('purchase_date'),
+                'warranty_months': data.get('warranty_months', 12),
+                'location': data.get('location', ''),
+                'status': data.get('status', 'موجود'),
+                'description': data.get('description', '')
+            } for data in items]
+        elif warehouse_type == 'قطعات نو':
+            rows = [{
+                'part_id': data.get('part_id'),
+                'quantity': data.get('quantity', 0),
+                'purchase_price': data.get('purchase_price', 0),
+                'sale_price': data.get('sale_price', 0),
+                'supplier_id': data.get('supplier_id'),
+                'purchase_date': data.get('purchase_date'),
+                'batch_number': data.get('batch_number', ''),
+                'location': data.get('location', ''),
+                'expiration_date': data.get('expiration_date'),
+                'status': data.get('status', 'موجود')
+            } for data in items]
+        else:
+            rows = [{
+                'part_id': data.get('part_id'),
+                'quantity': data.get('quantity', 0),
+                'purchase_price': data.get('purchase_price', 0),
+                'sale_price': data.get('sale_price', 0),
+                'source_device': data.get('source_device', ''),
+                'condition': data.get('condition', 'خوب'),
+                'purchase_date': data.get('purchase_date'),
+                'warranty_days': data.get('warranty_days', 30),
+                'location': data.get('location', ''),
+                'status': data.get('status', 'موجود')
+            } for data in items]
+        
+        transaction_date = QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss")
+        
+        try:
+            with self.db.transaction():
+                item_ids = self.db.bulk_insert(table_name, rows)
+                if item_ids is None:
+                    return None
+                
+                # ثبت تراکنش خرید برای هر ردیف با شناسه واقعی آن
+                transactions = []
+                for item_id, data in zip(item_ids, items):
+                    quantity = data.get('quantity', 1)
+                    unit_price = data.get('purchase_price', 0) or data.get('unit_price', 0)
+                    transactions.append({
+                        'transaction_type': 'خرید',
+                        'warehouse_type': warehouse_type,
+                        'item_id': item_id,
+                        'quantity': quantity,
+                        'unit_price': unit_price,
+                        'total_price': quantity * unit_price,
+                        'transaction_date': transaction_date,
+                        'related_document': data.get('purchase_document', '') or data.get('batch_number', ''),
+                        'description': f"خرید {warehouse_type} - {data.get('model', '')}",
+                        'employee': data.get('employee', 'سیستم')
+                    })
+                self.db.bulk_insert('InventoryTransactions', transactions, return_ids=False)
+        except TransactionAborted as e:
+            print(f"❌ ورود گروهی به انبار {warehouse_type} انجام نشد: {e}")
+            return None
+        
+        self.data_changed.emit(table_name)
+        print(f"✅ {len(item_ids)} ردیف به انبار {warehouse_type} اضافه شد")
+        return item_ids
+    
     def get_warehouse_stock(self, warehouse_type, item_id=None, show_all=False):
         """دریافت موجودی انبار - نسخه کامل"""
         table_map = {
@@ -966,17 +1307,7 @@ class WarehouseManager(BaseModel):
             """
             params = (item_id,)
         else:
-            query = """
-            SELECT 
-                naw.*,
-                dc.name as device_type_name,
-                b.name as brand_name,
-                p.full_name as supplier_name
-            FROM NewAppliancesWarehouse naw
-            LEFT JOIN DeviceCategories_name dc ON naw.device_type_id = dc.id
-            LEFT JOIN Brands b ON naw.brand_id = b.id
-            LEFT JOIN Persons p ON naw.supplier_id = p.id
-            """
+            query = self.STOCK_PAGES['لوازم نو'].select_sql
             
             if not show_all:
                 query += " WHERE naw.status = 'موجود'"
@@ -1005,25 +1336,7 @@ class WarehouseManager(BaseModel):
             """
             params = (item_id,)
         else:
-            query = """
-            SELECT 
-                uaw.*,
-                dc.name as device_type_name,
-                b.name as brand_name,
-                p.full_name as source_name,
-                r.reception_number,
-                CASE 
-                    WHEN uaw.source_type = 'مشتری' THEN 'خرید از مشتری'
-                    WHEN uaw.source_type = 'تامین کننده' THEN 'خرید از تامین‌کننده'
-                    WHEN uaw.source_type = 'تعویض شده' THEN 'تعویض شده'
-                    ELSE uaw.source_type
-                END as source_type_fa
-            FROM UsedAppliancesWarehouse uaw
-            LEFT JOIN DeviceCategories_name dc ON uaw.device_type_id = dc.id
-            LEFT JOIN Brands b ON uaw.brand_id = b.id
-            LEFT JOIN Persons p ON uaw.source_person_id = p.id
-            LEFT JOIN Receptions r ON uaw.original_reception_id = r.id
-            """
+            query = self.STOCK_PAGES['لوازم دست دوم'].select_sql
             
             if not show_all:
                 query += " WHERE uaw.status = 'موجود'"
@@ -1052,19 +1365,7 @@ class WarehouseManager(BaseModel):
             """
             params = (item_id,)
         else:
-            query = """
-            SELECT 
-                npw.*,
-                p.part_code,
-                p.part_name,
-                p.category,
-                p.brand,  # 🔴 اضافه شد - برند از جدول Parts
-                p.unit,
-                per.full_name as supplier_name
-            FROM NewPartsWarehouse npw
-            LEFT JOIN Parts p ON npw.part_id = p.id
-            LEFT JOIN Persons per ON npw.supplier_id = per.id
-            """
+            query = self.STOCK_PAGES['قطعات نو'].select_sql
             
             if not show_all:
                 query += " WHERE npw.status = 'موجود'"
@@ -1091,17 +1392,7 @@ class WarehouseManager(BaseModel):
             """
             params = (item_id,)
         else:
-            query = """
-            SELECT 
-                upw.*,
-                p.part_code,
-                p.part_name,
-                p.category,
-                p.brand,  # 🔴 اضافه شد
-                p.unit
-            FROM UsedPartsWarehouse upw
-            LEFT JOIN Parts p ON upw.part_id = p.id
-            """
+            query = self.STOCK_PAGES['قطعات دست دوم'].select_sql
             
             if not show_all:
                 query += " WHERE upw.status = 'موجود'"
@@ -1592,40 +1883,6 @@ class WarehouseManager(BaseModel):
         
         return []
     
-    def get_inventory_transactions(self, warehouse_type=None, start_date=None, end_date=None):
-        """دریافت تراکنش‌های انبار"""
-        query = """
-        SELECT 
-            it.*,
-            CASE 
-                WHEN it.warehouse_type = 'قطعات نو' THEN np.part_id
-                WHEN it.warehouse_type = 'لوازم نو' THEN naw.id
-                ELSE NULL
-            END as related_item_id
-        FROM InventoryTransactions it
-        LEFT JOIN NewPartsWarehouse np ON it.item_id = np.id AND it.warehouse_type = 'قطعات نو'
-        LEFT JOIN NewAppliancesWarehouse naw ON it.item_id = naw.id AND it.warehouse_type = 'لوازم نو'
-        WHERE 1=1
-        """
-        
-        params = []
-        
-        if warehouse_type:
-            query += " AND it.warehouse_type = ?"
-            params.append(warehouse_type)
-        
-        if start_date:
-            query += " AND DATE(it.transaction_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(it.transaction_date) <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY it.transaction_date DESC"
-        
-        return self.fetch_all(query, params)
-
     def update_stock_info(self, warehouse_type, warehouse_id, data):
         """به‌روزرسانی اطلاعات موجودی در انبار"""
         table_map = {
@@ -1710,11 +1967,12 @@ class WarehouseManager(BaseModel):
             
             print(f"   📝 تغییر وضعیت از '{original_status}' به '{new_status}'")
             
-            # تغییر وضعیت
-            query = f"UPDATE {table_name} SET status = ? WHERE id = ?"
-            success = self.execute_query(query, (new_status, item_id))
-            
-            if success:
+            # تغییر وضعیت و ثبت تاریخچه در یک واحد کار
+            with self.db.transaction():
+                query = f"UPDATE {table_name} SET status = ? WHERE id = ?"
+                if not self.execute_query(query, (new_status, item_id)):
+                    return False
+                
                 # ثبت تراکنش حذف نرم
                 delete_data = {
                     'item_id': item_id,
@@ -1731,11 +1989,10 @@ class WarehouseManager(BaseModel):
                 
                 # ثبت در لاگ تراکنش‌ها
                 self._log_soft_deletion_transaction(warehouse_type, delete_data)
-                
-                self.data_changed.emit(table_name)
-                print(f"✅ حذف نرم آیتم {item_id} با موفقیت انجام شد (وضعیت: {new_status})")
-                return True
-            return False
+            
+            self.data_changed.emit(table_name)
+            print(f"✅ حذف نرم آیتم {item_id} با موفقیت انجام شد (وضعیت: {new_status})")
+            return True
             
         except Exception as e:
             print(f"خطا در حذف نرم: {e}")
@@ -1839,20 +2096,20 @@ class WarehouseManager(BaseModel):
             if not table_name:
                 return False
             
-            restore_query = f"UPDATE {table_name} SET status = ? WHERE id = ?"
-            success = self.execute_query(restore_query, (original_status, item_id))
-            
-            if success:
+            with self.db.transaction():
+                restore_query = f"UPDATE {table_name} SET status = ? WHERE id = ?"
+                if not self.execute_query(restore_query, (original_status, item_id)):
+                    return False
+                
                 # ثبت تراکنش بازیابی
                 self._log_restoration_transaction(warehouse_type, deletion_record)
                 
                 # حذف از جدول حذف‌های نرم
                 delete_query = "DELETE FROM InventorySoftDeletions WHERE id = ?"
                 self.execute_query(delete_query, (deletion_id,))
-                
-                self.data_changed.emit(table_name)
-                return True
-            return False
+            
+            self.data_changed.emit(table_name)
+            return True
             
         except Exception as e:
             print(f"خطا در بازیابی آیتم: {e}")
@@ -1892,165 +2149,24 @@ class WarehouseManager(BaseModel):
 
 
     def get_inventory_transactions(self, warehouse_type=None, start_date=None, end_date=None):
-        """دریافت تراکنش‌های انبار - نسخه بهبود یافته شامل حذف‌ها"""
+        """دریافت تراکنش‌های انبار (شامل حذف‌ها) از دفتر یکپارچه، جدیدترین اول"""
         try:
-            print(f"🔍 دریافت تراکنش‌های انبار...")
-            print(f"   نوع انبار: {warehouse_type}")
-            print(f"   از تاریخ: {start_date}")
-            print(f"   تا تاریخ: {end_date}")
-            
-            # دریافت از جدول اصلی تراکنش‌ها
-            query_main = """
-            SELECT 
-                'main' as source,
-                it.id,
-                it.transaction_type,
-                it.warehouse_type,
-                it.item_id,
-                it.quantity,
-                it.unit_price,
-                it.total_price,
-                it.transaction_date,
-                it.related_document,
-                it.description,
-                it.employee,
-                it.created_at
-            FROM InventoryTransactions it
-            WHERE 1=1
-            """
-            
-            # دریافت از جدول حذف‌ها
-            query_delete = """
-            SELECT 
-                'delete' as source,
-                idt.id,
-                'حذف' as transaction_type,
-                idt.warehouse_type,
-                idt.item_id,
-                idt.quantity,
-                idt.unit_price,
-                idt.total_price,
-                idt.deletion_date as transaction_date,
-                'حذف دستی' as related_document,
-                CASE 
-                    WHEN idt.description IS NOT NULL THEN 'حذف - ' || idt.description
-                    ELSE 'حذف - ' || idt.deletion_reason
-                END as description,
-                idt.deleted_by as employee,
-                idt.created_at
-            FROM InventoryDeleteTransactions idt
-            WHERE 1=1
-            """
-            
-            # دریافت از جدول حذف‌های نرم
-            query_soft_delete = """
-            SELECT 
-                'soft_delete' as source,
-                isd.id,
-                'حذف نرم' as transaction_type,
-                isd.warehouse_type,
-                isd.item_id,
-                isd.quantity,
-                isd.unit_price,
-                isd.total_price,
-                isd.deletion_date as transaction_date,
-                'حذف نرم' as related_document,
-                CASE 
-                    WHEN isd.description IS NOT NULL THEN 'حذف نرم - ' || isd.description
-                    ELSE 'حذف نرم - ' || isd.deletion_reason || ' (از ' || isd.original_status || ' به ' || isd.new_status || ')'
-                END as description,
-                isd.deleted_by as employee,
-                isd.created_at
-            FROM InventorySoftDeletions isd
-            WHERE 1=1
-            """
-            
-            # ساخت شرط‌های WHERE
-            conditions_main = []
-            conditions_delete = []
-            conditions_soft = []
-            params_main = []
-            params_delete = []
-            params_soft = []
-            
-            if warehouse_type:
-                conditions_main.append("it.warehouse_type = ?")
-                conditions_delete.append("idt.warehouse_type = ?")
-                conditions_soft.append("isd.warehouse_type = ?")
-                params_main.append(warehouse_type)
-                params_delete.append(warehouse_type)
-                params_soft.append(warehouse_type)
-            
-            if start_date:
-                conditions_main.append("DATE(it.transaction_date) >= ?")
-                conditions_delete.append("DATE(idt.deletion_date) >= ?")
-                conditions_soft.append("DATE(isd.deletion_date) >= ?")
-                params_main.append(start_date)
-                params_delete.append(start_date)
-                params_soft.append(start_date)
-            
-            if end_date:
-                conditions_main.append("DATE(it.transaction_date) <= ?")
-                conditions_delete.append("DATE(idt.deletion_date) <= ?")
-                conditions_soft.append("DATE(isd.deletion_date) <= ?")
-                params_main.append(end_date)
-                params_delete.append(end_date)
-                params_soft.append(end_date)
-            
-            # اضافه کردن شرط‌ها به کوئری‌ها
-            if conditions_main:
-                query_main += " AND " + " AND ".join(conditions_main)
-            
-            if conditions_delete:
-                query_delete += " AND " + " AND ".join(conditions_delete)
-            
-            if conditions_soft:
-                query_soft_delete += " AND " + " AND ".join(conditions_soft)
-            
-            # UNION همه کوئری‌ها
+            # همان کوئری و فیلترهای TRANSACTIONS_PAGE، بدون صفحه‌بندی
+            conditions, params = pagination.filter_conditions({
+                'warehouse_type': warehouse_type,
+                'start_date': start_date,
+                'end_date': end_date,
+            }, self.TRANSACTIONS_PAGE.filters)
+            keys, descending = pagination.resolve_sort(
+                None, self.TRANSACTIONS_PAGE.sorts, self.TRANSACTIONS_PAGE.default_sort)
             final_query = f"""
-            {query_main}
-            UNION ALL
-            {query_delete}
-            UNION ALL
-            {query_soft_delete}
-            ORDER BY transaction_date DESC
+            {self.TRANSACTIONS_PAGE.select_sql}
+            {pagination.where_clause(conditions)}
+            {pagination.order_clause(keys, descending)}
             """
             
-            # اجرای کوئری
-            all_params = params_main + params_delete + params_soft
-            
-            print(f"   کوئری نهایی: {final_query[:200]}...")
-            print(f"   پارامترها: {all_params}")
-            
-            results = self.fetch_all(final_query, all_params)
-            print(f"   ✅ {len(results)} تراکنش (شامل حذف‌ها) یافت شد")
-            
-            # تبدیل تاریخ‌ها به شمسی برای نمایش بهتر
-            for result in results:
-                try:
-                    # تبدیل تاریخ میلادی به شمسی
-                    trans_date = result.get('transaction_date', '')
-                    if trans_date:
-                        # اگر تاریخ شمسی است (دارای /) نیازی به تبدیل نیست
-                        if '/' not in str(trans_date):
-                            # فرض می‌کنیم میلادی است
-                            import re
-                            numbers = re.findall(r'\d+', str(trans_date))
-                            if len(numbers) >= 3:
-                                year, month, day = map(int, numbers[:3])
-                                if year > 1500:  # میلادی است
-                                    import datetime
-                                    from datetime import date as datetime_date
-                                    gdate = datetime_date(year, month, day)
-                                    jdate = jdatetime.date.fromgregorian(date=gdate)
-                                    result['transaction_date_shamsi'] = jdate.strftime("%Y/%m/%d")
-                                else:
-                                    result['transaction_date_shamsi'] = f"{year}/{month:02d}/{day:02d}"
-                except Exception as e:
-                    print(f"⚠️ خطا در تبدیل تاریخ: {e}")
-                    result['transaction_date_shamsi'] = str(trans_date)
-            
+            results = self.fetch_all(final_query, params)
+            self._add_shamsi_dates(results)
             return results
             
         except Exception as e:
@@ -2059,6 +2175,97 @@ class WarehouseManager(BaseModel):
             traceback.print_exc()
             return []
     
+    def _add_shamsi_dates(self, results):
+        """افزودن transaction_date_shamsi به تراکنش‌های انبار"""
+        for result in results:
+            try:
+                # تبدیل تاریخ میلادی به شمسی
+                trans_date = result.get('transaction_date', '')
+                if trans_date:
+                    # اگر تاریخ شمسی است (دارای /) نیازی به تبدیل نیست
+                    if '/' not in str(trans_date):
+                        # فرض می‌کنیم میلادی است
+                        import re
+                        numbers = re.findall(r'\d+', str(trans_date))
+                        if len(numbers) >= 3:
+                            year, month, day = map(int, numbers[:3])
+                            if year > 1500:  # میلادی است
+                                import datetime
+                                from datetime import date as datetime_date
+                                gdate = datetime_date(year, month, day)
+                                jdate = jdatetime.date.fromgregorian(date=gdate)
+                                result['transaction_date_shamsi'] = jdate.strftime("%Y/%m/%d")
+                            else:
+                                result['transaction_date_shamsi'] = f"{year}/{month:02d}/{day:02d}"
+            except Exception as e:
+                print(f"⚠️ خطا در تبدیل تاریخ: {e}")
+                result['transaction_date_shamsi'] = str(trans_date)
+    
+    def get_inventory_transactions_page(self, filters=None, sort=None, cursor=None,
+                                        page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از تراکنش‌های انبار (شامل حذف‌ها) با صفحه‌بندی keyset
+        
+        filters: warehouse_type، transaction_type، item_id، start_date، end_date و search
+        sort: 'date' (پیش‌فرض، جدیدترین اول) یا 'amount'، یا (نام، descending)
+        """
+        return self.fetch_page(self.TRANSACTIONS_PAGE, filters, sort, cursor, page_size,
+                               prepare=self._add_shamsi_dates)
+    
+    def iter_inventory_transactions(self, filters=None, sort=None,
+                                    page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه تراکنش‌های انبار فیلتر شده، صفحه به صفحه و فقط به اندازه نیاز"""
+        return pagination.iter_rows(self.get_inventory_transactions_page, filters=filters,
+                                    sort=sort, page_size=page_size)
+    
+    def get_inventory_transactions_summary(self, filters=None):
+        """
+        آمار تراکنش‌های انبار فیلتر شده به تفکیک نوع
+        
+        خروجی: count، total_amount و types (لیست transaction_type، count و
+        total_amount به ترتیب تعداد)
+        """
+        conditions, params = pagination.filter_conditions(filters, self.TRANSACTIONS_PAGE.filters)
+        try:
+            query = f"""
+            SELECT l.transaction_type, COUNT(*) as count,
+                   COALESCE(SUM(l.total_price), 0) as total_amount
+            {self.TRANSACTIONS_PAGE.from_sql}
+            {pagination.where_clause(conditions)}
+            GROUP BY l.transaction_type
+            ORDER BY count DESC
+            """
+            types = self.db.fetch_all(query, params)
+        except Exception as e:
+            print(f"❌ خطا در آمار تراکنش‌های انبار: {e}")
+            types = []
+        
+        return {
+            'count': sum(row['count'] for row in types),
+            'total_amount': sum(row['total_amount'] for row in types),
+            'types': types,
+        }
+    
+    def get_stock_page(self, warehouse_type, filters=None, sort=None, cursor=None,
+                       page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از موجودی انبار warehouse_type (کلیدهای STOCK_PAGES)
+        
+        filters: status، start_date، end_date (تاریخ ورود)؛ بدون status همه آیتم‌ها
+        (معادل show_all=True) برگردانده می‌شوند.
+        """
+        return self.fetch_page(self.STOCK_PAGES[warehouse_type], filters, sort, cursor, page_size)
+    
+    def iter_stock(self, warehouse_type, filters=None, sort=None,
+                   page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه آیتم‌های موجودی انبار فیلتر شده، صفحه به صفحه"""
+        return pagination.iter_rows(self.get_stock_page, warehouse_type=warehouse_type,
+                                    filters=filters, sort=sort, page_size=page_size)
+    
+    def count_stock(self, warehouse_type, filters=None):
+        """تعداد آیتم‌های موجودی انبار: (تعداد، تخمینی بودن)"""
+        return self.count_rows(self.STOCK_PAGES[warehouse_type], filters)
+    
     def get_all_transactions_grouped(self):
         """دریافت تمام تراکنش‌ها گروه‌بندی شده بر اساس نوع"""
         try:
@@ -2068,13 +2275,7 @@ class WarehouseManager(BaseModel):
                 COUNT(*) as count,
                 SUM(total_price) as total_amount,
                 SUM(quantity) as total_quantity
-            FROM (
-                SELECT transaction_type, total_price, quantity FROM InventoryTransactions
-                UNION ALL
-                SELECT 'حذف' as transaction_type, total_price, quantity FROM InventoryDeleteTransactions
-                UNION ALL
-                SELECT 'حذف نرم' as transaction_type, total_price, quantity FROM InventorySoftDeletions
-            ) as all_transactions
+            FROM InventoryLedger
             GROUP BY transaction_type
             ORDER BY total_amount DESC
             """
@@ -2316,13 +2517,10 @@ class WarehouseManager(BaseModel):
         
         params = []
         
-        if start_date:
-            query += " AND DATE(deletion_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(deletion_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('deletion_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         if warehouse_type:
             query += " AND warehouse_type = ?"
@@ -2366,10 +2564,11 @@ class WarehouseManager(BaseModel):
             if not table_name:
                 return False
             
-            restore_query = f"UPDATE {table_name} SET status = 'موجود' WHERE id = ?"
-            success = self.execute_query(restore_query, (item_id,))
-            
-            if success:
+            with self.db.transaction():
+                restore_query = f"UPDATE {table_name} SET status = 'موجود' WHERE id = ?"
+                if not self.execute_query(restore_query, (item_id,)):
+                    return False
+                
                 # ثبت تراکنش بازیابی
                 restore_transaction_query = """
                 INSERT INTO InventoryTransactions (
@@ -2395,10 +2594,9 @@ class WarehouseManager(BaseModel):
                 )
                 
                 self.execute_query(restore_transaction_query, params)
-                
-                self.data_changed.emit(table_name)
-                return True
-            return False
+            
+            self.data_changed.emit(table_name)
+            return True
             
         except Exception as e:
             print(f"خطا در بازیابی آیتم: {e}")
@@ -2465,12 +2663,13 @@ class Invoice(BaseModel):
         year = QDate.currentDate().year()
         month = QDate.currentDate().month()
         
+        month_sql, month_params = date_filters.month_condition('invoice_date', year, month)
         query = f"""
         SELECT COUNT(*) as count FROM {self.table_name} 
-        WHERE strftime('%Y', invoice_date) = ? AND strftime('%m', invoice_date) = ?
+        WHERE {month_sql}
         """
         
-        result = self.fetch_one(query, (str(year), f"{month:02d}"))
+        result = self.fetch_one(query, tuple(month_params))
         count = result['count'] + 1 if result else 1
         
         return f"INV-{year}{month:02d}{count:04d}"
@@ -2513,48 +2712,48 @@ class Invoice(BaseModel):
             data.get('outsourced_cost', 0)
         )
         
-        if self.execute_query(query, params):
-            # دریافت invoice_id
-            query = "SELECT last_insert_rowid() as id"
-            result = self.fetch_one(query)
-            invoice_id = result['id'] if result else None
-            
-            # افزودن اقلام فاکتور
-            if invoice_id and self._add_invoice_items(invoice_id, items):
-                self.data_changed.emit(self.table_name)
+        # سربرگ، اقلام و سهم شرکا در یک واحد کار با یک commit ثبت می‌شوند
+        try:
+            with self.db.transaction():
+                if not self.execute_query(query, params):
+                    raise TransactionAborted("خطا در ثبت سربرگ فاکتور")
+                
+                # دریافت invoice_id
+                query = "SELECT last_insert_rowid() as id"
+                result = self.fetch_one(query)
+                invoice_id = result['id'] if result else None
+                
+                # افزودن اقلام فاکتور
+                if not invoice_id or not self._add_invoice_items(invoice_id, items):
+                    raise TransactionAborted("خطا در ثبت اقلام فاکتور")
                 
                 # محاسبه سهم شرکا
                 if data.get('calculate_partner_shares', True):
                     self._calculate_partner_shares(invoice_id, data.get('invoice_type'))
-                
-                return invoice_number
-        return None
+        except TransactionAborted as e:
+            print(f"❌ ثبت فاکتور {invoice_number} انجام نشد: {e}")
+            return None
+        
+        self.data_changed.emit(self.table_name)
+        return invoice_number
     
     def _add_invoice_items(self, invoice_id, items):
-        """افزودن اقلام فاکتور"""
-        for item in items:
-            query = """
-            INSERT INTO InvoiceItems (
-                invoice_id, item_type, item_id, item_name, quantity,
-                unit_price, total_price, description, partner_percentage
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            params = (
-                invoice_id,
-                item.get('item_type', 'قطعه'),
-                item.get('item_id'),
-                item.get('item_name', ''),
-                item.get('quantity', 1),
-                item.get('unit_price', 0),
-                item.get('total_price', 0),
-                item.get('description', ''),
-                item.get('partner_percentage', 0)
-            )
-            
-            if not self.execute_query(query, params):
-                return False
-        return True
+        """افزودن اقلام فاکتور (درج گروهی)"""
+        rows = [
+            {
+                'invoice_id': invoice_id,
+                'item_type': item.get('item_type', 'قطعه'),
+                'item_id': item.get('item_id'),
+                'item_name': item.get('item_name', ''),
+                'quantity': item.get('quantity', 1),
+                'unit_price': item.get('unit_price', 0),
+                'total_price': item.get('total_price', 0),
+                'description': item.get('description', ''),
+                'partner_percentage': item.get('partner_percentage', 0)
+            }
+            for item in items
+        ]
+        return self.db.bulk_insert('InvoiceItems', rows, return_ids=False) is not None
     
     def _calculate_partner_shares(self, invoice_id, invoice_type):
         """محاسبه سهم شرکا از فاکتور"""
@@ -2582,25 +2781,19 @@ class Invoice(BaseModel):
         share_percentage = 100.0 / len(partners)
         share_amount = total_amount * (share_percentage / 100)
         
-        # ثبت سهم شرکا
-        for partner in partners:
-            query = """
-            INSERT INTO PartnerShares (
-                partner_id, transaction_type, transaction_id,
-                share_percentage, share_amount, description
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            
-            params = (
-                partner['id'],
-                invoice_type,
-                invoice_id,
-                share_percentage,
-                share_amount,
-                f"سهم از فاکتور {invoice_id}"
-            )
-            
-            self.execute_query(query, params)
+        # ثبت سهم شرکا (درج گروهی)
+        rows = [
+            {
+                'partner_id': partner['id'],
+                'transaction_type': invoice_type,
+                'transaction_id': invoice_id,
+                'share_percentage': share_percentage,
+                'share_amount': share_amount,
+                'description': f"سهم از فاکتور {invoice_id}"
+            }
+            for partner in partners
+        ]
+        self.db.bulk_insert('PartnerShares', rows, return_ids=False)
 
 AccountingManager = AccountManager  # این ساده‌تر است
 class AccountManager(BaseModel):
@@ -2793,7 +2986,11 @@ class AccountManager(BaseModel):
         return summary
     
     def get_account_transactions(self, account_id, start_date=None, end_date=None):
-        """دریافت تراکنش‌های یک حساب"""
+        """
+        دریافت تراکنش‌های یک حساب
+        
+        balance_after مانده حساب پس از هر تراکنش (از دفتر موجودی) است.
+        """
         query = """
         SELECT 
             at.*,
@@ -2803,22 +3000,21 @@ class AccountManager(BaseModel):
                 WHEN at.from_account_id = ? THEN 'برداشت'
                 WHEN at.to_account_id = ? THEN 'واریز'
                 ELSE 'نامشخص'
-            END as transaction_direction
+            END as transaction_direction,
+            (SELECT l.balance_after FROM AccountLedger l
+             WHERE l.transaction_id = at.id AND l.account_id = ?) as balance_after
         FROM AccountingTransactions at
         LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
         LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
         WHERE (at.from_account_id = ? OR at.to_account_id = ?)
         """
         
-        params = [account_id, account_id, account_id, account_id]
-        
-        if start_date:
-            query += " AND DATE(at.transaction_date) >= ?"
-            params.append(start_date)
+        params = [account_id, account_id, account_id, account_id, account_id]
         
-        if end_date:
-            query += " AND DATE(at.transaction_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('at.transaction_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         query += " ORDER BY at.transaction_date DESC"
         
@@ -2830,9 +3026,19 @@ class AccountManager(BaseModel):
                 transaction['transaction_date']
             )
             transaction['amount_toman'] = transaction['amount'] / 10
+            balance_after = transaction.get('balance_after')
+            transaction['balance_after_toman'] = balance_after / 10 if balance_after is not None else None
         
         return transactions
     
+    def get_balance_as_of(self, account_id, as_of_date):
+        """مانده حساب در پایان یک روز (تاریخ میلادی یا شمسی) از دفتر موجودی"""
+        balance = account_ledger.balance_as_of(self.db, account_id, as_of_date)
+        return {
+            'balance_rial': balance,
+            'balance_toman': balance / 10
+        }
+    
     def add_transaction(self, data):
         """افزودن تراکنش حسابداری"""
         try:
@@ -2855,17 +3061,24 @@ class AccountManager(BaseModel):
                 data.get('employee', 'سیستم')
             )
             
-            success = self.db.execute_query(query, params)
+            # ثبت تراکنش و بروزرسانی موجودی حساب‌ها در یک واحد کار
+            with self.db.transaction():
+                success = self.db.execute_query(query, params)
+                
+                if success:
+                    transaction_id = self.db.fetch_one("SELECT last_insert_rowid() as id")['id']
+                    
+                    # بروزرسانی موجودی حساب‌ها
+                    self._update_account_balances(
+                        data.get('from_account_id'),
+                        data.get('to_account_id'),
+                        data.get('amount', 0),
+                        data.get('transaction_type'),
+                        transaction_id,
+                        data.get('transaction_date')
+                    )
             
             if success:
-                # بروزرسانی موجودی حساب‌ها
-                self._update_account_balances(
-                    data.get('from_account_id'),
-                    data.get('to_account_id'),
-                    data.get('amount', 0),
-                    data.get('transaction_type')
-                )
-                
                 print(f"✅ تراکنش با موفقیت ثبت شد")
                 self.data_changed.emit("AccountingTransactions")
                 return True, "تراکنش با موفقیت ثبت شد"
@@ -2877,28 +3090,49 @@ class AccountManager(BaseModel):
             print(f"❌ خطا در افزودن تراکنش: {e}")
             return False, f"خطا: {str(e)}"
     
-    def _update_account_balances(self, from_account_id, to_account_id, amount, transaction_type):
-        """بروزرسانی موجودی حساب‌ها"""
-        if transaction_type == 'انتقال' and from_account_id and to_account_id:
-            # کسر از حساب مبدا
-            query = "UPDATE Accounts SET current_balance = current_balance - ? WHERE id = ?"
-            self.execute_query(query, (amount, from_account_id))
-            
-            # افزودن به حساب مقصد
-            query = "UPDATE Accounts SET current_balance = current_balance + ? WHERE id = ?"
-            self.execute_query(query, (amount, to_account_id))
-        elif transaction_type == 'دریافت' and to_account_id:
-            # افزودن به حساب
-            query = "UPDATE Accounts SET current_balance = current_balance + ? WHERE id = ?"
-            self.execute_query(query, (amount, to_account_id))
-        elif transaction_type == 'پرداخت' and from_account_id:
-            # کسر از حساب
-            query = "UPDATE Accounts SET current_balance = current_balance - ? WHERE id = ?"
-            self.execute_query(query, (amount, from_account_id))
+    def _update_account_balances(self, from_account_id, to_account_id, amount, transaction_type,
+                                 transaction_id=None, transaction_date=None):
+        """بروزرسانی موجودی حساب‌ها و ثبت در دفتر موجودی (account_ledger)"""
+        account_ledger.post_transaction(
+            self.db, transaction_id, transaction_type,
+            from_account_id, to_account_id, amount, transaction_date
+        )
 
 class CheckManager(BaseModel):
     """مدل مدیریت چک‌ها"""
     
+    # لیست صفحه‌بندی شده چک‌ها (نزدیک‌ترین سررسید اول)؛ چون جوین اشخاص روی
+    # صادرکننده یا دریافت‌کننده است، شناسه شخص هم جزو کلید یکتای ردیف است
+    PAGE_QUERY = pagination.PageQuery(
+        select_sql="""
+        SELECT c.*,
+               CASE 
+                   WHEN p.first_name IS NOT NULL AND p.last_name IS NOT NULL THEN p.first_name || ' ' || p.last_name
+                   WHEN p.first_name IS NOT NULL THEN p.first_name
+                   WHEN p.last_name IS NOT NULL THEN p.last_name
+                   WHEN p.mobile IS NOT NULL THEN p.mobile
+                   ELSE 'شخص #' || c.drawer
+               END as customer_name,
+               IFNULL(p.id, 0) as person_key
+        FROM Checks c
+        LEFT JOIN Persons p ON c.drawer = p.id OR c.payee = p.id
+        """,
+        from_sql="FROM Checks c",
+        sorts={
+            'due_date': [('c.due_date', 'due_date'), ('c.id', 'id'), ('IFNULL(p.id, 0)', 'person_key')],
+            'amount': [('c.amount', 'amount'), ('c.id', 'id'), ('IFNULL(p.id, 0)', 'person_key')],
+        },
+        default_sort=('due_date', False),
+        filters={
+            'check_type': "c.check_type = ?",
+            'status': "c.status = ?",
+            'start_date': lambda value: date_filters.range_condition(
+                'c.due_date', date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                'c.due_date', None, date_filters.next_day_start(value)),
+        },
+    )
+    
     def __init__(self, db_manager):
         super().__init__(db_manager)
         self.table_name = "Checks"
@@ -2988,8 +3222,8 @@ class CheckManager(BaseModel):
         query = f"""
         SELECT * FROM {self.table_name} 
         WHERE status IN ('وصول نشده', 'پاس نشده')
-        AND date(due_date) <= date('now', '+{days} days')
-        AND date(due_date) >= date('now')
+        AND due_date >= date('now')
+        AND due_date < date('now', '+{days + 1} days')
         ORDER BY due_date
         """
         return self.fetch_all(query)  
@@ -2999,8 +3233,8 @@ class CheckManager(BaseModel):
         query = f"""
         SELECT * FROM {self.table_name} 
         WHERE status IN ('وصول نشده', 'پاس نشده')
-        AND date(due_date) <= date('now', '+{days} days')
-        AND date(due_date) >= date('now')
+        AND due_date >= date('now')
+        AND due_date < date('now', '+{days + 1} days')
         ORDER BY due_date
         """
         return self.fetch_all(query)
@@ -3034,6 +3268,25 @@ class CheckManager(BaseModel):
         query += " ORDER BY c.due_date"
         return self.fetch_all(query, params)
     
+    def get_checks_page(self, filters=None, sort=None, cursor=None,
+                        page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از چک‌ها با صفحه‌بندی keyset
+        
+        filters: check_type، status، start_date، end_date (بازه سررسید)
+        sort: ('due_date', False) پیش‌فرض، یا 'amount'
+        """
+        return self.fetch_page(self.PAGE_QUERY, filters, sort, cursor, page_size)
+    
+    def iter_checks(self, filters=None, sort=None, page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه چک‌های فیلتر شده، صفحه به صفحه و فقط به اندازه نیاز"""
+        return pagination.iter_rows(self.get_checks_page, filters=filters, sort=sort,
+                                    page_size=page_size)
+    
+    def count_checks(self, filters=None):
+        """تعداد چک‌های فیلتر شده: (تعداد، تخمینی بودن)"""
+        return self.count_rows(self.PAGE_QUERY, filters)
+    
 class ReportManager(BaseModel):
     """مدل مدیریت گزارش‌ها"""
     
@@ -3058,16 +3311,17 @@ class ReportManager(BaseModel):
         reception_report = self.fetch_one(query, (report_date,))
         
         # گزارش مالی
-        query = """
+        day_sql, day_params = date_filters.day_condition('transaction_date', report_date)
+        query = f"""
         SELECT 
             SUM(CASE WHEN transaction_type = 'دریافت' THEN amount ELSE 0 END) as total_income,
             SUM(CASE WHEN transaction_type = 'پرداخت' THEN amount ELSE 0 END) as total_expense,
             COUNT(*) as total_transactions
         FROM AccountingTransactions
-        WHERE date(transaction_date) = ?
+        WHERE {day_sql}
         """
         
-        financial_report = self.fetch_one(query, (report_date,))
+        financial_report = self.fetch_one(query, tuple(day_params))
         
         return {
             'date': report_date,
@@ -3090,10 +3344,11 @@ class ReportManager(BaseModel):
             SUM(CASE WHEN status = 'تحویل داده شده' THEN 1 ELSE 0 END) as delivered,
             AVG(estimated_cost) as avg_estimated_cost
         FROM Receptions
-        WHERE strftime('%Y', reception_date) = ? AND strftime('%m', reception_date) = ?
+        WHERE reception_date >= ? AND reception_date < ?
         """
         
-        reception_report = self.fetch_one(query, (str(year), f"{month:02d}"))
+        month_range = date_filters.month_bounds(year, month)
+        reception_report = self.fetch_one(query, month_range)
         
         # گزارش فروش ماهانه
         query = """
@@ -3103,11 +3358,11 @@ class ReportManager(BaseModel):
             SUM(paid_amount) as total_paid,
             AVG(total) as avg_invoice_amount
         FROM Invoices
-        WHERE strftime('%Y', invoice_date) = ? AND strftime('%m', invoice_date) = ?
+        WHERE invoice_date >= ? AND invoice_date < ?
         AND invoice_type IN ('فروش', 'خدمات')
         """
         
-        sales_report = self.fetch_one(query, (str(year), f"{month:02d}"))
+        sales_report = self.fetch_one(query, month_range)
         
         return {
             'year': year,
@@ -3132,12 +3387,12 @@ class ReportManager(BaseModel):
         FROM PartnerShares ps
         JOIN Partners p ON ps.partner_id = p.id
         JOIN Persons per ON p.person_id = per.id
-        WHERE date(ps.calculation_date) BETWEEN ? AND ?
+        WHERE ps.calculation_date >= ? AND ps.calculation_date < ?
         GROUP BY p.id, partner_name
         ORDER BY total_profit DESC
         """
         
-        return self.fetch_all(query, (start_date, end_date))
+        return self.fetch_all(query, date_filters.days_bounds(start_date, end_date))
 
     def get_active_partners(self):
         """دریافت شرکای فعال - با رفع خطای partner_name"""
@@ -3346,10 +3601,13 @@ class ServiceFee(BaseModel):
         query = f"SELECT * FROM {self.table_name} WHERE category = ? AND is_active = 1 ORDER BY service_name"
         return self.fetch_all(query, (category,))
     
-    def search_services(self, keyword):
-        """جستجوی خدمات بر اساس نام یا کد"""
-        query = f"SELECT * FROM {self.table_name} WHERE (service_name LIKE ? OR service_code LIKE ?) AND is_active = 1 ORDER BY service_name"
-        return self.fetch_all(query, (f"%{keyword}%", f"%{keyword}%"))
+    def search_services(self, keyword, limit=200):
+        """جستجوی خدمات فعال (نام، کد، دسته و شرح) به ترتیب میزان تطابق"""
+        try:
+            return search_index.search(self.db, self.table_name, keyword, ["t.is_active = 1"], limit=limit)
+        except Exception as e:
+            print(f"خطا در جستجوی خدمات: {e}")
+            return []
     
     def add_service(self, data):
         """افزودن خدمت جدید"""
@@ -3573,13 +3831,16 @@ class SecuritySettingsManager(BaseModel):
 class DataManager(QObject):
     """مدیریت متمرکز تمام مدل‌های داده - نسخه سریع"""
     
+    data_changed = Signal(str)  # بازپخش تغییرات همه مدل‌ها (نام جدول)
+    
     def __init__(self, db_path="data/repair_shop.db"):  
         super().__init__()
         self.db = DatabaseManager(db_path)
+        # مهاجرت‌های نسخه‌دار؛ دیتابیس به‌روز فقط یک بررسی نسخه دارد
         self.db.initialize_database()
-        
-        # 🔴 فقط مهاجرت‌های ضروری را اجرا کن
-        self.run_quick_migrations()
+        self.db.print_startup_report()
+        # لاگ حسابرسی در نخ پس‌زمینه و به صورت دسته‌ای نوشته می‌شود (بخش [AUDIT])
+        self.audit_log = audit_log.AuditLogWriter(self.db, **audit_log.load_audit_settings())
 
         # ایجاد نمونه‌های مدل
         self.person = Person(self.db)
@@ -3633,7 +3894,7 @@ class DataManager(QObject):
         """اتصال سیگنال‌های تغییر داده"""
         models = [
             self.person, self.device, self.reception, self.part,
-            self.invoice, self.check_manager, self.settings, self.user,
+            self.warehouse, self.invoice, self.check_manager, self.settings, self.user,
             self.device_category_name, self.device_with_category,
             self.account_manager, self.repair, self.service_fee,
             self.transaction_manager, self.invoice_manager
@@ -3646,41 +3907,7 @@ class DataManager(QObject):
     def _on_data_changed(self, table_name):
         """هندلر تغییر داده"""
         print(f"📊 داده‌های جدول {table_name} تغییر کرد")
-    
-    def run_quick_migrations(self):
-        """اجرای مهاجرت‌های سریع"""
-        print("🔧 اجرای مهاجرت‌های سریع دیتابیس...")
-        
-        # فقط چند مهاجرت ضروری
-        try:
-            # بررسی و اضافه کردن ستون‌های گمشده
-            self.db.connect()
-            
-            # 1. Checks table - اضافه کردن ستون check_date اگر وجود ندارد
-            self.db.cursor.execute("PRAGMA table_info(Checks)")
-            check_columns = [col[1] for col in self.db.cursor.fetchall()]
-            
-            if 'check_date' not in check_columns:
-                print("➕ افزودن check_date به Checks")
-                self.db.cursor.execute("ALTER TABLE Checks ADD COLUMN check_date DATE")
-                # مقداردهی اولیه با due_date
-                self.db.cursor.execute("UPDATE Checks SET check_date = due_date WHERE check_date IS NULL")
-            
-            # 2. Invoices table - بررسی ستون invoice_date
-            self.db.cursor.execute("PRAGMA table_info(Invoices)")
-            invoice_columns = [col[1] for col in self.db.cursor.fetchall()]
-            if 'invoice_date' not in invoice_columns:
-                print("➕ افزودن invoice_date به Invoices")
-                self.db.cursor.execute("ALTER TABLE Invoices ADD COLUMN invoice_date DATE")
-            
-            self.db.connection.commit()
-            print("✅ مهاجرت‌های سریع انجام شد")
-            
-        except Exception as e:
-            print(f"⚠️ خطا در مهاجرت‌های سریع: {e}")
-        finally:
-            if self.db.connection:
-                self.db.connection.close()
+        self.data_changed.emit(table_name)
 
 # تست مدل‌ها
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+# pagination.py - صفحه‌بندی keyset (seek) برای لیست‌های بزرگ
+"""
+صفحه‌بندی بر اساس کلید مرتب‌سازی به جای خواندن کل جدول یا LIMIT/OFFSET
+
+هر صفحه با شرط «بعد از آخرین ردیف صفحه قبل» خوانده می‌شود:
+
+    (transaction_date, id) < (?, ?)  ORDER BY transaction_date DESC, id DESC  LIMIT n
+
+که SQLite آن را با SEARCH روی ایندکس ستون تاریخ اجرا می‌کند؛ هزینه هر صفحه به
+اندازه همان صفحه است و برخلاف OFFSET با جلو رفتن در لیست بیشتر نمی‌شود. آخرین
+ستون کلید باید یکتا باشد (معمولاً id) تا ردیف‌های هم‌تاریخ جا نیفتند.
+
+تعریف‌ها:
+- keys: لیست (عبارت SQL، نام ستون در نتیجه) مثل [('at.transaction_date', 'transaction_date'), ('at.id', 'id')]
+- sorts: دیکشنری نام مرتب‌سازی ← keys؛ مرتب‌سازی درخواستی 'name' یا ('name', descending) است
+- filter rules: دیکشنری نام فیلتر ← شرط SQL با ? (مقدار به تعداد ? تکرار می‌شود)
+  یا تابع مقدار ← (sql, params)؛ فیلترهای خالی (None یا '') نادیده گرفته می‌شوند
+
+هر لیست با یک PageQuery تعریف می‌شود (کوئری، مرتب‌سازی‌ها و فیلترهای مجاز).
+خروجی fetch_page دیکشنری {'rows', 'next_cursor', 'has_more'} است؛ next_cursor را
+برای صفحه بعد به همان تابع بدهید. iter_rows صفحه‌ها را پشت سر هم و فقط به اندازه
+نیاز می‌خواند و می‌تواند مستقیماً به RecordTableView داده شود.
+
+ستون‌های کلید باید NOT NULL باشند؛ برای ستون‌های nullable از IFNULL در عبارت
+کلید و نام مستعار همان عبارت در SELECT استفاده کنید.
+"""
+
+DEFAULT_PAGE_SIZE = 200
+
+# سقف شمارش دقیق ردیف‌های فیلتر شده؛ بیشتر از این «حداقل» گزارش می‌شود
+COUNT_LIMIT = 10000
+
+
+def resolve_sort(sort, sorts, default):
+    """
+    (keys, descending) برای مرتب‌سازی درخواستی
+
+    sort: None، نام مرتب‌سازی یا (نام، descending)؛ نام ناشناخته ValueError می‌دهد.
+    """
+    if sort is None:
+        sort = default
+    if isinstance(sort, str):
+        name, descending = sort, True
+    else:
+        name, descending = sort
+    if name not in sorts:
+        raise ValueError(f"مرتب‌سازی ناشناخته: {name}")
+    return sorts[name], bool(descending)
+
+
+def filter_conditions(filters, rules):
+    """شرط‌ها و پارامترهای فیلترهای درخواستی بر اساس قواعد مجاز"""
+    conditions = []
+    params = []
+    for name, value in (filters or {}).items():
+        if value is None or value == '':
+            continue
+        rule = rules.get(name)
+        if rule is None:
+            raise ValueError(f"فیلتر ناشناخته: {name}")
+        if callable(rule):
+            sql, rule_params = rule(value)
+        else:
+            sql, rule_params = rule, [value] * rule.count('?')
+        conditions.append(sql)
+        params.extend(rule_params)
+    return conditions, params
+
+
+def where_clause(conditions):
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def keyset_condition(keys, cursor, descending=True):
+    """شرط «بعد از cursor» به ترتیب keys (مقایسه row value)"""
+    expressions = ", ".join(expression for expression, _ in keys)
+    placeholders = ", ".join("?" for _ in keys)
+    operator = "<" if descending else ">"
+    return f"({expressions}) {operator} ({placeholders})", list(cursor)
+
+
+def order_clause(keys, descending=True):
+    direction = "DESC" if descending else "ASC"
+    return "ORDER BY " + ", ".join(f"{expression} {direction}" for expression, _ in keys)
+
+
+def fetch_page(db, select_sql, keys, conditions=(), params=(), cursor=None,
+               descending=True, page_size=DEFAULT_PAGE_SIZE):
+    """
+    یک صفحه از select_sql (SELECT ... FROM ... JOIN ... بدون WHERE و ORDER BY)
+
+    یک ردیف بیشتر از page_size خوانده می‌شود تا وجود صفحه بعد بدون شمارش مشخص شود.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if cursor is not None:
+        keyset_sql, keyset_params = keyset_condition(keys, cursor, descending)
+        conditions.append(keyset_sql)
+        params.extend(keyset_params)
+
+    query = f"""
+    {select_sql}
+    {where_clause(conditions)}
+    {order_clause(keys, descending)}
+    LIMIT ?
+    """
+    rows = db.fetch_all(query, params + [page_size + 1])
+
+    has_more = len(rows) > page_size
+    if has_more:
+        del rows[page_size:]
+    next_cursor = tuple(rows[-1][name] for _, name in keys) if has_more else None
+    return {'rows': rows, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
+def count_rows(db, from_sql, conditions=(), params=(), limit=COUNT_LIMIT):
+    """
+    تعداد ردیف‌ها: (تعداد، تخمینی بودن)
+
+    from_sql فقط جدول پایه و جوین‌های لازم برای شرط‌هاست (مثلاً 'FROM Receptions r').
+    بدون شرط شمارش دقیق است (SQLite کوچک‌ترین ایندکس را می‌شمارد)؛ با شرط تا
+    limit ردیف شمرده می‌شود و بیشتر از آن با تخمینی=True به صورت «حداقل limit» برمی‌گردد.
+    """
+    conditions = list(conditions)
+    if not conditions:
+        result = db.fetch_one(f"SELECT COUNT(*) AS count {from_sql}")
+        return (result['count'] if result else 0), False
+
+    query = f"""
+    SELECT COUNT(*) AS count FROM (
+        SELECT 1 {from_sql} {where_clause(conditions)} LIMIT ?
+    )
+    """
+    result = db.fetch_one(query, list(params) + [limit + 1])
+    count = result['count'] if result else 0
+    if count > limit:
+        return limit, True
+    return count, False
+
+
+def iter_rows(fetch_page_fn, **kwargs):
+    """
+    ردیف‌های همه صفحه‌ها پشت سر هم؛ صفحه بعد فقط وقتی خوانده می‌شود که لازم باشد
+
+    fetch_page_fn تابعی با پارامتر cursor است (مثلاً TransactionManager.get_transactions_page).
+    """
+    cursor = None
+    while True:
+        page = fetch_page_fn(cursor=cursor, **kwargs)
+        yield from page['rows']
+        if not page['has_more']:
+            return
+        cursor = page['next_cursor']
+
+
+class PageQuery:
+    """
+    تعریف یک لیست قابل صفحه‌بندی
+
+    select_sql: SELECT ... FROM ... JOIN ... (بدون WHERE و ORDER BY)
+    from_sql: جدول پایه (و جوین‌های لازم برای فیلترها) برای شمارش، مثل 'FROM Receptions r'
+    sorts: نام مرتب‌سازی ← keys؛ default_sort مرتب‌سازی پیش‌فرض
+    filters: نام فیلتر ← قاعده (شرط SQL یا تابع)
+    prepare: تابع اختیاری که ردیف‌های هر صفحه را تکمیل می‌کند (مثلاً تاریخ شمسی)
+    """
+
+    def __init__(self, select_sql, from_sql, sorts, default_sort, filters=None, prepare=None):
+        self.select_sql = select_sql
+        self.from_sql = from_sql
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.filters = filters or {}
+        self.prepare = prepare
+
+    def fetch_page(self, db, filters=None, sort=None, cursor=None, page_size=DEFAULT_PAGE_SIZE,
+                   prepare=None):
+        keys, descending = resolve_sort(sort, self.sorts, self.default_sort)
+        conditions, params = filter_conditions(filters, self.filters)
+        page = fetch_page(db, self.select_sql, keys, conditions, params, cursor, descending, page_size)
+        prepare = prepare or self.prepare
+        if prepare is not None:
+            prepare(page['rows'])
+        return page
+
+    def count(self, db, filters=None, limit=COUNT_LIMIT):
+        conditions, params = filter_conditions(filters, self.filters)
+        return count_rows(db, self.from_sql, conditions, params, limit)
+
+
+def format_count(count, is_estimate):
+    """متن نمایشی تعداد (برای تعداد تخمینی: «بیش از»)"""
+    return f"بیش از {count:,}" if is_estimate else f"{count:,}"
@@ -0,0 +1,252 @@
+# part_stock.py - موجودی جاری قطعات (نگهداری شده با تریگر)
+"""
+موجودی جاری هر قطعه (PartStock)
+
+موجودی قطعه جمع quantity ردیف‌های «موجود» آن در NewPartsWarehouse و
+UsedPartsWarehouse است. به جای SUM ... GROUP BY part_id در هر بار خواندن، برای
+هر قطعه یک ردیف در PartStock نگهداری می‌شود و تریگرهای دو انبار آن را به‌روز
+می‌کنند:
+
+- new_qty و used_qty: موجودی انبار نو و دست دوم
+- value: ارزش خرید موجودی (quantity × purchase_price)
+- last_movement: زمان آخرین تغییر ردیف‌های انبار این قطعه
+- min_stock: کپی Parts.min_stock (با تریگر Parts) تا شرط «کمتر از حداقل» و
+  مرتب‌سازی بر اساس کسری از ایندکس idx_part_stock_shortage خوانده شود
+
+نویسنده‌های انبار تغییری لازم ندارند؛ درج، ویرایش (تعداد، قیمت، وضعیت یا قطعه)
+و حذف ردیف‌ها از هر اتصالی اعمال می‌شود. موجودی یک قطعه با یک جستجوی کلید اصلی
+خوانده می‌شود:
+
+    SELECT new_qty, used_qty FROM PartStock WHERE part_id = ?
+
+بررسی و بازسازی (اختلاف‌ها چاپ و جدول از نو ساخته می‌شود):
+
+    python -m database.part_stock [مسیر دیتابیس]
+"""
+
+import sqlite3
+import sys
+
+
+AVAILABLE_STATUS = 'موجود'
+
+STOCK_TABLE = """
+    CREATE TABLE IF NOT EXISTS PartStock (
+        part_id INTEGER PRIMARY KEY,
+        new_qty INTEGER NOT NULL DEFAULT 0,
+        used_qty INTEGER NOT NULL DEFAULT 0,
+        value REAL NOT NULL DEFAULT 0,
+        min_stock INTEGER NOT NULL DEFAULT 0,
+        last_movement TIMESTAMP
+    )
+"""
+
+# کسری نسبت به حداقل موجودی؛ کوئری‌ها باید همین عبارت (shortage_sql) را به کار ببرند تا ایندکس استفاده شود
+SHORTAGE_SQL = "min_stock - new_qty - used_qty"
+
+STOCK_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_part_stock_shortage ON PartStock({SHORTAGE_SQL})",
+    # ردیف‌های موجود یک قطعه (قیمت آخرین ردیف در جستجوی قطعات، کسر موجودی در تعمیر)
+    "CREATE INDEX IF NOT EXISTS idx_new_parts_part_status ON NewPartsWarehouse(part_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_used_parts_part_status ON UsedPartsWarehouse(part_id, status)",
+]
+
+
+def shortage_sql(alias):
+    """عبارت کسری با نام مستعار جدول PartStock در کوئری (مثلاً 's')"""
+    return f"{alias}.min_stock - {alias}.new_qty - {alias}.used_qty"
+
+
+# انبار ← ستون موجودی آن در PartStock
+_WAREHOUSES = [
+    ('NewPartsWarehouse', 'new_qty'),
+    ('UsedPartsWarehouse', 'used_qty'),
+]
+
+
+def _available(row, expression):
+    """مقدار expression برای ردیف موجود و صفر برای بقیه ({row} یعنی NEW/OLD یا نام جدول)"""
+    return f"(CASE WHEN {row}.status = '{AVAILABLE_STATUS}' THEN {expression} ELSE 0 END)"
+
+
+def _quantity(row):
+    return _available(row, f"COALESCE({row}.quantity, 0)")
+
+
+def _value(row):
+    return _available(row, f"COALESCE({row}.quantity, 0) * COALESCE({row}.purchase_price, 0)")
+
+
+def _apply(row, qty_column, sign):
+    """UPDATE اثر یک ردیف انبار (sign: '+' یا '-') روی موجودی قطعه آن"""
+    return f"""
+            UPDATE PartStock SET
+                {qty_column} = {qty_column} {sign} {_quantity(row)},
+                value = value {sign} {_value(row)},
+                last_movement = datetime('now', 'localtime')
+            WHERE part_id = {row}.part_id;
+    """
+
+
+def _ensure(row):
+    """ردیف PartStock قطعه (اگر قطعه در Parts باشد و ردیفی نداشته باشد)"""
+    return f"""
+            INSERT OR IGNORE INTO PartStock (part_id, min_stock)
+            SELECT id, COALESCE(min_stock, 0) FROM Parts WHERE id = {row}.part_id;
+    """
+
+
+def _trigger_statements():
+    yield """
+        CREATE TRIGGER IF NOT EXISTS trg_Parts_stock_insert
+        AFTER INSERT ON Parts
+        BEGIN
+            INSERT OR IGNORE INTO PartStock (part_id, min_stock)
+            VALUES (NEW.id, COALESCE(NEW.min_stock, 0));
+        END
+    """
+    yield """
+        CREATE TRIGGER IF NOT EXISTS trg_Parts_stock_min_stock
+        AFTER UPDATE OF min_stock ON Parts
+        BEGIN
+            UPDATE PartStock SET min_stock = COALESCE(NEW.min_stock, 0) WHERE part_id = NEW.id;
+        END
+    """
+    yield """
+        CREATE TRIGGER IF NOT EXISTS trg_Parts_stock_delete
+        AFTER DELETE ON Parts
+        BEGIN
+            DELETE FROM PartStock WHERE part_id = OLD.id;
+        END
+    """
+    for table, qty_column in _WAREHOUSES:
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stock_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            {_ensure('NEW')}
+            {_apply('NEW', qty_column, '+')}
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stock_update
+        AFTER UPDATE OF part_id, quantity, purchase_price, status ON {table}
+        BEGIN
+            {_apply('OLD', qty_column, '-')}
+            {_ensure('NEW')}
+            {_apply('NEW', qty_column, '+')}
+        END
+        """
+        yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stock_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            {_apply('OLD', qty_column, '-')}
+        END
+        """
+
+
+# موجودی محاسبه شده از جداول انبار (پایه بازسازی و بررسی)
+_COMPUTED_SQL = f"""
+    SELECT
+        p.id AS part_id,
+        COALESCE(n.qty, 0) AS new_qty,
+        COALESCE(u.qty, 0) AS used_qty,
+        COALESCE(n.value, 0) + COALESCE(u.value, 0) AS value,
+        COALESCE(p.min_stock, 0) AS min_stock,
+        MAX(COALESCE(n.last_movement, ''), COALESCE(u.last_movement, '')) AS last_movement
+    FROM Parts p
+    LEFT JOIN (
+        SELECT part_id, SUM({_quantity('NewPartsWarehouse')}) AS qty,
+               SUM({_value('NewPartsWarehouse')}) AS value,
+               MAX(COALESCE(updated_at, created_at)) AS last_movement
+        FROM NewPartsWarehouse GROUP BY part_id
+    ) n ON n.part_id = p.id
+    LEFT JOIN (
+        SELECT part_id, SUM({_quantity('UsedPartsWarehouse')}) AS qty,
+               SUM({_value('UsedPartsWarehouse')}) AS value,
+               MAX(created_at) AS last_movement
+        FROM UsedPartsWarehouse GROUP BY part_id
+    ) u ON u.part_id = p.id
+"""
+
+# قطعاتی که ردیف PartStock آن‌ها با موجودی محاسبه شده یکی نیست (یا ردیف ندارند)
+_MISMATCH_SQL = f"""
+    SELECT
+        c.part_id,
+        s.new_qty AS stored_new_qty,
+        c.new_qty AS computed_new_qty,
+        s.used_qty AS stored_used_qty,
+        c.used_qty AS computed_used_qty,
+        s.value AS stored_value,
+        c.value AS computed_value
+    FROM ({_COMPUTED_SQL}) c
+    LEFT JOIN PartStock s ON s.part_id = c.part_id
+    WHERE s.part_id IS NULL
+       OR s.new_qty != c.new_qty
+       OR s.used_qty != c.used_qty
+       OR s.min_stock != c.min_stock
+       OR ABS(s.value - c.value) > 0.01
+    ORDER BY c.part_id
+"""
+
+
+# ---------- ساخت، بازسازی و بررسی ----------
+
+def _existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_stock_table(cursor):
+    """
+    ایجاد جدول موجودی، ایندکس و تریگرهای آن روی cursor داده شده
+
+    اگر جدول تازه ساخته شود، موجودی از روی جداول انبار پر می‌شود.
+    خروجی: True اگر جدول ساخته شد.
+    """
+    existing = _existing_tables(cursor)
+    if not all(table in existing for table in ['Parts'] + [table for table, _ in _WAREHOUSES]):
+        return False
+
+    created = 'PartStock' not in existing
+    cursor.execute(STOCK_TABLE)
+    for index_sql in STOCK_INDEXES:
+        cursor.execute(index_sql)
+    for trigger_sql in _trigger_statements():
+        cursor.execute(trigger_sql)
+
+    if created:
+        rebuild(cursor)
+    return created
+
+
+def rebuild(cursor):
+    """بازسازی کامل PartStock از Parts و جداول انبار"""
+    cursor.execute("DELETE FROM PartStock")
+    cursor.execute(f"""
+        INSERT INTO PartStock (part_id, new_qty, used_qty, value, min_stock, last_movement)
+        SELECT part_id, new_qty, used_qty, value, min_stock, NULLIF(last_movement, '')
+        FROM ({_COMPUTED_SQL})
+    """)
+
+
+def find_mismatches(db):
+    """قطعاتی که موجودی PartStock آن‌ها با جمع ردیف‌های انبار یکی نیست"""
+    return db.fetch_all(_MISMATCH_SQL)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        cursor = connection.cursor()
+        if not create_stock_table(cursor):
+            cursor.execute(_MISMATCH_SQL)
+            for part_id, new_qty, computed_new, used_qty, computed_used, _, _ in cursor.fetchall():
+                print(f"⚠️ قطعه {part_id}: نو {new_qty} / {computed_new} - دست دوم {used_qty} / {computed_used}")
+            rebuild(cursor)
+        connection.commit()
+        print(f"✅ موجودی قطعات {db_path} بازسازی شد")
+    finally:
+        connection.close()
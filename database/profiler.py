@@ -0,0 +1,336 @@
+# profiler.py - پروفایلر کوئری‌ها و لاگ کوئری‌های کند
+"""
+پروفایلر اختیاری کوئری‌های DatabaseManager
+
+- زمان اجرا، تعداد ردیف‌ها و محل فراخوانی (کلاس و متد مدل) هر دستور ثبت می‌شود.
+- کوئری‌های کندتر از آستانه با EXPLAIN QUERY PLAN همان لحظه ذخیره می‌شوند.
+- تشخیص N+1: اگر یک شکل کوئری (متن بدون مقادیر ثابت) در یک «اقدام» رابط
+  کاربری بیش از حد مجاز اجرا شود هشدار ثبت می‌شود. اقدام با profiler.action()
+  مشخص می‌شود یا به صورت خودکار با فاصله زمانی بین کوئری‌ها جدا می‌شود.
+- نتایج در یک فایل لاگ چرخشی نوشته می‌شوند و از پنل «عملکرد» قابل مشاهده‌اند.
+
+پروفایلر به صورت پیش‌فرض خاموش است و در حالت خاموش فقط یک بررسی bool هزینه دارد.
+"""
+
+import configparser
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+
+
+DEFAULT_PROFILER_SETTINGS = {
+    'enabled': False,                        # فعال بودن پروفایلر
+    'slow_query_ms': 50.0,                   # آستانه کوئری کند (میلی‌ثانیه)
+    'n_plus_one_threshold': 20,              # حداکثر تکرار یک شکل کوئری در یک اقدام
+    'action_gap_ms': 300.0,                  # فاصله بیکاری که اقدام خودکار جدید را شروع می‌کند
+    'history_size': 1000,                    # تعداد آخرین کوئری‌های نگه داشته شده در حافظه
+    'log_file': 'logs/query_profile.log',
+    'log_max_kb': 1024,
+    'log_backup_count': 3,
+    'log_all_queries': False,                # نوشتن تمام کوئری‌ها در لاگ (نه فقط کندها و هشدارها)
+}
+
+# فریم‌هایی که محل واقعی فراخوانی نیستند (لایه دیتابیس و wrapperهای BaseModel)
+_WRAPPER_FUNCTIONS = {
+    'fetch_all', 'fetch_one', 'execute_query', 'execute_many', 'bulk_insert',
+    'connection_scope', 'transaction', 'record',
+}
+_DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def load_profiler_settings(config_path="config.ini"):
+    """خواندن تنظیمات پروفایلر از بخش [PROFILER] فایل config.ini"""
+    settings = dict(DEFAULT_PROFILER_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('PROFILER'):
+        return settings
+
+    section = parser['PROFILER']
+    try:
+        settings['enabled'] = section.getboolean('enabled', fallback=settings['enabled'])
+        settings['slow_query_ms'] = section.getfloat('slow_query_ms', fallback=settings['slow_query_ms'])
+        settings['n_plus_one_threshold'] = section.getint(
+            'n_plus_one_threshold', fallback=settings['n_plus_one_threshold']
+        )
+        settings['action_gap_ms'] = section.getfloat('action_gap_ms', fallback=settings['action_gap_ms'])
+        settings['history_size'] = section.getint('history_size', fallback=settings['history_size'])
+        settings['log_file'] = section.get('log_file', fallback=settings['log_file']).strip()
+        settings['log_max_kb'] = section.getint('log_max_kb', fallback=settings['log_max_kb'])
+        settings['log_backup_count'] = section.getint(
+            'log_backup_count', fallback=settings['log_backup_count']
+        )
+        settings['log_all_queries'] = section.getboolean(
+            'log_all_queries', fallback=settings['log_all_queries']
+        )
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [PROFILER]: {e}")
+
+    return settings
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(sql):
+    """شکل کوئری: متن یک‌خطی با مقادیر ثابت و لیست‌های IN جایگزین شده با ?"""
+    shape = _STRING_LITERAL_RE.sub('?', sql)
+    shape = _NUMBER_LITERAL_RE.sub('?', shape)
+    shape = _WHITESPACE_RE.sub(' ', shape).strip()
+    return _IN_LIST_RE.sub('(?)', shape)
+
+
+def _call_site():
+    """پیدا کردن اولین فریم خارج از لایه دیتابیس (مثلاً Invoice.create_invoice)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        in_database_layer = os.path.dirname(os.path.abspath(filename)) == _DATABASE_DIR
+        if not (code.co_name in _WRAPPER_FUNCTIONS and in_database_layer) and 'contextlib' not in filename:
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f"{type(owner).__name__}.{code.co_name}"
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f"{module}.{code.co_name}"
+        frame = frame.f_back
+    return "نامشخص"
+
+
+class QueryProfiler:
+    """جمع‌آوری آمار کوئری‌ها، کوئری‌های کند و هشدارهای N+1"""
+
+    def __init__(self, settings=None):
+        self.settings = dict(DEFAULT_PROFILER_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+        self.reset()
+
+        if self.settings['enabled']:
+            self.set_enabled(True)
+
+    # ---------- کنترل ----------
+
+    def set_enabled(self, enabled):
+        """روشن/خاموش کردن پروفایلر در زمان اجرا"""
+        if enabled and self._logger is None:
+            self._logger = self._create_logger()
+        self.enabled = bool(enabled)
+
+    def reset(self):
+        """پاک کردن تمام آمار جمع‌آوری شده"""
+        with self._lock:
+            self._history = deque(maxlen=max(1, int(self.settings['history_size'])))
+            self._slow = deque(maxlen=200)
+            self._warnings = deque(maxlen=200)
+            self._stats = {}
+
+    def _create_logger(self):
+        """ساخت لاگر با فایل چرخشی؛ در صورت خطا فقط حافظه استفاده می‌شود"""
+        logger = logging.getLogger('repair_shop.query_profiler')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        log_file = self.settings['log_file']
+        if log_file and not logger.handlers:
+            try:
+                directory = os.path.dirname(log_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    log_file,
+                    maxBytes=int(self.settings['log_max_kb']) * 1024,
+                    backupCount=int(self.settings['log_backup_count']),
+                    encoding='utf-8'
+                )
+                handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
+                logger.addHandler(handler)
+            except OSError as e:
+                print(f"⚠️ ایجاد فایل لاگ پروفایلر ممکن نشد: {e}")
+        return logger
+
+    # ---------- اقدام‌های رابط کاربری ----------
+
+    def _action_state(self):
+        state = self._local
+        if not hasattr(state, 'counts'):
+            state.name = None
+            state.explicit = False
+            state.counts = {}
+            state.warned = {}
+            state.last_query = 0.0
+        return state
+
+    def _start_action(self, state, name, explicit):
+        state.name = name
+        state.explicit = explicit
+        state.counts = {}
+        state.warned = {}
+
+    @contextmanager
+    def action(self, name):
+        """
+        مشخص کردن یک اقدام رابط کاربری برای تشخیص N+1
+
+            with db.profiler.action("MainWindow.refresh_dashboard_data"):
+                ...
+        """
+        state = self._action_state()
+        previous = (state.name, state.explicit, state.counts, state.warned)
+        self._start_action(state, name, True)
+        try:
+            yield
+        finally:
+            state.name, state.explicit, state.counts, state.warned = previous
+
+    # ---------- ثبت ----------
+
+    def record(self, kind, sql, params, started, rowcount, connection=None):
+        """ثبت یک اجرای کوئری؛ started مقدار time.perf_counter() پیش از اجراست"""
+        now = time.perf_counter()
+        elapsed_ms = (now - started) * 1000.0
+        shape = statement_shape(sql)
+        call_site = _call_site()
+
+        state = self._action_state()
+        if not state.explicit and (now - state.last_query) * 1000.0 > self.settings['action_gap_ms']:
+            self._start_action(state, f"خودکار ({call_site})", False)
+        state.last_query = now
+        count = state.counts.get(shape, 0) + 1
+        state.counts[shape] = count
+
+        entry = {
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'kind': kind,
+            'sql': sql.strip(),
+            'shape': shape,
+            'params': repr(params)[:200],
+            'elapsed_ms': round(elapsed_ms, 3),
+            'rows': rowcount,
+            'call_site': call_site,
+            'action': state.name,
+            'thread': threading.current_thread().name,
+            'plan': None,
+        }
+
+        slow = elapsed_ms >= self.settings['slow_query_ms']
+        if slow and connection is not None:
+            entry['plan'] = self._explain(connection, sql, params)
+
+        warning = None
+        with self._lock:
+            self._history.append(entry)
+
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = {
+                    'shape': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'call_sites': {}
+                }
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['rows'] += rowcount if rowcount and rowcount > 0 else 0
+            stats['call_sites'][call_site] = stats['call_sites'].get(call_site, 0) + 1
+
+            if slow:
+                self._slow.append(entry)
+
+            threshold = self.settings['n_plus_one_threshold']
+            if count > threshold:
+                warning = state.warned.get(shape)
+                if warning is None:
+                    warning = state.warned[shape] = {
+                        'time': entry['time'],
+                        'action': state.name,
+                        'shape': shape,
+                        'call_site': call_site,
+                        'count': count,
+                    }
+                    self._warnings.append(warning)
+                else:
+                    warning['count'] = count
+                    warning = None  # فقط بار اول لاگ می‌شود
+
+        logger = self._logger
+        if logger is not None:
+            if slow:
+                logger.warning(
+                    "SLOW %.1fms | %s | rows=%s | %s | plan=%s",
+                    elapsed_ms, call_site, rowcount, entry['shape'], entry['plan']
+                )
+            elif self.settings['log_all_queries']:
+                logger.info("%.1fms | %s | rows=%s | %s", elapsed_ms, call_site, rowcount, entry['shape'])
+            if warning is not None:
+                logger.warning(
+                    "N+1 | action=%s | %s | > %s بار | %s",
+                    warning['action'], call_site, self.settings['n_plus_one_threshold'], shape
+                )
+
+    @staticmethod
+    def _explain(connection, sql, params):
+        """ثبت EXPLAIN QUERY PLAN برای کوئری کند"""
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            return " | ".join(str(row[-1]) for row in rows)
+        except Exception as e:
+            return f"EXPLAIN ناموفق: {e}"
+
+    # ---------- گزارش ----------
+
+    def recent(self, limit=200):
+        """آخرین کوئری‌ها (جدیدترین اول)"""
+        with self._lock:
+            return list(self._history)[-limit:][::-1]
+
+    def slow_queries(self):
+        """کوئری‌های کند (جدیدترین اول)"""
+        with self._lock:
+            return list(self._slow)[::-1]
+
+    def n_plus_one_warnings(self):
+        """هشدارهای N+1 (جدیدترین اول)"""
+        with self._lock:
+            return [dict(warning) for warning in self._warnings][::-1]
+
+    def summary(self, order_by='total_ms', limit=100):
+        """آمار تجمیعی هر شکل کوئری به ترتیب order_by (total_ms، count یا max_ms)"""
+        with self._lock:
+            rows = []
+            for stats in self._stats.values():
+                row = dict(stats)
+                row['avg_ms'] = row['total_ms'] / row['count'] if row['count'] else 0.0
+                row['call_sites'] = ", ".join(
+                    f"{site} ×{count}" for site, count in
+                    sorted(stats['call_sites'].items(), key=lambda item: -item[1])[:3]
+                )
+                rows.append(row)
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
@@ -0,0 +1,260 @@
+# search_index.py - جستجوی تمام‌متن (FTS5) اشخاص، دستگاه‌ها، قطعات، پذیرش‌ها و اجرت‌ها
+"""
+جستجوی تمام‌متن با FTS5 و نرمال‌سازی فارسی
+
+برای هر جدول قابل جستجو یک جدول مجازی FTS5 با نام {جدول}FTS ساخته می‌شود
+(rowid همان id ردیف اصلی است) با دو ستون:
+
+- title: نام/عنوان اصلی (نام و نام خانوادگی، نام قطعه، شماره پذیرش، ...)
+- content: بقیه فیلدهای قابل جستجو (موبایل، کد ملی، سریال، کد قطعه، شرح، ...)
+
+متن هر دو ستون و عبارت جستجو با یک قاعده نرمال می‌شوند:
+
+- «ي» و «ى» عربی ← «ی» فارسی، «ك» ← «ک»
+- نیم‌فاصله (ZWNJ) حذف می‌شود («می‌خواهم» و «میخواهم» یکی هستند)
+- ارقام فارسی و عربی ← ارقام لاتین
+
+تریگرهای درج، ویرایش و حذف جدول اصلی ایندکس را همگام نگه می‌دارند؛ نرمال‌سازی در
+تریگر با REPLACE تو در تو انجام می‌شود تا به تابع پایتونی روی اتصال وابسته نباشد.
+
+هر کلمه جستجو به صورت پیشوندی جستجو می‌شود ("عل"* «علی» و «علیرضا» را می‌یابد) و
+نتایج با bm25 (وزن عنوان ۱۰ برابر بقیه فیلدها) رتبه‌بندی می‌شوند.
+
+بازسازی کامل ایندکس‌ها:
+
+    python -m database.search_index [مسیر دیتابیس]
+"""
+
+import re
+import sqlite3
+import sys
+
+
+# نویسه‌هایی که قبل از ایندکس و جستجو جایگزین می‌شوند
+_CHARACTER_MAP = {
+    '\u064a': '\u06cc',  # ي ← ی
+    '\u0649': '\u06cc',  # ى ← ی
+    '\u0643': '\u06a9',  # ك ← ک
+    '\u200c': '',        # نیم‌فاصله (ZWNJ)
+}
+_CHARACTER_MAP.update({chr(0x06f0 + digit): str(digit) for digit in range(10)})  # ۰-۹
+_CHARACTER_MAP.update({chr(0x0660 + digit): str(digit) for digit in range(10)})  # ٠-٩
+
+_TRANSLATION = str.maketrans(_CHARACTER_MAP)
+
+# توکن‌ها مثل tokenizer پیش‌فرض unicode61: حروف و ارقام، بقیه جداکننده
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+QUICK_SEARCH_LIMIT = 5
+
+# جدول ← (برچسب، ستون‌های title، ستون‌های content)
+ENTITIES = {
+    'Persons': ('شخص', ['first_name', 'last_name'],
+                ['mobile', 'phone', 'national_id', 'economic_code']),
+    'Devices': ('دستگاه', ['device_type', 'brand', 'model'],
+                ['serial_number', 'description']),
+    'Parts': ('قطعه', ['part_name'],
+              ['part_code', 'brand', 'model', 'category']),
+    'Receptions': ('پذیرش', ['reception_number'],
+                   ['problem_description', 'accessories', 'notes']),
+    'ServiceFees': ('اجرت', ['service_name'],
+                    ['service_code', 'category', 'description']),
+}
+
+
+def normalize(text):
+    """نرمال‌سازی متن فارسی برای جستجو (همان قاعده normalize_sql)"""
+    return str(text or '').translate(_TRANSLATION)
+
+
+def normalize_sql(expression):
+    """عبارت SQL نرمال‌شده expression با REPLACE تو در تو"""
+    for source, target in _CHARACTER_MAP.items():
+        expression = f"REPLACE({expression}, '{source}', '{target}')"
+    return expression
+
+
+def match_query(text):
+    """
+    عبارت MATCH برای متن جستجو؛ None اگر متن کلمه‌ای نداشته باشد
+
+    هر کلمه (بخش جدا شده با فاصله) یک عبارت پیشوندی است و همه کلمه‌ها باید پیدا شوند:
+    «REC-1403 علی» ← "rec 1403"* "علی"*
+    """
+    phrases = []
+    for word in normalize(text).split():
+        tokens = _TOKEN_PATTERN.findall(word)
+        if tokens:
+            phrases.append('"' + ' '.join(tokens) + '"*')
+    return ' '.join(phrases) if phrases else None
+
+
+def fts_table(table):
+    return f"{table}FTS"
+
+
+def _text_sql(row, columns):
+    """متن نرمال‌شده چند ستون یک ردیف ({row} یعنی NEW/OLD یا نام جدول)"""
+    joined = " || ' ' || ".join(f"COALESCE({row}.{column}, '')" for column in columns)
+    return normalize_sql(joined)
+
+
+def _trigger_statements(table):
+    _, title_columns, content_columns = ENTITIES[table]
+    fts = fts_table(table)
+    insert = f"""
+            INSERT INTO {fts} (rowid, title, content)
+            VALUES (NEW.id, {_text_sql('NEW', title_columns)}, {_text_sql('NEW', content_columns)});
+    """
+    yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            {insert}
+        END
+    """
+    yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update
+        AFTER UPDATE OF {', '.join(['id'] + title_columns + content_columns)} ON {table}
+        BEGIN
+            DELETE FROM {fts} WHERE rowid = OLD.id;
+            {insert}
+        END
+    """
+    yield f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {fts} WHERE rowid = OLD.id;
+        END
+    """
+
+
+# ---------- ساخت و بازسازی ----------
+
+def _existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_search_tables(cursor):
+    """
+    ایجاد جداول FTS5 و تریگرهای آن‌ها روی cursor داده شده
+
+    جداولی که تازه ساخته شوند از روی جدول اصلی پر می‌شوند.
+    خروجی: لیست جداول اصلی که ایندکسشان ساخته شد.
+    """
+    existing = _existing_tables(cursor)
+    created = []
+    for table in ENTITIES:
+        if table not in existing:
+            continue
+        fts = fts_table(table)
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                title, content, prefix = '2 3'
+            )
+        """)
+        for trigger_sql in _trigger_statements(table):
+            cursor.execute(trigger_sql)
+        if fts not in existing:
+            rebuild(cursor, table)
+            created.append(table)
+    return created
+
+
+def rebuild(cursor, table=None):
+    """بازسازی کامل ایندکس یک جدول (یا همه جدول‌ها) از جدول اصلی"""
+    for name in [table] if table else ENTITIES:
+        _, title_columns, content_columns = ENTITIES[name]
+        fts = fts_table(name)
+        cursor.execute(f"DELETE FROM {fts}")
+        cursor.execute(f"""
+            INSERT INTO {fts} (rowid, title, content)
+            SELECT id, {_text_sql(name, title_columns)}, {_text_sql(name, content_columns)}
+            FROM {name}
+        """)
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+# ---------- جستجو ----------
+
+def _rank_sql(table):
+    return f"bm25({fts_table(table)}, {TITLE_WEIGHT}, {CONTENT_WEIGHT})"
+
+
+def match_condition(table, id_expression, text):
+    """
+    شرط «id_expression در نتایج جستجوی table» برای WHERE (مثلاً قاعده فیلتر PageQuery)
+
+    خروجی: (sql, params)؛ متن بدون کلمه هیچ ردیفی را نمی‌یابد.
+    """
+    query = match_query(text)
+    if query is None:
+        return "0", []
+    fts = fts_table(table)
+    return f"{id_expression} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", [query]
+
+
+def search(db, table, text, conditions=(), params=(), limit=50):
+    """
+    ردیف‌های table که با text می‌خوانند، به ترتیب رتبه (بهترین اول)
+
+    conditions شرط‌های اضافه روی جدول اصلی با نام مستعار t هستند (مثل "t.is_active = 1").
+    """
+    query = match_query(text)
+    if query is None:
+        return []
+    fts = fts_table(table)
+    where = " AND ".join([f"{fts} MATCH ?"] + list(conditions))
+    return db.fetch_all(f"""
+        SELECT t.*
+        FROM {fts}
+        JOIN {table} t ON t.id = {fts}.rowid
+        WHERE {where}
+        ORDER BY {_rank_sql(table)}
+        LIMIT ?
+    """, [query] + list(params) + [limit])
+
+
+def quick_search(db, text, limit=QUICK_SEARCH_LIMIT, tables=None):
+    """
+    جستجوی سراسری در همه جداول: بهترین limit نتیجه هر جدول، مرتب بر اساس رتبه
+
+    هر نتیجه: {'entity', 'label', 'id', 'title', 'content', 'rank'}
+    """
+    query = match_query(text)
+    if query is None:
+        return []
+    selects = []
+    params = []
+    for table in tables or ENTITIES:
+        fts = fts_table(table)
+        selects.append(f"""
+            SELECT * FROM (
+                SELECT '{table}' AS entity, rowid AS id, title, content, {_rank_sql(table)} AS rank
+                FROM {fts} WHERE {fts} MATCH ?
+                ORDER BY rank LIMIT ?
+            )
+        """)
+        params.extend([query, limit])
+    results = db.fetch_all(" UNION ALL ".join(selects) + " ORDER BY rank", params)
+    for result in results:
+        result['label'] = ENTITIES[result['entity']][0]
+    return results
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        cursor = connection.cursor()
+        create_search_tables(cursor)
+        rebuild(cursor)
+        connection.commit()
+        print(f"✅ ایندکس جستجوی {db_path} بازسازی شد")
+    finally:
+        connection.close()
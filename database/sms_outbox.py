@@ -0,0 +1,236 @@
+# sms_outbox.py - صف ماندگار ارسال پیامک (SMSOutbox)
+"""
+صف ماندگار پیامک‌های در انتظار ارسال
+
+هر پیامک قبل از ارسال یک ردیف در SMSOutbox است و وضعیت آن در همان ردیف
+به‌روز می‌شود؛ پیامک‌های صف با بسته شدن برنامه از بین نمی‌روند:
+
+- در صف: منتظر ارسال از زمان next_attempt_at
+- در حال ارسال: برداشته شده توسط سرویس ارسال (claim_due)
+- ارسال شده: provider_message_id و sent_at ثبت شده است
+- خطا: بعد از max_attempts تلاش ناموفق کنار گذاشته شده است
+
+ردیف‌های «در حال ارسال» که برنامه پیش از ثبت نتیجه‌شان بسته شده، در شروع بعدی
+سرویس با recover_interrupted به صف برمی‌گردند (ارسال حداقل یک بار).
+
+dedup_key یکتاست: درج دوباره پیامکی با همان کلید (مثلاً «پذیرش ۱۲۳» یا
+«یادآوری فاکتور ۴۵ در تاریخ ...») ردیف جدیدی نمی‌سازد.
+
+زمان‌ها به صورت YYYY-MM-DD HH:MM:SS محلی ذخیره می‌شوند.
+
+وضعیت صف:
+
+    python -m database.sms_outbox [مسیر دیتابیس]
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+
+STATUS_QUEUED = 'در صف'
+STATUS_SENDING = 'در حال ارسال'
+STATUS_SENT = 'ارسال شده'
+STATUS_FAILED = 'خطا'
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+OUTBOX_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS SMSOutbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dedup_key TEXT UNIQUE,
+        phone TEXT NOT NULL,
+        message TEXT NOT NULL,
+        line_number TEXT,
+        message_type TEXT,
+        status TEXT NOT NULL DEFAULT '{STATUS_QUEUED}',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL,
+        last_error TEXT,
+        provider_message_id TEXT,
+        created_at TIMESTAMP NOT NULL,
+        sent_at TIMESTAMP
+    )
+"""
+
+OUTBOX_INDEXES = [
+    # پیامک‌های آماده ارسال به ترتیب زمان
+    "CREATE INDEX IF NOT EXISTS idx_sms_outbox_due ON SMSOutbox(status, next_attempt_at)",
+]
+
+_INSERT_SQL = """
+    INSERT OR IGNORE INTO SMSOutbox
+        (dedup_key, phone, message, line_number, message_type, next_attempt_at, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def timestamp(moment=None):
+    return (moment or datetime.now()).strftime(TIMESTAMP_FORMAT)
+
+
+def create_outbox_table(cursor):
+    """ایجاد جدول صف پیامک و ایندکس آن روی cursor داده شده"""
+    cursor.execute(OUTBOX_TABLE)
+    for index_sql in OUTBOX_INDEXES:
+        cursor.execute(index_sql)
+    return True
+
+
+# ---------- افزودن به صف ----------
+
+def enqueue(db, phone, message, line_number=None, message_type=None, dedup_key=None):
+    """
+    افزودن یک پیامک به صف
+
+    خروجی: شناسه ردیف (برای کلید تکراری شناسه ردیف قبلی)، یا None در صورت خطا.
+    """
+    now = timestamp()
+    try:
+        with db.transaction() as connection:
+            cursor = connection.execute(
+                _INSERT_SQL, (dedup_key, phone, message, line_number, message_type, now, now)
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid
+            row = connection.execute(
+                "SELECT id FROM SMSOutbox WHERE dedup_key = ?", (dedup_key,)
+            ).fetchone()
+            return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"❌ خطا در افزودن پیامک به صف: {e}")
+        return None
+
+
+def enqueue_many(db, messages):
+    """
+    افزودن گروهی پیامک‌ها (لیست dict با کلیدهای phone، message و اختیاری
+    line_number، message_type، dedup_key) با executemany در بسته‌های یک تراکنشی
+
+    پیامک‌هایی که dedup_key آن‌ها قبلاً در صف بوده نادیده گرفته می‌شوند.
+    """
+    now = timestamp()
+    params_list = [
+        (item.get('dedup_key'), item['phone'], item['message'], item.get('line_number'),
+         item.get('message_type'), now, now)
+        for item in messages
+    ]
+    return db.execute_many(_INSERT_SQL, params_list)
+
+
+# ---------- برداشتن و ثبت نتیجه ----------
+
+def claim_due(db, limit, now=None):
+    """برداشتن حداکثر limit پیامک آماده (قدیمی‌ترین اول) و علامت «در حال ارسال»"""
+    now = timestamp(now)
+    with db.transaction() as connection:
+        cursor = connection.execute("""
+            SELECT id, phone, message, line_number, message_type, attempts
+            FROM SMSOutbox
+            WHERE status = ? AND next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        """, (STATUS_QUEUED, now, limit))
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+        connection.executemany(
+            "UPDATE SMSOutbox SET status = ? WHERE id = ?",
+            [(STATUS_SENDING, row['id']) for row in rows]
+        )
+    return rows
+
+
+def mark_sent(db, ids, provider_message_ids=None):
+    """ثبت ارسال موفق (provider_message_ids هم‌ترتیب ids یا None)"""
+    provider_message_ids = list(provider_message_ids or [])
+    now = timestamp()
+    params_list = [
+        (STATUS_SENT, now,
+         str(provider_message_ids[index]) if index < len(provider_message_ids) else None,
+         outbox_id)
+        for index, outbox_id in enumerate(ids)
+    ]
+    return db.execute_many("""
+        UPDATE SMSOutbox
+        SET status = ?, sent_at = ?, provider_message_id = ?, attempts = attempts + 1,
+            last_error = NULL
+        WHERE id = ?
+    """, params_list)
+
+
+def retry_delay(attempts, base_seconds, max_seconds):
+    """تأخیر تلاش بعدی بعد از attempts تلاش ناموفق (نمایی: base، 2×base، 4×base ...)"""
+    return min(max_seconds, base_seconds * 2 ** max(0, attempts - 1))
+
+
+def mark_failed(db, rows, error, max_attempts, base_seconds, max_seconds):
+    """
+    ثبت ارسال ناموفق ردیف‌های برداشته شده (dictهای claim_due)
+
+    ردیف‌هایی که به max_attempts رسیده‌اند «خطا» و بقیه با تأخیر نمایی دوباره
+    «در صف» می‌شوند.
+    """
+    now = datetime.now()
+    params_list = []
+    for row in rows:
+        attempts = row['attempts'] + 1
+        if attempts >= max_attempts:
+            status, next_attempt = STATUS_FAILED, now
+        else:
+            status = STATUS_QUEUED
+            next_attempt = now + timedelta(seconds=retry_delay(attempts, base_seconds, max_seconds))
+        params_list.append((status, attempts, timestamp(next_attempt), str(error or '')[:500], row['id']))
+    return db.execute_many("""
+        UPDATE SMSOutbox
+        SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+        WHERE id = ?
+    """, params_list)
+
+
+def release(db, ids):
+    """برگرداندن ردیف‌های برداشته شده و ارسال نشده به صف (مثلاً هنگام توقف سرویس)"""
+    return db.execute_many(
+        "UPDATE SMSOutbox SET status = ? WHERE id = ? AND status = ?",
+        [(STATUS_QUEUED, outbox_id, STATUS_SENDING) for outbox_id in ids]
+    )
+
+
+def recover_interrupted(db):
+    """برگرداندن ردیف‌های «در حال ارسال» یک اجرای قطع شده به صف"""
+    return db.execute_query(
+        "UPDATE SMSOutbox SET status = ? WHERE status = ?", (STATUS_QUEUED, STATUS_SENDING)
+    )
+
+
+def seconds_until_next(db, now=None):
+    """ثانیه تا زمان اولین پیامک در صف (0 اگر آماده است)؛ None اگر صف خالی است"""
+    row = db.fetch_one(
+        "SELECT MIN(next_attempt_at) AS next_attempt_at FROM SMSOutbox WHERE status = ?",
+        (STATUS_QUEUED,)
+    )
+    if not row or not row['next_attempt_at']:
+        return None
+    next_attempt = datetime.strptime(row['next_attempt_at'], TIMESTAMP_FORMAT)
+    return max(0.0, (next_attempt - (now or datetime.now())).total_seconds())
+
+
+def status_counts(db):
+    """تعداد پیامک‌ها در هر وضعیت"""
+    rows = db.fetch_all("SELECT status, COUNT(*) AS count FROM SMSOutbox GROUP BY status")
+    return {row['status']: row['count'] for row in rows}
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "data/repair_shop.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        create_outbox_table(connection.cursor())
+        connection.commit()
+        counts = connection.execute(
+            "SELECT status, COUNT(*) FROM SMSOutbox GROUP BY status"
+        ).fetchall()
+    finally:
+        connection.close()
+    print(f"📨 صف پیامک {db_path}:")
+    for status, count in counts or [('خالی', 0)]:
+        print(f"   {status}: {count}")
@@ -0,0 +1,189 @@
+# statements.py - جدول دستورات آماده و نگاشت سریع ردیف‌ها
+"""
+مسیر سریع نتایج کوئری
+
+- متن تمیز شده کوئری (جایگزینی # با --) و مسیریابی خواننده/نویسنده یک بار
+  برای هر متن کوئری محاسبه و نگه داشته می‌شود.
+- نام ستون‌ها یک بار برای هر دستور استخراج می‌شود نه برای هر ردیف.
+- نوع ردیف خروجی قابل انتخاب است: dict (پیش‌فرض و سازگار با کدهای قبلی)،
+  tuple، sqlite3.Row یا record (کلاس سبک با __slots__).
+"""
+
+import keyword
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+ROW_TYPES = ('dict', 'tuple', 'row', 'record')
+
+
+class Statement:
+    """اطلاعات کش شده یک متن کوئری"""
+
+    __slots__ = ('sql', 'reader_safe', 'columns')
+
+    def __init__(self, sql, reader_safe):
+        self.sql = sql
+        self.reader_safe = reader_safe
+        self.columns = None
+
+    def resolve_columns(self, description):
+        """نام ستون‌ها فقط وقتی دوباره خوانده می‌شود که تعداد ستون‌ها تغییر کرده باشد"""
+        columns = self.columns
+        if columns is None or len(columns) != len(description):
+            columns = tuple(col[0] for col in description)
+            self.columns = columns
+        return columns
+
+
+class StatementCache:
+    """جدول محدود دستورات بر اساس متن کوئری (LRU)"""
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._statements = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query):
+        """دریافت یا ساخت Statement برای متن کوئری"""
+        with self._lock:
+            statement = self._statements.get(query)
+            if statement is not None:
+                self._statements.move_to_end(query)
+                self.hits += 1
+                return statement
+
+            self.misses += 1
+            sql = query.replace('#', '--')
+            lowered = sql.lower()
+            # توابعی مثل last_insert_rowid() به آخرین نوشتن همان اتصال وابسته‌اند
+            reader_safe = 'last_insert_rowid' not in lowered and 'changes()' not in lowered
+            statement = Statement(sql, reader_safe)
+
+            self._statements[query] = statement
+            if len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+            return statement
+
+    def clear(self):
+        """پاک کردن جدول (مثلاً بعد از تغییر ساختار جداول)"""
+        with self._lock:
+            self._statements.clear()
+
+    def stats(self):
+        """آمار استفاده از جدول دستورات"""
+        with self._lock:
+            return {'size': len(self._statements), 'hits': self.hits, 'misses': self.misses}
+
+
+class RecordBase:
+    """پایه ردیف‌های سبک با __slots__ که مثل dict فقط‌خواندنی هم قابل استفاده‌اند"""
+
+    __slots__ = ()
+    _fields = ()
+    _keys = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return getattr(self, self._fields[key])
+        try:
+            return getattr(self, self._fields[self._keys.index(key)])
+        except ValueError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self):
+        return list(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def to_dict(self):
+        return {key: getattr(self, field) for key, field in zip(self._keys, self._fields)}
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+_record_classes = {}
+_record_lock = threading.Lock()
+
+
+def _safe_field(name, index):
+    """نام ستون را به یک شناسه معتبر پایتون تبدیل می‌کند"""
+    if name.isidentifier() and not keyword.iskeyword(name) and not name.startswith('_'):
+        return name
+    return f"col_{index}"
+
+
+def record_class(columns):
+    """ساخت (یا دریافت از کش) کلاس ردیف با __slots__ برای یک مجموعه ستون"""
+    cls = _record_classes.get(columns)
+    if cls is not None:
+        return cls
+
+    with _record_lock:
+        cls = _record_classes.get(columns)
+        if cls is not None:
+            return cls
+
+        # ستون‌های تکراری (مثل id در SELECT r.*, p.id) مثل dict آخرین مقدار را نگه می‌دارند
+        last_index = {name: idx for idx, name in enumerate(columns)}
+        keys = tuple(name for idx, name in enumerate(columns) if last_index[name] == idx)
+        fields = tuple(_safe_field(name, last_index[name]) for name in keys)
+        indexes = tuple(last_index[name] for name in keys)
+
+        def __init__(self, row, _fields=fields, _indexes=indexes):
+            for field, idx in zip(_fields, _indexes):
+                object.__setattr__(self, field, row[idx])
+
+        cls = type('Record', (RecordBase,), {
+            '__slots__': fields,
+            '_fields': fields,
+            '_keys': keys,
+            '__init__': __init__,
+        })
+        _record_classes[columns] = cls
+        return cls
+
+
+def map_rows(rows, columns, row_type='dict'):
+    """تبدیل ردیف‌های خام (tuple) به نوع درخواستی"""
+    if row_type == 'dict':
+        return [dict(zip(columns, row)) for row in rows]
+    if row_type == 'tuple':
+        return rows
+    if row_type == 'record':
+        cls = record_class(columns)
+        return [cls(row) for row in rows]
+    raise ValueError(f"نوع ردیف نامعتبر: {row_type} (مقادیر مجاز: {', '.join(ROW_TYPES)})")
+
+
+def map_row(row, columns, row_type='dict'):
+    """تبدیل یک ردیف خام به نوع درخواستی"""
+    if row is None:
+        return None
+    return map_rows((row,), columns, row_type)[0]
+
+
+def row_factory_for(row_type):
+    """row_factory مناسب cursor برای نوع ردیف درخواستی"""
+    if row_type == 'row':
+        return sqlite3.Row
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"نوع ردیف نامعتبر: {row_type} (مقادیر مجاز: {', '.join(ROW_TYPES)})")
+    return None
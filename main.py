@@ -5,9 +5,15 @@ import os
 # اضافه کردن مسیر پوشه‌ها به sys.path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from ui.login_window import LoginWindow
-from ui.main_window import MainWindow
-from database.models import DataManager
+# زمان‌بندی راه‌اندازی از همین‌جا شروع می‌شود؛ پنجره اصلی و فرم‌ها بعد از ورود
+# (یا در بارگذاری پیش‌دستانه پس از نمایش فرم ورود) از ui.form_registry بارگذاری می‌شوند
+from modules import lazy_imports
+
+with lazy_imports.timed("ui.login_window"):
+    from ui.login_window import LoginWindow
+with lazy_imports.timed("database.models"):
+    from database.models import DataManager
+from ui.form_registry import FORMS
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFont
 from PySide6.QtCore import QTranslator, QLocale
@@ -56,6 +62,7 @@ class ApplicationController:
         self.data_manager = data_manager
         self.login_window = None
         self.main_window = None
+        self.startup_settings = lazy_imports.load_startup_settings()
     
     def start(self):
         """شروع برنامه"""
@@ -67,6 +74,13 @@ class ApplicationController:
         self.login_window.show()
         
         print("✅ برنامه آماده است. فرم ورود نمایش داده می‌شود.")
+        
+        if self.startup_settings['report']:
+            lazy_imports.print_startup_report("زمان تا نمایش فرم ورود", self.startup_settings['budget_ms'])
+        
+        # بارگذاری پنجره اصلی و فرم‌ها در زمان بیکاری، تا کاربر رمز را وارد می‌کند
+        if self.startup_settings['prewarm']:
+            FORMS.prewarm(delay_ms=self.startup_settings['prewarm_delay_ms'])
     
     def on_login_successful(self, user_data):
         """هنگام موفقیت‌آمیز بودن ورود"""
@@ -75,7 +89,8 @@ class ApplicationController:
         # بستن فرم ورود
         self.login_window.close()
         
-        # ایجاد پنجره اصلی
+        # ایجاد پنجره اصلی (اگر بارگذاری پیش‌دستانه تمام نشده باشد، همین‌جا ایمپورت می‌شود)
+        MainWindow = FORMS.get('MainWindow')
         self.main_window = MainWindow(user_data, self.data_manager)
         self.main_window.show()
         
@@ -87,12 +102,14 @@ def main():
     create_data_directory()
     
     # تنظیم برنامه
-    app = setup_application()
+    with lazy_imports.timed("QApplication"):
+        app = setup_application()
     
     # ایجاد مدیر داده با مسیر صحیح دیتابیس
     print("📦 در حال راه‌اندازی پایگاه داده...")
     db_path = "data/repair_shop.db"  # 🔴 تغییر مسیر به پوشه data
-    data_manager = DataManager(db_path)
+    with lazy_imports.timed("DataManager"):
+        data_manager = DataManager(db_path)
     
     # نمایش اطلاعات اولیه
     today = jdatetime.datetime.now()
@@ -104,6 +121,10 @@ def main():
     controller = ApplicationController(app, data_manager)
     controller.start()
     
+    # نوشتن باقی‌مانده صف لاگ و بستن اتصال‌های ماندگار دیتابیس هنگام خروج
+    app.aboutToQuit.connect(data_manager.audit_log.close)
+    app.aboutToQuit.connect(data_manager.db.close)
+    
     # اجرای برنامه
     sys.exit(app.exec())
 
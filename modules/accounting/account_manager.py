@@ -6,6 +6,8 @@ from PySide6.QtCore import QObject, Signal
 import jdatetime
 from datetime import datetime
 
+from database import date_filters, account_ledger
+
 class AccountManager(QObject):
     """مدیریت کامل حساب‌های بانکی و نقدی"""
     
@@ -158,8 +160,13 @@ class AccountManager(QObject):
     
     # ---------- تراکنش‌های حساب ----------
     
-    def get_account_transactions(self, account_id, start_date=None, end_date=None):
-        """دریافت تراکنش‌های یک حساب"""
+    def get_account_transactions(self, account_id, start_date=None, end_date=None, limit=None):
+        """
+        دریافت تراکنش‌های یک حساب
+        
+        balance_after مانده حساب پس از هر تراکنش (از دفتر موجودی) است، پس برای
+        صورت حساب یک بازه لازم نیست تراکنش‌های قبل از آن خوانده شوند.
+        """
         query = """
         SELECT 
             at.*,
@@ -169,25 +176,28 @@ class AccountManager(QObject):
                 WHEN at.from_account_id = ? THEN 'برداشت'
                 WHEN at.to_account_id = ? THEN 'واریز'
                 ELSE 'نامشخص'
-            END as transaction_direction
+            END as transaction_direction,
+            (SELECT l.balance_after FROM AccountLedger l
+             WHERE l.transaction_id = at.id AND l.account_id = ?) as balance_after
         FROM AccountingTransactions at
         LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
         LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
         WHERE (at.from_account_id = ? OR at.to_account_id = ?)
         """
         
-        params = [account_id, account_id, account_id, account_id]
-        
-        if start_date:
-            query += " AND DATE(at.transaction_date) >= ?"
-            params.append(start_date)
+        params = [account_id, account_id, account_id, account_id, account_id]
         
-        if end_date:
-            query += " AND DATE(at.transaction_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('at.transaction_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         query += " ORDER BY at.transaction_date DESC"
         
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
         transactions = self.db.fetch_all(query, params)
         
         # تبدیل تاریخ‌ها به شمسی
@@ -196,34 +206,45 @@ class AccountManager(QObject):
                 transaction['transaction_date']
             )
             transaction['amount_toman'] = transaction['amount'] / 10
+            balance_after = transaction.get('balance_after')
+            transaction['balance_after_toman'] = balance_after / 10 if balance_after is not None else None
         
         return transactions
     
     def get_account_balance_history(self, account_id, days=30):
-        """تاریخچه موجودی حساب"""
+        """
+        تاریخچه موجودی حساب (از دفتر موجودی)
+        
+        هر ردیف: date، daily_change و balance (مانده پایان روز)؛ روزهای بدون
+        تغییر حذف می‌شوند. مانده ابتدای بازه با get_balance_as_of خوانده می‌شود.
+        """
         import datetime as dt
         
-        end_date = dt.datetime.now()
+        end_date = dt.datetime.now().date()
         start_date = end_date - dt.timedelta(days=days)
         
-        query = """
-        SELECT 
-            DATE(transaction_date) as date,
-            SUM(CASE 
-                WHEN to_account_id = ? THEN amount 
-                WHEN from_account_id = ? THEN -amount 
-                ELSE 0 
-            END) as daily_change
-        FROM AccountingTransactions
-        WHERE transaction_date BETWEEN ? AND ?
-            AND (from_account_id = ? OR to_account_id = ?)
-        GROUP BY DATE(transaction_date)
-        ORDER BY DATE(transaction_date)
-        """
+        history = account_ledger.balance_history(self.db, account_id, start_date, end_date)
         
-        params = [account_id, account_id, 
-                 start_date.strftime("%Y-%m-%d"), 
-                 end_date.strftime("%Y-%m-%d"),
-                 account_id, account_id]
+        for item in history:
+            item['balance_toman'] = item['balance'] / 10
+            item['daily_change_toman'] = item['daily_change'] / 10
         
-        return self.db.fetch_all(query, params)
\ No newline at end of file
+        return history
+    
+    def get_balance_as_of(self, account_id, as_of_date):
+        """مانده حساب در پایان یک روز (تاریخ میلادی یا شمسی)"""
+        balance = account_ledger.balance_as_of(self.db, account_id, as_of_date)
+        return {
+            'balance_rial': balance,
+            'balance_toman': balance / 10
+        }
+    
+    def check_ledger_consistency(self, repair=False):
+        """
+        بررسی هماهنگی دفتر موجودی با موجودی فعلی حساب‌ها
+        
+        با repair=True برای حساب‌های ناهماهنگ ردیف اصلاحی ثبت می‌شود.
+        """
+        if repair:
+            return self.db.reconcile_account_ledger()
+        return account_ledger.find_mismatches(self.db)
\ No newline at end of file
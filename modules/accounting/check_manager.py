@@ -6,6 +6,8 @@ from PySide6.QtCore import QObject, Signal
 import jdatetime
 from datetime import datetime
 
+from database.database import TransactionAborted
+
 class CheckManager(QObject):
     """مدیریت کامل چک‌ها"""
     
@@ -55,18 +57,21 @@ class CheckManager(QObject):
                 check_data.get('description', '')
             )
             
-            success = self.db.execute_query(query, params)
-            
-            if success:
+            # چک و تراکنش موقت آن در یک واحد کار ثبت می‌شوند
+            with self.db.transaction():
+                if not self.db.execute_query(query, params):
+                    raise TransactionAborted("خطا در ثبت چک")
+                
                 # اگر چک دریافتی است، تراکنش ثبت کن
                 if check_data.get('check_type') == 'دریافتی':
                     # ثبت تراکنش موقت (وقتی چک وصول شد، تراکنش نهایی ثبت می‌شود)
                     self._record_check_transaction(check_data, amount_rial, 'در انتظار')
-                
-                self.data_changed.emit("Checks")
-                return True, "چک با موفقیت ثبت شد"
-            return False, "خطا در ثبت چک"
             
+            self.data_changed.emit("Checks")
+            return True, "چک با موفقیت ثبت شد"
+            
+        except TransactionAborted as e:
+            return False, str(e)
         except Exception as e:
             return False, f"خطا: {str(e)}"
     
@@ -98,16 +103,20 @@ class CheckManager(QObject):
         WHERE id = ?
         """
         
-        success = self.db.execute_query(query, (status, check_id))
+        try:
+            # تغییر وضعیت و نهایی کردن تراکنش چک در یک واحد کار
+            with self.db.transaction():
+                if not self.db.execute_query(query, (status, check_id)):
+                    raise TransactionAborted("خطا در بروزرسانی وضعیت")
+                
+                # اگر چک وصول شد، تراکنش نهایی ثبت کن
+                if status == 'وصول شده':
+                    self._finalize_check_transaction(check_id)
+        except TransactionAborted as e:
+            return False, str(e)
         
-        if success:
-            # اگر چک وصول شد، تراکنش نهایی ثبت کن
-            if status == 'وصول شده':
-                self._finalize_check_transaction(check_id)
-            
-            self.data_changed.emit("Checks")
-            return True, f"وضعیت چک به '{status}' تغییر کرد"
-        return False, "خطا در بروزرسانی وضعیت"
+        self.data_changed.emit("Checks")
+        return True, f"وضعیت چک به '{status}' تغییر کرد"
     
     def _finalize_check_transaction(self, check_id):
         """ثبت نهایی تراکنش چک وصول شده"""
@@ -189,8 +198,8 @@ class CheckManager(QObject):
             FROM Checks c
             LEFT JOIN Persons p ON c.drawer = p.id OR c.payee = p.id
             WHERE c.status IN ('وصول نشده', 'پاس نشده')
-            AND date(c.due_date) <= date('now', '+{days} days')
-            AND date(c.due_date) >= date('now')
+            AND c.due_date >= date('now')
+            AND c.due_date < date('now', '+{days + 1} days')
             ORDER BY c.due_date
             """
             
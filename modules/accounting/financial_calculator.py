@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import statistics
 
+from database import date_filters
+
 
 class FinancialCalculator:
     """کلاس محاسبات مالی پیشرفته"""
@@ -189,12 +191,12 @@ class FinancialCalculator:
             SELECT COALESCE(SUM(share_amount), 0) as total_profit
             FROM PartnerShares
             WHERE partner_id = ?
-            AND DATE(calculation_date) BETWEEN ? AND ?
+            AND calculation_date >= ? AND calculation_date < ?
             """
             
             profit_result = self.data_manager.db.fetch_one(
                 profit_query, 
-                (partner_id, start_date, end_date)
+                (partner_id,) + date_filters.days_bounds(start_date, end_date)
             )
             total_profit = profit_result.get('total_profit', 0) if profit_result else 0
             
@@ -251,7 +253,7 @@ class FinancialCalculator:
                     THEN amount ELSE 0 
                 END), 0) as total_income
             FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
+            WHERE transaction_date >= ? AND transaction_date < ?
             """
             
             expense_query = """
@@ -261,11 +263,12 @@ class FinancialCalculator:
                     THEN amount ELSE 0 
                 END), 0) as total_expense
             FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
+            WHERE transaction_date >= ? AND transaction_date < ?
             """
             
-            income_result = self.data_manager.db.fetch_one(income_query, (start_gregorian, end_gregorian))
-            expense_result = self.data_manager.db.fetch_one(expense_query, (start_gregorian, end_gregorian))
+            date_range = date_filters.days_bounds(start_gregorian, end_gregorian)
+            income_result = self.data_manager.db.fetch_one(income_query, date_range)
+            expense_result = self.data_manager.db.fetch_one(expense_query, date_range)
             
             # 🔴 استفاده از get با مقدار پیش‌فرض
             total_income = income_result.get('total_income', 0) if income_result else 0
@@ -409,18 +412,22 @@ class FinancialCalculator:
         """
         try:
             # دریافت داده‌های تاریخی
+            # فقط ۲۴ ماه اخیر با شرط بازه‌ای روی ایندکس تاریخ خوانده می‌شود
             historical_query = """
             SELECT 
                 strftime('%Y-%m', transaction_date) as month,
                 SUM(amount) as monthly_income
             FROM AccountingTransactions
-            WHERE transaction_type IN ('دریافت', 'درآمد')
+            WHERE transaction_date >= ?
+            AND transaction_type IN ('دریافت', 'درآمد')
             GROUP BY strftime('%Y-%m', transaction_date)
             ORDER BY month DESC
             LIMIT 24
             """
             
-            historical_data = self.data_manager.db.fetch_all(historical_query)
+            historical_data = self.data_manager.db.fetch_all(
+                historical_query, (date_filters.recent_months_start(24),)
+            )
             
             if not historical_data:
                 return []
@@ -538,13 +545,16 @@ class FinancialCalculator:
                 strftime('%Y-%m', transaction_date) as month,
                 SUM(amount) as monthly_income
             FROM AccountingTransactions
-            WHERE transaction_type IN ('دریافت', 'درآمد')
+            WHERE transaction_date >= ?
+            AND transaction_type IN ('دریافت', 'درآمد')
             GROUP BY strftime('%Y-%m', transaction_date)
             ORDER BY month DESC
             LIMIT 12
             """
             
-            monthly_data = self.data_manager.db.fetch_all(monthly_income_query)
+            monthly_data = self.data_manager.db.fetch_all(
+                monthly_income_query, (date_filters.recent_months_start(12),)
+            )
             monthly_incomes = [float(item['monthly_income']) for item in monthly_data]
             
             if len(monthly_incomes) < 2:
@@ -609,11 +619,12 @@ class FinancialCalculator:
             SELECT COALESCE(SUM(amount), 0) as total
             FROM AccountingTransactions
             WHERE transaction_type IN ('دریافت', 'درآمد')
-            AND DATE(transaction_date) BETWEEN ? AND ?
+            AND transaction_date >= ? AND transaction_date < ?
             """
+            date_range = date_filters.days_bounds(start_gregorian, end_gregorian)
             income_result = self.data_manager.db.fetch_one(
                 total_income_query, 
-                (start_gregorian, end_gregorian)
+                date_range
             )
             total_income = income_result.get('total', 0) if income_result else 0
             total_income = float(total_income or 0)
@@ -630,13 +641,13 @@ class FinancialCalculator:
                 COALESCE(SUM(amount), 0) as total_amount
             FROM AccountingTransactions
             WHERE transaction_type IN ('پرداخت', 'هزینه')
-            AND DATE(transaction_date) BETWEEN ? AND ?
+            AND transaction_date >= ? AND transaction_date < ?
             GROUP BY expense_type
             """
             
             expenses_result = self.data_manager.db.fetch_all(
                 expenses_by_type_query, 
-                (start_gregorian, end_gregorian)
+                date_range
             )
             
             total_expense = sum(float(item.get('total_amount', 0) or 0) for item in expenses_result)
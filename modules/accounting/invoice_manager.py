@@ -8,11 +8,41 @@ from PySide6.QtCore import QObject, Signal
 import jdatetime
 from datetime import datetime
 
+from database.database import TransactionAborted
+from database import date_filters, pagination
+
 class InvoiceManager(QObject):
     """مدیریت کامل فاکتورها - نسخه ساده‌تر"""
     
     data_changed = Signal(str)
     
+    # لیست صفحه‌بندی شده فاکتورها (جدیدترین اول)
+    PAGE_QUERY = pagination.PageQuery(
+        select_sql="""
+        SELECT 
+            i.*,
+            p.first_name || ' ' || p.last_name as customer_name,
+            p.mobile as customer_mobile
+        FROM Invoices i
+        LEFT JOIN Persons p ON i.customer_id = p.id
+        """,
+        from_sql="FROM Invoices i",
+        sorts={
+            'date': [('i.invoice_date', 'invoice_date'), ('i.id', 'id')],
+            'total': [('i.total', 'total'), ('i.id', 'id')],
+        },
+        default_sort='date',
+        filters={
+            'status': "i.payment_status = ?",
+            'invoice_type': "i.invoice_type = ?",
+            'customer_id': "i.customer_id = ?",
+            'start_date': lambda value: date_filters.range_condition(
+                'i.invoice_date', date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                'i.invoice_date', None, date_filters.next_day_start(value)),
+        },
+    )
+    
     def __init__(self, data_manager):
         super().__init__()
         self.data_manager = data_manager
@@ -32,17 +62,15 @@ class InvoiceManager(QObject):
             'مرجوعی': 'R'
         }.get(invoice_type, 'INV')
         
-        # شماره سریال ماهانه
+        # شماره سریال ماهانه (ماه شمسی جاری با کلید jalali_ym)
         query = """
         SELECT COUNT(*) as count 
         FROM Invoices 
-        WHERE invoice_type = ? 
-        AND strftime('%Y', invoice_date) = ? 
-        AND strftime('%m', invoice_date) = ?
+        WHERE jalali_ym = ? AND invoice_type = ?
         """
         
         month_str = f"{month:02d}"
-        result = self.db.fetch_one(query, (invoice_type, str(year), month_str))
+        result = self.db.fetch_one(query, (date_filters.jalali_ym(year, month), invoice_type))
         count = result['count'] + 1 if result else 1
         
         return f"{prefix}-{year}{month_str}{count:04d}"
@@ -118,23 +146,27 @@ class InvoiceManager(QObject):
                 float(invoice_data.get('outsourced_cost', 0)) * 10
             )
             
-            success = self.db.execute_query(query, params)
-            
-            if not success:
-                return False, "خطا در ایجاد فاکتور"
-            
-            # دریافت شناسه فاکتور
-            invoice_id = self.db.fetch_one("SELECT last_insert_rowid() as id")['id']
-            
-            # افزودن آیتم‌های فاکتور
-            for item in items:
-                item_success, item_message = self.add_invoice_item(invoice_id, item)
-                if not item_success:
-                    return False, f"خطا در افزودن آیتم: {item_message}"
+            # فاکتور و تمام آیتم‌هایش با یک commit ثبت می‌شوند؛ در صورت خطا هیچ بخشی ذخیره نمی‌شود
+            with self.db.transaction():
+                success = self.db.execute_query(query, params)
+                
+                if not success:
+                    raise TransactionAborted("خطا در ایجاد فاکتور")
+                
+                # دریافت شناسه فاکتور
+                invoice_id = self.db.fetch_one("SELECT last_insert_rowid() as id")['id']
+                
+                # افزودن آیتم‌های فاکتور
+                for item in items:
+                    item_success, item_message = self.add_invoice_item(invoice_id, item)
+                    if not item_success:
+                        raise TransactionAborted(f"خطا در افزودن آیتم: {item_message}")
             
             self.data_changed.emit("Invoices")
             return True, f"فاکتور {invoice_number} با موفقیت ایجاد شد"
             
+        except TransactionAborted as e:
+            return False, str(e)
         except Exception as e:
             return False, f"خطا: {str(e)}"
     
@@ -190,19 +222,19 @@ class InvoiceManager(QObject):
             query += " AND i.payment_status = ?"
             params.append(status)
         
-        if start_date:
-            query += " AND DATE(i.invoice_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(i.invoice_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('i.invoice_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         query += " ORDER BY i.invoice_date DESC"
         
         invoices = self.db.fetch_all(query, params)
-        
-        # تبدیل تاریخ‌ها و مبالغ
+        self._add_display_fields(invoices)
+        return invoices
+    
+    def _add_display_fields(self, invoices):
+        """تبدیل تاریخ‌ها و مبالغ برای نمایش"""
         for invoice in invoices:
             invoice['invoice_date_shamsi'] = self.db.gregorian_to_jalali(invoice['invoice_date'])
             invoice['due_date_shamsi'] = self.db.gregorian_to_jalali(invoice['due_date'])
@@ -210,8 +242,26 @@ class InvoiceManager(QObject):
             # تبدیل مبالغ به تومان
             for field in ['subtotal', 'discount', 'tax', 'total', 'paid_amount', 'remaining_amount']:
                 invoice[f'{field}_toman'] = invoice[field] / 10 if invoice[field] else 0
+    
+    def get_invoices_page(self, filters=None, sort=None, cursor=None,
+                          page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از فاکتورها با صفحه‌بندی keyset
         
-        return invoices
+        filters: status، invoice_type، customer_id، start_date، end_date
+        sort: 'date' (پیش‌فرض، جدیدترین اول) یا 'total'، یا (نام، descending)
+        """
+        return self.PAGE_QUERY.fetch_page(self.db, filters, sort, cursor, page_size,
+                                          prepare=self._add_display_fields)
+    
+    def iter_invoices(self, filters=None, sort=None, page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه فاکتورهای فیلتر شده، صفحه به صفحه و فقط به اندازه نیاز"""
+        return pagination.iter_rows(self.get_invoices_page, filters=filters, sort=sort,
+                                    page_size=page_size)
+    
+    def count_invoices(self, filters=None):
+        """تعداد فاکتورهای فیلتر شده: (تعداد، تخمینی بودن)"""
+        return self.PAGE_QUERY.count(self.db, filters)
     
     def get_invoice_by_id(self, invoice_id):
         """دریافت فاکتور با شناسه"""
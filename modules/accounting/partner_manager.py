@@ -7,6 +7,8 @@ from PySide6.QtCore import QObject, Signal
 import jdatetime
 from datetime import datetime
 
+from database import date_filters
+
 class PartnerManager(QObject):
     """مدیریت کامل شرکا و سود"""
     
@@ -221,27 +223,21 @@ class PartnerManager(QObject):
                 for partner in partners:
                     partner['share_percentage'] = partner.get('profit_percentage', 0)
             
-            # ثبت سهم‌ها
-            for partner in partners:
-                share_amount = total_amount * (partner['share_percentage'] / 100)
-                
-                query = """
-                INSERT INTO PartnerShares (
-                    partner_id, transaction_type, transaction_id,
-                    share_percentage, share_amount, calculation_date, description
-                ) VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
-                """
-                
-                params = (
-                    partner['id'],
-                    transaction_type,
-                    transaction_id,
-                    partner['share_percentage'],
-                    share_amount,
-                    f"سهم از {transaction_type} #{transaction_id}"
-                )
-                
-                self.db.execute_query(query, params)
+            # ثبت سهم‌ها (درج گروهی با یک commit؛ calculation_date پیش‌فرض CURRENT_TIMESTAMP دارد)
+            rows = [
+                {
+                    'partner_id': partner['id'],
+                    'transaction_type': transaction_type,
+                    'transaction_id': transaction_id,
+                    'share_percentage': partner['share_percentage'],
+                    'share_amount': total_amount * (partner['share_percentage'] / 100),
+                    'description': f"سهم از {transaction_type} #{transaction_id}"
+                }
+                for partner in partners
+            ]
+            
+            if self.db.bulk_insert('PartnerShares', rows, return_ids=False) is None:
+                return False, "خطا در ثبت سهم شرکا"
             
             self.data_changed.emit("PartnerShares")
             return True, f"سود برای {len(partners)} شریک محاسبه شد"
@@ -267,13 +263,10 @@ class PartnerManager(QObject):
         
         params = [partner_id]
         
-        if start_date:
-            query += " AND DATE(ps.calculation_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(ps.calculation_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('ps.calculation_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         query += " ORDER BY ps.calculation_date DESC"
         
@@ -303,13 +296,10 @@ class PartnerManager(QObject):
         
         params = []
         
-        if start_date:
-            query += " AND DATE(ps.calculation_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(ps.calculation_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('ps.calculation_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         query += """
         GROUP BY p.id, partner_name
@@ -332,23 +322,16 @@ class PartnerManager(QObject):
                 month = today.month
                 year = today.year
             
-            # محدوده ماه شمسی
-            start_jalali = f"{year}/{month:02d}/01"
-            end_jalali = f"{year}/{month:02d}/31"
-            
-            start_gregorian = self.db.jalali_to_gregorian(start_jalali)
-            end_gregorian = self.db.jalali_to_gregorian(end_jalali)
-            
-            # دریافت کل درآمد ماه
+            # دریافت کل درآمد ماه (کلید ماه شمسی jalali_ym)
             query = """
             SELECT SUM(total) as total_income
             FROM Invoices
-            WHERE invoice_type IN ('فروش', 'خدمات')
-            AND DATE(invoice_date) BETWEEN ? AND ?
+            WHERE jalali_ym = ?
+            AND invoice_type IN ('فروش', 'خدمات')
             AND payment_status != 'پرداخت نشده'
             """
             
-            result = self.db.fetch_one(query, (start_gregorian, end_gregorian))
+            result = self.db.fetch_one(query, (date_filters.jalali_ym(year, month),))
             total_income = result.get('total_income', 0) if result else 0
             
             if total_income <= 0:
@@ -365,19 +348,15 @@ class PartnerManager(QObject):
             # توزیع بر اساس سرمایه یا درصد تعیین شده
             total_capital = sum(partner.get('capital', 0) for partner in partners)
             
+            description = f"توزیع سود ماهانه {year}/{month:02d}"
+            shares = []
+            
             if total_capital > 0:
                 # توزیع بر اساس سرمایه
                 for partner in partners:
                     share_percentage = (partner.get('capital', 0) / total_capital) * 100
                     share_amount = distributable_profit * (share_percentage / 100)
-                    
-                    # ثبت سهم
-                    self._record_profit_distribution(
-                        partner['id'], 
-                        share_amount, 
-                        share_percentage,
-                        f"توزیع سود ماهانه {year}/{month:02d}"
-                    )
+                    shares.append((partner['id'], share_amount, share_percentage))
             else:
                 # توزیع بر اساس درصد سود تعیین شده
                 total_percentage = sum(partner.get('profit_percentage', 0) for partner in partners)
@@ -386,25 +365,18 @@ class PartnerManager(QObject):
                     for partner in partners:
                         share_percentage = partner.get('profit_percentage', 0)
                         share_amount = distributable_profit * (share_percentage / 100)
-                        
-                        self._record_profit_distribution(
-                            partner['id'], 
-                            share_amount, 
-                            share_percentage,
-                            f"توزیع سود ماهانه {year}/{month:02d}"
-                        )
+                        shares.append((partner['id'], share_amount, share_percentage))
                 else:
                     # توزیع مساوی
                     share_percentage = 100.0 / len(partners)
                     share_amount = distributable_profit * (share_percentage / 100)
                     
                     for partner in partners:
-                        self._record_profit_distribution(
-                            partner['id'], 
-                            share_amount, 
-                            share_percentage,
-                            f"توزیع سود ماهانه {year}/{month:02d}"
-                        )
+                        shares.append((partner['id'], share_amount, share_percentage))
+            
+            # ثبت سهم تمام شرکا با یک درج گروهی
+            if not self._record_profit_distributions(shares, description):
+                return False, "خطا در ثبت توزیع سود"
             
             self.data_changed.emit("PartnerShares")
             
@@ -414,6 +386,21 @@ class PartnerManager(QObject):
         except Exception as e:
             return False, f"خطا در توزیع سود: {str(e)}"
     
+    def _record_profit_distributions(self, shares, description):
+        """ثبت گروهی توزیع سود؛ shares لیست (partner_id, share_amount, share_percentage)"""
+        rows = [
+            {
+                'partner_id': partner_id,
+                'transaction_type': 'توزیع سود',
+                'transaction_id': 0,  # transaction_id برای توزیع سود 0 است
+                'share_percentage': share_percentage,
+                'share_amount': share_amount,
+                'description': description
+            }
+            for partner_id, share_amount, share_percentage in shares
+        ]
+        return self.db.bulk_insert('PartnerShares', rows, return_ids=False) is not None
+    
     def _record_profit_distribution(self, partner_id, share_amount, share_percentage, description):
         """ثبت توزیع سود"""
         query = """
@@ -446,35 +433,25 @@ class PartnerManager(QObject):
     
     def get_profit_trend(self, months=6):
         """روند سوددهی در ماه‌های اخیر"""
-        import datetime as dt
-        
-        end_date = dt.datetime.now()
-        start_date = end_date - dt.timedelta(days=30*months)
-        
         query = """
         SELECT 
-            strftime('%Y-%m', calculation_date) as month,
+            jalali_ym,
             COUNT(*) as transaction_count,
             SUM(share_amount) as total_profit,
             AVG(share_percentage) as avg_percentage
         FROM PartnerShares
-        WHERE calculation_date BETWEEN ? AND ?
-        GROUP BY strftime('%Y-%m', calculation_date)
-        ORDER BY month
+        WHERE jalali_ym >= ?
+        GROUP BY jalali_ym
+        ORDER BY jalali_ym
         """
         
-        trend = self.db.fetch_all(query, (start_date, end_date))
+        trend = self.db.fetch_all(query, (date_filters.recent_jalali_ym_start(months),))
         
-        # تبدیل تاریخ به شمسی و مبالغ به تومان
+        # نام ماه شمسی و تبدیل مبالغ به تومان
         for item in trend:
-            # تبدیل نام ماه میلادی به شمسی
-            year_month = item['month'].split('-')
-            if len(year_month) == 2:
-                year, month = map(int, year_month)
-                # تقریباً 621 سال تفاوت
-                jalali_year = year - 621
-                month_name = self._get_persian_month_name(month)
-                item['month_name'] = f"{month_name} {jalali_year}"
+            year, month = date_filters.split_jalali_ym(item['jalali_ym'])
+            item['month'] = f"{year}/{month:02d}"
+            item['month_name'] = f"{self._get_persian_month_name(month)} {year}"
             
             item['total_profit_toman'] = item['total_profit'] / 10 if item['total_profit'] else 0
         
@@ -9,6 +9,8 @@ from typing import Dict, List, Optional
 import json
 from io import BytesIO
 
+from database import date_filters, daily_summaries, account_ledger
+
 # Import FinancialCalculator از فایل جداگانه
 try:
     from .financial_calculator import FinancialCalculator
@@ -16,18 +18,16 @@ except ImportError:
     # اگر import نسبی کار نکرد
     from financial_calculator import FinancialCalculator
 
-try:
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch, cm
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    REPORTLAB_AVAILABLE = True
-except ImportError:
+from modules.lazy_imports import is_available, optional_module
+
+# reportlab فقط هنگام ساخت PDF (اولین دسترسی به این ماژول‌ها) ایمپورت می‌شود
+REPORTLAB_AVAILABLE = is_available('reportlab')
+pagesizes = optional_module('reportlab.lib.pagesizes')
+colors = optional_module('reportlab.lib.colors')
+platypus = optional_module('reportlab.platypus')
+rl_styles = optional_module('reportlab.lib.styles')
+if not REPORTLAB_AVAILABLE:
     print("⚠️ reportlab در دسترس نیست - قابلیت PDF غیرفعال")
-    REPORTLAB_AVAILABLE = False
 
 
 class ReportGenerator:
@@ -60,6 +60,7 @@ class ReportGenerator:
                 report_date = jdatetime.datetime.now().strftime("%Y/%m/%d")
             
             report_gregorian = self.data_manager.db.jalali_to_gregorian(report_date)
+            report_range = date_filters.day_bounds(report_gregorian)
             
             # 1. اطلاعات کلی
             report = {
@@ -68,41 +69,16 @@ class ReportGenerator:
                 'generated_at': jdatetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
             }
             
-            # 2. تراکنش‌های روز
-            transactions_query = """
-            SELECT 
-                transaction_type,
-                COUNT(*) as count,
-                SUM(amount) as total_amount
-            FROM AccountingTransactions
-            WHERE DATE(transaction_date) = ?
-            GROUP BY transaction_type
-            ORDER BY transaction_type
-            """
-            
-            transactions_result = self.data_manager.db.fetch_all(
-                transactions_query, 
-                (report_gregorian,)
+            # 2. تراکنش‌های روز (از خلاصه روزانه)
+            transactions_result = daily_summaries.transaction_summary(
+                self.data_manager.db, *report_range
             )
             
             report['transactions_summary'] = transactions_result
             
-            # 3. فاکتورهای روز
-            invoices_query = """
-            SELECT 
-                invoice_type,
-                COUNT(*) as count,
-                SUM(total) as total_amount,
-                SUM(paid_amount) as total_paid
-            FROM Invoices
-            WHERE DATE(invoice_date) = ?
-            GROUP BY invoice_type
-            ORDER BY invoice_type
-            """
-            
-            invoices_result = self.data_manager.db.fetch_all(
-                invoices_query, 
-                (report_gregorian,)
+            # 3. فاکتورهای روز (از خلاصه روزانه)
+            invoices_result = daily_summaries.invoice_summary(
+                self.data_manager.db, *report_range
             )
             
             report['invoices_summary'] = invoices_result
@@ -115,14 +91,14 @@ class ReportGenerator:
                 COUNT(*) as count,
                 SUM(amount) as total_amount
             FROM Checks
-            WHERE DATE(updated_at) = ?
+            WHERE updated_at >= ? AND updated_at < ?
             GROUP BY check_type, status
             ORDER BY check_type, status
             """
             
             checks_result = self.data_manager.db.fetch_all(
                 checks_query, 
-                (report_gregorian,)
+                report_range
             )
             
             report['checks_summary'] = checks_result
@@ -200,8 +176,10 @@ class ReportGenerator:
             else:
                 end_date = f"{year}/{month:02d}/30"
             
-            start_gregorian = self.data_manager.db.jalali_to_gregorian(start_date)
-            end_gregorian = self.data_manager.db.jalali_to_gregorian(end_date)
+            # کلید ماه شمسی (jalali_ym) برای جداول دارای این ستون و بازه نیمه‌باز
+            # میلادی [start_gregorian, end_gregorian) برای بقیه جداول
+            month_key = date_filters.jalali_ym(year, month)
+            start_gregorian, end_gregorian = date_filters.jalali_month_bounds(year, month)
             
             # نام ماه
             month_names = [
@@ -225,14 +203,14 @@ class ReportGenerator:
                 COUNT(*) as count,
                 SUM(amount) as total_amount
             FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
+            WHERE jalali_ym = ?
             GROUP BY transaction_type
             ORDER BY transaction_type
             """
             
             financial_result = self.data_manager.db.fetch_all(
                 financial_query, 
-                (start_gregorian, end_gregorian)
+                (month_key,)
             )
             
             report['monthly_financial_summary'] = financial_result
@@ -246,14 +224,14 @@ class ReportGenerator:
                 SUM(paid_amount) as total_paid,
                 AVG(total) as average_amount
             FROM Invoices
-            WHERE DATE(invoice_date) BETWEEN ? AND ?
+            WHERE jalali_ym = ?
             GROUP BY invoice_type
             ORDER BY invoice_type
             """
             
             invoices_result = self.data_manager.db.fetch_all(
                 invoices_query, 
-                (start_gregorian, end_gregorian)
+                (month_key,)
             )
             
             report['monthly_invoices'] = invoices_result
@@ -266,7 +244,7 @@ class ReportGenerator:
                 COUNT(*) as count,
                 SUM(amount) as total_amount
             FROM Checks
-            WHERE DATE(issue_date) BETWEEN ? AND ?
+            WHERE issue_date >= ? AND issue_date < ?
             GROUP BY check_type, status
             ORDER BY check_type, status
             """
@@ -279,14 +257,7 @@ class ReportGenerator:
             report['monthly_checks'] = checks_result
             
             # 4. مقایسه با ماه قبل
-            prev_month = month - 1 if month > 1 else 12
-            prev_year = year if month > 1 else year - 1
-            
-            prev_start_date = f"{prev_year}/{prev_month:02d}/01"
-            prev_end_date = f"{prev_year}/{prev_month:02d}/30"
-            
-            prev_start_gregorian = self.data_manager.db.jalali_to_gregorian(prev_start_date)
-            prev_end_gregorian = self.data_manager.db.jalali_to_gregorian(prev_end_date)
+            prev_month_key = date_filters.shift_jalali_ym(month_key, -1)
             
             comparison_query = """
             SELECT 
@@ -294,39 +265,31 @@ class ReportGenerator:
                 SUM(CASE WHEN transaction_type IN ('دریافت', 'درآمد') THEN amount ELSE 0 END) as income,
                 SUM(CASE WHEN transaction_type IN ('پرداخت', 'هزینه') THEN amount ELSE 0 END) as expense
             FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
+            WHERE jalali_ym = ?
             UNION ALL
             SELECT 
                 'ماه قبل' as period,
                 SUM(CASE WHEN transaction_type IN ('دریافت', 'درآمد') THEN amount ELSE 0 END) as income,
                 SUM(CASE WHEN transaction_type IN ('پرداخت', 'هزینه') THEN amount ELSE 0 END) as expense
             FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
+            WHERE jalali_ym = ?
             """
             
             comparison_result = self.data_manager.db.fetch_all(
                 comparison_query, 
-                (start_gregorian, end_gregorian, prev_start_gregorian, prev_end_gregorian)
+                (month_key, prev_month_key)
             )
             
             report['monthly_comparison'] = comparison_result
             
-            # 5. تحلیل روند روزانه
-            daily_trend_query = """
-            SELECT 
-                DATE(transaction_date) as day,
-                SUM(CASE WHEN transaction_type IN ('دریافت', 'درآمد') THEN amount ELSE 0 END) as daily_income,
-                SUM(CASE WHEN transaction_type IN ('پرداخت', 'هزینه') THEN amount ELSE 0 END) as daily_expense
-            FROM AccountingTransactions
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
-            GROUP BY DATE(transaction_date)
-            ORDER BY day
-            """
-            
-            daily_trend = self.data_manager.db.fetch_all(
-                daily_trend_query, 
-                (start_gregorian, end_gregorian)
-            )
+            # 5. تحلیل روند روزانه (از خلاصه روزانه)
+            daily_trend = [
+                {'day': item['date'], 'daily_income': item['income'], 'daily_expense': item['expense']}
+                for item in daily_summaries.daily_cash_series(
+                    self.data_manager.db, start_gregorian, end_gregorian,
+                    income_types=('دریافت', 'درآمد'), expense_types=('پرداخت', 'هزینه')
+                )
+            ]
             
             report['daily_trend'] = daily_trend
             
@@ -387,8 +350,8 @@ class ReportGenerator:
         تولید صورت سود و زیان - نسخه اصلاح شده
         """
         try:
-            start_gregorian = self.data_manager.db.jalali_to_gregorian(start_date)
-            end_gregorian = self.data_manager.db.jalali_to_gregorian(end_date)
+            # بازه نیمه‌باز [start_gregorian, end_gregorian)
+            start_gregorian, end_gregorian = date_filters.days_bounds(start_date, end_date)
             
             report = {
                 'report_type': 'صورت سود و زیان',
@@ -403,7 +366,7 @@ class ReportGenerator:
                 COALESCE(SUM(ii.total_price), 0) as amount
             FROM InvoiceItems ii
             JOIN Invoices i ON ii.invoice_id = i.id
-            WHERE i.invoice_date BETWEEN ? AND ?
+            WHERE i.invoice_date >= ? AND i.invoice_date < ?
             AND ii.item_type = 'خدمات'
             
             UNION ALL
@@ -413,7 +376,7 @@ class ReportGenerator:
                 COALESCE(SUM(ii.total_price), 0) as amount
             FROM InvoiceItems ii
             JOIN Invoices i ON ii.invoice_id = i.id
-            WHERE i.invoice_date BETWEEN ? AND ?
+            WHERE i.invoice_date >= ? AND i.invoice_date < ?
             AND ii.item_type = 'قطعه'
             
             UNION ALL
@@ -422,7 +385,7 @@ class ReportGenerator:
                 'سایر درآمدها' as category,
                 COALESCE(SUM(at.amount), 0) as amount
             FROM AccountingTransactions at
-            WHERE at.transaction_date BETWEEN ? AND ?
+            WHERE at.transaction_date >= ? AND at.transaction_date < ?
             AND at.transaction_type = 'درآمد'
             AND at.description NOT LIKE '%خدمات%'
             AND at.description NOT LIKE '%قطعات%'
@@ -438,56 +401,38 @@ class ReportGenerator:
             report['revenues'] = revenue_result
             total_revenue = sum(item.get('amount', 0) or 0 for item in revenue_result)
             
-            # هزینه‌ها - با کنترل مقادیر None
+            # هزینه‌ها - دسته‌بندی بر اساس توضیحات در یک پیمایش بازه
             expense_query = """
             SELECT 
-                'هزینه مواد و قطعات' as category,
-                COALESCE(SUM(amount), 0) as amount
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            AND transaction_type = 'هزینه'
-            AND (description LIKE '%قطعه%' OR description LIKE '%لوازم%')
-            
-            UNION ALL
-            
-            SELECT 
-                'هزینه حقوق و دستمزد' as category,
-                COALESCE(SUM(amount), 0) as amount
+                COALESCE(SUM(CASE WHEN description LIKE '%قطعه%' OR description LIKE '%لوازم%'
+                    THEN amount END), 0) as materials,
+                COALESCE(SUM(CASE WHEN description LIKE '%حقوق%' OR description LIKE '%اجرت%'
+                    THEN amount END), 0) as salaries,
+                COALESCE(SUM(CASE WHEN description LIKE '%اداری%'
+                    THEN amount END), 0) as administrative,
+                COALESCE(SUM(CASE WHEN description NOT LIKE '%قطعه%'
+                    AND description NOT LIKE '%حقوق%'
+                    AND description NOT LIKE '%اداری%'
+                    THEN amount END), 0) as other
             FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
+            WHERE transaction_date >= ? AND transaction_date < ?
             AND transaction_type = 'هزینه'
-            AND (description LIKE '%حقوق%' OR description LIKE '%اجرت%')
-            
-            UNION ALL
-            
-            SELECT 
-                'هزینه‌های اداری' as category,
-                COALESCE(SUM(amount), 0) as amount
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            AND transaction_type = 'هزینه'
-            AND description LIKE '%اداری%'
-            
-            UNION ALL
-            
-            SELECT 
-                'سایر هزینه‌ها' as category,
-                COALESCE(SUM(amount), 0) as amount
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            AND transaction_type = 'هزینه'
-            AND description NOT LIKE '%قطعه%'
-            AND description NOT LIKE '%حقوق%'
-            AND description NOT LIKE '%اداری%'
             """
             
-            expense_result = self.data_manager.db.fetch_all(
+            expense_totals = self.data_manager.db.fetch_one(
                 expense_query, 
-                (start_gregorian, end_gregorian,
-                start_gregorian, end_gregorian,
-                start_gregorian, end_gregorian,
-                start_gregorian, end_gregorian)
-            )
+                (start_gregorian, end_gregorian)
+            ) or {}
+            
+            expense_result = [
+                {'category': category, 'amount': expense_totals.get(key, 0) or 0}
+                for category, key in (
+                    ('هزینه مواد و قطعات', 'materials'),
+                    ('هزینه حقوق و دستمزد', 'salaries'),
+                    ('هزینه‌های اداری', 'administrative'),
+                    ('سایر هزینه‌ها', 'other'),
+                )
+            ]
             
             report['expenses'] = expense_result
             total_expense = sum(item.get('amount', 0) or 0 for item in expense_result)
@@ -541,8 +486,8 @@ class ReportGenerator:
             dict: صورت جریان وجوه نقد
         """
         try:
-            start_gregorian = self.data_manager.db.jalali_to_gregorian(start_date)
-            end_gregorian = self.data_manager.db.jalali_to_gregorian(end_date)
+            # بازه نیمه‌باز [start_gregorian, end_gregorian)
+            start_gregorian, end_gregorian = date_filters.days_bounds(start_date, end_date)
             
             report = {
                 'report_type': 'صورت جریان وجوه نقد',
@@ -550,73 +495,52 @@ class ReportGenerator:
                 'generated_at': jdatetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
             }
             
-            # جریان نقدی حاصل از فعالیت‌های عملیاتی
-            operating_query = """
+            # جریان‌های نقدی عملیاتی، سرمایه‌گذاری و تأمین مالی در یک پیمایش بازه
+            cash_flow_query = """
             SELECT 
-                'فعالیت‌های عملیاتی' as category,
-                'دریافت از مشتریان' as subcategory,
-                SUM(CASE 
-                    WHEN transaction_type = 'دریافت' 
-                    AND description LIKE '%مشتری%' 
-                    THEN amount ELSE 0 
-                END) as inflow,
-                SUM(CASE 
-                    WHEN transaction_type = 'پرداخت' 
-                    AND description LIKE '%تامین کننده%' 
-                    THEN amount ELSE 0 
-                END) as outflow
+                COALESCE(SUM(CASE 
+                    WHEN transaction_type = 'دریافت' AND description LIKE '%مشتری%' 
+                    THEN amount END), 0) as operating_inflow,
+                COALESCE(SUM(CASE 
+                    WHEN transaction_type = 'پرداخت' AND description LIKE '%تامین کننده%' 
+                    THEN amount END), 0) as operating_outflow,
+                COALESCE(SUM(CASE 
+                    WHEN transaction_type = 'پرداخت' AND description LIKE '%خرید دارایی%' 
+                    THEN amount END), 0) as investing_outflow,
+                COALESCE(SUM(CASE 
+                    WHEN transaction_type = 'دریافت' AND description LIKE '%سرمایه%' 
+                    THEN amount END), 0) as financing_inflow,
+                COALESCE(SUM(CASE 
+                    WHEN transaction_type = 'پرداخت' AND description LIKE '%سود%' 
+                    THEN amount END), 0) as financing_outflow
             FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
+            WHERE transaction_date >= ? AND transaction_date < ?
+            AND transaction_type IN ('دریافت', 'پرداخت')
             """
             
-            operating_result = self.data_manager.db.fetch_one(
-                operating_query, 
+            flows = self.data_manager.db.fetch_one(
+                cash_flow_query, 
                 (start_gregorian, end_gregorian)
-            )
-            
-            # جریان نقدی حاصل از فعالیت‌های سرمایه‌گذاری
-            investing_query = """
-            SELECT 
-                'فعالیت‌های سرمایه‌گذاری' as category,
-                'خرید دارایی' as subcategory,
-                0 as inflow,
-                SUM(CASE 
-                    WHEN transaction_type = 'پرداخت' 
-                    AND description LIKE '%خرید دارایی%' 
-                    THEN amount ELSE 0 
-                END) as outflow
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            """
-            
-            investing_result = self.data_manager.db.fetch_one(
-                investing_query, 
-                (start_gregorian, end_gregorian)
-            )
-            
-            # جریان نقدی حاصل از فعالیت‌های تأمین مالی
-            financing_query = """
-            SELECT 
-                'فعالیت‌های تأمین مالی' as category,
-                'افزایش سرمایه' as subcategory,
-                SUM(CASE 
-                    WHEN transaction_type = 'دریافت' 
-                    AND description LIKE '%سرمایه%' 
-                    THEN amount ELSE 0 
-                END) as inflow,
-                SUM(CASE 
-                    WHEN transaction_type = 'پرداخت' 
-                    AND description LIKE '%سود%' 
-                    THEN amount ELSE 0 
-                END) as outflow
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            """
+            ) or {}
             
-            financing_result = self.data_manager.db.fetch_one(
-                financing_query, 
-                (start_gregorian, end_gregorian)
-            )
+            operating_result = {
+                'category': 'فعالیت‌های عملیاتی',
+                'subcategory': 'دریافت از مشتریان',
+                'inflow': flows.get('operating_inflow', 0),
+                'outflow': flows.get('operating_outflow', 0)
+            }
+            investing_result = {
+                'category': 'فعالیت‌های سرمایه‌گذاری',
+                'subcategory': 'خرید دارایی',
+                'inflow': 0,
+                'outflow': flows.get('investing_outflow', 0)
+            }
+            financing_result = {
+                'category': 'فعالیت‌های تأمین مالی',
+                'subcategory': 'افزایش سرمایه',
+                'inflow': flows.get('financing_inflow', 0),
+                'outflow': flows.get('financing_outflow', 0)
+            }
             
             report['cash_flows'] = [
                 operating_result,
@@ -671,15 +595,15 @@ class ReportGenerator:
                 'generated_at': jdatetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
             }
             
-            # دارایی‌ها
-            assets_query = """
+            # دارایی‌ها (موجودی نقد: مانده هر حساب در تاریخ ترازنامه از دفتر موجودی)
+            assets_query = f"""
             SELECT 
                 'دارایی‌های جاری' as category,
                 'موجودی نقد' as subcategory,
-                SUM(current_balance) as amount
-            FROM Accounts
-            WHERE account_type IN ('نقدی', 'صندوق', 'جاری')
-            AND is_active = 1
+                SUM(COALESCE({account_ledger.last_balance_sql('a.id', '<')}, 0)) as amount
+            FROM Accounts a
+            WHERE a.account_type IN ('نقدی', 'صندوق', 'جاری')
+            AND a.is_active = 1
             
             UNION ALL
             
@@ -708,7 +632,9 @@ class ReportGenerator:
             AND description LIKE '%پیش پرداخت%'
             """
             
-            assets_result = self.data_manager.db.fetch_all(assets_query)
+            assets_result = self.data_manager.db.fetch_all(
+                assets_query, (date_filters.next_day_start(as_of_gregorian),)
+            )
             report['assets'] = assets_result
             total_assets = sum(item.get('amount', 0) or 0 for item in assets_result)
             
@@ -758,11 +684,13 @@ class ReportGenerator:
                 (
                     SELECT SUM(share_amount) 
                     FROM PartnerShares 
-                    WHERE strftime('%Y', calculation_date) = strftime('%Y', ?)
+                    WHERE calculation_date >= ? AND calculation_date < ?
                 ) as amount
             """
             
-            equity_result = self.data_manager.db.fetch_all(equity_query, (as_of_gregorian,))
+            equity_result = self.data_manager.db.fetch_all(
+                equity_query, date_filters.year_bounds(as_of_gregorian[:4])
+            )
             report['equity'] = equity_result
             total_equity = sum(item.get('amount', 0) or 0 for item in equity_result)
             
@@ -978,9 +906,9 @@ class ReportGenerator:
                 filename += '.pdf'
             
             # تنظیمات اولیه PDF
-            doc = SimpleDocTemplate(
+            doc = platypus.SimpleDocTemplate(
                 filename,
-                pagesize=landscape(A4),
+                pagesize=pagesizes.landscape(pagesizes.A4),
                 rightMargin=30,
                 leftMargin=30,
                 topMargin=30,
@@ -990,10 +918,10 @@ class ReportGenerator:
             elements = []
             
             # استایل‌ها
-            styles = getSampleStyleSheet()
+            styles = rl_styles.getSampleStyleSheet()
             
             # عنوان اصلی
-            title_style = ParagraphStyle(
+            title_style = rl_styles.ParagraphStyle(
                 'CustomTitle',
                 parent=styles['Title'],
                 fontSize=18,
@@ -1009,14 +937,14 @@ class ReportGenerator:
             if period:
                 title_text += f" - {period}"
             
-            elements.append(Paragraph(title_text, title_style))
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Paragraph(title_text, title_style))
+            elements.append(platypus.Spacer(1, 20))
             
             # تاریخ تولید
             generated_at = report_data.get('generated_at', '')
             date_text = f"تاریخ تولید: {generated_at}"
-            elements.append(Paragraph(date_text, styles['Normal']))
-            elements.append(Spacer(1, 30))
+            elements.append(platypus.Paragraph(date_text, styles['Normal']))
+            elements.append(platypus.Spacer(1, 30))
             
             # تولید جداول بر اساس نوع گزارش
             if report_type == 'گزارش روزانه':
@@ -1054,8 +982,8 @@ class ReportGenerator:
                 ['مانده کل حساب‌ها', f"{summary.get('accounts_total_balance', 0):,.0f}"]
             ]
             
-            table = Table(data, colWidths=[200, 150])
-            table.setStyle(TableStyle([
+            table = platypus.Table(data, colWidths=[200, 150])
+            table.setStyle(platypus.TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -1066,9 +994,9 @@ class ReportGenerator:
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
             ]))
             
-            elements.append(Paragraph("خلاصه مالی روز", styles['Heading2']))
+            elements.append(platypus.Paragraph("خلاصه مالی روز", styles['Heading2']))
             elements.append(table)
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Spacer(1, 20))
     
     def _add_monthly_report_to_pdf(self, elements, report_data, styles):
         """اضافه کردن گزارش ماهانه به PDF"""
@@ -1086,8 +1014,8 @@ class ReportGenerator:
                 ['میانگین هزینه روزانه', f"{analysis.get('average_daily_expense', 0):,.0f} ریال"]
             ]
             
-            table = Table(data, colWidths=[200, 150])
-            table.setStyle(TableStyle([
+            table = platypus.Table(data, colWidths=[200, 150])
+            table.setStyle(platypus.TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -1098,9 +1026,9 @@ class ReportGenerator:
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
             ]))
             
-            elements.append(Paragraph("تحلیل ماهانه", styles['Heading2']))
+            elements.append(platypus.Paragraph("تحلیل ماهانه", styles['Heading2']))
             elements.append(table)
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Spacer(1, 20))
     
     def _add_profit_loss_to_pdf(self, elements, report_data, styles):
         """اضافه کردن صورت سود و زیان به PDF"""
@@ -1117,8 +1045,8 @@ class ReportGenerator:
                 ['حاشیه سود خالص', f"{summary.get('net_profit_margin', 0):.1f}%"]
             ]
             
-            table = Table(data, colWidths=[200, 150])
-            table.setStyle(TableStyle([
+            table = platypus.Table(data, colWidths=[200, 150])
+            table.setStyle(platypus.TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -1130,9 +1058,9 @@ class ReportGenerator:
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
             ]))
             
-            elements.append(Paragraph("خلاصه سود و زیان", styles['Heading2']))
+            elements.append(platypus.Paragraph("خلاصه سود و زیان", styles['Heading2']))
             elements.append(table)
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Spacer(1, 20))
     
     def _add_cash_flow_to_pdf(self, elements, report_data, styles):
         """اضافه کردن صورت جریان وجوه نقد به PDF"""
@@ -1148,8 +1076,8 @@ class ReportGenerator:
                 ['نسبت کفایت نقدی', f"{summary.get('cash_flow_adequacy_ratio', 0):.1f}%"]
             ]
             
-            table = Table(data, colWidths=[200, 150])
-            table.setStyle(TableStyle([
+            table = platypus.Table(data, colWidths=[200, 150])
+            table.setStyle(platypus.TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -1161,9 +1089,9 @@ class ReportGenerator:
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
             ]))
             
-            elements.append(Paragraph("خلاصه جریان وجوه نقد", styles['Heading2']))
+            elements.append(platypus.Paragraph("خلاصه جریان وجوه نقد", styles['Heading2']))
             elements.append(table)
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Spacer(1, 20))
     
     def _add_balance_sheet_to_pdf(self, elements, report_data, styles):
         """اضافه کردن ترازنامه به PDF"""
@@ -1178,8 +1106,8 @@ class ReportGenerator:
                 ['اختلاف', f"{summary.get('equation_difference', 0):,.0f} ریال"]
             ]
             
-            table = Table(data, colWidths=[200, 150])
-            table.setStyle(TableStyle([
+            table = platypus.Table(data, colWidths=[200, 150])
+            table.setStyle(platypus.TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -1192,9 +1120,9 @@ class ReportGenerator:
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
             ]))
             
-            elements.append(Paragraph("ترازنامه - معادله حسابداری", styles['Heading2']))
+            elements.append(platypus.Paragraph("ترازنامه - معادله حسابداری", styles['Heading2']))
             elements.append(table)
-            elements.append(Spacer(1, 20))
+            elements.append(platypus.Spacer(1, 20))
     
     def generate_report(self, report_type: str, **kwargs) -> Dict:
         """
@@ -6,11 +6,53 @@ from PySide6.QtCore import QObject, Signal
 import jdatetime
 from datetime import datetime
 
+from database import date_filters, daily_summaries, account_ledger, pagination
+
+def _transaction_search_condition(text):
+    """جستجوی متن در شرح، نوع، نام حساب‌ها و کد TRX تراکنش"""
+    pattern = f"%{text}%"
+    return ("""(at.description LIKE ? OR at.transaction_type LIKE ?
+        OR at.from_account_id IN (SELECT id FROM Accounts WHERE account_name LIKE ?)
+        OR at.to_account_id IN (SELECT id FROM Accounts WHERE account_name LIKE ?)
+        OR printf('TRX%06d', at.id) LIKE ?)""", [pattern] * 5)
+
+
 class TransactionManager(QObject):
     """مدیریت کامل تراکنش‌های مالی"""
     
     data_changed = Signal(str)
     
+    # لیست صفحه‌بندی شده تراکنش‌ها (مبالغ فیلتر به تومان، مثل فرم‌ها)
+    PAGE_QUERY = pagination.PageQuery(
+        select_sql="""
+        SELECT 
+            at.*,
+            a1.account_name as from_account_name,
+            a2.account_name as to_account_name
+        FROM AccountingTransactions at
+        LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
+        LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
+        """,
+        from_sql="FROM AccountingTransactions at",
+        sorts={
+            'date': [('at.transaction_date', 'transaction_date'), ('at.id', 'id')],
+            'amount': [('at.amount', 'amount'), ('at.id', 'id')],
+            'id': [('at.id', 'id')],
+        },
+        default_sort='date',
+        filters={
+            'transaction_type': "at.transaction_type = ?",
+            'account_id': "(at.from_account_id = ? OR at.to_account_id = ?)",
+            'start_date': lambda value: date_filters.range_condition(
+                'at.transaction_date', date_filters.day_start(value)),
+            'end_date': lambda value: date_filters.range_condition(
+                'at.transaction_date', None, date_filters.next_day_start(value)),
+            'amount_min': lambda value: ("at.amount >= ?", [float(value) * 10]),
+            'amount_max': lambda value: ("at.amount <= ?", [float(value) * 10]),
+            'search': _transaction_search_condition,
+        },
+    )
+    
     def __init__(self, data_manager):
         super().__init__()
         self.data_manager = data_manager
@@ -51,12 +93,19 @@ class TransactionManager(QObject):
                 transaction_data.get('employee', 'سیستم')
             )
             
-            success = self.db.execute_query(query, params)
+            # ثبت تراکنش و بروزرسانی موجودی حساب‌ها در یک واحد کار
+            with self.db.transaction():
+                success = self.db.execute_query(query, params)
+                
+                if success:
+                    transaction_id = self.db.fetch_one("SELECT last_insert_rowid() as id")['id']
+                    
+                    # بروزرسانی موجودی حساب‌ها و دفتر موجودی
+                    self._update_account_balances(
+                        transaction_data, amount_rial, transaction_id, transaction_date
+                    )
             
             if success:
-                # بروزرسانی موجودی حساب‌ها
-                self._update_account_balances(transaction_data, amount_rial)
-                
                 self.data_changed.emit("AccountingTransactions")
                 return True, "تراکنش با موفقیت ثبت شد"
             return False, "خطا در ثبت تراکنش"
@@ -117,38 +166,22 @@ class TransactionManager(QObject):
         
         return {'success': True, 'message': 'اعتبارسنجی موفق'}
     
-    def _update_account_balances(self, transaction_data, amount_rial):
-        """بروزرسانی موجودی حساب‌ها پس از تراکنش"""
-        transaction_type = transaction_data.get('transaction_type')
-        from_account_id = transaction_data.get('from_account_id')
-        to_account_id = transaction_data.get('to_account_id')
+    def _update_account_balances(self, transaction_data, amount_rial, transaction_id=None, transaction_date=None):
+        """
+        بروزرسانی موجودی حساب‌ها پس از تراکنش
         
-        if transaction_type == 'انتقال':
-            # کسر از حساب مبدا
-            self.db.execute_query(
-                "UPDATE Accounts SET current_balance = current_balance - ? WHERE id = ?",
-                (amount_rial, from_account_id)
-            )
-            
-            # افزودن به حساب مقصد
-            self.db.execute_query(
-                "UPDATE Accounts SET current_balance = current_balance + ? WHERE id = ?",
-                (amount_rial, to_account_id)
-            )
-            
-        elif transaction_type == 'دریافت' and to_account_id:
-            # افزودن به حساب
-            self.db.execute_query(
-                "UPDATE Accounts SET current_balance = current_balance + ? WHERE id = ?",
-                (amount_rial, to_account_id)
-            )
-            
-        elif transaction_type == 'پرداخت' and from_account_id:
-            # کسر از حساب
-            self.db.execute_query(
-                "UPDATE Accounts SET current_balance = current_balance - ? WHERE id = ?",
-                (amount_rial, from_account_id)
-            )
+        هر تغییر موجودی با account_ledger.post در دفتر موجودی هم ثبت می‌شود
+        (انتقال: مبدا و مقصد، دریافت: مقصد، پرداخت: مبدا).
+        """
+        account_ledger.post_transaction(
+            self.db,
+            transaction_id,
+            transaction_data.get('transaction_type'),
+            transaction_data.get('from_account_id'),
+            transaction_data.get('to_account_id'),
+            amount_rial,
+            transaction_date
+        )
         
         self.data_changed.emit("Accounts")
     
@@ -167,13 +200,10 @@ class TransactionManager(QObject):
         
         params = []
         
-        if start_date:
-            query += " AND DATE(at.transaction_date) >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND DATE(at.transaction_date) <= ?"
-            params.append(end_date)
+        if start_date or end_date:
+            date_sql, date_params = date_filters.days_condition('at.transaction_date', start_date, end_date)
+            query += f" AND {date_sql}"
+            params.extend(date_params)
         
         if transaction_type:
             query += " AND at.transaction_type = ?"
@@ -182,15 +212,64 @@ class TransactionManager(QObject):
         query += " ORDER BY at.transaction_date DESC"
         
         transactions = self.db.fetch_all(query, params)
-        
-        # تبدیل تاریخ و مبلغ
+        self._add_display_fields(transactions)
+        return transactions
+    
+    def _add_display_fields(self, transactions):
+        """تبدیل تاریخ و مبلغ برای نمایش"""
         for transaction in transactions:
             transaction['transaction_date_shamsi'] = self.db.gregorian_to_jalali(
                 transaction['transaction_date']
             )
             transaction['amount_toman'] = transaction['amount'] / 10
+    
+    def get_transactions_page(self, filters=None, sort=None, cursor=None,
+                              page_size=pagination.DEFAULT_PAGE_SIZE):
+        """
+        یک صفحه از تراکنش‌ها با صفحه‌بندی keyset
         
-        return transactions
+        filters: transaction_type، account_id، start_date، end_date،
+        amount_min، amount_max (تومان) و search
+        sort: 'date' (پیش‌فرض، جدیدترین اول)، 'amount' یا 'id'، یا (نام، descending)
+        """
+        return self.PAGE_QUERY.fetch_page(self.db, filters, sort, cursor, page_size,
+                                          prepare=self._add_display_fields)
+    
+    def iter_transactions(self, filters=None, sort=None, page_size=pagination.DEFAULT_PAGE_SIZE):
+        """همه تراکنش‌های فیلتر شده، صفحه به صفحه و فقط به اندازه نیاز"""
+        return pagination.iter_rows(self.get_transactions_page, filters=filters, sort=sort,
+                                    page_size=page_size)
+    
+    def count_transactions(self, filters=None):
+        """تعداد تراکنش‌های فیلتر شده: (تعداد، تخمینی بودن)"""
+        return self.PAGE_QUERY.count(self.db, filters)
+    
+    def get_transactions_summary(self, filters=None):
+        """
+        آمار تراکنش‌های فیلتر شده با یک کوئری تجمعی (مبالغ به تومان)
+        
+        خروجی: count، income، expense، net، income_count، expense_count،
+        transfer_count، max_amount و min_amount (کمترین مبلغ مثبت)
+        """
+        conditions, params = pagination.filter_conditions(filters, self.PAGE_QUERY.filters)
+        query = f"""
+        SELECT 
+            COUNT(*) as count,
+            COALESCE(SUM(CASE WHEN at.transaction_type = 'دریافت' THEN at.amount END), 0) as income,
+            COALESCE(SUM(CASE WHEN at.transaction_type = 'پرداخت' THEN at.amount END), 0) as expense,
+            COUNT(CASE WHEN at.transaction_type = 'دریافت' THEN 1 END) as income_count,
+            COUNT(CASE WHEN at.transaction_type = 'پرداخت' THEN 1 END) as expense_count,
+            COUNT(CASE WHEN at.transaction_type = 'انتقال' THEN 1 END) as transfer_count,
+            COALESCE(MAX(at.amount), 0) as max_amount,
+            COALESCE(MIN(CASE WHEN at.amount > 0 THEN at.amount END), 0) as min_amount
+        {self.PAGE_QUERY.from_sql}
+        {pagination.where_clause(conditions)}
+        """
+        summary = self.db.fetch_one(query, params) or {}
+        for key in ('income', 'expense', 'max_amount', 'min_amount'):
+            summary[key] = (summary.get(key) or 0) / 10
+        summary['net'] = summary['income'] - summary['expense']
+        return summary
     
     def get_transaction_by_id(self, transaction_id):
         """دریافت تراکنش با شناسه"""
@@ -259,18 +338,7 @@ class TransactionManager(QObject):
             # تاریخ امروز
             date = datetime.now().strftime("%Y-%m-%d")
         
-        query = """
-        SELECT 
-            transaction_type,
-            COUNT(*) as count,
-            SUM(amount) as total_amount
-        FROM AccountingTransactions
-        WHERE DATE(transaction_date) = ?
-        GROUP BY transaction_type
-        ORDER BY transaction_type
-        """
-        
-        summary = self.db.fetch_all(query, (date,))
+        summary = daily_summaries.transaction_summary(self.db, *date_filters.day_bounds(date))
         
         # تبدیل به تومان
         for item in summary:
@@ -298,25 +366,19 @@ class TransactionManager(QObject):
             year = today.year
             month = today.month
         
-        # تبدیل به محدوده میلادی
-        start_jalali = f"{year}/{month:02d}/01"
-        end_jalali = f"{year}/{month:02d}/31"
-        
-        start_gregorian = self.db.jalali_to_gregorian(start_jalali)
-        end_gregorian = self.db.jalali_to_gregorian(end_jalali)
-        
+        # کلید ماه شمسی (ایندکس پوششی idx_acc_trans_jalali_ym)
         query = """
         SELECT 
             transaction_type,
             COUNT(*) as count,
             SUM(amount) as total_amount
         FROM AccountingTransactions
-        WHERE DATE(transaction_date) BETWEEN ? AND ?
+        WHERE jalali_ym = ?
         GROUP BY transaction_type
         ORDER BY transaction_type
         """
         
-        summary = self.db.fetch_all(query, (start_gregorian, end_gregorian))
+        summary = self.db.fetch_all(query, (date_filters.jalali_ym(year, month),))
         
         # تبدیل به تومان
         for item in summary:
@@ -352,22 +414,14 @@ class TransactionManager(QObject):
     
     def get_cash_flow(self, start_date, end_date):
         """گزارش گردش نقدی"""
-        query = """
-        SELECT 
-            DATE(transaction_date) as date,
-            SUM(CASE WHEN transaction_type = 'دریافت' THEN amount ELSE 0 END) as income,
-            SUM(CASE WHEN transaction_type = 'پرداخت' THEN amount ELSE 0 END) as expense,
-            SUM(CASE WHEN transaction_type = 'دریافت' THEN amount ELSE -amount END) as net_cash_flow
-        FROM AccountingTransactions
-        WHERE DATE(transaction_date) BETWEEN ? AND ?
-        GROUP BY DATE(transaction_date)
-        ORDER BY DATE(transaction_date)
-        """
-        
-        cash_flow = self.db.fetch_all(query, (start_date, end_date))
+        cash_flow = daily_summaries.daily_cash_series(
+            self.db, *date_filters.days_bounds(start_date, end_date)
+        )
         
         # تبدیل به تومان و تاریخ شمسی
         for item in cash_flow:
+            # هر نوع غیر از دریافت در خالص گردش خروجی حساب می‌شود
+            item['net_cash_flow'] = item['income'] - (item['total_amount'] - item['income'])
             item['date_shamsi'] = self.db.gregorian_to_jalali(item['date'])
             item['income_toman'] = item['income'] / 10
             item['expense_toman'] = item['expense'] / 10
@@ -1,8 +1,49 @@
 ﻿# modules/config_manager.py
 import json
 import os
+from types import MappingProxyType
+from typing import Any, FrozenSet, Mapping, NamedTuple
 from PySide6.QtCore import QObject, Signal, QTimer, Qt
-from datetime import datetime
+
+
+# مجوزی که همه مجوزها را می‌دهد
+FULL_ACCESS = 'all'
+
+
+class ConfigSnapshot(NamedTuple):
+    """
+    نسخه تغییرناپذیر تنظیمات که با هر set() یکجا جایگزین می‌شود
+
+    خواننده‌ها (get، check_permission، validate_password) فقط یک بار self._snapshot را
+    می‌خوانند، پس بدون قفل همیشه یک نسخه سازگار می‌بینند.
+    """
+    categories: Mapping[str, Mapping[str, Any]]   # دسته ← تنظیمات فقط خواندنی
+    role_permissions: Mapping[str, FrozenSet[str]]  # نقش ← مجوزها
+    full_access_roles: FrozenSet[str]             # نقش‌هایی که مجوز 'all' دارند
+
+
+def build_snapshot(configs):
+    """ساخت ConfigSnapshot از دیکشنری دسته ← تنظیمات (کپی می‌شود)"""
+    security = configs.get('security') or {}
+    role_permissions = MappingProxyType({
+        role: frozenset(permissions or ())
+        for role, permissions in dict(security.get('role_permissions') or {}).items()
+    })
+    categories = {}
+    for category, values in configs.items():
+        values = dict(values)
+        if category == 'security' and 'role_permissions' in values:
+            values['role_permissions'] = role_permissions
+        categories[category] = MappingProxyType(values)
+
+    return ConfigSnapshot(
+        categories=MappingProxyType(categories),
+        role_permissions=role_permissions,
+        full_access_roles=frozenset(
+            role for role, permissions in role_permissions.items() if FULL_ACCESS in permissions
+        ),
+    )
+
 
 class ConfigManager(QObject):
     """
@@ -24,7 +65,9 @@ class ConfigManager(QObject):
         if not hasattr(self, 'initialized'):
             super().__init__()
             self.data_manager = data_manager
-            self.config_cache = {}  # کش تنظیمات در حافظه
+            self._configs = {}  # نسخه قابل تغییر تنظیمات (فقط load_* و set آن را تغییر می‌دهند)
+            self._snapshot = build_snapshot({})  # نسخه منتشر شده برای خواندن
+            self._dirty = {}  # دسته ← کلیدهایی که هنوز در دیتابیس ذخیره نشده‌اند
             self.user_permissions = {}  # دسترسی‌های کاربران
             self.initialized = True
             
@@ -51,8 +94,14 @@ class ConfigManager(QObject):
         # ۵. تنظیمات نمایش
         self.load_display_config()
         
+        self._snapshot = build_snapshot(self._configs)
         print("✅ تنظیمات سیستم بارگذاری شد")
     
+    @property
+    def config_cache(self):
+        """تنظیمات فعلی (دسته ← تنظیمات) - فقط خواندنی"""
+        return self._snapshot.categories
+    
     def load_general_config(self):
         """بارگذاری تنظیمات عمومی"""
         try:
@@ -60,7 +109,7 @@ class ConfigManager(QObject):
             result = self.data_manager.db.fetch_one(query)
             
             if result:
-                self.config_cache['general'] = {
+                self._configs['general'] = {
                     'app_name': result.get('app_name', 'سیستم مدیریت تعمیرگاه'),
                     'company_name': result.get('company_name', ''),
                     'company_address': result.get('company_address', ''),
@@ -87,7 +136,7 @@ class ConfigManager(QObject):
             result = self.data_manager.db.fetch_one(query)
             
             if result:
-                self.config_cache['security'] = {
+                self._configs['security'] = {
                     'max_login_attempts': result.get('max_login_attempts', 3),
                     'session_timeout': result.get('session_timeout_minutes', 30),
                     'password_min_length': result.get('min_password_length', 8),
@@ -146,7 +195,7 @@ class ConfigManager(QObject):
             except:
                 pass  # اگر جدول وجود نداشت، مشکلی نیست
             
-            self.config_cache['financial'] = settings
+            self._configs['financial'] = settings
             
         except Exception as e:
             print(f"⚠️ خطا در بارگذاری تنظیمات مالی: {e}")
@@ -155,7 +204,7 @@ class ConfigManager(QObject):
     def load_inventory_config(self):
         """بارگذاری تنظیمات انبار"""
         try:
-            self.config_cache['inventory'] = {
+            self._configs['inventory'] = {
                 'min_stock_default': 5,
                 'max_stock_default': 100,
                 'low_stock_warning': 10,
@@ -180,7 +229,7 @@ class ConfigManager(QObject):
             result = self.data_manager.db.fetch_one(query)
             
             if result:
-                self.config_cache['display'] = {
+                self._configs['display'] = {
                     'font_family': result.get('font_name', 'B Nazanin'),
                     'font_size': result.get('font_size', 11),
                     'text_color': result.get('text_color', '#ffffff'),
@@ -197,7 +246,7 @@ class ConfigManager(QObject):
     
     def set_default_general_config(self):
         """تنظیمات پیش‌فرض عمومی"""
-        self.config_cache['general'] = {
+        self._configs['general'] = {
             'app_name': 'سیستم مدیریت تعمیرگاه شروین',
             'company_name': 'تعمیرگاه لوازم خانگی شروین',
             'company_address': '',
@@ -213,7 +262,7 @@ class ConfigManager(QObject):
     
     def set_default_security_config(self):
         """تنظیمات پیش‌فرض امنیتی"""
-        self.config_cache['security'] = {
+        self._configs['security'] = {
             'max_login_attempts': 3,
             'session_timeout': 30,
             'password_min_length': 8,
@@ -235,7 +284,7 @@ class ConfigManager(QObject):
     
     def set_default_financial_config(self):
         """تنظیمات پیش‌فرض مالی"""
-        self.config_cache['financial'] = {
+        self._configs['financial'] = {
             'tax_rate': 9.0,
             'currency': 'تومان',
             'default_discount': 0.0,
@@ -245,7 +294,7 @@ class ConfigManager(QObject):
     
     def set_default_inventory_config(self):
         """تنظیمات پیش‌فرض انبار"""
-        self.config_cache['inventory'] = {
+        self._configs['inventory'] = {
             'min_stock_default': 5,
             'max_stock_default': 100,
             'low_stock_warning': 10,
@@ -256,7 +305,7 @@ class ConfigManager(QObject):
     
     def set_default_display_config(self):
         """تنظیمات پیش‌فرض نمایش"""
-        self.config_cache['display'] = {
+        self._configs['display'] = {
             'font_family': 'B Nazanin',
             'font_size': 11,
             'text_color': '#ffffff',
@@ -267,64 +316,32 @@ class ConfigManager(QObject):
 
     def get(self, category, key=None, default=None):
         """
-        دریافت مقدار تنظیمات - نسخه نهایی اصلاح شده
+        دریافت مقدار تنظیمات از snapshot فعلی (بدون قفل، I/O یا چاپ)
+        
+        get(category) کل دسته را (فقط خواندنی) برمی‌گرداند؛ get(category, {}) همان
+        get(category, default={}) است.
         """
+        if isinstance(key, dict):
+            key, default = None, key
+        
         try:
-            # دیباگ: چاپ ورودی‌ها برای ردیابی
-            key_type_str = type(key).__name__ if key is not None else 'None'
-            print(f"🔍 دیباگ get: category='{category}', type={type(category).__name__}, key={key}, type(key)={key_type_str}")
-            
-            # اگر category دیکشنری است (اشتباه رایج)
-            if isinstance(category, dict):
-                print("⚠️ هشدار: category یک دیکشنری است!")
-                return default
-            
-            # اگر category رشته نیست
-            if not isinstance(category, str):
-                print("⚠️ هشدار: category باید رشته باشد")
-                return default
-            
-            # اگر key یک دیکشنری است، احتمالاً می‌خواهند default را ارسال کنند
-            if isinstance(key, dict):
-                print(f"⚠️ هشدار: key یک دیکشنری است! احتمالاً می‌خواهید: get('{category}', default={key})")
-                # در این حالت، key را نادیده می‌گیریم و از default استفاده می‌کنیم
-                return self.get(category, None, key)
-            
-            # بررسی وجود دسته
-            if category not in self.config_cache:
-                return default
-            
-            # اگر key مشخص نشده، کل دسته را برگردان
-            if key is None:
-                result = self.config_cache.get(category)
-                return result if result is not None else default
-            
-            # اطمینان از اینکه key رشته است
-            if not isinstance(key, str):
-                try:
-                    key = str(key)
-                except:
-                    return default
-            
-            # دریافت مقدار خاص
-            category_dict = self.config_cache.get(category, {})
-            if not isinstance(category_dict, dict):
-                return default
-            
-            return category_dict.get(key, default)
-            
-        except Exception as e:
-            print(f"⚠️ خطا در دریافت تنظیمات: {e}")
+            values = self._snapshot.categories.get(category)
+        except TypeError:  # category غیرقابل hash (مثلاً دیکشنری)
+            return default
+        
+        if values is None:
             return default
+        if key is None:
+            return values
+        return values.get(key, default)
 
     def set(self, category, key, value, save_to_db=True):
-        """تنظیم مقدار"""
+        """تنظیم مقدار و انتشار snapshot جدید"""
         try:
-            if category not in self.config_cache:
-                self.config_cache[category] = {}
-            
-            old_value = self.config_cache[category].get(key)
-            self.config_cache[category][key] = value
+            values = self._configs.setdefault(category, {})
+            old_value = values.get(key)
+            values[key] = value
+            self._snapshot = build_snapshot(self._configs)
             
             # ارسال سیگنال
             self.config_updated.emit(f"{category}.{key}", {
@@ -336,11 +353,13 @@ class ConfigManager(QObject):
             
             # اگر تنظیمات نمایش تغییر کرد، سیگنال ویژه ارسال کن
             if category == 'display':
-                self.display_settings_changed.emit(self.config_cache['display'])
+                self.display_settings_changed.emit(dict(self._configs['display']))
             
-            # ذخیره در دیتابیس
-            if save_to_db:
-                self.save_to_database(category, {key: value})
+            # ذخیره در دیتابیس؛ کلیدی که ذخیره نشد برای ذخیره خودکار علامت می‌خورد
+            if not save_to_db or not self.save_to_database(category, {key: value}):
+                self._dirty.setdefault(category, set()).add(key)
+            else:
+                self._dirty.get(category, set()).discard(key)
             
             return True
             
@@ -396,41 +415,34 @@ class ConfigManager(QObject):
             print(f"⚠️ خطا در تنظیم تایمر ذخیره خودکار: {e}")
     
     def auto_save_configs(self):
-        """ذخیره خودکار تنظیمات"""
+        """ذخیره خودکار فقط کلیدهایی که از آخرین ذخیره تغییر کرده‌اند"""
+        dirty = {category: keys for category, keys in self._dirty.items() if keys}
+        if not dirty:
+            return
+        
         try:
-            for category, configs in self.config_cache.items():
-                self.save_to_database(category, configs)
-            print("💾 تنظیمات به صورت خودکار ذخیره شد")
+            for category, keys in dirty.items():
+                values = self._configs.get(category, {})
+                data = {key: values[key] for key in keys if key in values}
+                if self.save_to_database(category, data):
+                    self._dirty.pop(category, None)
+            print("💾 تنظیمات تغییر کرده به صورت خودکار ذخیره شد")
         except Exception as e:
             print(f"⚠️ خطا در ذخیره خودکار: {e}")
     
     def check_permission(self, user_role, permission):
-        """بررسی دسترسی کاربر"""
-        try:
-            role_perms = self.get('security', 'role_permissions', {})
-            
-            if user_role not in role_perms:
-                return False
-            
-            user_permissions = role_perms[user_role]
-            
-            # اگر 'all' دارد، همه مجوزها را بده
-            if 'all' in user_permissions:
-                return True
-            
-            return permission in user_permissions
-            
-        except Exception as e:
-            print(f"⚠️ خطا در بررسی دسترسی: {e}")
-            return False
+        """بررسی دسترسی کاربر (دو جستجوی مجموعه در snapshot فعلی)"""
+        snapshot = self._snapshot
+        
+        # اگر 'all' دارد، همه مجوزها را بده
+        if user_role in snapshot.full_access_roles:
+            return True
+        
+        return permission in snapshot.role_permissions.get(user_role, ())
     
     def get_user_permissions(self, user_role):
         """دریافت تمام مجوزهای یک نقش"""
-        try:
-            role_perms = self.get('security', 'role_permissions', {})
-            return role_perms.get(user_role, [])
-        except:
-            return []
+        return sorted(self._snapshot.role_permissions.get(user_role, ()))
 
 
     def validate_password(self, password):
@@ -475,17 +487,12 @@ class ConfigManager(QObject):
             if not self.get('security', 'audit_log', True):
                 return
             
-            query = """
-            INSERT INTO Logs (user_id, action, details, ip_address, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            
             # در حالت واقعی، IP کاربر را دریافت کنید
             ip_address = "127.0.0.1"
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            return self.data_manager.db.execute_query(
-                query, (user_id, action, details, ip_address, timestamp)
+            # فقط به صف اضافه می‌شود؛ نوشتن دسته‌ای در نخ پس‌زمینه انجام می‌شود
+            return self.data_manager.audit_log.log(
+                user_id, action, details=details, ip_address=ip_address
             )
             
         except Exception as e:
@@ -3,10 +3,50 @@
 مدیریت داده‌های داشبورد - اتصال به داده‌های واقعی دیتابیس
 """
 
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QTimer, QRunnable, QThreadPool
 from datetime import datetime, timedelta
+import time
 import jdatetime
-from dateutil import relativedelta
+
+from modules.dashboard_stats import DashboardStatsEngine, OPEN_RECEPTION_STATUSES
+
+
+class DashboardRefreshSignals(QObject):
+    """سیگنال‌های کار پس‌زمینه (QRunnable خودش سیگنال ندارد)"""
+    
+    finished = Signal(int, object)  # شناسه درخواست، نتیجه ساخت (None یعنی لغو یا خطا)
+
+
+class DashboardRefreshTask(QRunnable):
+    """ساخت قسمت‌های داشبورد در نخ کارگر با اتصال خواندنی مخصوص خودش"""
+    
+    def __init__(self, manager, request_id, snapshot, parts, dirty_sections, full_refresh):
+        super().__init__()
+        # نگهداری توسط DashboardManager تا tryTake و سیگنال پایان معتبر بمانند
+        self.setAutoDelete(False)
+        self.manager = manager
+        self.request_id = request_id
+        self.snapshot = snapshot
+        self.parts = parts
+        self.dirty_sections = dirty_sections
+        self.full_refresh = full_refresh
+        self.cancelled = False
+        self.signals = DashboardRefreshSignals()
+    
+    def run(self):
+        result = None
+        try:
+            db = self.manager.data_manager.db
+            # تمام کوئری‌های این کار روی یک اتصال خواندنی قرض گرفته از استخر اجرا می‌شوند
+            with db.profiler.action("DashboardRefreshTask"):
+                with db.connection_scope(readonly=True):
+                    result = self.manager.build_parts(
+                        self.snapshot, self.parts, is_cancelled=lambda: self.cancelled
+                    )
+        except Exception as e:
+            print(f"❌ خطا در بروزرسانی پس‌زمینه داشبورد: {e}")
+        
+        self.signals.finished.emit(self.request_id, result)
 
 
 class DashboardManager(QObject):
@@ -14,10 +54,30 @@ class DashboardManager(QObject):
     
     dashboard_data_updated = Signal(dict)  # سیگنال بروزرسانی داده‌های داشبورد
     
+    # بخش‌های عکس لحظه‌ای که هر قسمت داشبورد از آن‌ها ساخته می‌شود
+    PART_SECTIONS = {
+        'stats': {'receptions', 'invoices', 'checks', 'stock', 'expenses', 'customers'},
+        'charts': {'receptions', 'invoices', 'inventory'},
+        'alerts': {'checks', 'open_receptions', 'stock', 'technicians'},
+        'quick_lists': {'open_receptions', 'checks', 'stock'},
+    }
+    
+    # تأخیر تجمیع تغییرات پشت سر هم قبل از بروزرسانی (میلی‌ثانیه)
+    CHANGE_REFRESH_DELAY_MS = 300
+    
     def __init__(self, data_manager):
         super().__init__()
         self.data_manager = data_manager
         
+        # موتور آمار تجمیعی (چند کوئری گروهی به جای ده‌ها کوئری جداگانه)
+        self.stats_engine = DashboardStatsEngine(data_manager.db)
+        
+        # عکس لحظه‌ای فعلی و بخش‌هایی که با تغییر داده‌ها نامعتبر شده‌اند
+        self.snapshot = None
+        self.snapshot_time = None
+        self.dirty_sections = set()
+        self.force_full_refresh = False
+        
         # کش داده‌ها برای بهبود عملکرد
         self.cache = {
             'stats': None,
@@ -27,27 +87,123 @@ class DashboardManager(QObject):
             'timestamp': None
         }
         
-        # تنظیم مدت زمان اعتبار کش (ثانیه)
+        # تنظیم مدت زمان اعتبار کش (ثانیه) - فقط برای تغییراتی که سیگنال ندارند
         self.cache_ttl = 300  # 5 دقیقه
+        
+        # سرویس پس‌زمینه: یک کار در حال اجرا، درخواست‌های هم‌زمان در یک درخواست بعدی تجمیع می‌شوند
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.active = True
+        self.running_task = None
+        self.tasks = {}
+        self.request_counter = 0
+        self.pending_refresh = False
+        self.pending_force = False
+        
+        # بروزرسانی خودکار پس از تغییر داده‌ها
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(self.CHANGE_REFRESH_DELAY_MS)
+        self.change_timer.timeout.connect(self.refresh_changed_sections)
+        
+        if hasattr(data_manager, 'data_changed'):
+            data_manager.data_changed.connect(self.on_data_changed)
     
-    def get_dashboard_data(self, force_refresh=False):
-        """دریافت تمام داده‌های داشبورد"""
+    def on_data_changed(self, table_name):
+        """نامعتبر کردن بخش‌های وابسته به جدول تغییر کرده"""
+        sections = self.stats_engine.sections_for_table(table_name)
+        if not sections:
+            return
+        
+        self.dirty_sections.update(sections)
+        
+        # تغییرات پشت سر هم در یک بروزرسانی تجمیع می‌شوند
+        if self.active and self.snapshot is not None:
+            self.change_timer.start()
+    
+    def refresh_changed_sections(self):
+        """بروزرسانی فقط قسمت‌هایی که داده‌هایشان تغییر کرده است"""
+        self.request_refresh()
+    
+    def _prepare_refresh(self, force_refresh=False):
+        """
+        تعیین کار لازم برای بروزرسانی
+        
+        خروجی (snapshot, parts, dirty_sections, full_refresh) یا None اگر چیزی تغییر نکرده باشد.
+        snapshot یک نسخه مستقل است و عکس لحظه‌ای فعلی تا پایان ساخت دست نمی‌خورد.
+        """
         current_time = datetime.now()
         
-        # بررسی کش و اعتبار آن
-        if (not force_refresh and 
-            self.cache['timestamp'] and 
-            (current_time - self.cache['timestamp']).seconds < self.cache_ttl):
-            return self.cache
+        # بازسازی کامل: اجباری، اولین بار، تغییر روز یا پایان اعتبار کش
+        full_refresh = (
+            force_refresh or
+            self.force_full_refresh or
+            self.snapshot is None or
+            self.snapshot.today != current_time.date() or
+            (current_time - self.snapshot_time).total_seconds() >= self.cache_ttl
+        )
         
-        # جمع‌آوری داده‌های جدید
-        dashboard_data = {
-            'stats': self.get_today_stats(),
-            'charts': self.get_charts_data(),
-            'alerts': self.get_alerts(),
-            'quick_lists': self.get_quick_lists(),
-            'timestamp': current_time
+        dirty_sections = self.dirty_sections
+        if full_refresh:
+            snapshot = self.stats_engine.snapshot(current_time.date())
+            parts = list(self.PART_SECTIONS)
+        else:
+            # بدون تغییر: بدون هیچ کوئری از کش برمی‌گردد
+            if not dirty_sections:
+                return None
+            
+            snapshot = self.snapshot.copy(invalidate=dirty_sections)
+            parts = [part for part, sections in self.PART_SECTIONS.items()
+                     if sections & dirty_sections]
+        
+        self.dirty_sections = set()
+        self.force_full_refresh = False
+        self.change_timer.stop()
+        return snapshot, parts, dirty_sections, full_refresh
+    
+    def build_parts(self, snapshot, parts, is_cancelled=None):
+        """ساخت قسمت‌های داشبورد از عکس لحظه‌ای (قابل اجرا در نخ کارگر)"""
+        started = time.perf_counter()
+        loaded_before = set(snapshot.sections)
+        builders = {
+            'stats': self.get_today_stats,
+            'charts': self.get_charts_data,
+            'alerts': self.get_alerts,
+            'quick_lists': self.get_quick_lists,
+        }
+        
+        data = {}
+        build_timings = {}
+        for part in parts:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            part_started = time.perf_counter()
+            data[part] = builders[part](snapshot=snapshot)
+            build_timings[part] = round((time.perf_counter() - part_started) * 1000, 2)
+        
+        loaded = [name for name in snapshot.sections if name not in loaded_before]
+        return {
+            'data': data,
+            'timings': {
+                'sections': {name: snapshot.timings[name] for name in loaded},
+                'build': build_timings,
+                'queries': len(loaded),
+                'total_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
         }
+    
+    def _publish(self, snapshot, parts, full_refresh, result):
+        """پذیرش نتیجه ساخت، ذخیره در کش و ارسال سیگنال"""
+        current_time = datetime.now()
+        self.snapshot = snapshot
+        if full_refresh:
+            self.snapshot_time = current_time
+        
+        dashboard_data = dict(self.cache)
+        dashboard_data.update(result['data'])
+        dashboard_data['timestamp'] = current_time
+        dashboard_data['changed'] = parts
+        dashboard_data['timings'] = result['timings']
         
         # ذخیره در کش
         self.cache = dashboard_data
@@ -57,173 +213,151 @@ class DashboardManager(QObject):
         
         return dashboard_data
     
-    def get_today_stats(self):
+    def get_dashboard_data(self, force_refresh=False):
+        """دریافت تمام داده‌های داشبورد (هم‌زمان، در نخ فراخواننده)"""
+        # نتیجه کار پس‌زمینه در حال اجرا دیگر معتبر نیست
+        self.cancel_pending()
+        
+        prepared = self._prepare_refresh(force_refresh)
+        if prepared is None:
+            return self.cache
+        
+        snapshot, parts, _dirty_sections, full_refresh = prepared
+        return self._publish(snapshot, parts, full_refresh, self.build_parts(snapshot, parts))
+    
+    def request_refresh(self, force_refresh=False):
+        """
+        درخواست بروزرسانی در پس‌زمینه؛ نتیجه با dashboard_data_updated می‌رسد
+        
+        اگر کاری در حال اجرا باشد، درخواست‌ها تا پایان آن تجمیع می‌شوند و سپس
+        فقط یک بروزرسانی دیگر انجام می‌شود. خروجی True یعنی کار جدیدی شروع شد.
+        """
+        # داشبورد نمایش داده نمی‌شود؛ تغییرات تا فعال شدن دوباره نگه داشته می‌شوند
+        if not self.active:
+            return False
+        
+        if self.running_task is not None:
+            self.pending_refresh = True
+            self.pending_force = self.pending_force or force_refresh
+            return False
+        
+        prepared = self._prepare_refresh(force_refresh)
+        if prepared is None:
+            return False
+        
+        self.request_counter += 1
+        task = DashboardRefreshTask(self, self.request_counter, *prepared)
+        task.signals.finished.connect(self._on_refresh_finished)
+        self.tasks[task.request_id] = task
+        self.running_task = task
+        self.thread_pool.start(task)
+        return True
+    
+    def _restore_task(self, task):
+        """بازگرداندن کار لغو شده به صف تغییرات تا در بروزرسانی بعدی انجام شود"""
+        self.dirty_sections |= task.dirty_sections
+        if task.full_refresh:
+            self.force_full_refresh = True
+    
+    def _on_refresh_finished(self, request_id, result):
+        """دریافت نتیجه کار پس‌زمینه در نخ اصلی"""
+        task = self.tasks.pop(request_id, None)
+        if task is None:
+            return
+        
+        if task is self.running_task:
+            self.running_task = None
+        
+        if task.cancelled or result is None:
+            self._restore_task(task)
+        else:
+            self._publish(task.snapshot, task.parts, task.full_refresh, result)
+        
+        # اجرای درخواست‌های تجمیع شده در زمان اجرای این کار
+        if self.running_task is None and self.pending_refresh and self.active:
+            force_refresh = self.pending_force
+            self.pending_refresh = False
+            self.pending_force = False
+            self.request_refresh(force_refresh)
+    
+    def cancel_pending(self):
+        """لغو کار در حال اجرا و درخواست‌های منتظر (مثلاً هنگام تغییر تب)"""
+        self.pending_refresh = False
+        self.pending_force = False
+        
+        task = self.running_task
+        if task is None:
+            return
+        
+        self.running_task = None
+        task.cancelled = True
+        
+        # کاری که هنوز شروع نشده از صف حذف می‌شود؛ در غیر این صورت نتیجه‌اش دور ریخته می‌شود
+        if self.thread_pool.tryTake(task):
+            self.tasks.pop(task.request_id, None)
+            self._restore_task(task)
+    
+    def set_active(self, active):
+        """
+        فعال/غیرفعال کردن داشبورد هنگام نمایش یا ترک آن
+        
+        در حالت غیرفعال کارهای قدیمی لغو و تغییرات فقط علامت‌گذاری می‌شوند؛
+        با فعال شدن دوباره، داده‌های کش فوراً ارسال و تغییرات در پس‌زمینه بروز می‌شوند.
+        """
+        self.active = active
+        
+        if not active:
+            self.change_timer.stop()
+            self.cancel_pending()
+            return
+        
+        if self.cache.get('timestamp'):
+            cached_data = dict(self.cache)
+            cached_data['changed'] = list(self.PART_SECTIONS)
+            self.dashboard_data_updated.emit(cached_data)
+        
+        self.request_refresh()
+    
+    def shutdown(self, timeout_ms=2000):
+        """توقف سرویس پس‌زمینه هنگام بستن برنامه"""
+        self.active = False
+        self.change_timer.stop()
+        self.cancel_pending()
+        self.thread_pool.waitForDone(timeout_ms)
+    
+    def _snapshot(self, snapshot):
+        """استفاده از عکس لحظه‌ای داده شده یا ایجاد یک عکس جدید"""
+        return snapshot if snapshot is not None else self.stats_engine.snapshot()
+    
+    def get_today_stats(self, snapshot=None):
         """آمار امروز - محاسبه از دیتابیس"""
         try:
-            today = datetime.now().date()
-            today_str = today.strftime('%Y-%m-%d')
-            today_jalali = jdatetime.date.today()
-            today_jalali_str = today_jalali.strftime('%Y-%m-%d')
-            
-            # 1. تعداد پذیرش‌های امروز
-            query = """
-            SELECT COUNT(*) as count
-            FROM Receptions 
-            WHERE DATE(reception_date) = ?
-            """
-            today_receptions = self.data_manager.db.fetch_one(query, (today_str,))
-            today_receptions_count = today_receptions['count'] if today_receptions else 0
-            
-            # 2. دستگاه‌های در حال تعمیر
-            query = """
-            SELECT COUNT(*) as count
-            FROM Receptions 
-            WHERE status IN ('در حال تعمیر', 'در انتظار')
-            """
-            repairing_receptions = self.data_manager.db.fetch_one(query)
-            repairing_count = repairing_receptions['count'] if repairing_receptions else 0
-            
-            # 3. تعمیرات تکمیل شده امروز
-            query = """
-            SELECT COUNT(*) as count
-            FROM Receptions 
-            WHERE status = 'تعمیر شده' 
-            AND DATE(reception_date) = ?
-            """
-            completed_today = self.data_manager.db.fetch_one(query, (today_str,))
-            completed_count = completed_today['count'] if completed_today else 0
-            
-            # 4. فاکتورهای پرداخت نشده امروز
-            query = """
-            SELECT COUNT(*) as count, COALESCE(SUM(total), 0) as total_amount
-            FROM Invoices 
-            WHERE payment_status = 'نسیه' 
-            AND DATE(invoice_date) = ?
-            """
-            unpaid_invoices = self.data_manager.db.fetch_one(query, (today_str,))
-            unpaid_count = unpaid_invoices['count'] if unpaid_invoices else 0
-            unpaid_amount = unpaid_invoices['total_amount'] if unpaid_invoices else 0
-            
-            # 5. چک‌های سررسید نزدیک (۳ روز آینده)
-            three_days_later = today + timedelta(days=3)
-            three_days_later_str = three_days_later.strftime('%Y-%m-%d')
-            
-            query = """
-            SELECT COUNT(*) as count, COALESCE(SUM(amount), 0) as total_amount
-            FROM Checks 
-            WHERE status IN ('وصول نشده', 'پاس نشده')
-            AND date(due_date) BETWEEN date(?) AND date(?)
-            """
-            due_checks = self.data_manager.db.fetch_one(query, (today_str, three_days_later_str))
-            due_checks_count = due_checks['count'] if due_checks else 0
-            due_checks_amount = due_checks['total_amount'] if due_checks else 0
-            
-            # 6. موجودی‌های کم انبار
-            query = """
-            SELECT COUNT(*) as count
-            FROM Parts p
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM NewPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) np ON p.id = np.part_id
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM UsedPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) up ON p.id = up.part_id
-            WHERE COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) < p.min_stock
-            """
-            low_stock = self.data_manager.db.fetch_one(query)
-            low_stock_count = low_stock['count'] if low_stock else 0
-            
-            # 7. درآمد امروز
-            query = """
-            SELECT COALESCE(SUM(paid_amount), 0) as total_income
-            FROM Invoices 
-            WHERE DATE(invoice_date) = ? 
-            AND payment_status IN ('پرداخت شده', 'نقدی')
-            """
-            today_income = self.data_manager.db.fetch_one(query, (today_str,))
-            income_today = today_income['total_income'] if today_income else 0
-            
-            # 8. هزینه‌های امروز
-            query = """
-            SELECT COALESCE(SUM(amount), 0) as total_expense
-            FROM AccountingTransactions 
-            WHERE transaction_type = 'پرداخت'
-            AND DATE(transaction_date) = ?
-            """
-            today_expenses = self.data_manager.db.fetch_one(query, (today_str,))
-            expenses_today = today_expenses['total_expense'] if today_expenses else 0
-            
-            # 9. مشتریان جدید امروز
-            query = """
-            SELECT COUNT(*) as count
-            FROM Persons 
-            WHERE person_type = 'مشتری'
-            AND DATE(registration_date) = ?
-            """
-            new_customers = self.data_manager.db.fetch_one(query, (today_str,))
-            new_customers_count = new_customers['count'] if new_customers else 0
-            
-            # 10. سود امروز
-            profit_today = income_today - expenses_today
-            
-            stats = {
-                'today_receptions': today_receptions_count,
-                'repairing_devices': repairing_count,
-                'completed_today': completed_count,
-                'unpaid_invoices': {
-                    'count': unpaid_count,
-                    'amount': unpaid_amount
-                },
-                'due_checks': {
-                    'count': due_checks_count,
-                    'amount': due_checks_amount
-                },
-                'low_stock_items': low_stock_count,
-                'today_income': income_today,
-                'today_expenses': expenses_today,
-                'profit_today': profit_today,
-                'new_customers': new_customers_count
-            }
-            
-            return stats
-            
+            return self.stats_engine.today_stats(self._snapshot(snapshot))
+        
         except Exception as e:
             print(f"خطا در محاسبه آمار امروز: {e}")
             return {}
     
-    def get_charts_data(self):
+    def get_charts_data(self, snapshot=None):
         """داده‌های نمودارها"""
         try:
+            snapshot = self._snapshot(snapshot)
             charts = {
-                'reception_status': self.get_reception_status_chart(),
-                'daily_income': self.get_daily_income_chart(),
-                'monthly_trends': self.get_monthly_trends_chart(),
-                'inventory_status': self.get_inventory_status_chart()
+                'reception_status': self.get_reception_status_chart(snapshot),
+                'daily_income': self.get_daily_income_chart(snapshot),
+                'monthly_trends': self.get_monthly_trends_chart(snapshot),
+                'inventory_status': self.get_inventory_status_chart(snapshot)
             }
             return charts
-            
+        
         except Exception as e:
             print(f"خطا در دریافت داده‌های نمودارها: {e}")
             return {}
     
-    def get_reception_status_chart(self):
+    def get_reception_status_chart(self, snapshot=None):
         """نمودار وضعیت پذیرش‌ها"""
         try:
-            query = """
-            SELECT 
-                status,
-                COUNT(*) as count
-            FROM Receptions
-            GROUP BY status
-            """
-            
-            results = self.data_manager.db.fetch_all(query)
+            status_counts = self.stats_engine.reception_status_counts(self._snapshot(snapshot))
             
             # تبدیل به فرمت مناسب برای نمودار
             chart_data = {
@@ -240,169 +374,72 @@ class DashboardManager(QObject):
                 'لغو شده': '#e74c3c'  # قرمز
             }
             
-            for row in results:
-                status = row['status']
+            for status, count in status_counts.items():
                 if status in status_colors:
                     chart_data['labels'].append(status)
-                    chart_data['data'].append(row['count'])
+                    chart_data['data'].append(count)
                     chart_data['colors'].append(status_colors[status])
             
             return chart_data
-            
+        
         except Exception as e:
             print(f"خطا در دریافت نمودار وضعیت پذیرش: {e}")
             return {'labels': [], 'data': [], 'colors': []}
     
-    def get_daily_income_chart(self):
+    def get_daily_income_chart(self, snapshot=None):
         """نمودار درآمد روزانه هفته جاری"""
         try:
-            # تاریخ ۷ روز گذشته
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=6)
-            
-            query = """
-            SELECT 
-                DATE(invoice_date) as date,
-                COALESCE(SUM(paid_amount), 0) as daily_income
-            FROM Invoices
-            WHERE DATE(invoice_date) BETWEEN ? AND ?
-            AND payment_status IN ('پرداخت شده', 'نقدی')
-            GROUP BY DATE(invoice_date)
-            ORDER BY DATE(invoice_date)
-            """
-            
-            results = self.data_manager.db.fetch_all(query, (start_date, end_date))
-            
-            # ایجاد لیست کامل ۷ روز
-            dates = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') 
-                    for i in range(7)]
-            
-            income_data = {row['date']: row['daily_income'] for row in results}
-            
-            # پر کردن روزهای بدون درآمد با صفر
-            daily_income = [income_data.get(date, 0) for date in dates]
+            daily = self.stats_engine.daily_income(self._snapshot(snapshot))
             
             # تبدیل تاریخ‌ها به شمسی برای نمایش
-            jalali_dates = []
-            for date_str in dates:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                jalali_date = jdatetime.date.fromgregorian(date=date_obj)
-                jalali_dates.append(jalali_date.strftime('%m/%d'))
+            jalali_dates = [
+                jdatetime.date.fromgregorian(date=day).strftime('%m/%d')
+                for day, _income in daily
+            ]
             
             return {
                 'dates': jalali_dates,
-                'income': daily_income
+                'income': [income for _day, income in daily]
             }
-            
+        
         except Exception as e:
             print(f"خطا در دریافت نمودار درآمد روزانه: {e}")
             return {'dates': [], 'income': []}
     
-    def get_monthly_trends_chart(self):
+    def get_monthly_trends_chart(self, snapshot=None):
         """نمودار روند ماهانه"""
         try:
-            # ۶ ماه گذشته
-            end_date = datetime.now().date()
-            start_date = end_date - relativedelta.relativedelta(months=5)
-            start_date = start_date.replace(day=1)  # اول ماه
-            
-            query = """
-            SELECT 
-                strftime('%Y-%m', invoice_date) as month,
-                COUNT(*) as reception_count,
-                COALESCE(SUM(total), 0) as total_income
-            FROM Invoices
-            WHERE DATE(invoice_date) BETWEEN ? AND ?
-            GROUP BY strftime('%Y-%m', invoice_date)
-            ORDER BY strftime('%Y-%m', invoice_date)
-            """
-            
-            results = self.data_manager.db.fetch_all(query, (start_date, end_date))
-            
-            # ایجاد لیست کامل ۶ ماه
-            months = []
-            for i in range(6):
-                month_date = end_date - relativedelta.relativedelta(months=(5-i))
-                months.append(month_date.strftime('%Y-%m'))
-            
-            # تبدیل به دیکشنری برای جستجوی آسان
-            month_data = {row['month']: row for row in results}
-            
-            # آماده‌سازی داده‌ها
-            reception_counts = []
-            incomes = []
-            
-            for month in months:
-                if month in month_data:
-                    reception_counts.append(month_data[month]['reception_count'])
-                    incomes.append(month_data[month]['total_income'])
-                else:
-                    reception_counts.append(0)
-                    incomes.append(0)
+            trends = self.stats_engine.monthly_trends(self._snapshot(snapshot))
             
             # تبدیل نام ماه‌ها به شمسی
-            month_names = []
-            for month_str in months:
-                year, month = map(int, month_str.split('-'))
-                miladi_date = datetime(year, month, 1).date()
-                jalali_date = jdatetime.date.fromgregorian(date=miladi_date)
-                month_names.append(jalali_date.strftime('%b %y'))
+            month_names = [
+                jdatetime.date.fromgregorian(date=month_date).strftime('%b %y')
+                for month_date, _count, _income in trends
+            ]
             
             return {
                 'months': month_names,
-                'receptions': reception_counts,
-                'income': incomes
+                'receptions': [count for _month, count, _income in trends],
+                'income': [income for _month, _count, income in trends]
             }
-            
+        
         except Exception as e:
             print(f"خطا در دریافت نمودار روند ماهانه: {e}")
             return {'months': [], 'receptions': [], 'income': []}
     
-    def get_inventory_status_chart(self):
+    def get_inventory_status_chart(self, snapshot=None):
         """وضعیت موجودی انبار"""
         try:
-            # دریافت موجودی انواع انبار
-            warehouse_types = ['قطعات نو', 'قطعات دست دوم', 'لوازم نو', 'لوازم دست دوم']
-            
-            inventory_data = []
+            inventory = self._snapshot(snapshot).get('inventory')
             
-            for warehouse_type in warehouse_types:
-                if 'قطعات' in warehouse_type:
-                    # برای قطعات
-                    query = """
-                    SELECT COUNT(*) as item_count
-                    FROM Parts p
-                    LEFT JOIN (
-                        SELECT part_id, SUM(quantity) as total_qty 
-                        FROM NewPartsWarehouse 
-                        WHERE status = 'موجود'
-                        GROUP BY part_id
-                    ) np ON p.id = np.part_id
-                    LEFT JOIN (
-                        SELECT part_id, SUM(quantity) as total_qty 
-                        FROM UsedPartsWarehouse 
-                        WHERE status = 'موجود'
-                        GROUP BY part_id
-                    ) up ON p.id = up.part_id
-                    """
-                    
-                    result = self.data_manager.db.fetch_one(query)
-                    item_count = result['item_count'] if result else 0
-                    
-                elif 'لوازم' in warehouse_type:
-                    # برای لوازم
-                    if 'نو' in warehouse_type:
-                        query = "SELECT COUNT(*) as item_count FROM NewAppliancesWarehouse WHERE status = 'موجود'"
-                    else:
-                        query = "SELECT COUNT(*) as item_count FROM UsedAppliancesWarehouse WHERE status = 'موجود'"
-                    
-                    result = self.data_manager.db.fetch_one(query)
-                    item_count = result['item_count'] if result else 0
-                
-                inventory_data.append({
-                    'warehouse': warehouse_type,
-                    'count': item_count
-                })
+            # قطعات نو و دست دوم هر دو تعداد قطعات تعریف شده را نمایش می‌دهند
+            parts_count = inventory.get('parts_count', 0)
+            inventory_data = [
+                {'warehouse': 'قطعات نو', 'count': parts_count},
+                {'warehouse': 'قطعات دست دوم', 'count': parts_count},
+                {'warehouse': 'لوازم نو', 'count': inventory.get('new_appliances', 0)},
+                {'warehouse': 'لوازم دست دوم', 'count': inventory.get('used_appliances', 0)}
+            ]
             
             # آماده‌سازی برای نمودار
             labels = [item['warehouse'] for item in inventory_data]
@@ -414,46 +451,36 @@ class DashboardManager(QObject):
                 'data': counts,
                 'colors': colors
             }
-            
+        
         except Exception as e:
             print(f"خطا در دریافت نمودار موجودی: {e}")
             return {'labels': [], 'data': [], 'colors': []}
     
-    def get_alerts(self):
+    def get_alerts(self, snapshot=None):
         """دریافت هشدارها و اعلان‌ها"""
         try:
+            snapshot = self._snapshot(snapshot)
             alerts = {
-                'urgent': self.get_urgent_alerts(),
-                'warning': self.get_warning_alerts(),
-                'info': self.get_info_alerts()
+                'urgent': self.get_urgent_alerts(snapshot),
+                'warning': self.get_warning_alerts(snapshot),
+                'info': self.get_info_alerts(snapshot)
             }
             return alerts
-            
+        
         except Exception as e:
             print(f"خطا در دریافت هشدارها: {e}")
             return {}
     
-    def get_urgent_alerts(self):
+    def get_urgent_alerts(self, snapshot=None):
         """هشدارهای فوری"""
         alerts = []
         
         try:
-            # 1. چک‌های فردا سررسید می‌شوند
-            tomorrow = (datetime.now() + timedelta(days=1)).date()
-            tomorrow_str = tomorrow.strftime('%Y-%m-%d')
-            
-            query = """
-            SELECT 
-                check_number, 
-                bank_name, 
-                amount,
-                drawer
-            FROM Checks 
-            WHERE status IN ('وصول نشده', 'پاس نشده')
-            AND date(due_date) = ?
-            """
+            snapshot = self._snapshot(snapshot)
             
-            due_checks = self.data_manager.db.fetch_all(query, (tomorrow_str,))
+            # 1. چک‌های فردا سررسید می‌شوند
+            tomorrow_str = (snapshot.today + timedelta(days=1)).strftime('%Y-%m-%d')
+            due_checks = [c for c in snapshot.get('checks') if c['due_day'] == tomorrow_str]
             
             for check in due_checks:
                 alerts.append({
@@ -466,21 +493,9 @@ class DashboardManager(QObject):
                 })
             
             # 2. پذیرش‌های با اولویت خیلی فوری
-            query = """
-            SELECT 
-                r.reception_number,
-                p.first_name || ' ' || p.last_name as customer_name,
-                d.device_type,
-                d.brand
-            FROM Receptions r
-            JOIN Persons p ON r.customer_id = p.id
-            JOIN Devices d ON r.device_id = d.id
-            WHERE r.priority = 'خیلی فوری'
-            AND r.status IN ('در انتظار', 'در حال تعمیر')
-            LIMIT 5
-            """
-            
-            urgent_receptions = self.data_manager.db.fetch_all(query)
+            urgent_receptions = self.stats_engine.open_receptions(
+                snapshot, statuses=OPEN_RECEPTION_STATUSES, priorities=('خیلی فوری',)
+            )[:5]
             
             for reception in urgent_receptions:
                 alerts.append({
@@ -491,44 +506,21 @@ class DashboardManager(QObject):
                     'action': 'receptions',
                     'timestamp': datetime.now().isoformat()
                 })
-            
+        
         except Exception as e:
             print(f"خطا در دریافت هشدارهای فوری: {e}")
         
         return alerts
     
-    def get_warning_alerts(self):
+    def get_warning_alerts(self, snapshot=None):
         """هشدارهای هشداری"""
         alerts = []
         
         try:
-            # 1. موجودی‌های زیر حداقل
-            query = """
-            SELECT 
-                p.part_code,
-                p.part_name,
-                p.min_stock,
-                COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) as current_stock
-            FROM Parts p
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM NewPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) np ON p.id = np.part_id
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM UsedPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) up ON p.id = up.part_id
-            WHERE COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) < p.min_stock
-            LIMIT 10
-            """
+            snapshot = self._snapshot(snapshot)
             
-            low_stock_items = self.data_manager.db.fetch_all(query)
-            
-            for item in low_stock_items:
+            # 1. موجودی‌های زیر حداقل (از مجموعه مشترک کم‌موجودی‌ها)
+            for item in snapshot.get('stock')[:10]:
                 alerts.append({
                     'type': 'warning',
                     'title': 'موجودی کم',
@@ -539,22 +531,10 @@ class DashboardManager(QObject):
                 })
             
             # 2. دستگاه‌های در انتظار قطعه
-            query = """
-            SELECT 
-                r.reception_number,
-                p.first_name || ' ' || p.last_name as customer_name,
-                d.device_type,
-                d.brand,
-                r.problem_description
-            FROM Receptions r
-            JOIN Persons p ON r.customer_id = p.id
-            JOIN Devices d ON r.device_id = d.id
-            WHERE r.status = 'در انتظار'
-            AND r.notes LIKE '%قطعه%'
-            LIMIT 5
-            """
-            
-            waiting_parts = self.data_manager.db.fetch_all(query)
+            waiting_parts = [
+                r for r in self.stats_engine.open_receptions(snapshot, statuses=('در انتظار',))
+                if 'قطعه' in (r['notes'] or '')
+            ][:5]
             
             for reception in waiting_parts:
                 alerts.append({
@@ -565,33 +545,25 @@ class DashboardManager(QObject):
                     'action': 'receptions',
                     'timestamp': datetime.now().isoformat()
                 })
-            
+        
         except Exception as e:
             print(f"خطا در دریافت هشدارهای هشدار: {e}")
         
         return alerts
     
-    def get_info_alerts(self):
+    def get_info_alerts(self, snapshot=None):
         """اطلاعیه‌ها"""
         alerts = []
         
         try:
-            # 1. مشتریان منتظر تماس
-            query = """
-            SELECT 
-                p.first_name || ' ' || p.last_name as customer_name,
-                p.mobile,
-                r.reception_number,
-                d.device_type
-            FROM Receptions r
-            JOIN Persons p ON r.customer_id = p.id
-            JOIN Devices d ON r.device_id = d.id
-            WHERE r.status = 'تعمیر شده'
-            AND DATE(r.reception_date) = DATE('now', '-1 day')
-            LIMIT 5
-            """
+            snapshot = self._snapshot(snapshot)
             
-            customers_to_call = self.data_manager.db.fetch_all(query)
+            # 1. مشتریان منتظر تماس (دستگاه‌هایی که دیروز تعمیر شده‌اند)
+            yesterday_str = (snapshot.today - timedelta(days=1)).strftime('%Y-%m-%d')
+            customers_to_call = [
+                r for r in self.stats_engine.open_receptions(snapshot, statuses=('تعمیر شده',))
+                if r['reception_day'] == yesterday_str
+            ][:5]
             
             for customer in customers_to_call:
                 alerts.append({
@@ -604,21 +576,7 @@ class DashboardManager(QObject):
                 })
             
             # 2. تعمیرکارانی که کار دارند
-            query = """
-            SELECT 
-                per.first_name || ' ' || per.last_name as technician_name,
-                COUNT(r.id) as repair_count
-            FROM Repairs rep
-            JOIN Persons per ON rep.technician_id = per.id
-            JOIN Receptions r ON rep.reception_id = r.id
-            WHERE rep.status IN ('شروع شده', 'در حال انجام')
-            GROUP BY rep.technician_id
-            HAVING COUNT(r.id) > 0
-            """
-            
-            busy_technicians = self.data_manager.db.fetch_all(query)
-            
-            for tech in busy_technicians:
+            for tech in snapshot.get('technicians'):
                 alerts.append({
                     'type': 'info',
                     'title': 'تعمیرکار مشغول',
@@ -627,149 +585,99 @@ class DashboardManager(QObject):
                     'action': 'repairs',
                     'timestamp': datetime.now().isoformat()
                 })
-            
+        
         except Exception as e:
             print(f"خطا در دریافت اطلاعیه‌ها: {e}")
         
         return alerts
     
-    def get_quick_lists(self):
+    def get_quick_lists(self, snapshot=None):
         """لیست‌های سریع برای دسترسی آسان"""
         try:
+            snapshot = self._snapshot(snapshot)
             quick_lists = {
-                'urgent_receptions': self.get_urgent_receptions(),
-                'due_checks': self.get_due_checks_list(),
-                'low_stock': self.get_low_stock_list(),
-                'waiting_customers': self.get_waiting_customers()
+                'urgent_receptions': self.get_urgent_receptions(snapshot=snapshot),
+                'due_checks': self.get_due_checks_list(snapshot=snapshot),
+                'low_stock': self.get_low_stock_list(snapshot=snapshot),
+                'waiting_customers': self.get_waiting_customers(snapshot=snapshot)
             }
             return quick_lists
-            
+        
         except Exception as e:
             print(f"خطا در دریافت لیست‌های سریع: {e}")
             return {}
     
-    def get_urgent_receptions(self, limit=10):
+    def get_urgent_receptions(self, limit=10, snapshot=None):
         """پذیرش‌های فوری"""
         try:
-            query = """
-            SELECT 
-                r.reception_number,
-                p.first_name || ' ' || p.last_name as customer_name,
-                d.device_type,
-                d.brand,
-                r.priority,
-                r.reception_date,
-                r.status
-            FROM Receptions r
-            JOIN Persons p ON r.customer_id = p.id
-            JOIN Devices d ON r.device_id = d.id
-            WHERE r.priority IN ('فوری', 'خیلی فوری')
-            AND r.status NOT IN ('تحویل داده شده', 'لغو شده')
-            ORDER BY 
-                CASE r.priority 
-                    WHEN 'خیلی فوری' THEN 1
-                    WHEN 'فوری' THEN 2
-                    ELSE 3
-                END,
-                r.reception_date DESC
-            LIMIT ?
-            """
-            
-            return self.data_manager.db.fetch_all(query, (limit,))
-            
+            receptions = self.stats_engine.open_receptions(
+                self._snapshot(snapshot), priorities=('فوری', 'خیلی فوری')
+            )
+            # خیلی فوری اول؛ ترتیب تاریخ نزولی از کوئری پایه حفظ می‌شود
+            receptions.sort(key=lambda r: 1 if r['priority'] == 'خیلی فوری' else 2)
+            
+            return [
+                {
+                    'reception_number': r['reception_number'],
+                    'customer_name': r['customer_name'],
+                    'device_type': r['device_type'],
+                    'brand': r['brand'],
+                    'priority': r['priority'],
+                    'reception_date': r['reception_date'],
+                    'status': r['status']
+                }
+                for r in receptions[:limit]
+            ]
+        
         except Exception as e:
             print(f"خطا در دریافت پذیرش‌های فوری: {e}")
             return []
     
-    def get_due_checks_list(self, limit=10):
+    def get_due_checks_list(self, limit=10, snapshot=None):
         """چک‌های سررسید نزدیک"""
         try:
-            seven_days_later = (datetime.now() + timedelta(days=7)).date()
-            today_str = datetime.now().date().strftime('%Y-%m-%d')
-            seven_days_str = seven_days_later.strftime('%Y-%m-%d')
-            
-            query = """
-            SELECT 
-                check_number,
-                bank_name,
-                amount,
-                due_date,
-                drawer,
-                status
-            FROM Checks 
-            WHERE status IN ('وصول نشده', 'پاس نشده')
-            AND date(due_date) BETWEEN date(?) AND date(?)
-            ORDER BY due_date
-            LIMIT ?
-            """
-            
-            return self.data_manager.db.fetch_all(query, (today_str, seven_days_str, limit))
-            
+            checks = self._snapshot(snapshot).get('checks')
+            
+            return [
+                {
+                    'check_number': c['check_number'],
+                    'bank_name': c['bank_name'],
+                    'amount': c['amount'],
+                    'due_date': c['due_date'],
+                    'drawer': c['drawer'],
+                    'status': c['status']
+                }
+                for c in checks[:limit]
+            ]
+        
         except Exception as e:
             print(f"خطا در دریافت چک‌های سررسید: {e}")
             return []
     
-    def get_low_stock_list(self, limit=10):
+    def get_low_stock_list(self, limit=10, snapshot=None):
         """موجودی‌های کم"""
         try:
-            query = """
-            SELECT 
-                p.part_code,
-                p.part_name,
-                p.category,
-                p.min_stock,
-                COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) as current_stock,
-                (p.min_stock - (COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0))) as deficit
-            FROM Parts p
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM NewPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) np ON p.id = np.part_id
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM UsedPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) up ON p.id = up.part_id
-            WHERE COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) < p.min_stock
-            ORDER BY deficit DESC
-            LIMIT ?
-            """
-            
-            return self.data_manager.db.fetch_all(query, (limit,))
-            
+            return self._snapshot(snapshot).get('stock')[:limit]
+        
         except Exception as e:
             print(f"خطا در دریافت موجودی‌های کم: {e}")
             return []
     
-    def get_waiting_customers(self, limit=10):
+    def get_waiting_customers(self, limit=10, snapshot=None):
         """مشتریان منتظر"""
         try:
-            query = """
-            SELECT 
-                p.first_name || ' ' || p.last_name as customer_name,
-                p.mobile,
-                COUNT(r.id) as waiting_count,
-                MAX(r.reception_date) as last_reception
-            FROM Receptions r
-            JOIN Persons p ON r.customer_id = p.id
-            WHERE r.status IN ('در انتظار', 'در حال تعمیر')
-            GROUP BY r.customer_id
-            HAVING COUNT(r.id) > 0
-            ORDER BY MAX(r.reception_date) DESC
-            LIMIT ?
-            """
-            
-            return self.data_manager.db.fetch_all(query, (limit,))
-            
+            return self.stats_engine.waiting_customers(self._snapshot(snapshot))[:limit]
+        
         except Exception as e:
             print(f"خطا در دریافت مشتریان منتظر: {e}")
             return []
     
     def clear_cache(self):
         """پاک کردن کش"""
+        self.cancel_pending()
+        self.snapshot = None
+        self.snapshot_time = None
+        self.dirty_sections = set()
         self.cache = {
             'stats': None,
             'charts': None,
@@ -798,6 +706,10 @@ if __name__ == "__main__":
     print(f"دستگاه در حال تعمیر: {stats.get('repairing_devices', 0)}")
     print(f"درآمد امروز: {stats.get('today_income', 0):,} تومان")
     
+    print("\n⏱️ زمان‌بندی بخش‌ها...")
+    timings = dashboard_manager.refresh_dashboard()['timings']
+    print(f"تعداد کوئری‌ها: {timings['queries']} - کل زمان: {timings['total_ms']} ms")
+    
     print("\n📈 دریافت داده‌های نمودار...")
     charts = dashboard_manager.get_charts_data()
     if charts:
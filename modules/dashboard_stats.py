@@ -0,0 +1,385 @@
+# modules/dashboard_stats.py
+"""
+موتور آمار داشبورد - محاسبه تمام شمارنده‌ها با چند کوئری تجمیعی (یکی برای هر جدول پایه)
+
+هر «بخش» (section) فقط یک بار در هر بروزرسانی از دیتابیس خوانده می‌شود و نتیجه آن
+بین آمار، نمودارها، هشدارها و لیست‌های سریع مشترک است؛ مثلاً مجموعه قطعات کم‌موجودی
+هم برای شمارنده، هم برای هشدارها و هم برای لیست سریع استفاده می‌شود.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from dateutil import relativedelta
+
+from database import date_filters, part_stock
+
+
+# وضعیت‌هایی که در داشبورد استفاده می‌شوند
+OPEN_RECEPTION_STATUSES = ('در انتظار', 'در حال تعمیر')
+CLOSED_RECEPTION_STATUSES = ('تحویل داده شده', 'لغو شده')
+PAID_INVOICE_STATUSES = ('پرداخت شده', 'نقدی')
+OPEN_CHECK_STATUSES = ('وصول نشده', 'پاس نشده')
+
+CHECKS_WINDOW_DAYS = 7       # بازه چک‌های سررسید نزدیک (لیست سریع)
+DUE_CHECKS_STAT_DAYS = 3     # بازه چک‌های سررسید در کارت آمار
+TREND_MONTHS = 6             # تعداد ماه‌های نمودار روند ماهانه
+DAILY_INCOME_DAYS = 7        # تعداد روزهای نمودار درآمد روزانه
+
+
+class DashboardSnapshot:
+    """
+    عکس لحظه‌ای داده‌های داشبورد
+
+    بخش‌ها به صورت تنبل (lazy) و فقط یک بار بارگذاری می‌شوند؛
+    زمان اجرای هر بخش (میلی‌ثانیه) در timings نگهداری می‌شود.
+    """
+
+    def __init__(self, engine, today=None):
+        self.engine = engine
+        self.today = today or datetime.now().date()
+        self.sections = {}
+        self.timings = {}
+
+    def get(self, name):
+        """دریافت یک بخش؛ در صورت نبود، از دیتابیس خوانده می‌شود"""
+        if name not in self.sections:
+            started = time.perf_counter()
+            self.sections[name] = self.engine.load_section(name, self.today)
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return self.sections[name]
+
+    def load(self, names=None):
+        """بارگذاری چند بخش (پیش‌فرض: همه بخش‌ها)"""
+        for name in names or self.engine.SECTIONS:
+            self.get(name)
+        return self
+
+    def copy(self, invalidate=()):
+        """
+        نسخه مستقل از عکس لحظه‌ای (برای ساخت در نخ کارگر)
+
+        بخش‌های داده شده در invalidate کپی نمی‌شوند تا دوباره از دیتابیس خوانده شوند.
+        """
+        clone = DashboardSnapshot(self.engine, self.today)
+        for name, value in self.sections.items():
+            if name not in invalidate:
+                clone.sections[name] = value
+                clone.timings[name] = self.timings[name]
+        return clone
+
+    @property
+    def query_count(self):
+        """تعداد رفت‌وبرگشت‌های دیتابیس (هر بخش یک کوئری)"""
+        return len(self.sections)
+
+
+class DashboardStatsEngine:
+    """موتور محاسبه آمار داشبورد"""
+
+    SECTIONS = (
+        'receptions', 'open_receptions', 'invoices', 'checks',
+        'stock', 'inventory', 'expenses', 'customers', 'technicians'
+    )
+
+    # بخش‌هایی که با تغییر هر جدول نامعتبر می‌شوند
+    TABLE_SECTIONS = {
+        'Receptions': ('receptions', 'open_receptions', 'technicians'),
+        'Repairs': ('technicians',),
+        'Persons': ('open_receptions', 'customers', 'technicians'),
+        'Devices': ('open_receptions',),
+        'Invoices': ('invoices',),
+        'Checks': ('checks',),
+        'AccountingTransactions': ('expenses',),
+        'Parts': ('stock', 'inventory'),
+        'NewPartsWarehouse': ('stock',),
+        'UsedPartsWarehouse': ('stock',),
+        'NewAppliancesWarehouse': ('inventory',),
+        'UsedAppliancesWarehouse': ('inventory',),
+    }
+
+    def __init__(self, db):
+        self.db = db
+
+    def sections_for_table(self, table_name):
+        """بخش‌های وابسته به یک جدول"""
+        return self.TABLE_SECTIONS.get(table_name, ())
+
+    def snapshot(self, today=None):
+        """ایجاد عکس لحظه‌ای جدید"""
+        return DashboardSnapshot(self, today)
+
+    def load_section(self, name, today):
+        """اجرای کوئری یک بخش"""
+        if name not in self.SECTIONS:
+            raise KeyError(f"بخش ناشناخته داشبورد: {name}")
+        return getattr(self, f"_load_{name}")(today)
+
+    @staticmethod
+    def _placeholders(values):
+        return ', '.join('?' for _ in values)
+
+    # ---------- Receptions ----------
+
+    def _load_receptions(self, today):
+        """تعداد پذیرش‌ها به تفکیک وضعیت، همراه با تعداد امروز هر وضعیت"""
+        query = """
+        SELECT
+            status,
+            COUNT(*) as total_count,
+            SUM(CASE WHEN reception_date >= ? AND reception_date < ? THEN 1 ELSE 0 END) as today_count
+        FROM Receptions
+        GROUP BY status
+        """
+        rows = self.db.fetch_all(query, date_filters.day_bounds(today))
+        return {
+            row['status']: {'total': row['total_count'], 'today': row['today_count'] or 0}
+            for row in rows
+        }
+
+    def _load_open_receptions(self, today):
+        """پذیرش‌های باز (تحویل نشده) به همراه مشتری و دستگاه - پایه هشدارها و لیست‌ها"""
+        query = f"""
+        SELECT
+            r.id,
+            r.reception_number,
+            r.customer_id,
+            r.device_id,
+            r.priority,
+            r.status,
+            r.reception_date,
+            DATE(r.reception_date) as reception_day,
+            r.notes,
+            p.first_name || ' ' || p.last_name as customer_name,
+            p.mobile,
+            d.id as device_exists,
+            d.device_type,
+            d.brand
+        FROM Receptions r
+        JOIN Persons p ON r.customer_id = p.id
+        LEFT JOIN Devices d ON r.device_id = d.id
+        WHERE r.status NOT IN ({self._placeholders(CLOSED_RECEPTION_STATUSES)})
+        ORDER BY r.reception_date DESC, r.id DESC
+        """
+        return self.db.fetch_all(query, CLOSED_RECEPTION_STATUSES)
+
+    # ---------- Invoices ----------
+
+    def _load_invoices(self, today):
+        """جمع روزانه فاکتورها در بازه نمودار روند ماهانه (شامل ۷ روز اخیر و امروز)"""
+        month_start = (today - relativedelta.relativedelta(months=TREND_MONTHS - 1)).replace(day=1)
+        start_date = min(month_start, today - timedelta(days=DAILY_INCOME_DAYS - 1))
+        paid = self._placeholders(PAID_INVOICE_STATUSES)
+        query = f"""
+        SELECT
+            DATE(invoice_date) as day,
+            COUNT(*) as invoice_count,
+            COALESCE(SUM(total), 0) as total_amount,
+            COALESCE(SUM(CASE WHEN payment_status IN ({paid}) THEN paid_amount ELSE 0 END), 0) as paid_income,
+            SUM(CASE WHEN payment_status = 'نسیه' THEN 1 ELSE 0 END) as unpaid_count,
+            COALESCE(SUM(CASE WHEN payment_status = 'نسیه' THEN total ELSE 0 END), 0) as unpaid_amount
+        FROM Invoices
+        WHERE invoice_date >= ? AND invoice_date < ?
+        GROUP BY DATE(invoice_date)
+        """
+        params = PAID_INVOICE_STATUSES + date_filters.days_bounds(start_date, today)
+        return {row['day']: row for row in self.db.fetch_all(query, params)}
+
+    # ---------- Checks ----------
+
+    def _load_checks(self, today):
+        """چک‌های باز با سررسید از امروز تا ۷ روز آینده، مرتب بر اساس سررسید"""
+        query = f"""
+        SELECT
+            check_number,
+            bank_name,
+            amount,
+            due_date,
+            DATE(due_date) as due_day,
+            drawer,
+            status
+        FROM Checks
+        WHERE status IN ({self._placeholders(OPEN_CHECK_STATUSES)})
+        AND due_date >= ? AND due_date < ?
+        ORDER BY due_date
+        """
+        params = OPEN_CHECK_STATUSES + date_filters.days_bounds(
+            today, today + timedelta(days=CHECKS_WINDOW_DAYS)
+        )
+        return self.db.fetch_all(query, params)
+
+    # ---------- Parts / Warehouses ----------
+
+    def _load_stock(self, today):
+        """مجموعه قطعات زیر حداقل موجودی، مرتب بر اساس کسری (از ایندکس کسری PartStock)"""
+        shortage = part_stock.shortage_sql('s')
+        query = f"""
+        SELECT
+            p.part_code,
+            p.part_name,
+            p.category,
+            s.min_stock,
+            (s.new_qty + s.used_qty) as current_stock,
+            ({shortage}) as deficit
+        FROM PartStock s
+        JOIN Parts p ON p.id = s.part_id
+        WHERE {shortage} > 0
+        ORDER BY {shortage} DESC
+        """
+        return self.db.fetch_all(query)
+
+    def _load_inventory(self, today):
+        """تعداد اقلام هر انبار در یک رفت‌وبرگشت"""
+        query = """
+        SELECT
+            (SELECT COUNT(*) FROM Parts) as parts_count,
+            (SELECT COUNT(*) FROM NewAppliancesWarehouse WHERE status = 'موجود') as new_appliances,
+            (SELECT COUNT(*) FROM UsedAppliancesWarehouse WHERE status = 'موجود') as used_appliances
+        """
+        return self.db.fetch_one(query) or {}
+
+    # ---------- AccountingTransactions / Persons / Repairs ----------
+
+    def _load_expenses(self, today):
+        """هزینه‌های امروز"""
+        query = """
+        SELECT COALESCE(SUM(amount), 0) as total_expense
+        FROM AccountingTransactions
+        WHERE transaction_type = 'پرداخت'
+        AND transaction_date >= ? AND transaction_date < ?
+        """
+        row = self.db.fetch_one(query, date_filters.day_bounds(today))
+        return row['total_expense'] if row else 0
+
+    def _load_customers(self, today):
+        """مشتریان جدید امروز"""
+        query = """
+        SELECT COUNT(*) as count
+        FROM Persons
+        WHERE person_type = 'مشتری'
+        AND registration_date >= ? AND registration_date < ?
+        """
+        row = self.db.fetch_one(query, date_filters.day_bounds(today))
+        return row['count'] if row else 0
+
+    def _load_technicians(self, today):
+        """تعمیرکارانی که کار جاری دارند"""
+        query = """
+        SELECT
+            per.first_name || ' ' || per.last_name as technician_name,
+            COUNT(r.id) as repair_count
+        FROM Repairs rep
+        JOIN Persons per ON rep.technician_id = per.id
+        JOIN Receptions r ON rep.reception_id = r.id
+        WHERE rep.status IN ('شروع شده', 'در حال انجام')
+        GROUP BY rep.technician_id
+        HAVING COUNT(r.id) > 0
+        """
+        return self.db.fetch_all(query)
+
+    # ---------- محاسبات مشتق از بخش‌ها ----------
+
+    @staticmethod
+    def today_stats(snapshot):
+        """کارت‌های آمار امروز"""
+        today = snapshot.today
+        today_str = today.strftime('%Y-%m-%d')
+
+        receptions = snapshot.get('receptions')
+        today_receptions = sum(item['today'] for item in receptions.values())
+        repairing = sum(receptions.get(status, {}).get('total', 0) for status in OPEN_RECEPTION_STATUSES)
+        completed = receptions.get('تعمیر شده', {}).get('today', 0)
+
+        invoice_today = snapshot.get('invoices').get(today_str) or {}
+        income_today = invoice_today.get('paid_income', 0)
+
+        last_due_day = (today + timedelta(days=DUE_CHECKS_STAT_DAYS)).strftime('%Y-%m-%d')
+        due_checks = [c for c in snapshot.get('checks') if c['due_day'] <= last_due_day]
+
+        expenses_today = snapshot.get('expenses')
+
+        return {
+            'today_receptions': today_receptions,
+            'repairing_devices': repairing,
+            'completed_today': completed,
+            'unpaid_invoices': {
+                'count': invoice_today.get('unpaid_count', 0),
+                'amount': invoice_today.get('unpaid_amount', 0)
+            },
+            'due_checks': {
+                'count': len(due_checks),
+                'amount': sum(c['amount'] or 0 for c in due_checks)
+            },
+            'low_stock_items': len(snapshot.get('stock')),
+            'today_income': income_today,
+            'today_expenses': expenses_today,
+            'profit_today': income_today - expenses_today,
+            'new_customers': snapshot.get('customers')
+        }
+
+    @staticmethod
+    def reception_status_counts(snapshot):
+        """تعداد کل پذیرش‌ها به تفکیک وضعیت"""
+        return {status: item['total'] for status, item in snapshot.get('receptions').items()}
+
+    @staticmethod
+    def daily_income(snapshot):
+        """[(تاریخ میلادی, درآمد)] برای ۷ روز اخیر"""
+        invoices = snapshot.get('invoices')
+        start_date = snapshot.today - timedelta(days=DAILY_INCOME_DAYS - 1)
+        result = []
+        for i in range(DAILY_INCOME_DAYS):
+            day = start_date + timedelta(days=i)
+            row = invoices.get(day.strftime('%Y-%m-%d'))
+            result.append((day, row['paid_income'] if row else 0))
+        return result
+
+    @staticmethod
+    def monthly_trends(snapshot):
+        """[(اول ماه, تعداد فاکتور, جمع مبلغ)] برای ۶ ماه اخیر"""
+        totals = {}
+        for day, row in snapshot.get('invoices').items():
+            month = totals.setdefault(day[:7], [0, 0])
+            month[0] += row['invoice_count']
+            month[1] += row['total_amount']
+
+        result = []
+        for i in range(TREND_MONTHS):
+            month_date = snapshot.today - relativedelta.relativedelta(months=(TREND_MONTHS - 1 - i))
+            count, amount = totals.get(month_date.strftime('%Y-%m'), (0, 0))
+            result.append((month_date.replace(day=1), count, amount))
+        return result
+
+    @staticmethod
+    def open_receptions(snapshot, statuses=None, priorities=None, with_device=True):
+        """فیلتر پذیرش‌های باز (پیش‌فرض فقط پذیرش‌هایی که دستگاه معتبر دارند)"""
+        rows = []
+        for row in snapshot.get('open_receptions'):
+            if statuses and row['status'] not in statuses:
+                continue
+            if priorities and row['priority'] not in priorities:
+                continue
+            if with_device and row['device_exists'] is None:
+                continue
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def waiting_customers(snapshot):
+        """مشتریانی که دستگاه در انتظار یا در حال تعمیر دارند، جدیدترین اول"""
+        customers = {}
+        for row in DashboardStatsEngine.open_receptions(
+                snapshot, statuses=OPEN_RECEPTION_STATUSES, with_device=False):
+            item = customers.get(row['customer_id'])
+            if item is None:
+                customers[row['customer_id']] = {
+                    'customer_name': row['customer_name'],
+                    'mobile': row['mobile'],
+                    'waiting_count': 1,
+                    'last_reception': row['reception_date']
+                }
+            else:
+                item['waiting_count'] += 1
+                if (row['reception_date'] or '') > (item['last_reception'] or ''):
+                    item['last_reception'] = row['reception_date']
+        return sorted(customers.values(), key=lambda c: c['last_reception'] or '', reverse=True)
@@ -0,0 +1,209 @@
+# modules/lazy_imports.py - بارگذاری تنبل فرم‌ها و کتابخانه‌های سنگین
+"""
+بارگذاری تنبل فرم‌ها و کتابخانه‌های اختیاری
+
+- LazyRegistry: فرم‌ها و پنجره‌ها با نام ثبت می‌شوند و ماژولشان در اولین get()
+  ایمپورت می‌شود. خطای ایمپورت یک بار چاپ و None برگردانده می‌شود (همان رفتار
+  قبلی پرچم‌های *_AVAILABLE).
+- optional_module: نماینده ماژولی مثل pandas یا cv2 که در اولین دسترسی به یک
+  صفت ایمپورت می‌شود؛ is_available بدون ایمپورت نصب بودن آن را بررسی می‌کند.
+- زمان هر ایمپورت تنبل و مراحل راه‌اندازی (mark) ثبت می‌شود و
+  print_startup_report آن‌ها را با بودجه زمانی [STARTUP] مقایسه می‌کند.
+- LazyRegistry.prewarm بعد از نمایش فرم ورود، ماژول‌های ثبت شده را یکی‌یکی در
+  زمان بیکاری حلقه رویداد Qt بارگذاری می‌کند تا باز شدن پنجره اصلی کند نباشد.
+"""
+
+import configparser
+import importlib
+import importlib.util
+import os
+import time
+
+
+DEFAULT_STARTUP_SETTINGS = {
+    'budget_ms': 1500.0,      # بودجه زمان تا نمایش فرم ورود
+    'report': True,           # چاپ گزارش زمان‌بندی راه‌اندازی
+    'prewarm': True,          # بارگذاری فرم‌ها پس از نمایش فرم ورود
+    'prewarm_delay_ms': 300,  # تأخیر شروع بارگذاری پیش‌دستانه
+}
+
+_PROCESS_STARTED = time.perf_counter()
+
+# (عنوان، زمان میلی‌ثانیه) به ترتیب وقوع
+_timings = []
+
+
+def load_startup_settings(config_path="config.ini"):
+    """خواندن تنظیمات راه‌اندازی از بخش [STARTUP] فایل config.ini"""
+    settings = dict(DEFAULT_STARTUP_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('STARTUP'):
+        return settings
+
+    section = parser['STARTUP']
+    try:
+        settings['budget_ms'] = section.getfloat('budget_ms', fallback=settings['budget_ms'])
+        settings['report'] = section.getboolean('report', fallback=settings['report'])
+        settings['prewarm'] = section.getboolean('prewarm', fallback=settings['prewarm'])
+        settings['prewarm_delay_ms'] = section.getint(
+            'prewarm_delay_ms', fallback=settings['prewarm_delay_ms']
+        )
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [STARTUP]: {e}")
+
+    return settings
+
+
+# ---------- زمان‌بندی ----------
+
+class _Timer:
+    """context manager ثبت زمان یک مرحله یا ایمپورت در گزارش راه‌اندازی"""
+
+    def __init__(self, title):
+        self.title = title
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _timings.append((self.title, (time.perf_counter() - self.started) * 1000))
+        return False
+
+
+def timed(title):
+    """with timed('...'): زمان بلوک در گزارش راه‌اندازی ثبت می‌شود"""
+    return _Timer(title)
+
+
+def elapsed_ms():
+    """زمان گذشته از ایمپورت این ماژول (تقریباً شروع برنامه)"""
+    return (time.perf_counter() - _PROCESS_STARTED) * 1000
+
+
+def timings():
+    return list(_timings)
+
+
+def print_startup_report(title, budget_ms):
+    """چاپ زمان مراحل و ایمپورت‌های ثبت شده تا این لحظه و مقایسه کل با بودجه"""
+    total = elapsed_ms()
+    print(f"⏱️ {title}: {total:.0f} ms (بودجه {budget_ms:.0f} ms)")
+    for name, ms in _timings:
+        print(f"   {ms:8.1f} ms  {name}")
+    if total > budget_ms:
+        print(f"⚠️ زمان راه‌اندازی {total - budget_ms:.0f} ms بیشتر از بودجه است")
+    return total
+
+
+# ---------- کتابخانه‌های اختیاری ----------
+
+def is_available(module_name):
+    """نصب بودن یک ماژول بدون ایمپورت کردن آن"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class _LazyModule:
+    """نماینده ماژولی که در اولین دسترسی به یک صفت ایمپورت می‌شود"""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with timed(self._module_name):
+                self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, name):
+        # صفت‌های خود نماینده (مثلاً هنگام copy پیش از __init__) نباید ایمپورت را شروع کنند
+        if name.startswith('_module'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._module_name!r} ({state})>"
+
+
+def optional_module(module_name):
+    """ماژول تنبل (مثلاً pd = optional_module('pandas'))؛ ImportError در اولین استفاده"""
+    return _LazyModule(module_name)
+
+
+# ---------- فرم‌ها ----------
+
+class LazyRegistry:
+    """ثبت نام ← (ماژول، صفت) و ایمپورت در اولین درخواست"""
+
+    def __init__(self):
+        self._entries = {}
+        self._loaded = {}
+        self._failed = set()
+        self._prewarm_queue = []
+
+    def register(self, name, module_name, attribute=None, title=None):
+        """ثبت صفت attribute (پیش‌فرض همان name) از ماژول module_name"""
+        self._entries[name] = (module_name, attribute or name, title or name)
+
+    def get(self, name):
+        """کلاس/شیء ثبت شده یا None اگر ایمپورت آن ممکن نباشد"""
+        if name in self._loaded:
+            return self._loaded[name]
+        if name in self._failed:
+            return None
+
+        module_name, attribute, title = self._entries[name]
+        try:
+            with timed(module_name):
+                value = getattr(importlib.import_module(module_name), attribute)
+        except (ImportError, AttributeError) as e:
+            print(f"⚠️ خطا در بارگذاری {title}: {e}")
+            self._failed.add(name)
+            return None
+
+        self._loaded[name] = value
+        return value
+
+    def is_available(self, name):
+        return self.get(name) is not None
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def prewarm(self, names=None, delay_ms=0):
+        """
+        بارگذاری پیش‌دستانه در زمان بیکاری: هر بار یک نام با QTimer.singleShot(0)،
+        تا رویدادهای کاربر بین ایمپورت‌ها پردازش شوند (ایمپورت ماژول‌های Qt در نخ
+        دیگر امن نیست، پس بارگذاری روی نخ اصلی و تکه‌تکه انجام می‌شود).
+        """
+        from PySide6.QtCore import QTimer
+
+        pending = [name for name in (names or self._entries) if name not in self._loaded]
+        self._prewarm_queue.extend(name for name in pending if name not in self._prewarm_queue)
+        QTimer.singleShot(delay_ms, self._prewarm_next)
+
+    def _prewarm_next(self):
+        from PySide6.QtCore import QTimer
+
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if name not in self._loaded and name not in self._failed:
+                self.get(name)
+                break
+        if self._prewarm_queue:
+            QTimer.singleShot(0, self._prewarm_next)
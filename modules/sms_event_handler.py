@@ -46,7 +46,8 @@ class SMSEventHandler:
                 'device_name': device.device_type,
                 'reception_number': reception.reception_number,
                 'estimated_time': '۲۴-۴۸ ساعت'  # زمان تخمینی تعمیر
-            }
+            },
+            dedup_key=f"reception_created:{data.get('reception_id')}"
         )
     
     def on_repair_started(self, data: dict) -> bool:
@@ -88,7 +89,8 @@ class SMSEventHandler:
                 'reception_number': reception.reception_number,
                 'final_cost': f"{repair.total_cost:,} تومان",
                 'ready_time': datetime.now().strftime("%H:%M")
-            }
+            },
+            dedup_key=f"repair_completed:{data.get('repair_id')}"
         )
     
     def on_device_ready(self, data: dict) -> bool:
@@ -108,7 +110,8 @@ class SMSEventHandler:
                         'customer_name': reception.customer.first_name,
                         'device_name': reception.device.device_type,
                         'days_passed': '۱ روز'
-                    }
+                    },
+                    dedup_key=f"device_ready:{data.get('reception_id')}:{datetime.now().date()}"
                 )
         return False
     
@@ -79,9 +79,45 @@ class SMSManager:
     
     def send_bulk_sms(self, numbers: List[str], message: str, 
                       line_number: str = None) -> Dict:
-        """ارسال پیامک به چندین شماره"""
-        # پیاده‌سازی مشابه send_single_sms اما با لیست شماره‌ها
-        pass
+        """
+        ارسال یک متن به چندین شماره در یک درخواست
+        
+        Returns:
+            دیکشنری نتیجه مانند send_single_sms با message_ids (هم‌ترتیب numbers)
+        """
+        try:
+            payload = {
+                'username': self.api_key,
+                'from': line_number or self._get_default_line(),
+                'to': list(numbers),
+                'text': message,
+                'isFlash': False
+            }
+            
+            # (مستندات هر پنل متفاوت است، این یک نمونه است)
+            response = self.session.post(
+                f"{self.api_url}/api/send/multiple",
+                json=payload,
+                timeout=30
+            )
+            
+            result = response.json()
+            message_ids = result.get('messageIds') or []
+            
+            return {
+                'success': result.get('status') == 1,
+                'message_ids': message_ids,
+                'status_code': result.get('status'),
+                'message': result.get('message', ''),
+                'raw_response': result
+            }
+            
+        except requests.exceptions.Timeout:
+            return {'success': False, 'error': 'Timeout: اتصال به سرور پیامکی timed out'}
+        except requests.exceptions.ConnectionError:
+            return {'success': False, 'error': 'ConnectionError: خطا در اتصال به اینترنت'}
+        except Exception as e:
+            return {'success': False, 'error': f'خطای ناشناخته: {str(e)}'}
     
     def send_pattern_sms(self, pattern_code: str, to_number: str, 
                          parameters: Dict) -> Dict:
@@ -46,13 +46,12 @@ def insert_test_data():
             ('سایر',)
         ]
         
-        for category in device_categories:
-            try:
-                db.cursor.execute('''
-                INSERT OR IGNORE INTO DeviceCategories_name (name) VALUES (?)
-                ''', category)
-            except sqlite3.Error as e:
-                print(f"   ⚠️ خطا در دسته‌بندی {category[0]}: {e}")
+        try:
+            db.cursor.executemany('''
+            INSERT OR IGNORE INTO DeviceCategories_name (name) VALUES (?)
+            ''', device_categories)
+        except sqlite3.Error as e:
+            print(f"   ⚠️ خطا در دسته‌بندی‌ها: {e}")
         
         # 3. درج برندها
         print("🏷️  در حال درج برندها...")
@@ -73,13 +72,12 @@ def insert_test_data():
             ('ایران رادیاتور',)
         ]
         
-        for brand in brands:
-            try:
-                db.cursor.execute('''
-                INSERT OR IGNORE INTO Brands (name) VALUES (?)
-                ''', brand)
-            except sqlite3.Error as e:
-                print(f"   ⚠️ خطا در برند {brand[0]}: {e}")
+        try:
+            db.cursor.executemany('''
+            INSERT OR IGNORE INTO Brands (name) VALUES (?)
+            ''', brands)
+        except sqlite3.Error as e:
+            print(f"   ⚠️ خطا در برندها: {e}")
         
         # 4. درج اشخاص (مشتریان، تامین‌کنندگان، تعمیرکاران)
         print("👥 در حال درج اشخاص...")
@@ -95,14 +93,13 @@ def insert_test_data():
             ('کارمند', 'حسین', 'اکبری', '09197778899', 'تهران، تهرانپارس', '3031323334'),
         ]
         
-        for person in persons:
-            try:
-                db.cursor.execute('''
-                INSERT OR IGNORE INTO Persons (person_type, first_name, last_name, mobile, address, national_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', person)
-            except sqlite3.Error as e:
-                print(f"   ⚠️ خطا در شخص {person[1]} {person[2]}: {e}")
+        try:
+            db.cursor.executemany('''
+            INSERT OR IGNORE INTO Persons (person_type, first_name, last_name, mobile, address, national_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', persons)
+        except sqlite3.Error as e:
+            print(f"   ⚠️ خطا در اشخاص: {e}")
         
         # 5. درج دستگاه‌ها
         print("📺 در حال درج دستگاه‌ها...")
@@ -631,14 +628,13 @@ def insert_test_data():
             ('repair_status', 'تحویل داده شده', 4),
         ]
         
-        for lookup in lookups:
-            try:
-                db.cursor.execute('''
-                INSERT OR IGNORE INTO LookupValues (category, value, display_order)
-                VALUES (?, ?, ?)
-                ''', lookup)
-            except sqlite3.Error as e:
-                print(f"   ⚠️ خطا در lookup {lookup[1]}: {e}")
+        try:
+            db.cursor.executemany('''
+            INSERT OR IGNORE INTO LookupValues (category, value, display_order)
+            VALUES (?, ?, ?)
+            ''', lookups)
+        except sqlite3.Error as e:
+            print(f"   ⚠️ خطا در مقادیر ثابت: {e}")
         
         # تایید تغییرات
         db.connection.commit()
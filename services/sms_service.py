@@ -1,19 +1,119 @@
 ﻿# services/sms_service.py
+import configparser
+import os
 import threading
 import time
-from datetime import datetime
-from typing import List
-from queue import Queue
+from queue import Queue, Empty, Full
+from typing import Dict, List, Optional
+
+from database import sms_outbox
+
+
+DEFAULT_SMS_SETTINGS = {
+    'provider': 'panel',           # panel: پنل پیامکی (SMSManager) | stub: ارائه‌دهنده محلی برای تست
+    'workers': 4,                  # تعداد نخ‌های ارسال
+    'requests_per_second': 5.0,    # سقف درخواست به پنل برای هر خط ارسال
+    'burst': 10,                   # حداکثر درخواست پشت سر هم هر خط
+    'batch_size': 100,             # حداکثر گیرنده در هر send_bulk_sms
+    'max_attempts': 5,             # تعداد تلاش قبل از «خطا»
+    'retry_base_seconds': 30,      # تأخیر اولین تلاش مجدد (هر بار دو برابر)
+    'retry_max_seconds': 3600,     # سقف تأخیر تلاش مجدد
+}
+
+# حداکثر خواب توزیع‌کننده وقتی صف خالی است (برای پیامک‌هایی که از اتصال دیگری اضافه شده‌اند)
+IDLE_CHECK_SECONDS = 60
+
+
+def load_sms_settings(config_path="config.ini"):
+    """خواندن تنظیمات صف ارسال پیامک از بخش [SMS] فایل config.ini"""
+    settings = dict(DEFAULT_SMS_SETTINGS)
+
+    if not config_path or not os.path.exists(config_path):
+        return settings
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding='utf-8-sig')
+    except configparser.Error as e:
+        print(f"⚠️ خطا در خواندن {config_path}: {e}")
+        return settings
+
+    if not parser.has_section('SMS'):
+        return settings
+
+    section = parser['SMS']
+    try:
+        settings['provider'] = section.get('provider', fallback=settings['provider']).strip().lower()
+        settings['requests_per_second'] = section.getfloat(
+            'requests_per_second', fallback=settings['requests_per_second']
+        )
+        for name in ['workers', 'burst', 'batch_size', 'max_attempts',
+                     'retry_base_seconds', 'retry_max_seconds']:
+            settings[name] = section.getint(name, fallback=settings[name])
+    except ValueError as e:
+        print(f"⚠️ مقدار نامعتبر در بخش [SMS]: {e}")
+
+    return settings
+
+
+class TokenBucket:
+    """محدودکننده نرخ سطل توکن: rate توکن در ثانیه و حداکثر capacity توکن ذخیره"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """برداشتن یک توکن (در صورت نیاز با انتظار)؛ False اگر stop_event در این مدت set شود"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
 
 class SMSService:
-    """سرویس ارسال خودکار پیامک‌ها"""
+    """
+    سرویس ارسال خودکار پیامک‌ها از صف ماندگار SMSOutbox
+    
+    - send_auto_sms، enqueue و send_bulk فقط ردیف صف را ثبت و توزیع‌کننده را بیدار می‌کنند؛
+      پیامک‌های ارسال نشده با بسته شدن برنامه از بین نمی‌روند.
+    - نخ توزیع‌کننده پیامک‌های آماده را برمی‌دارد، پیامک‌های با متن و خط یکسان را در بسته‌های
+      batch_size تایی گروه می‌کند و در صف مسدودکننده jobs می‌گذارد؛ وقتی کاری نیست تا افزودن
+      پیامک جدید یا زمان اولین تلاش مجدد می‌خوابد.
+    - workers نخ کارگر کارها را از jobs برمی‌دارند و پیش از هر درخواست یک توکن از سطل خط
+      ارسال می‌گیرند؛ بسته‌های چند گیرنده‌ای با send_bulk_sms ارسال می‌شوند. ارسال ناموفق با
+      تأخیر نمایی دوباره تلاش و بعد از max_attempts «خطا» ثبت می‌شود.
+    
+    sms_manager هر شیء با send_single_sms و send_bulk_sms است (SMSManager یا StubSMSProvider).
+    """
     
-    def __init__(self, sms_manager, data_manager):
+    def __init__(self, sms_manager, data_manager, settings: Optional[Dict] = None):
         self.sms_manager = sms_manager
         self.data_manager = data_manager
-        self.message_queue = Queue()
+        self.db = data_manager.db
+        self.settings = dict(settings or load_sms_settings())
+        self.workers = max(1, self.settings['workers'])
+        self.batch_size = max(1, self.settings['batch_size'])
+        self.jobs = Queue(maxsize=self.workers * 2)
         self.is_running = False
-        self.worker_thread = None
+        self.dispatcher_thread = None
+        self.worker_threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
         
         # الگوهای ارسال خودکار
         self.auto_patterns = {
@@ -25,21 +125,69 @@ class SMSService:
     
     def start(self):
         """شروع سرویس ارسال خودکار"""
-        if not self.is_running:
-            self.is_running = True
-            self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
-            self.worker_thread.start()
-            print("سرویس پیامک خودکار شروع به کار کرد.")
+        if self.is_running:
+            return
+        # پیامک‌هایی که اجرای قبلی در میانه ارسال رها کرده دوباره در صف قرار می‌گیرند
+        sms_outbox.recover_interrupted(self.db)
+        self.is_running = True
+        self._stopping.clear()
+        self.dispatcher_thread = threading.Thread(target=self._dispatch, name="SMSDispatcher", daemon=True)
+        self.worker_threads = [
+            threading.Thread(target=self._work, name=f"SMSWorker-{number + 1}", daemon=True)
+            for number in range(self.workers)
+        ]
+        self.dispatcher_thread.start()
+        for thread in self.worker_threads:
+            thread.start()
+        print(f"سرویس پیامک خودکار شروع به کار کرد ({self.workers} کارگر).")
     
-    def stop(self):
-        """توقف سرویس"""
+    def stop(self, timeout: float = 5):
+        """توقف سرویس؛ کارهای شروع نشده به صف ماندگار برمی‌گردند"""
+        if not self.is_running:
+            return
         self.is_running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5)
+        self._stopping.set()
+        self._wakeup.set()
+        self.dispatcher_thread.join(timeout)
+        
+        pending = []
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except Empty:
+                break
+            if job:
+                pending.extend(row['id'] for row in job)
+        if pending:
+            sms_outbox.release(self.db, pending)
+        
+        for _ in self.worker_threads:
+            self.jobs.put(None)
+        for thread in self.worker_threads:
+            thread.join(timeout)
         print("سرویس پیامک خودکار متوقف شد.")
     
+    def enqueue(self, phone_number: str, message: str, message_type: str = None,
+                line_number: str = None, dedup_key: str = None) -> Optional[int]:
+        """
+        افزودن یک پیامک به صف ارسال
+        
+        Args:
+            dedup_key: کلید یکتای پیامک؛ پیامکی با کلید تکراری دوباره ارسال نمی‌شود
+        
+        Returns:
+            شناسه ردیف صف یا None در صورت خطا
+        """
+        outbox_id = sms_outbox.enqueue(
+            self.db, phone_number, message, line_number=line_number,
+            message_type=message_type, dedup_key=dedup_key
+        )
+        if outbox_id is not None:
+            self._wakeup.set()
+        return outbox_id
+    
     def send_auto_sms(self, pattern_name: str, phone_number: str, 
-                      parameters: dict) -> bool:
+                      parameters: dict, dedup_key: str = None) -> bool:
         """
         ارسال خودکار پیامک بر اساس الگو
         
@@ -47,6 +195,7 @@ class SMSService:
             pattern_name: نام الگو از auto_patterns
             phone_number: شماره گیرنده
             parameters: پارامترهای جایگزین در الگو
+            dedup_key: کلید یکتای رویداد (مثلاً شماره پذیرش) برای جلوگیری از ارسال تکراری
         """
         if pattern_name not in self.auto_patterns:
             return False
@@ -55,57 +204,133 @@ class SMSService:
         message = template.format(**parameters)
         
         # اضافه به صف ارسال
-        self.message_queue.put({
-            'type': 'auto',
-            'pattern': pattern_name,
-            'phone': phone_number,
-            'message': message,
-            'parameters': parameters,
-            'timestamp': datetime.now()
-        })
+        return self.enqueue(phone_number, message, message_type=pattern_name,
+                            dedup_key=dedup_key) is not None
+    
+    def send_bulk(self, phone_numbers: List[str], message: str, message_type: str = None,
+                  line_number: str = None, dedup_prefix: str = None) -> bool:
+        """
+        افزودن یک متن برای چندین گیرنده (مثلاً یادآوری‌ها) با یک درج گروهی
         
-        return True
+        با dedup_prefix کلید هر گیرنده «{dedup_prefix}:{شماره}» است تا اجرای دوباره
+        همان یادآوری پیامک تکراری نفرستد. این پیامک‌ها در بسته‌های batch_size تایی
+        با send_bulk_sms ارسال می‌شوند.
+        """
+        messages = [
+            {
+                'phone': phone,
+                'message': message,
+                'line_number': line_number,
+                'message_type': message_type,
+                'dedup_key': f"{dedup_prefix}:{phone}" if dedup_prefix else None,
+            }
+            for phone in dict.fromkeys(phone_numbers) if phone
+        ]
+        queued = sms_outbox.enqueue_many(self.db, messages)
+        self._wakeup.set()
+        return queued
+    
+    def get_queue_status(self) -> Dict[str, int]:
+        """تعداد پیامک‌های صف در هر وضعیت"""
+        return sms_outbox.status_counts(self.db)
+    
+    def _bucket(self, line_number: str) -> TokenBucket:
+        """سطل توکن خط ارسال"""
+        with self._buckets_lock:
+            bucket = self._buckets.get(line_number or '')
+            if bucket is None:
+                bucket = TokenBucket(self.settings['requests_per_second'], self.settings['burst'])
+                self._buckets[line_number or ''] = bucket
+            return bucket
     
-    def _process_queue(self):
-        """پردازش صف پیامک‌ها"""
-        while self.is_running:
+    def _group(self, rows: List[dict]):
+        """گروه‌بندی پیامک‌های با متن و خط یکسان در بسته‌های batch_size تایی"""
+        groups = {}
+        for row in rows:
+            groups.setdefault((row['line_number'], row['message']), []).append(row)
+        for group in groups.values():
+            for start in range(0, len(group), self.batch_size):
+                yield group[start:start + self.batch_size]
+    
+    def _put_job(self, job: List[dict]):
+        """قرار دادن کار در صف کارگرها (با انتظار اگر کارگرها مشغول باشند)"""
+        while not self._stopping.is_set():
+            try:
+                self.jobs.put(job, timeout=0.5)
+                return
+            except Full:
+                continue
+        sms_outbox.release(self.db, [row['id'] for row in job])
+    
+    def _dispatch(self):
+        """برداشتن پیامک‌های آماده از صف ماندگار و تقسیم بین کارگرها"""
+        while not self._stopping.is_set():
+            self._wakeup.clear()
             try:
-                if not self.message_queue.empty():
-                    sms_data = self.message_queue.get()
-                    
-                    # ارسال پیامک
-                    result = self.sms_manager.send_single_sms(
-                        to_number=sms_data['phone'],
-                        message=sms_data['message']
-                    )
-                    
-                    # ذخیره لاگ
-                    self._log_auto_sms(sms_data, result)
-                    
-                    # تاخیر برای عدم ارسال سریع
-                    time.sleep(2)
-                else:
-                    time.sleep(1)
-                    
+                rows = sms_outbox.claim_due(self.db, self.batch_size * self.workers)
+                if rows:
+                    for job in self._group(rows):
+                        self._put_job(job)
+                    continue
+                delay = sms_outbox.seconds_until_next(self.db)
             except Exception as e:
                 print(f"خطا در پردازش صف پیامک: {e}")
-                time.sleep(5)
-    
-    def _log_auto_sms(self, sms_data: dict, result: dict):
-        """ذخیره لاگ پیامک خودکار"""
-        try:
-            from database.models import Message
-            msg = Message(
-                message_type=f"خودکار - {sms_data['pattern']}",
-                message_text=sms_data['message'],
-                mobile_number=sms_data['phone'],
-                send_status='ارسال شده' if result.get('success') else 'ناموفق',
-                response_data=str(result),
-                sent_at=sms_data['timestamp']
+                delay = 5
+            
+            # بیدار شدن با پیامک جدید، نتیجه ناموفق، زمان تلاش مجدد بعدی یا توقف سرویس
+            self._wakeup.wait(IDLE_CHECK_SECONDS if delay is None else min(delay, IDLE_CHECK_SECONDS))
+    
+    def _work(self):
+        """ارسال کارهای صف jobs با رعایت سقف نرخ خط ارسال"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            
+            if not self._bucket(job[0]['line_number']).acquire(self._stopping):
+                sms_outbox.release(self.db, [row['id'] for row in job])
+                continue
+            
+            try:
+                result = self._send(job)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            
+            try:
+                self._record(job, result)
+            except Exception as e:
+                print(f"خطا در ثبت نتیجه ارسال پیامک: {e}")
+    
+    def _send(self, job: List[dict]) -> Dict:
+        message = job[0]['message']
+        line_number = job[0]['line_number']
+        if len(job) == 1:
+            return self.sms_manager.send_single_sms(
+                to_number=job[0]['phone'],
+                message=message,
+                line_number=line_number
             )
-            self.data_manager.add(msg)
-        except Exception as e:
-            print(f"خطا در ذخیره لاگ پیامک خودکار: {e}")
+        return self.sms_manager.send_bulk_sms(
+            [row['phone'] for row in job], message, line_number=line_number
+        )
+    
+    def _record(self, job: List[dict], result: Dict):
+        """ثبت نتیجه ارسال در صف ماندگار"""
+        result = result or {}
+        if result.get('success'):
+            message_ids = result.get('message_ids') or [result.get('message_id')]
+            sms_outbox.mark_sent(self.db, [row['id'] for row in job], message_ids)
+            return
+        
+        error = result.get('error') or result.get('message') or 'پاسخ نامعتبر از پنل پیامکی'
+        sms_outbox.mark_failed(
+            self.db, job, error,
+            self.settings['max_attempts'],
+            self.settings['retry_base_seconds'],
+            self.settings['retry_max_seconds']
+        )
+        # زمان تلاش مجدد در محاسبه خواب توزیع‌کننده لحاظ شود
+        self._wakeup.set()
     
     def check_and_send_reminders(self):
         """بررسی و ارسال یادآوری‌ها"""
@@ -0,0 +1,53 @@
+﻿# services/sms_stub.py
+import random
+import threading
+import time
+from typing import Dict, List
+
+
+class StubSMSProvider:
+    """
+    ارائه‌دهنده محلی پیامک برای تست (بدون شبکه)
+    
+    همان رابط SMSManager (send_single_sms و send_bulk_sms) را دارد و پیامک‌های
+    «ارسال شده» را در sent نگه می‌دارد. latency_ms تأخیر هر درخواست و
+    failure_rate نسبت درخواست‌های ناموفق است. با provider = stub در بخش [SMS]
+    فایل config.ini به جای پنل پیامکی استفاده می‌شود.
+    """
+    
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0.0, seed=None):
+        self.latency = max(0.0, latency_ms) / 1000
+        self.failure_rate = failure_rate
+        self.sent = []        # (line_number, to_number, message)
+        self.requests = 0     # تعداد درخواست‌ها (هر send_bulk_sms یک درخواست)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1
+    
+    def send_single_sms(self, to_number: str, message: str, 
+                        line_number: str = None) -> Dict:
+        result = self.send_bulk_sms([to_number], message, line_number)
+        if result['success']:
+            result['message_id'] = result['message_ids'][0]
+        return result
+    
+    def send_bulk_sms(self, numbers: List[str], message: str, 
+                      line_number: str = None) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.failure_rate:
+                return {'success': False, 'error': 'خطای شبیه‌سازی شده ارائه‌دهنده محلی'}
+            message_ids = list(range(self._next_id, self._next_id + len(numbers)))
+            self._next_id += len(numbers)
+            self.sent.extend((line_number, number, message) for number in numbers)
+        return {
+            'success': True,
+            'message_ids': message_ids,
+            'status_code': 1,
+            'message': '',
+        }
+    
+    def get_credit(self) -> float:
+        return 0
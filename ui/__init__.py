@@ -1,5 +1,20 @@
 # ui/__init__.py
-from .login_window import LoginWindow
-from .main_window import MainWindow
+# پنجره‌ها در اولین دسترسی ایمپورت می‌شوند تا «from ui.login_window import ...» کل
+# پنجره اصلی و فرم‌هایش را بارگذاری نکند
+import importlib
+
+_EXPORTS = {
+    'LoginWindow': '.login_window',
+    'MainWindow': '.main_window',
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = ['LoginWindow', 'MainWindow']
\ No newline at end of file
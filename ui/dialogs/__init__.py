@@ -3,5 +3,6 @@
 """
 
 from .smart_search_dialog import SmartSearchDialog
+from .performance_dialog import PerformanceDialog
 
-__all__ = ['SmartSearchDialog']
\ No newline at end of file
+__all__ = ['SmartSearchDialog', 'PerformanceDialog']
\ No newline at end of file
@@ -0,0 +1,202 @@
+# performance_dialog.py - پنل عملکرد (نتایج پروفایلر کوئری‌ها)
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTableWidget, QTableWidgetItem, QTabWidget, QTextEdit, QHeaderView,
+    QAbstractItemView, QComboBox
+)
+from PySide6.QtCore import Qt, QTimer
+
+
+class PerformanceDialog(QDialog):
+    """
+    پنل عملکرد: آمار کوئری‌ها، کوئری‌های کند با نقشه اجرا و هشدارهای N+1
+    """
+
+    SUMMARY_ORDERS = [
+        ("مجموع زمان", 'total_ms'),
+        ("تعداد اجرا", 'count'),
+        ("بیشترین زمان", 'max_ms'),
+    ]
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        self.profiler = data_manager.db.profiler
+
+        # تازه‌سازی خودکار هنگام باز بودن پنل
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(2000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.init_ui()
+        self.refresh()
+        self.refresh_timer.start()
+
+    def init_ui(self):
+        """راه‌اندازی رابط کاربری"""
+        self.setWindowTitle("⏱️ پنل عملکرد - پروفایلر کوئری‌ها")
+        self.setMinimumSize(1100, 650)
+        self.setLayoutDirection(Qt.RightToLeft)
+
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(12, 12, 12, 12)
+
+        # ===== نوار کنترل =====
+        control_layout = QHBoxLayout()
+
+        self.chk_enabled = QCheckBox("فعال بودن پروفایلر")
+        self.chk_enabled.setChecked(self.profiler.enabled)
+        self.chk_enabled.toggled.connect(self.on_enabled_toggled)
+        control_layout.addWidget(self.chk_enabled)
+
+        control_layout.addWidget(QLabel("مرتب‌سازی:"))
+        self.cmb_order = QComboBox()
+        for title, key in self.SUMMARY_ORDERS:
+            self.cmb_order.addItem(title, key)
+        self.cmb_order.currentIndexChanged.connect(self.refresh)
+        control_layout.addWidget(self.cmb_order)
+
+        control_layout.addStretch()
+
+        btn_refresh = QPushButton("🔄 بروزرسانی")
+        btn_refresh.clicked.connect(self.refresh)
+        control_layout.addWidget(btn_refresh)
+
+        btn_reset = QPushButton("🗑️ پاک کردن آمار")
+        btn_reset.clicked.connect(self.on_reset)
+        control_layout.addWidget(btn_reset)
+
+        main_layout.addLayout(control_layout)
+
+        settings = self.profiler.settings
+        self.status_label = QLabel(
+            f"آستانه کوئری کند: {settings['slow_query_ms']:g} ms | "
+            f"آستانه N+1: {settings['n_plus_one_threshold']} تکرار در هر اقدام | "
+            f"فایل لاگ: {settings['log_file']}"
+        )
+        main_layout.addWidget(self.status_label)
+
+        # ===== تب‌ها =====
+        self.tabs = QTabWidget()
+
+        self.summary_table = self.create_table(
+            ["کوئری", "تعداد", "مجموع (ms)", "میانگین (ms)", "بیشترین (ms)", "ردیف‌ها", "محل فراخوانی"]
+        )
+        self.tabs.addTab(self.summary_table, "📊 خلاصه کوئری‌ها")
+
+        self.slow_table = self.create_table(
+            ["زمان", "مدت (ms)", "ردیف‌ها", "محل فراخوانی", "کوئری", "نقشه اجرا"]
+        )
+        self.tabs.addTab(self.slow_table, "🐢 کوئری‌های کند")
+
+        self.warning_table = self.create_table(
+            ["زمان", "اقدام", "تعداد تکرار", "محل فراخوانی", "کوئری"]
+        )
+        self.tabs.addTab(self.warning_table, "🔁 هشدارهای N+1")
+
+        self.recent_table = self.create_table(
+            ["زمان", "نوع", "مدت (ms)", "ردیف‌ها", "محل فراخوانی", "اقدام", "کوئری"]
+        )
+        self.tabs.addTab(self.recent_table, "🕒 آخرین کوئری‌ها")
+
+        main_layout.addWidget(self.tabs, stretch=1)
+
+        # ===== جزئیات ردیف انتخاب شده =====
+        self.details = QTextEdit()
+        self.details.setReadOnly(True)
+        self.details.setMaximumHeight(140)
+        self.details.setLayoutDirection(Qt.LeftToRight)
+        self.details.setPlaceholderText("برای دیدن متن کامل کوئری و نقشه اجرا روی یک ردیف کلیک کنید")
+        main_layout.addWidget(self.details)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        btn_close = QPushButton("❌ بستن")
+        btn_close.clicked.connect(self.close)
+        button_layout.addWidget(btn_close)
+        main_layout.addLayout(button_layout)
+
+        self.setLayout(main_layout)
+
+    def create_table(self, headers):
+        """ساخت جدول فقط‌خواندنی با ستون آخر کشسان"""
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setAlternatingRowColors(True)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(len(headers) - 1, QHeaderView.Stretch)
+        table.cellClicked.connect(lambda row, _column, t=table: self.show_details(t, row))
+        return table
+
+    def fill_table(self, table, rows, details):
+        """پر کردن جدول؛ details متن جزئیات هر ردیف است"""
+        table.setRowCount(len(rows))
+        for row_index, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem("" if value is None else str(value))
+                if column == 0:
+                    item.setData(Qt.UserRole, details[row_index])
+                table.setItem(row_index, column, item)
+
+    # ---------- رویدادها ----------
+
+    def on_enabled_toggled(self, checked):
+        self.profiler.set_enabled(checked)
+        self.refresh()
+
+    def on_reset(self):
+        self.profiler.reset()
+        self.details.clear()
+        self.refresh()
+
+    def show_details(self, table, row):
+        item = table.item(row, 0)
+        if item is not None:
+            self.details.setPlainText(item.data(Qt.UserRole) or "")
+
+    def refresh(self):
+        """بارگذاری دوباره داده‌های پروفایلر"""
+        order_by = self.cmb_order.currentData() or 'total_ms'
+
+        summary = self.profiler.summary(order_by=order_by)
+        self.fill_table(
+            self.summary_table,
+            [(s['shape'], s['count'], f"{s['total_ms']:.1f}", f"{s['avg_ms']:.2f}",
+              f"{s['max_ms']:.1f}", s['rows'], s['call_sites']) for s in summary],
+            [s['shape'] for s in summary]
+        )
+
+        slow = self.profiler.slow_queries()
+        self.fill_table(
+            self.slow_table,
+            [(q['time'], f"{q['elapsed_ms']:.1f}", q['rows'], q['call_site'], q['shape'], q['plan'])
+             for q in slow],
+            [f"{q['sql']}\n\nپارامترها: {q['params']}\n\nنقشه اجرا:\n{q['plan'] or '-'}" for q in slow]
+        )
+
+        warnings = self.profiler.n_plus_one_warnings()
+        self.fill_table(
+            self.warning_table,
+            [(w['time'], w['action'], w['count'], w['call_site'], w['shape']) for w in warnings],
+            [f"اقدام: {w['action']}\n{w['shape']}" for w in warnings]
+        )
+
+        recent = self.profiler.recent()
+        self.fill_table(
+            self.recent_table,
+            [(q['time'], q['kind'], f"{q['elapsed_ms']:.2f}", q['rows'], q['call_site'],
+              q['action'], q['shape']) for q in recent],
+            [f"{q['sql']}\n\nپارامترها: {q['params']}" for q in recent]
+        )
+
+        self.tabs.setTabText(1, f"🐢 کوئری‌های کند ({len(slow)})")
+        self.tabs.setTabText(2, f"🔁 هشدارهای N+1 ({len(warnings)})")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
@@ -1,13 +1,14 @@
 ﻿# smart_search_dialog.py - نسخه اصلاح شده
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QRadioButton,
-    QWidget, QGridLayout, QGroupBox, QFrame, QMessageBox,
-    QHeaderView, QComboBox, QScrollArea, QAbstractItemView 
+    QPushButton, QGridLayout, QGroupBox, QFrame, QMessageBox,
+    QHeaderView, QComboBox, QScrollArea
 )
-from PySide6.QtCore import Qt, Signal, QRegularExpression, QTimer
-from PySide6.QtGui import QRegularExpressionValidator, QColor
-import jdatetime
+from PySide6.QtCore import Signal, QRegularExpression, QTimer
+from PySide6.QtGui import QRegularExpressionValidator
+
+from database import jalali_calendar, pagination
+from ui.widgets.record_table import RecordTableView, TableColumn
 
 class SmartSearchDialog(QDialog):
     """
@@ -16,11 +17,29 @@ class SmartSearchDialog(QDialog):
     
     reception_selected = Signal(dict)  # اطلاعات پذیرش انتخاب شده
     
+    SEARCH_DELAY_MS = 300  # تأخیر جستجوی زنده پس از آخرین تایپ
+    PAGE_SIZE = 100  # تعداد نتایج هر صفحه
+    
+    # رنگ‌بندی ستون وضعیت
+    STATUS_COLORS = {
+        'تعمیر شده': '#27ae60',
+        'در حال تعمیر': '#3498db',
+        'در انتظار': '#f39c12',
+        'تحویل داده شده': '#9b59b6',
+    }
+    
     def __init__(self, data_manager):
         super().__init__()
         self.data_manager = data_manager
         self.selected_reception = None
         
+        # وضعیت صفحه‌بندی نتایج
+        self.search_filters = {}
+        self.next_cursor = None
+        self.loaded_count = 0
+        self.total_count = 0
+        self.count_is_estimate = False
+        
         # تایمر برای جستجوی زنده
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
@@ -54,7 +73,7 @@ class SmartSearchDialog(QDialog):
         # موبایل مشتری
         filter_layout.addWidget(QLabel("📱 موبایل مشتری:"), 0, 0)
         self.filter_mobile = QLineEdit()
-        self.filter_mobile.setPlaceholderText("09xxxxxxxxx - جستجو در موبایل مشتریان")
+        self.filter_mobile.setPlaceholderText("09xxxxxxxxx یا چند رقم آخر - جستجو در موبایل مشتریان")
         self.filter_mobile.setValidator(
             QRegularExpressionValidator(QRegularExpression(r'[0-9]*'))
         )
@@ -113,41 +132,43 @@ class SmartSearchDialog(QDialog):
         """)
         result_layout.addWidget(self.status_label)
         
-        # جدول نتایج
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(9)
-        self.results_table.setHorizontalHeaderLabels([
-            "انتخاب", "شماره پذیرش", "مشتری", "موبایل", "دستگاه", 
-            "نوع", "تاریخ پذیرش", "هزینه تخمینی", "وضعیت"
-        ])
-        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.results_table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.results_table.cellClicked.connect(self.on_row_clicked)
+        # جدول نتایج (انتخاب پذیرش با انتخاب سطر)
+        self.results_table = RecordTableView([
+            TableColumn("شماره پذیرش", 'reception_number', width=120),
+            TableColumn("مشتری", 'customer_name'),
+            TableColumn("موبایل", 'mobile', width=110),
+            TableColumn("دستگاه", text=lambda r: f"{r.get('brand', '')} {r.get('model', '')}"),
+            TableColumn("نوع", 'device_type', width=100),
+            TableColumn("تاریخ پذیرش", 'reception_date', width=100,
+                        text=lambda r: self.convert_to_jalali(r.get('reception_date', ''))),
+            TableColumn("هزینه تخمینی", 'estimated_cost', width=110,
+                        text=lambda r: f"{r['estimated_cost']:,} تومان" if r.get('estimated_cost') else "تعیین نشده"),
+            TableColumn("وضعیت", 'status', width=110,
+                        foreground=lambda r: self.STATUS_COLORS.get(r.get('status', ''))),
+        ], self)
+        self.results_table.selection_changed.connect(self.on_selection_changed)
+        self.results_table.record_activated.connect(self.on_reception_activated)
         
         # تنظیمات جدول
         header = self.results_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.Fixed)    # انتخاب
-        header.setSectionResizeMode(1, QHeaderView.Fixed)    # شماره پذیرش
-        header.setSectionResizeMode(2, QHeaderView.Stretch)  # مشتری
-        header.setSectionResizeMode(3, QHeaderView.Fixed)    # موبایل
-        header.setSectionResizeMode(4, QHeaderView.Stretch)  # دستگاه
-        header.setSectionResizeMode(5, QHeaderView.Fixed)    # نوع
-        header.setSectionResizeMode(6, QHeaderView.Fixed)    # تاریخ
-        header.setSectionResizeMode(7, QHeaderView.Fixed)    # هزینه
-        header.setSectionResizeMode(8, QHeaderView.Fixed)    # وضعیت
-        
-        self.results_table.setColumnWidth(0, 60)
-        self.results_table.setColumnWidth(1, 120)
-        self.results_table.setColumnWidth(3, 110)
-        self.results_table.setColumnWidth(5, 100)
-        self.results_table.setColumnWidth(6, 100)
-        self.results_table.setColumnWidth(7, 110)
-        self.results_table.setColumnWidth(8, 110)
+        header.setStretchLastSection(False)
+        for column in range(8):
+            header.setSectionResizeMode(column, QHeaderView.Fixed)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)  # مشتری
+        header.setSectionResizeMode(3, QHeaderView.Stretch)  # دستگاه
         
         # ارتفاع سطرها
         self.results_table.verticalHeader().setDefaultSectionSize(40)
         
         result_layout.addWidget(self.results_table)
+        
+        # بارگذاری صفحه بعدی نتایج
+        self.btn_load_more = QPushButton("⬇️ نمایش نتایج بیشتر")
+        self.btn_load_more.setStyleSheet(self.get_button_style("#34495e"))
+        self.btn_load_more.clicked.connect(self.load_more_results)
+        self.btn_load_more.setVisible(False)
+        result_layout.addWidget(self.btn_load_more)
+        
         result_frame.setLayout(result_layout)
         main_layout.addWidget(result_frame, stretch=1)
         
@@ -207,163 +228,77 @@ class SmartSearchDialog(QDialog):
     def on_filter_changed(self):
         """هنگام تغییر فیلترها"""
         self.search_timer.stop()
-        self.search_timer.start(500)  # 500ms delay
+        self.search_timer.start(self.SEARCH_DELAY_MS)
     
     def perform_search(self):
         """انجام جستجو بر اساس فیلترها"""
         try:
+            self.search_timer.stop()
+            
             # دریافت فیلترها
-            mobile = self.filter_mobile.text().strip()
-            name = self.filter_name.text().strip()
-            reception_no = self.filter_reception_no.text().strip()
             status_filter = self.filter_status.currentText()
+            self.search_filters = {
+                'mobile': self.filter_mobile.text().strip(),
+                'name': self.filter_name.text().strip(),
+                'reception_number': self.filter_reception_no.text().strip(),
+                'status': status_filter if status_filter != "همه" else None,
+            }
             
-            # دریافت همه پذیرش‌ها از دیتابیس
-            all_receptions = self.data_manager.reception.get_all_receptions()
-            
-            # فیلتر کردن نتایج
-            filtered_receptions = []
-            for reception in all_receptions:
-                # فیلتر موبایل
-                if mobile:
-                    # پیدا کردن مشتری و بررسی موبایل
-                    customer_id = reception.get('customer_id')
-                    if customer_id:
-                        customer = self.data_manager.person.get_person_by_id(customer_id)
-                        if customer and mobile not in str(customer.get('mobile', '')):
-                            continue
-                    else:
-                        continue
-                
-                # فیلتر نام
-                if name:
-                    customer_name = reception.get('customer_name', '').lower()
-                    if name.lower() not in customer_name:
-                        continue
-                
-                # فیلتر شماره پذیرش
-                if reception_no:
-                    reception_number = str(reception.get('reception_number', '')).lower()
-                    if reception_no.lower() not in reception_number:
-                        continue
-                
-                # فیلتر وضعیت
-                if status_filter != "همه":
-                    status = reception.get('status', '')
-                    if status != status_filter:
-                        continue
-                
-                filtered_receptions.append(reception)
+            # فیلتر و صفحه‌بندی در خود دیتابیس انجام می‌شود
+            reception = self.data_manager.reception
+            self.total_count, self.count_is_estimate = reception.count_receptions(self.search_filters)
+            page = reception.get_receptions_page(self.search_filters, page_size=self.PAGE_SIZE)
             
             # نمایش نتایج
-            self.display_results(filtered_receptions)
-            
-            # به‌روزرسانی وضعیت
-            count = len(filtered_receptions)
-            self.status_label.setText(f"✅ {count} پذیرش یافت شد" if count > 0 else "❌ نتیجه‌ای یافت نشد")
+            self.selected_reception = None
+            self.btn_select.setEnabled(False)
+            self.display_results(page)
+            self.update_search_status()
             
         except Exception as e:
             self.status_label.setText(f"❌ خطا در جستجو: {str(e)}")
             print(f"خطا در جستجو: {e}")
     
-    def display_results(self, receptions):
-        """نمایش پذیرش‌ها در جدول"""
-        self.results_table.setRowCount(len(receptions))
-        
-        for row, reception in enumerate(receptions):
-            # ستون انتخاب (رادیو باتن)
-            radio = QRadioButton()
-            radio.setProperty('reception_id', reception.get('id'))
-            radio.toggled.connect(
-                lambda checked, r=reception: self.on_reception_selected(r) if checked else None
+    def load_more_results(self):
+        """بارگذاری صفحه بعدی همان جستجو"""
+        try:
+            page = self.data_manager.reception.get_receptions_page(
+                self.search_filters, cursor=self.next_cursor, page_size=self.PAGE_SIZE
             )
+            self.display_results(page, append=True)
+            self.update_search_status()
             
-            cell_widget = QWidget()
-            layout = QHBoxLayout(cell_widget)
-            layout.addWidget(radio)
-            layout.setAlignment(Qt.AlignCenter)
-            layout.setContentsMargins(0, 0, 0, 0)
-            self.results_table.setCellWidget(row, 0, cell_widget)
-            
-            # شماره پذیرش
-            self.results_table.setItem(row, 1, 
-                QTableWidgetItem(str(reception.get('reception_number', ''))))
-            
-            # مشتری
-            self.results_table.setItem(row, 2, 
-                QTableWidgetItem(reception.get('customer_name', '')))
-            
-            # موبایل مشتری
-            mobile = self.get_customer_mobile(reception.get('customer_id'))
-            self.results_table.setItem(row, 3, QTableWidgetItem(mobile))
-            
-            # دستگاه
-            device_text = f"{reception.get('brand', '')} {reception.get('model', '')}"
-            self.results_table.setItem(row, 4, QTableWidgetItem(device_text))
-            
-            # نوع دستگاه
-            self.results_table.setItem(row, 5, 
-                QTableWidgetItem(reception.get('device_type', '')))
-            
-            # تاریخ پذیرش (تبدیل به شمسی)
-            reception_date = reception.get('reception_date', '')
-            jalali_date = self.convert_to_jalali(reception_date)
-            self.results_table.setItem(row, 6, QTableWidgetItem(jalali_date))
-            
-            # هزینه تخمینی
-            cost = reception.get('estimated_cost', 0)
-            cost_text = f"{cost:,} تومان" if cost else "تعیین نشده"
-            self.results_table.setItem(row, 7, QTableWidgetItem(cost_text))
-            
-            # وضعیت با رنگ‌بندی
-            status_item = QTableWidgetItem(reception.get('status', ''))
-            status = reception.get('status', '')
-            
-            # رنگ‌بندی وضعیت
-            if status == 'تعمیر شده':
-                status_item.setForeground(QColor('#27ae60'))
-            elif status == 'در حال تعمیر':
-                status_item.setForeground(QColor('#3498db'))
-            elif status == 'در انتظار':
-                status_item.setForeground(QColor('#f39c12'))
-            elif status == 'تحویل داده شده':
-                status_item.setForeground(QColor('#9b59b6'))
-            
-            self.results_table.setItem(row, 8, status_item)
+        except Exception as e:
+            self.status_label.setText(f"❌ خطا در بارگذاری نتایج: {str(e)}")
+            print(f"خطا در بارگذاری نتایج: {e}")
     
-    def get_customer_mobile(self, customer_id):
-        """دریافت موبایل مشتری"""
-        if not customer_id:
-            return ""
-        
-        try:
-            customer = self.data_manager.person.get_person_by_id(customer_id)
-            return customer.get('mobile', '') if customer else ""
-        except:
-            return ""
+    def update_search_status(self):
+        """به‌روزرسانی وضعیت جستجو و دکمه نتایج بیشتر"""
+        count_text = pagination.format_count(self.total_count, self.count_is_estimate)
+        has_more = self.next_cursor is not None
+        if self.loaded_count == 0:
+            self.status_label.setText("❌ نتیجه‌ای یافت نشد")
+        elif has_more:
+            self.status_label.setText(f"✅ {count_text} پذیرش یافت شد (نمایش {self.loaded_count} مورد)")
+        else:
+            self.status_label.setText(f"✅ {count_text} پذیرش یافت شد")
+        
+        self.btn_load_more.setVisible(has_more)
+    
+    def display_results(self, page, append=False):
+        """نمایش یک صفحه از پذیرش‌ها در جدول"""
+        receptions = page['rows']
+        self.next_cursor = page['next_cursor']
+        if append:
+            self.loaded_count += len(receptions)
+            self.results_table.append_rows(receptions)
+        else:
+            self.loaded_count = len(receptions)
+            self.results_table.set_rows(receptions)
     
     def convert_to_jalali(self, date_str):
         """تبدیل تاریخ میلادی به شمسی"""
-        if not date_str:
-            return ""
-        
-        try:
-            # جدا کردن قسمت تاریخ از رشته
-            if ' ' in str(date_str):
-                date_str = str(date_str).split(' ')[0]
-            
-            # جدا کردن سال، ماه، روز
-            parts = str(date_str).replace('-', '/').split('/')
-            if len(parts) >= 3:
-                year, month, day = map(int, parts[:3])
-                
-                # تبدیل میلادی به شمسی
-                jalali_date = jdatetime.date.fromgregorian(year=year, month=month, day=day)
-                return jalali_date.strftime('%Y/%m/%d')
-        except:
-            pass
-        
-        return str(date_str)
+        return jalali_calendar.to_jalali(date_str)
     
     def on_reception_selected(self, reception):
         """هنگام انتخاب یک پذیرش"""
@@ -386,14 +321,19 @@ class SmartSearchDialog(QDialog):
         self.selected_info.setText(info_text)
         self.btn_select.setEnabled(True)
     
-    def on_row_clicked(self, row, column):
-        """هنگام کلیک روی سطر جدول"""
-        if column != 0:  # اگر روی ستون رادیو کلیک نکرده
-            radio_widget = self.results_table.cellWidget(row, 0)
-            if radio_widget:
-                radio = radio_widget.findChild(QRadioButton)
-                if radio:
-                    radio.setChecked(True)
+    def on_selection_changed(self):
+        """هنگام تغییر سطر انتخاب شده جدول"""
+        reception = self.results_table.selected_record()
+        if reception:
+            self.on_reception_selected(reception)
+        elif self.selected_reception is None:
+            self.selected_info.setText("⚠️ هیچ پذیرشی انتخاب نشده است")
+            self.btn_select.setEnabled(False)
+    
+    def on_reception_activated(self, reception):
+        """دابل کلیک روی سطر: انتخاب و تأیید"""
+        self.on_reception_selected(reception)
+        self.accept_selection()
     
     def accept_selection(self):
         """تأیید انتخاب"""
@@ -491,13 +431,13 @@ class SmartSearchDialog(QDialog):
             font-family: 'B Nazanin', Tahoma;
             color: white;
         }
-        QTableWidget {
+        QTableView {
             background-color: #2c2c2c;
             alternate-background-color: #3c3c3c;
             gridline-color: #444;
             font-size: 12px;
         }
-        QTableWidget::item {
+        QTableView::item {
             padding: 6px 4px;
         }
         QHeaderView::section {
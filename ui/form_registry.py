@@ -0,0 +1,15 @@
+# ui/form_registry.py - فهرست فرم‌ها و پنجره‌هایی که در اولین استفاده بارگذاری می‌شوند
+from modules.lazy_imports import LazyRegistry
+
+FORMS = LazyRegistry()
+
+# پنجره اصلی اول ثبت می‌شود تا بارگذاری پیش‌دستانه پس از فرم ورود از آن شروع شود
+FORMS.register('MainWindow', 'ui.main_window', title="پنجره اصلی")
+FORMS.register('PersonForm', 'ui.forms.person_form', title="فرم اشخاص")
+FORMS.register('ReceptionForm', 'ui.forms.reception_form', title="فرم پذیرش")
+FORMS.register('DeviceForm', 'ui.forms.device_form', title="فرم دستگاه‌ها")
+FORMS.register('RepairForm', 'ui.forms.repair_form', title="فرم تعمیرات")
+FORMS.register('ServiceFeeForm', 'ui.forms.service_fee_form', title="فرم اجرت‌ها")
+FORMS.register('InventoryWindow', 'ui.forms.inventory.inventory_window', title="پنجره انبار")
+FORMS.register('AccountingWindow', 'ui.forms.accounting.accounting_window', title="پنجره حسابداری")
+FORMS.register('ReportsWindow', 'ui.forms.reports.reports_window', title="ماژول گزارش‌گیری")
\ No newline at end of file
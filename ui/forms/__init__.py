@@ -1,12 +1,27 @@
 # ui/forms/__init__.py
-from .person_form import PersonForm
-from .device_form import DeviceForm
-from .reception_form import ReceptionForm
-from .repair_form.repair_form import RepairForm
-from .service_fee_form import ServiceFeeForm
-from .device_category_manager_form import DeviceCategoryManagerForm  # تغییر نام
-from .device_category_name_form import DeviceCategoryNameForm
-from .part_form import PartForm
+# فرم‌ها در اولین دسترسی ایمپورت می‌شوند تا ایمپورت یک فرم (ui.forms.person_form)
+# بقیه فرم‌ها را بارگذاری نکند
+import importlib
+
+_EXPORTS = {
+    'PersonForm': '.person_form',
+    'DeviceForm': '.device_form',
+    'ReceptionForm': '.reception_form',
+    'RepairForm': '.repair_form.repair_form',
+    'ServiceFeeForm': '.service_fee_form',
+    'DeviceCategoryManagerForm': '.device_category_manager_form',  # تغییر نام
+    'DeviceCategoryNameForm': '.device_category_name_form',
+    'PartForm': '.part_form',
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'PersonForm',
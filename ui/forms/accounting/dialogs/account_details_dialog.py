@@ -224,7 +224,7 @@ class AccountDetailsDialog(QDialog):
         
         # جدول تراکنش‌ها
         self.transactions_table = QTableWidget()
-        self.transactions_table.setColumnCount(7)
+        self.transactions_table.setColumnCount(8)
         self.transactions_table.setHorizontalHeaderLabels([
             "ردیف",
             "تاریخ",
@@ -232,7 +232,8 @@ class AccountDetailsDialog(QDialog):
             "طرف حساب",
             "مبلغ (تومان)",
             "شرح",
-            "وضعیت"
+            "وضعیت",
+            "مانده (تومان)"
         ])
         
         # تنظیم عرض ستون‌ها
@@ -243,6 +244,7 @@ class AccountDetailsDialog(QDialog):
         self.transactions_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
         self.transactions_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
         self.transactions_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeToContents)
+        self.transactions_table.horizontalHeader().setSectionResizeMode(7, QHeaderView.ResizeToContents)
         
         self.transactions_table.setColumnWidth(0, 60)   # ردیف
         self.transactions_table.setColumnWidth(1, 120)  # تاریخ
@@ -419,12 +421,27 @@ class AccountDetailsDialog(QDialog):
                 status_item = QTableWidgetItem(trans.get('status', 'انجام شده'))
                 status_item.setForeground(QColor('#f39c12'))
                 self.transactions_table.setItem(row, 6, status_item)
+                
+                # مانده پس از تراکنش (از دفتر موجودی)
+                balance_after = trans.get('balance_after_toman')
+                balance_item = QTableWidgetItem(f"{balance_after:,.0f}" if balance_after is not None else "-")
+                balance_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.transactions_table.setItem(row, 7, balance_item)
+            
+            # مانده ابتدا و انتهای بازه (جستجوی مستقیم در دفتر موجودی)
+            account_manager = self.data_manager.account_manager
+            opening = account_manager.get_balance_as_of(
+                self.account_id, self.from_date_input.date().addDays(-1).toString("yyyy-MM-dd")
+            )
+            closing = account_manager.get_balance_as_of(self.account_id, to_date)
             
             # به‌روزرسانی آمار
             self.stats_label.setText(
                 f"تعداد تراکنش‌ها: {len(transactions)} | "
                 f"مجموع واریزها: {total_deposits:,.0f} تومان | "
-                f"مجموع برداشت‌ها: {total_withdrawals:,.0f} تومان"
+                f"مجموع برداشت‌ها: {total_withdrawals:,.0f} تومان | "
+                f"مانده ابتدای دوره: {opening['balance_toman']:,.0f} تومان | "
+                f"مانده پایان دوره: {closing['balance_toman']:,.0f} تومان"
             )
             
         except Exception as e:
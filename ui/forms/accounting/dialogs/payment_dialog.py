@@ -11,6 +11,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QDate, Signal
 from PySide6.QtGui import QFont
 
+from database import account_ledger
+
 
 class PaymentDialog(QDialog):
     """دیالوگ ثبت پرداخت برای فاکتور"""
@@ -377,17 +379,18 @@ class PaymentDialog(QDialog):
                     payment_data['invoice_id']
                 )
                 
-                self.data_manager.db.execute_query(transaction_query, params)
-                
-                # 3. بروزرسانی موجودی حساب
-                update_balance_query = """
-                UPDATE Accounts 
-                SET current_balance = current_balance + ? 
-                WHERE id = ?
-                """
-                
-                self.data_manager.db.execute_query(update_balance_query, 
-                    (amount_rial, account_id))
+                db = self.data_manager.db
+                with db.transaction():
+                    db.execute_query(transaction_query, params)
+                    transaction = db.fetch_one(
+                        "SELECT id, transaction_date FROM AccountingTransactions WHERE id = last_insert_rowid()"
+                    )
+                    
+                    # 3. بروزرسانی موجودی حساب و ثبت در دفتر موجودی
+                    account_ledger.post(
+                        db, account_id, amount_rial,
+                        transaction['transaction_date'], transaction['id']
+                    )
             
             return True
             
@@ -17,6 +17,7 @@ import locale
 
 # وارد کردن ویجت تاریخ شمسی
 from utils.jalali_date_widget import JalaliDateInput
+from database import date_filters, daily_summaries
 
 
 class DailySummaryForm(QWidget):
@@ -429,34 +430,14 @@ class DailySummaryForm(QWidget):
     def load_summary_stats(self, date_str: str):
         """بارگذاری آمار کلیدی - نسخه اصلاح شده"""
         try:
-            # مجموع دریافتی‌ها
-            income_query = """
-            SELECT SUM(amount) as total 
-            FROM AccountingTransactions 
-            WHERE transaction_type = 'دریافت' 
-            AND DATE(transaction_date) = ?
-            """
-            income_result = self.data_manager.db.fetch_one(income_query, (date_str,))
-            income_total = income_result.get('total', 0) if income_result else 0
-            
-            # مجموع پرداختی‌ها
-            expense_query = """
-            SELECT SUM(amount) as total 
-            FROM AccountingTransactions 
-            WHERE transaction_type = 'پرداخت' 
-            AND DATE(transaction_date) = ?
-            """
-            expense_result = self.data_manager.db.fetch_one(expense_query, (date_str,))
-            expense_total = expense_result.get('total', 0) if expense_result else 0
-            
-            # تعداد تراکنش‌ها
-            count_query = """
-            SELECT COUNT(*) as count 
-            FROM AccountingTransactions 
-            WHERE DATE(transaction_date) = ?
-            """
-            count_result = self.data_manager.db.fetch_one(count_query, (date_str,))
-            transaction_count = count_result.get('count', 0) if count_result else 0
+            # مجموع دریافتی‌ها، پرداختی‌ها و تعداد تراکنش‌ها از خلاصه روزانه
+            summary = daily_summaries.transaction_summary(
+                self.data_manager.db, *date_filters.day_bounds(date_str)
+            )
+            totals = {item['transaction_type']: item['total_amount'] or 0 for item in summary}
+            income_total = totals.get('دریافت', 0)
+            expense_total = totals.get('پرداخت', 0)
+            transaction_count = sum(item['count'] for item in summary)
             
             # محاسبه مانده روز
             daily_balance = income_total - expense_total
@@ -513,10 +494,12 @@ class DailySummaryForm(QWidget):
             FROM AccountingTransactions t
             LEFT JOIN Accounts a ON t.from_account_id = a.id
             WHERE t.transaction_type = 'دریافت' 
-            AND DATE(t.transaction_date) = ?
+            AND t.transaction_date >= ? AND t.transaction_date < ?
             ORDER BY t.created_at DESC
             """
-            income_details = self.data_manager.db.fetch_all(income_details_query, (date_str,))
+            income_details = self.data_manager.db.fetch_all(
+                income_details_query, date_filters.day_bounds(date_str)
+            )
             
             self.income_table.setRowCount(len(income_details))
             
@@ -572,10 +555,12 @@ class DailySummaryForm(QWidget):
             FROM AccountingTransactions t
             LEFT JOIN Accounts a ON t.from_account_id = a.id
             WHERE t.transaction_type = 'پرداخت' 
-            AND DATE(t.transaction_date) = ?
+            AND t.transaction_date >= ? AND t.transaction_date < ?
             ORDER BY t.created_at DESC
             """
-            expense_details = self.data_manager.db.fetch_all(expense_details_query, (date_str,))
+            expense_details = self.data_manager.db.fetch_all(
+                expense_details_query, date_filters.day_bounds(date_str)
+            )
             
             self.expense_table.setRowCount(len(expense_details))
             
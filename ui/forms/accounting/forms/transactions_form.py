@@ -12,6 +12,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QDate
 from PySide6.QtGui import QColor, QFont, QIcon
+from ui.widgets.record_table import RecordTableView, TableColumn, ROW_NUMBER
 import jdatetime
 from datetime import datetime, timedelta
 import json
@@ -144,12 +145,31 @@ class TransactionsForm(QWidget):
     transaction_added = Signal(dict)
     transaction_deleted = Signal(int)
     
+    # رنگ‌بندی ستون نوع تراکنش (سایر انواع: بنفش)
+    TYPE_COLORS = {
+        "دریافت": '#27ae60',
+        "پرداخت": '#e74c3c',
+        "انتقال": '#3498db',
+        "سود": '#f39c12',
+    }
+    
+    # رنگ‌بندی ستون وضعیت (سایر وضعیت‌ها: خاکستری)
+    STATUS_COLORS = {
+        "انجام شده": '#27ae60',
+        "لغو شده": '#e74c3c',
+        "در انتظار": '#f39c12',
+    }
+    
     def __init__(self, data_manager):
         super().__init__()
         self.data_manager = data_manager
         self.transaction_manager = data_manager.transaction_manager
         self.selected_transaction_id = None
         
+        # فیلترها و مرتب‌سازی فعلی لیست (سمت دیتابیس)
+        self.current_filters = {}
+        self.current_sort = None
+        
         # 🔴 **راست‌چین کردن کامل**
         self.setLayoutDirection(Qt.RightToLeft)
         
@@ -562,51 +582,41 @@ class TransactionsForm(QWidget):
         table_group = QGroupBox("لیست تراکنش‌ها")
         table_layout = QVBoxLayout()
         
-        self.transactions_table = QTableWidget()
+        center = Qt.AlignCenter
+        self.transactions_table = RecordTableView([
+            TableColumn("ردیف", ROW_NUMBER, width=60),
+            TableColumn("کد تراکنش", 'id', width=100,
+                        text=lambda trans: f"TRX{trans.get('id', 0):06d}"),
+            TableColumn("تاریخ", 'transaction_date', width=110,
+                        text=lambda trans: trans.get('transaction_date_shamsi', '')),
+            TableColumn("نوع", 'transaction_type', align=center, width=100,
+                        foreground=lambda trans: self.TYPE_COLORS.get(trans.get('transaction_type', ''), '#9b59b6')),
+            TableColumn("از حساب", 'from_account_name',
+                        text=lambda trans: trans.get('from_account_name', '---')),
+            TableColumn("به حساب", 'to_account_name',
+                        text=lambda trans: trans.get('to_account_name', '---')),
+            TableColumn("مبلغ (تومان)", 'amount_toman', align=Qt.AlignRight | Qt.AlignVCenter, width=150,
+                        text=lambda trans: f"{trans.get('amount_toman', 0):,.0f} تومان",
+                        foreground=self.amount_color),
+            TableColumn("شرح", 'description', text=self.short_description,
+                        tooltip=lambda trans: trans.get('description', '')),
+            TableColumn("مرجع", width=120, text=self.reference_text),
+            TableColumn("وضعیت", 'status', align=center, width=100,
+                        text=lambda trans: trans.get('status', 'انجام شده'),
+                        foreground=lambda trans: self.STATUS_COLORS.get(trans.get('status', 'انجام شده'), '#7f8c8d')),
+            TableColumn("عملیات", width=150, actions=[
+                ('view', "👁️ مشاهده", "مشاهده جزئیات تراکنش"),
+                ('reverse', "↩️ برگشت", "ایجاد تراکنش معکوس"),
+            ]),
+        ], self)
         self.transactions_table.setObjectName("transactions_table")
-        self.transactions_table.setColumnCount(11)
-        self.transactions_table.setHorizontalHeaderLabels([
-            "ردیف",
-            "کد تراکنش",
-            "تاریخ",
-            "نوع",
-            "از حساب", 
-            "به حساب",
-            "مبلغ (تومان)",
-            "شرح",
-            "مرجع",
-            "وضعیت",
-            "عملیات"
-        ])
-        
-        # تنظیمات جدول
-        self.transactions_table.setAlternatingRowColors(True)
-        self.transactions_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.transactions_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.transactions_table.horizontalHeader().setStretchLastSection(True)
         
         # تنظیم عرض ستون‌ها
         header = self.transactions_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Fixed)       # ردیف
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # کد
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # تاریخ
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # نوع
         header.setSectionResizeMode(4, QHeaderView.Stretch)     # از حساب
         header.setSectionResizeMode(5, QHeaderView.Stretch)     # به حساب
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # مبلغ
         header.setSectionResizeMode(7, QHeaderView.Stretch)     # شرح
-        header.setSectionResizeMode(8, QHeaderView.ResizeToContents)  # مرجع
-        header.setSectionResizeMode(9, QHeaderView.ResizeToContents)  # وضعیت
-        header.setSectionResizeMode(10, QHeaderView.ResizeToContents) # عملیات
-        
-        self.transactions_table.setColumnWidth(0, 60)   # ردیف
-        self.transactions_table.setColumnWidth(1, 100)  # کد
-        self.transactions_table.setColumnWidth(2, 110)  # تاریخ
-        self.transactions_table.setColumnWidth(3, 100)  # نوع
-        self.transactions_table.setColumnWidth(6, 150)  # مبلغ
-        self.transactions_table.setColumnWidth(8, 120)  # مرجع
-        self.transactions_table.setColumnWidth(9, 100)  # وضعیت
-        self.transactions_table.setColumnWidth(10, 150) # عملیات
         
         table_layout.addWidget(self.transactions_table)
         
@@ -651,8 +661,11 @@ class TransactionsForm(QWidget):
         tab.setLayout(layout)
         
         # اتصال سیگنال‌ها
-        self.transactions_table.itemSelectionChanged.connect(self.on_transaction_selected)
-        self.transactions_table.doubleClicked.connect(self.view_transaction_details)
+        self.transactions_table.selection_changed.connect(self.on_transaction_selected)
+        self.transactions_table.record_activated.connect(
+            lambda trans: self.view_transaction_details(trans.get('id')))
+        self.transactions_table.action_triggered.connect(self.on_table_action)
+        self.transactions_table.set_sort_handler(self.on_sort_requested)
         
         return tab
     
@@ -848,220 +861,57 @@ class TransactionsForm(QWidget):
         except Exception as e:
             print(f"⚠️ خطا در بارگذاری حساب‌ها برای فیلتر: {e}")
     
+    # کلید ستون جدول ← مرتب‌سازی سمت دیتابیس
+    SORT_KEYS = {
+        'transaction_date': 'date',
+        'amount_toman': 'amount',
+        'id': 'id',
+    }
+    
     def load_transactions(self, filters=None):
         """بارگذاری تراکنش‌ها از دیتابیس با استفاده از TransactionManager"""
+        filters = dict(filters or {})
+        if filters.get('transaction_type') == "همه انواع":
+            filters['transaction_type'] = None
+        self.current_filters = filters
+        self.show_transactions()
+    
+    def show_transactions(self):
+        """
+        نمایش تراکنش‌های فیلتر شده
+        
+        ردیف‌ها صفحه به صفحه و هنگام اسکرول خوانده می‌شوند و آمار با یک کوئری
+        تجمعی محاسبه می‌شود؛ کل جدول هیچ‌وقت در حافظه خوانده نمی‌شود.
+        """
         try:
             self.status_label.setText("در حال بارگذاری تراکنش‌ها...")
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(10)
             
-            # استفاده از TransactionManager
-            transactions = []
-            
-            if filters:
-                # استخراج پارامترهای فیلتر
-                transaction_type = filters.get('transaction_type')
-                if transaction_type == "همه انواع":
-                    transaction_type = None
-                
-                # تاریخ‌ها (شمسی)
-                start_date = filters.get('start_date')
-                end_date = filters.get('end_date')
-                
-                # دریافت تراکنش‌ها با فیلتر
-                transactions = self.transaction_manager.get_all_transactions(
-                    start_date=start_date,
-                    end_date=end_date,
-                    transaction_type=transaction_type
-                )
-            else:
-                # دریافت همه تراکنش‌ها
-                transactions = self.transaction_manager.get_all_transactions()
+            # پر کردن جدول (متن و رنگ سلول‌ها هنگام نمایش ساخته می‌شود)
+            self.transactions_table.set_rows(self.transaction_manager.iter_transactions(
+                self.current_filters, sort=self.current_sort
+            ))
             
             self.progress_bar.setValue(50)
             
-            # پاک کردن جدول
-            self.transactions_table.setRowCount(0)
-            
-            # متغیرهای آمار
-            total_income = 0
-            total_expense = 0
-            transfer_count = 0
-            
-            # پر کردن جدول
-            for row, transaction in enumerate(transactions):
-                self.transactions_table.insertRow(row)
-                
-                # شماره ردیف
-                self.transactions_table.setItem(row, 0, 
-                    QTableWidgetItem(str(row + 1)))
-                
-                # کد تراکنش
-                trans_id = transaction.get('id', '')
-                self.transactions_table.setItem(row, 1, 
-                    QTableWidgetItem(f"TRX{trans_id:06d}"))
-                
-                # تاریخ شمسی
-                trans_date = transaction.get('transaction_date_shamsi', '')
-                self.transactions_table.setItem(row, 2, 
-                    QTableWidgetItem(trans_date))
-                
-                # نوع تراکنش
-                trans_type = transaction.get('transaction_type', '')
-                type_item = QTableWidgetItem(trans_type)
-                
-                # رنگ‌بندی بر اساس نوع
-                if trans_type == "دریافت":
-                    type_item.setForeground(QColor('#27ae60'))
-                    total_income += transaction.get('amount_toman', 0)
-                elif trans_type == "پرداخت":
-                    type_item.setForeground(QColor('#e74c3c'))
-                    total_expense += transaction.get('amount_toman', 0)
-                elif trans_type == "انتقال":
-                    type_item.setForeground(QColor('#3498db'))
-                    transfer_count += 1
-                elif trans_type == "سود":
-                    type_item.setForeground(QColor('#f39c12'))
-                else:
-                    type_item.setForeground(QColor('#9b59b6'))
-                
-                type_item.setTextAlignment(Qt.AlignCenter)
-                self.transactions_table.setItem(row, 3, type_item)
-                
-                # از حساب
-                from_account = transaction.get('from_account_name', '---')
-                self.transactions_table.setItem(row, 4, 
-                    QTableWidgetItem(from_account))
-                
-                # به حساب
-                to_account = transaction.get('to_account_name', '---')
-                self.transactions_table.setItem(row, 5, 
-                    QTableWidgetItem(to_account))
-                
-                # مبلغ (تومان)
-                amount = transaction.get('amount_toman', 0)
-                amount_item = QTableWidgetItem(f"{amount:,.0f} تومان")
-                amount_item.setTextAlignment(Qt.AlignRight)
-                
-                # رنگ‌بندی مبلغ
-                if trans_type == "دریافت":
-                    amount_item.setForeground(QColor('#27ae60'))
-                elif trans_type == "پرداخت":
-                    amount_item.setForeground(QColor('#e74c3c'))
-                else:
-                    amount_item.setForeground(QColor('#f39c12'))
-                
-                self.transactions_table.setItem(row, 6, amount_item)
-                
-                # شرح
-                description = transaction.get('description', '')
-                self.transactions_table.setItem(row, 7, 
-                    QTableWidgetItem(description[:50] + "..." if len(description) > 50 else description))
-                
-                # مرجع
-                reference_type = transaction.get('reference_type', '')
-                reference_id = transaction.get('reference_id', '')
-                reference_text = ""
-                
-                if reference_type and reference_id:
-                    reference_text = f"{reference_type} #{reference_id}"
-                elif reference_id:
-                    reference_text = f"#{reference_id}"
-                else:
-                    reference_text = "---"
-                
-                self.transactions_table.setItem(row, 8, 
-                    QTableWidgetItem(reference_text))
-                
-                # وضعیت
-                status = transaction.get('status', 'انجام شده')
-                status_item = QTableWidgetItem(status)
-                
-                if status == "انجام شده":
-                    status_item.setForeground(QColor('#27ae60'))
-                elif status == "لغو شده":
-                    status_item.setForeground(QColor('#e74c3c'))
-                elif status == "در انتظار":
-                    status_item.setForeground(QColor('#f39c12'))
-                else:
-                    status_item.setForeground(QColor('#7f8c8d'))
-                
-                status_item.setTextAlignment(Qt.AlignCenter)
-                self.transactions_table.setItem(row, 9, status_item)
-                
-                # عملیات
-                btn_layout = QHBoxLayout()
-                btn_widget = QWidget()
-                
-                btn_view = QPushButton("👁️ مشاهده")
-                btn_view.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498db;
-                        color: white;
-                        border: none;
-                        padding: 5px 10px;
-                        border-radius: 3px;
-                        font-size: 9pt;
-                        min-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980b9;
-                    }
-                """)
-                btn_view.clicked.connect(lambda checked, tid=transaction['id']: self.view_transaction_details(tid))
-                
-                btn_reverse = QPushButton("↩️ برگشت")
-                btn_reverse.setStyleSheet("""
-                    QPushButton {
-                        background-color: #f39c12;
-                        color: white;
-                        border: none;
-                        padding: 5px 10px;
-                        border-radius: 3px;
-                        font-size: 9pt;
-                        min-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #d68910;
-                    }
-                """)
-                btn_reverse.clicked.connect(lambda checked, tid=transaction['id']: self.reverse_selected_transaction(tid))
-                
-                btn_layout.addWidget(btn_view)
-                btn_layout.addWidget(btn_reverse)
-                btn_layout.setContentsMargins(2, 2, 2, 2)
-                btn_widget.setLayout(btn_layout)
-                
-                self.transactions_table.setCellWidget(row, 10, btn_widget)
-                
-                # ذخیره شناسه تراکنش در ردیف
-                for col in range(self.transactions_table.columnCount()):
-                    item = self.transactions_table.item(row, col)
-                    if item:
-                        item.setData(Qt.UserRole, transaction.get('id'))
-            
-            self.progress_bar.setValue(90)
-            
             # به‌روزرسانی آمار
-            net_balance = total_income - total_expense
-            
-            self.summary_label.setText(
-                f"📊 {len(transactions)} تراکنش | "
-                f"📥 {total_income:,.0f} تومان | "
-                f"📤 {total_expense:,.0f} تومان | "
-                f"💰 خالص: {net_balance:,.0f} تومان | "
-                f"🔄 {transfer_count} انتقال"
-            )
+            summary = self.transaction_manager.get_transactions_summary(self.current_filters)
+            self.update_summary_label(summary)
             
             # به‌روزرسانی آمار کلی
             if hasattr(self, 'stats_labels'):
-                self.update_statistics_labels(transactions, total_income, total_expense, net_balance)
+                self.update_statistics_labels(summary)
             
             self.progress_bar.setValue(100)
-            self.status_label.setText(f"✅ {len(transactions)} تراکنش بارگذاری شد")
+            count = summary.get('count', 0)
+            if self.current_filters.get('search'):
+                self.status_label.setText(f"🔍 {count:,} تراکنش یافت شد")
+            else:
+                self.status_label.setText(f"✅ {count:,} تراکنش")
             self.progress_bar.setVisible(False)
             
-            print(f"✅ {len(transactions)} تراکنش بارگذاری شد (از TransactionManager)")
+            print(f"✅ {count} تراکنش (نمایش {self.transactions_table.record_count()} ردیف اول)")
             
         except Exception as e:
             self.progress_bar.setVisible(False)
@@ -1069,6 +919,17 @@ class TransactionsForm(QWidget):
             print(f"❌ خطا در بارگذاری تراکنش‌ها: {e}")
             QMessageBox.critical(self, "خطا", f"خطا در بارگذاری تراکنش‌ها:\n\n{str(e)}")
     
+    def on_sort_requested(self, key, descending):
+        """مرتب‌سازی با کلیک سرستون؛ ستون‌های بدون مرتب‌سازی دیتابیسی False"""
+        sort_name = self.SORT_KEYS.get(key)
+        if sort_name is None:
+            return False
+        self.current_sort = (sort_name, descending)
+        self.transactions_table.set_rows(self.transaction_manager.iter_transactions(
+            self.current_filters, sort=self.current_sort
+        ))
+        return True
+    
     def convert_jalali_to_gregorian(self, jalali_date):
         """تبدیل تاریخ شمسی به میلادی"""
         try:
@@ -1088,21 +949,21 @@ class TransactionsForm(QWidget):
         
         return None
     
-    def update_statistics_labels(self, transactions, total_income, total_expense, net_balance):
-        """به‌روزرسانی برچسب‌های آمار"""
+    def update_statistics_labels(self, summary):
+        """به‌روزرسانی برچسب‌های آمار از خروجی get_transactions_summary"""
         try:
-            # محاسبه آمار
-            total_count = len(transactions)
-            income_count = len([t for t in transactions if t.get('transaction_type') == 'دریافت'])
-            expense_count = len([t for t in transactions if t.get('transaction_type') == 'پرداخت'])
+            total_count = summary.get('count', 0)
+            total_income = summary.get('income', 0)
+            total_expense = summary.get('expense', 0)
+            net_balance = summary.get('net', 0)
+            income_count = summary.get('income_count', 0)
+            expense_count = summary.get('expense_count', 0)
             
             avg_income = total_income / income_count if income_count > 0 else 0
             avg_expense = total_expense / expense_count if expense_count > 0 else 0
             
-            # پیدا کردن بیشترین و کمترین مبلغ
-            amounts = [t.get('amount_toman', 0) for t in transactions if t.get('amount_toman', 0) > 0]
-            max_amount = max(amounts) if amounts else 0
-            min_amount = min(amounts) if amounts else 0
+            max_amount = summary.get('max_amount', 0)
+            min_amount = summary.get('min_amount', 0)
             
             # به‌روزرسانی برچسب‌ها
             self.stats_labels['total_transactions'].setText(f"{total_count:,}")
@@ -1187,10 +1048,9 @@ class TransactionsForm(QWidget):
     
     def on_transaction_selected(self):
         """هنگام انتخاب تراکنش از جدول"""
-        selected_items = self.transactions_table.selectedItems()
-        if selected_items:
-            first_item = selected_items[0]
-            self.selected_transaction_id = first_item.data(Qt.UserRole)
+        selected = self.transactions_table.selected_record()
+        if selected:
+            self.selected_transaction_id = selected.get('id')
     
     def on_search_changed(self, text):
         """هنگام تغییر متن جستجو"""
@@ -1198,108 +1058,54 @@ class TransactionsForm(QWidget):
             self.search_transactions()
     
     def search_transactions(self):
-        """جستجوی تراکنش‌ها"""
+        """جستجوی تراکنش‌ها (در دیتابیس و روی فیلترهای فعلی)"""
         search_text = self.search_input.text().strip()
         if not search_text:
             return
         
-        try:
-            # جستجو با استفاده از TransactionManager
-            transactions = self.transaction_manager.get_all_transactions()
-            
-            # فیلتر کردن نتایج بر اساس متن جستجو
-            filtered_transactions = []
-            for transaction in transactions:
-                # جستجو در فیلدهای مختلف
-                search_fields = [
-                    transaction.get('description', ''),
-                    transaction.get('transaction_type', ''),
-                    transaction.get('from_account_name', ''),
-                    transaction.get('to_account_name', ''),
-                    f"TRX{transaction.get('id', ''):06d}"
-                ]
-                
-                # بررسی وجود متن جستجو در هر یک از فیلدها
-                found = any(search_text.lower() in str(field).lower() for field in search_fields)
-                if found:
-                    filtered_transactions.append(transaction)
-            
-            # به‌روزرسانی جدول
-            self.update_table_with_data(filtered_transactions)
-            
-            self.status_label.setText(f"🔍 {len(filtered_transactions)} تراکنش یافت شد")
-            
-        except Exception as e:
-            print(f"❌ خطا در جستجو: {e}")
+        self.current_filters = dict(self.current_filters, search=search_text)
+        self.show_transactions()
     
-    def update_table_with_data(self, transactions):
-        """به‌روزرسانی جدول با داده‌های جدید"""
-        self.transactions_table.setRowCount(0)
-        
-        # متغیرهای آمار
-        total_income = 0
-        total_expense = 0
-        transfer_count = 0
-        
-        for row, transaction in enumerate(transactions):
-            self.transactions_table.insertRow(row)
-            
-            # شماره ردیف
-            self.transactions_table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            
-            # کد تراکنش
-            trans_id = transaction.get('id', '')
-            self.transactions_table.setItem(row, 1, QTableWidgetItem(f"TRX{trans_id:06d}"))
-            
-            # تاریخ شمسی
-            trans_date = transaction.get('transaction_date_shamsi', '')
-            self.transactions_table.setItem(row, 2, QTableWidgetItem(trans_date))
-            
-            # نوع تراکنش
-            trans_type = transaction.get('transaction_type', '')
-            type_item = QTableWidgetItem(trans_type)
-            
-            # رنگ‌بندی بر اساس نوع
-            if trans_type == "دریافت":
-                type_item.setForeground(QColor('#27ae60'))
-                total_income += transaction.get('amount_toman', 0)
-            elif trans_type == "پرداخت":
-                type_item.setForeground(QColor('#e74c3c'))
-                total_expense += transaction.get('amount_toman', 0)
-            elif trans_type == "انتقال":
-                type_item.setForeground(QColor('#3498db'))
-                transfer_count += 1
-            elif trans_type == "سود":
-                type_item.setForeground(QColor('#f39c12'))
-            else:
-                type_item.setForeground(QColor('#9b59b6'))
-            
-            type_item.setTextAlignment(Qt.AlignCenter)
-            self.transactions_table.setItem(row, 3, type_item)
-            
-            # بقیه سلول‌ها
-            self.transactions_table.setItem(row, 4, QTableWidgetItem(transaction.get('from_account_name', '---')))
-            self.transactions_table.setItem(row, 5, QTableWidgetItem(transaction.get('to_account_name', '---')))
-            self.transactions_table.setItem(row, 6, QTableWidgetItem(f"{transaction.get('amount_toman', 0):,.0f} تومان"))
-            self.transactions_table.setItem(row, 7, QTableWidgetItem(transaction.get('description', '')[:50]))
-            
-            # ذخیره شناسه
-            for col in range(self.transactions_table.columnCount()):
-                item = self.transactions_table.item(row, col)
-                if item:
-                    item.setData(Qt.UserRole, transaction.get('id'))
-        
-        # به‌روزرسانی آمار
-        net_balance = total_income - total_expense
-        
+    def update_summary_label(self, summary):
+        """آمار نوار پایین جدول از خروجی get_transactions_summary"""
         self.summary_label.setText(
-            f"📊 {len(transactions)} تراکنش | "
-            f"📥 {total_income:,.0f} تومان | "
-            f"📤 {total_expense:,.0f} تومان | "
-            f"💰 خالص: {net_balance:,.0f} تومان | "
-            f"🔄 {transfer_count} انتقال"
+            f"📊 {summary.get('count', 0):,} تراکنش | "
+            f"📥 {summary.get('income', 0):,.0f} تومان | "
+            f"📤 {summary.get('expense', 0):,.0f} تومان | "
+            f"💰 خالص: {summary.get('net', 0):,.0f} تومان | "
+            f"🔄 {summary.get('transfer_count', 0)} انتقال"
         )
     
+    # ---------- ستون‌های جدول ----------
+    
+    def amount_color(self, transaction):
+        trans_type = transaction.get('transaction_type', '')
+        if trans_type == "دریافت":
+            return '#27ae60'
+        if trans_type == "پرداخت":
+            return '#e74c3c'
+        return '#f39c12'
+    
+    def short_description(self, transaction):
+        description = transaction.get('description', '') or ''
+        return description[:50] + "..." if len(description) > 50 else description
+    
+    def reference_text(self, transaction):
+        reference_type = transaction.get('reference_type', '')
+        reference_id = transaction.get('reference_id', '')
+        if reference_type and reference_id:
+            return f"{reference_type} #{reference_id}"
+        if reference_id:
+            return f"#{reference_id}"
+        return "---"
+    
+    def on_table_action(self, action, transaction):
+        """دکمه‌های ستون عملیات"""
+        if action == 'view':
+            self.view_transaction_details(transaction['id'])
+        elif action == 'reverse':
+            self.reverse_selected_transaction(transaction['id'])
+    
     # ---------- عملیات اصلی ----------
     
     def add_receipt(self):
@@ -1611,16 +1417,9 @@ class TransactionsForm(QWidget):
     def calculate_statistics(self):
         """محاسبه آمار کلی"""
         try:
-            # دریافت همه تراکنش‌ها
-            transactions = self.transaction_manager.get_all_transactions()
-            
-            # محاسبه آمار
-            total_income = sum(t.get('amount_toman', 0) for t in transactions if t.get('transaction_type') == 'دریافت')
-            total_expense = sum(t.get('amount_toman', 0) for t in transactions if t.get('transaction_type') == 'پرداخت')
-            net_balance = total_income - total_expense
-            
-            # به‌روزرسانی برچسب‌ها
-            self.update_statistics_labels(transactions, total_income, total_expense, net_balance)
+            # آمار همه تراکنش‌ها با یک کوئری تجمعی
+            summary = self.transaction_manager.get_transactions_summary()
+            self.update_statistics_labels(summary)
             
             self.status_label.setText("✅ آمار محاسبه شد")
             
@@ -14,8 +14,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QDate, QTimer
 from PySide6.QtGui import QFont, QColor, QPalette
-import jdatetime
-from datetime import datetime
+
+from database import jalali_calendar
+from ui.widgets.record_table import RecordTableView
 
 class BaseInventoryForm(QWidget):
     """فرم پایه انبار با تم مشکی کامل و راست‌چین"""
@@ -63,41 +64,6 @@ class BaseInventoryForm(QWidget):
         self.set_rtl_layout()
         #self.setup_ui()
 
-    def format_date(self, date_str):
-        """فرمت کردن تاریخ (تبدیل میلادی به شمسی)"""
-        try:
-            if not date_str:
-                return ""
-            
-            # اگر تاریخ شمسی است
-            if isinstance(date_str, str) and ('/' in date_str or '-' in date_str):
-                # بررسی اگر تاریخ شمسی است
-                try:
-                    parts = date_str.replace('-', '/').split('/')
-                    if len(parts) == 3:
-                        year, month, day = map(int, parts)
-                        # اگر تاریخ شمسی است (سال بین 1300 تا 1500)
-                        if 1300 <= year <= 1500:
-                            jalali_date = jdatetime.date(year, month, day)
-                            return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
-                except:
-                    pass
-            
-            # تبدیل میلادی به شمسی
-            if isinstance(date_str, str):
-                # فرمت‌های مختلف تاریخ میلادی
-                for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"]:
-                    try:
-                        date_obj = datetime.strptime(date_str, fmt)
-                        jalali_date = jdatetime.date.fromgregorian(date=date_obj.date())
-                        return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
-                    except:
-                        continue
-            
-            return str(date_str)
-        except:
-            return date_str
-        
     def create_stat_card(self, title, icon, color, value):
         """ایجاد کارت آمار"""
         card = QFrame()
@@ -263,7 +229,7 @@ class BaseInventoryForm(QWidget):
             }
             
             /* جدول‌ها */
-            QTableWidget {
+            QTableView {
                 background-color: #111111;
                 alternate-background-color: #0a0a0a;
                 gridline-color: #333333;
@@ -273,12 +239,12 @@ class BaseInventoryForm(QWidget):
                 selection-color: white;
             }
             
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #222222;
             }
             
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #1e90ff;
                 color: white;
             }
@@ -611,6 +577,15 @@ class BaseInventoryForm(QWidget):
         
         return table
     
+    def create_record_table(self, columns):
+        """
+        ایجاد جدول مبتنی بر مدل برای لیست‌های بزرگ
+        
+        columns لیست TableColumn است؛ داده با table.set_rows(rows) نمایش داده می‌شود
+        و سلول‌ها فقط هنگام دیده شدن قالب‌بندی می‌شوند.
+        """
+        return RecordTableView(columns, self)
+    
     def format_currency(self, value):
         """قالب‌بندی ارز به صورت تومان"""
         try:
@@ -638,29 +613,27 @@ class BaseInventoryForm(QWidget):
             return 0
     
     def format_date(self, date_str):
-        """قالب‌بندی تاریخ شمسی"""
-        if not date_str:
-            return ""
-        
-        try:
-            # اگر تاریخ میلادی است، به شمسی تبدیل کن
-            if '-' in date_str and len(date_str.split('-')) == 3:
-                year, month, day = map(int, date_str.split('-'))
-                jalali_date = jdatetime.date.fromgregorian(year=year, month=month, day=day)
-                return jalali_date.strftime("%Y/%m/%d")
-            
-            # اگر تاریخ شمسی است
-            if '/' in date_str:
-                parts = date_str.replace('-', '/').split('/')
-                if len(parts) == 3:
-                    year, month, day = map(int, parts)
-                    jalali_date = jdatetime.date(year, month, day)
-                    return jalali_date.strftime("%Y/%m/%d")
-                    
-        except Exception as e:
-            print(f"خطا در تبدیل تاریخ: {e}")
-        
-        return date_str
+        """قالب‌بندی تاریخ شمسی (تاریخ میلادی به شمسی تبدیل می‌شود)"""
+        return jalali_calendar.to_jalali(date_str)
+    
+    def miladi_to_shamsi(self, miladi_date_str, format_str="%Y/%m/%d"):
+        """تبدیل تاریخ میلادی به شمسی"""
+        return jalali_calendar.to_jalali(miladi_date_str, format_str)
+    
+    def miladi_to_shamsi_many(self, miladi_dates, format_str="%Y/%m/%d"):
+        """تبدیل دسته‌ای یک ستون تاریخ میلادی به شمسی"""
+        return jalali_calendar.to_jalali_many(miladi_dates, format_str)
+    
+    def shamsi_to_miladi(self, shamsi_date_str, format_str="%Y-%m-%d"):
+        """تبدیل تاریخ شمسی به میلادی (تاریخ نامعتبر: امروز)"""
+        if not shamsi_date_str:
+            return None
+        
+        miladi = jalali_calendar.to_gregorian(shamsi_date_str, format_str)
+        if miladi is None:
+            print(f"خطا در تبدیل شمسی به میلادی: {shamsi_date_str}")
+            return QDate.currentDate().toString("yyyy-MM-dd")
+        return miladi
     
     def setup_live_search(self, search_widget, callback, delay=300):
         """تنظیم جستجوی زنده برای ویجت"""
@@ -15,12 +15,16 @@ class LowStockDialog(QDialog):
     
     order_created = Signal(list)  # سیگنال ایجاد سفارش
     
-    def __init__(self, parent=None):
+    def __init__(self, data_manager=None, parent=None):
         super().__init__(parent)
+        self.data_manager = data_manager
         self.setWindowTitle("هشدار موجودی کم")
         self.setMinimumSize(800, 500)
         self.setup_ui()
         
+        if self.data_manager:
+            self.load_from_database()
+        
     def setup_ui(self):
         layout = QVBoxLayout()
         
@@ -186,6 +190,13 @@ class LowStockDialog(QDialog):
         self.low_stock_items = []
         self.selected_items = []
     
+    def load_from_database(self):
+        """بارگذاری قطعات زیر حداقل موجودی از جدول PartStock"""
+        parts = self.data_manager.part.get_low_stock_parts()
+        for part in parts:
+            part['quantity'] = part['total_quantity']
+        self.load_low_stock_items(parts)
+    
     def load_low_stock_items(self, items):
         """بارگذاری آیتم‌های با موجودی کم"""
         self.low_stock_items = items
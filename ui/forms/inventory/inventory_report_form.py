@@ -28,41 +28,6 @@ class InventoryReportForm(BaseInventoryForm):
         self.setup_ui()
         self.load_initial_data()
 
-    def format_date(self, date_str):
-        """فرمت کردن تاریخ (تبدیل میلادی به شمسی)"""
-        try:
-            if not date_str:
-                return ""
-            
-            # اگر تاریخ شمسی است
-            if isinstance(date_str, str) and ('/' in date_str or '-' in date_str):
-                # بررسی اگر تاریخ شمسی است
-                try:
-                    parts = date_str.replace('-', '/').split('/')
-                    if len(parts) == 3:
-                        year, month, day = map(int, parts)
-                        # اگر تاریخ شمسی است (سال بین 1300 تا 1500)
-                        if 1300 <= year <= 1500:
-                            jalali_date = jdatetime.date(year, month, day)
-                            return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
-                except:
-                    pass
-            
-            # تبدیل میلادی به شمسی
-            if isinstance(date_str, str):
-                # فرمت‌های مختلف تاریخ میلادی
-                for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"]:
-                    try:
-                        date_obj = datetime.strptime(date_str, fmt)
-                        jalali_date = jdatetime.date.fromgregorian(date=date_obj.date())
-                        return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
-                    except:
-                        continue
-            
-            return str(date_str)
-        except:
-            return date_str      
-
     def setup_ui(self):
         # هدر
         header_label = QLabel("📊 گزارش‌گیری انبار")
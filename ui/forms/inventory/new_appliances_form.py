@@ -3,14 +3,14 @@
 """
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QLineEdit, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox,
+    QHeaderView, QMessageBox,
     QGroupBox, QFormLayout, QSpinBox, QDoubleSpinBox,
     QTextEdit, QFrame, QCheckBox, QApplication, QInputDialog
 )
 from PySide6.QtCore import Qt, QDate, QTimer
-from PySide6.QtGui import QColor, QFont
+from PySide6.QtGui import QFont
 import jdatetime
 from datetime import datetime
 import re
@@ -19,11 +19,20 @@ from .base_inventory_form import BaseInventoryForm
 from .widgets.currency_converter import CurrencyConverter
 from .widgets.inventory_date_input import InventoryDateInput
 from .widgets.enhanced_combo import EnhancedComboBox
+from ui.widgets.record_table import TableColumn, ROW_NUMBER
 
 
 class NewAppliancesForm(BaseInventoryForm):
     """فرم مدیریت انبار لوازم خانگی نو - نسخه اصلاح شده"""
 
+    # رنگ ستون وضعیت
+    STATUS_COLORS = {
+        'موجود': '#27ae60',
+        'رزرو شده': '#3498db',
+        'ناموجود': '#e74c3c',
+        'فروخته شده': '#9b59b6',
+    }
+
     def __init__(self, parent=None):
         super().__init__("انبار لوازم خانگی نو", parent)
         self.current_edit_id = None
@@ -368,33 +377,32 @@ class NewAppliancesForm(BaseInventoryForm):
         """ایجاد بخش جدول نمایش لوازم"""
         table_group, table_layout = self.create_form_group("📋 لیست لوازم خانگی نو")
         
-        self.table = self.create_table([
-            "ردیف",
-            "نوع دستگاه",
-            "برند",
-            "مدل",
-            "شماره سریال",
-            "سال تولید",
-            "تعداد",
-            "قیمت خرید",
-            "قیمت فروش",
-            "وضعیت",
-            "تاریخ خرید",
-            "عملیات"
+        center = Qt.AlignCenter
+        self.table = self.create_record_table([
+            TableColumn("ردیف", ROW_NUMBER, align=center, width=60),
+            TableColumn("نوع دستگاه", 'device_type', width=120),
+            TableColumn("برند", 'brand', width=120),
+            TableColumn("مدل", 'model', width=150),
+            TableColumn("شماره سریال", 'serial_number', width=150),
+            TableColumn("سال تولید", 'production_year', align=center, width=90),
+            TableColumn("تعداد", 'quantity', align=center, width=80,
+                        background=self.stock_color,
+                        foreground=lambda item: 'white' if self.stock_color(item) else None),
+            TableColumn("قیمت خرید", 'purchase_price', align=Qt.AlignLeft, width=130,
+                        text=lambda item: self.format_currency(item.get('purchase_price', 0))),
+            TableColumn("قیمت فروش", 'sale_price', align=Qt.AlignLeft, width=130,
+                        text=lambda item: self.format_currency(item.get('sale_price', 0))),
+            TableColumn("وضعیت", 'status', align=center, width=100,
+                        background=lambda item: self.STATUS_COLORS.get(item.get('status', '')),
+                        foreground=lambda item: 'white'),
+            TableColumn("تاریخ خرید", 'purchase_date', align=center, width=110),
+            TableColumn("عملیات", actions=[
+                ('edit', "✏️", "ویرایش لوازم"),
+                ('delete', "🗑️", "حذف با ثبت تراکنش"),
+                ('soft_delete', "📝", "حذف نرم (تغییر وضعیت)"),
+            ]),
         ])
-        
-        # تنظیم عرض ستون‌ها
-        self.table.setColumnWidth(0, 60)   # ردیف
-        self.table.setColumnWidth(1, 120)  # نوع دستگاه
-        self.table.setColumnWidth(2, 120)  # برند
-        self.table.setColumnWidth(3, 150)  # مدل
-        self.table.setColumnWidth(4, 150)  # شماره سریال
-        self.table.setColumnWidth(5, 90)   # سال تولید
-        self.table.setColumnWidth(6, 80)   # تعداد
-        self.table.setColumnWidth(7, 130)  # قیمت خرید
-        self.table.setColumnWidth(8, 130)  # قیمت فروش
-        self.table.setColumnWidth(9, 100)  # وضعیت
-        self.table.setColumnWidth(10, 110) # تاریخ خرید
+        self.table.action_triggered.connect(self.on_table_action)
         
         # تنظیم حداقل ارتفاع
         self.table.setMinimumHeight(300)
@@ -450,7 +458,7 @@ class NewAppliancesForm(BaseInventoryForm):
         self.main_layout.addWidget(btn_group)
         
         # اتصال انتخاب جدول
-        self.table.itemSelectionChanged.connect(self.on_table_selection_changed)
+        self.table.selection_changed.connect(self.on_table_selection_changed)
 
     def create_summary_section(self):
         """ایجاد بخش خلاصه"""
@@ -629,10 +637,11 @@ class NewAppliancesForm(BaseInventoryForm):
                 
                 if warehouse_items:
                     self.all_data = []
-                    for item in warehouse_items:
-                        # تبدیل تاریخ میلادی به شمسی برای نمایش
-                        purchase_date_shamsi = self.miladi_to_shamsi(item.get('purchase_date', ''))
-                        
+                    # تبدیل دسته‌ای ستون تاریخ میلادی به شمسی برای نمایش
+                    purchase_dates = self.miladi_to_shamsi_many(
+                        item.get('purchase_date', '') for item in warehouse_items)
+                    
+                    for item, purchase_date_shamsi in zip(warehouse_items, purchase_dates):
                         data_item = {
                             'id': item.get('id'),
                             'device_type': item.get('device_type_name', 'نامشخص'),
@@ -672,111 +681,26 @@ class NewAppliancesForm(BaseInventoryForm):
             self.show_error(f"خطا در بارگذاری از دیتابیس: {str(e)}")
 
     def populate_table(self, data):
-        """پر کردن جدول با داده‌ها"""
-        self.table.setRowCount(len(data))
-        
-        for row, item in enumerate(data):
-            # ردیف
-            self.table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            self.table.item(row, 0).setTextAlignment(Qt.AlignCenter)
-            
-            # نوع دستگاه
-            self.table.setItem(row, 1, QTableWidgetItem(item.get('device_type', '')))
-            
-            # برند
-            self.table.setItem(row, 2, QTableWidgetItem(item.get('brand', '')))
-            
-            # مدل
-            self.table.setItem(row, 3, QTableWidgetItem(item.get('model', '')))
-            
-            # شماره سریال
-            self.table.setItem(row, 4, QTableWidgetItem(item.get('serial_number', '')))
-            
-            # سال تولید
-            year_item = QTableWidgetItem(str(item.get('production_year', '')))
-            year_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 5, year_item)
-            
-            # تعداد
-            quantity = item.get('quantity', 0)
-            qty_item = QTableWidgetItem(str(quantity))
-            qty_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ‌آمیزی تعداد کم
-            if quantity == 0:
-                qty_item.setBackground(QColor('#e74c3c'))
-                qty_item.setForeground(QColor('white'))
-            elif quantity <= 2:
-                qty_item.setBackground(QColor('#f39c12'))
-                qty_item.setForeground(QColor('white'))
-            
-            self.table.setItem(row, 6, qty_item)
-            
-            # قیمت خرید
-            purchase_price = item.get('purchase_price', 0)
-            purchase_item = QTableWidgetItem(self.format_currency(purchase_price))
-            purchase_item.setTextAlignment(Qt.AlignLeft)
-            self.table.setItem(row, 7, purchase_item)
-            
-            # قیمت فروش
-            sale_price = item.get('sale_price', 0)
-            sale_item = QTableWidgetItem(self.format_currency(sale_price))
-            sale_item.setTextAlignment(Qt.AlignLeft)
-            self.table.setItem(row, 8, sale_item)
-            
-            # وضعیت
-            status = item.get('status', '')
-            status_item = QTableWidgetItem(status)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ وضعیت
-            if status == 'موجود':
-                status_item.setBackground(QColor('#27ae60'))
-            elif status == 'رزرو شده':
-                status_item.setBackground(QColor('#3498db'))
-            elif status == 'ناموجود':
-                status_item.setBackground(QColor('#e74c3c'))
-            elif status == 'فروخته شده':
-                status_item.setBackground(QColor('#9b59b6'))
-            
-            status_item.setForeground(QColor('white'))
-            self.table.setItem(row, 9, status_item)
-            
-            # تاریخ خرید (شمسی)
-            date_item = QTableWidgetItem(item.get('purchase_date', ''))
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 10, date_item)
-            
-            # عملیات
-            btn_widget = QWidget()
-            btn_layout = QHBoxLayout()
-            btn_layout.setContentsMargins(2, 2, 2, 2)
-            
-            btn_edit = QPushButton("✏️")
-            btn_edit.setFixedSize(35, 35)
-            btn_edit.setToolTip("ویرایش لوازم")
-            btn_edit.clicked.connect(lambda checked, idx=item['id']: self.edit_item(idx))
-            
-            # دکمه حذف با تراکنش
-            btn_delete = QPushButton("🗑️")
-            btn_delete.setFixedSize(35, 35)
-            btn_delete.setToolTip("حذف با ثبت تراکنش")
-            btn_delete.clicked.connect(lambda checked, idx=item['id']: self.on_delete_with_transaction_for_item(idx))
-            
-            # دکمه حذف نرم
-            btn_soft_delete = QPushButton("📝")
-            btn_soft_delete.setFixedSize(35, 35)
-            btn_soft_delete.setToolTip("حذف نرم (تغییر وضعیت)")
-            btn_soft_delete.clicked.connect(lambda checked, idx=item['id']: self.on_soft_delete_for_item(idx))
-            
-            btn_layout.addWidget(btn_edit)
-            btn_layout.addWidget(btn_delete)
-            btn_layout.addWidget(btn_soft_delete)
-            btn_layout.addStretch()
-            
-            btn_widget.setLayout(btn_layout)
-            self.table.setCellWidget(row, 11, btn_widget)  # 🔴 ستون 11 برای عملیات
+        """پر کردن جدول با داده‌ها (قالب‌بندی سلول‌ها هنگام نمایش انجام می‌شود)"""
+        self.table.set_rows(data)
+
+    def stock_color(self, item):
+        """رنگ زمینه ستون تعداد (ناموجود یا تعداد کم)"""
+        quantity = item.get('quantity', 0)
+        if quantity == 0:
+            return '#e74c3c'
+        if quantity <= 2:
+            return '#f39c12'
+        return None
 
+    def on_table_action(self, action, item):
+        """دکمه‌های عملیات هر ردیف جدول"""
+        if action == 'edit':
+            self.edit_item(item['id'])
+        elif action == 'delete':
+            self.on_delete_with_transaction_for_item(item['id'])
+        elif action == 'soft_delete':
+            self.on_soft_delete_for_item(item['id'])
 
     def update_stats(self, data):
         """به‌روزرسانی آمار"""
@@ -809,8 +733,7 @@ class NewAppliancesForm(BaseInventoryForm):
 
     def on_table_selection_changed(self):
         """هنگام تغییر انتخاب در جدول"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        has_selection = len(selected_rows) > 0
+        has_selection = self.table.has_selection()
         
         self.btn_edit.setEnabled(has_selection)
         self.btn_delete.setEnabled(has_selection)
@@ -1194,12 +1117,9 @@ class NewAppliancesForm(BaseInventoryForm):
 
     def on_edit(self):
         """ویرایش لوازم انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
-                self.edit_item(item_id)
+        selected = self.table.selected_record()
+        if selected:
+            self.edit_item(selected['id'])
 
     def _convert_days_to_months(self, days):
         """تبدیل روز به ماه برای گارانتی"""
@@ -1363,43 +1283,13 @@ class NewAppliancesForm(BaseInventoryForm):
         print("🔴 on_delete_with_transaction فراخوانی شد")
         
         try:
-            selected_rows = self.table.selectionModel().selectedRows()
-            if not selected_rows:
+            selected = self.table.selected_record()
+            if not selected:
                 self.show_warning("لطفاً یک آیتم را از جدول انتخاب کنید.")
                 return
             
-            row = selected_rows[0].row()
-            print(f"🔴 ردیف انتخاب شده: {row}")
-            
-            # بررسی وجود داده در ردیف انتخاب شده
-            if row >= self.table.rowCount():
-                self.show_error("ردیف انتخاب شده معتبر نیست.")
-                return
-            
-            # پیدا کردن آیتم در all_data با استفاده از ردیف
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
-                print(f"🔴 item_id از طریق ردیف: {item_id}")
-            else:
-                # اگر نتوانستیم از all_data پیدا کنیم، سعی می‌کنیم از جدول اطلاعات بگیریم
-                # گرفتن مدل از ستون سوم (ستون 2)
-                model_item = self.table.item(row, 2)
-                if not model_item:
-                    self.show_error("نمی‌توان مدل را پیدا کرد.")
-                    return
-                
-                model_name = model_item.text()
-                
-                # جستجو در all_data بر اساس مدل
-                item_id = None
-                for item in self.all_data:
-                    if item.get('model') == model_name:
-                        item_id = item.get('id')
-                        break
-                
-                if not item_id:
-                    self.show_error("آیتم انتخاب شده در داده‌ها یافت نشد.")
-                    return
+            item_id = selected['id']
+            print(f"🔴 item_id ردیف انتخاب شده: {item_id}")
             
             # حذف با ثبت تراکنش
             print(f"🔴 فراخوانی delete_item_with_transaction با item_id: {item_id}")
@@ -1493,55 +1383,25 @@ class NewAppliancesForm(BaseInventoryForm):
 
     def on_soft_delete(self):
         """حذف نرم برای لوازم انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
-                
-                if self.soft_delete_item(item_id):
-                    self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
-                    self.load_from_database()
-                    if hasattr(self, 'data_changed'):
-                        self.data_changed.emit()
+        selected = self.table.selected_record()
+        if selected:
+            if self.soft_delete_item(selected['id']):
+                self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
+                self.load_from_database()
+                if hasattr(self, 'data_changed'):
+                    self.data_changed.emit()
 
     # 🔴 تصحیح تابع on_delete_with_transaction
     def on_delete_with_transaction(self):
         """حذف با ثبت تراکنش برای لوازم انتخاب شده"""
         try:
-            selected_rows = self.table.selectionModel().selectedRows()
-            if not selected_rows:
+            selected = self.table.selected_record()
+            if not selected:
                 self.show_warning("لطفاً یک آیتم را از جدول انتخاب کنید.")
                 return
             
-            row = selected_rows[0].row()
-            print(f"🔴 ردیف انتخاب شده: {row}")
-            
-            if row >= self.table.rowCount():
-                self.show_error("ردیف انتخاب شده معتبر نیست.")
-                return
-            
-            # گرفتن شماره سریال از ستون چهارم (ستون 4)
-            serial_item = self.table.item(row, 4)
-            if not serial_item:
-                self.show_error("نمی‌توان شماره سریال را پیدا کرد.")
-                return
-            
-            serial_number = serial_item.text()
-            print(f"🔴 شماره سریال: {serial_number}")
-            
-            # پیدا کردن آیتم در all_data
-            item_id = None
-            for item in self.all_data:
-                if str(item.get('serial_number', '')) == serial_number:
-                    item_id = item.get('id')
-                    print(f"🔴 یافتن item_id: {item_id}")
-                    break
-            
-            if not item_id:
-                if row < len(self.all_data):
-                    item_id = self.all_data[row].get('id')
-                    print(f"🔴 item_id از طریق ردیف: {item_id}")
+            item_id = selected.get('id')
+            print(f"🔴 شماره سریال: {selected.get('serial_number', '')} - item_id: {item_id}")
             
             if not item_id:
                 self.show_error("آیتم انتخاب شده در داده‌ها یافت نشد.")
@@ -1627,80 +1487,19 @@ class NewAppliancesForm(BaseInventoryForm):
     def log_action(self, log_data):
         """ثبت لاگ عملیات"""
         try:
-            if self.data_manager and hasattr(self.data_manager.db, 'execute_query'):
-                query = """
-                INSERT INTO Logs (user_id, action, table_name, record_id, details, ip_address)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """
-                
-                params = (
+            if self.data_manager and hasattr(self.data_manager, 'audit_log'):
+                self.data_manager.audit_log.log(
                     log_data.get('user_id', 1),
                     log_data.get('action', ''),
-                    log_data.get('table_name', ''),
-                    log_data.get('record_id', 0),
-                    log_data.get('details', ''),
-                    log_data.get('ip_address', '127.0.0.1')
+                    table_name=log_data.get('table_name', ''),
+                    record_id=log_data.get('record_id', 0),
+                    details=log_data.get('details', ''),
+                    ip_address=log_data.get('ip_address', '127.0.0.1')
                 )
-                
-                self.data_manager.db.execute_query(query, params)
                 print(f"📝 لاگ ثبت شد: {log_data.get('action')}")
         except Exception as e:
             print(f"⚠️ خطا در ثبت لاگ: {e}")
 
-    def shamsi_to_miladi(self, shamsi_date_str):
-        """تبدیل تاریخ شمسی به میلادی"""
-        if not shamsi_date_str:
-            return None
-        
-        try:
-            import re
-            numbers = re.findall(r'\d+', str(shamsi_date_str))
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                if 1300 <= year <= 1500:
-                    jalali = jdatetime.date(year, month, day)
-                    gregorian = jalali.togregorian()
-                    return gregorian.strftime("%Y-%m-%d")
-                else:
-                    return f"{year:04d}-{month:02d}-{day:02d}"
-            else:
-                from PySide6.QtCore import QDate
-                return QDate.currentDate().toString("yyyy-MM-dd")
-                
-        except Exception as e:
-            print(f"خطا در تبدیل شمسی به میلادی: {e}")
-            from PySide6.QtCore import QDate
-            return QDate.currentDate().toString("yyyy-MM-dd")
-
-    def miladi_to_shamsi(self, miladi_date_str, format_str="%Y-%m-%d"):
-        """تبدیل تاریخ میلادی به شمسی"""
-        if not miladi_date_str:
-            return ""
-        
-        try:
-            import re
-            numbers = re.findall(r'\d+', str(miladi_date_str))
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                if year > 1500:
-                    from datetime import date
-                    gregorian_date = date(year, month, day)
-                    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
-                    return jalali.strftime("%Y/%m/%d")
-                else:
-                    return f"{year:04d}/{month:02d}/{day:02d}"
-            else:
-                return str(miladi_date_str)
-                
-        except Exception as e:
-            print(f"خطا در تبدیل میلادی به شمسی: {e}")
-            return str(miladi_date_str)
-
-
     def export_excel(self):
         """خروجی Excel"""
         self.show_success("خروجی Excel تولید شد (ویژگی در حال توسعه).")
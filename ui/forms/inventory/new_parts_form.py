@@ -4,25 +4,33 @@
 """
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QLineEdit, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox,
+    QHeaderView, QMessageBox,
     QGroupBox, QFormLayout, QSpinBox, QDoubleSpinBox,
     QTextEdit, QFrame, QSizePolicy, QInputDialog
 )
 from PySide6.QtCore import Qt, QDate, QTimer
-from PySide6.QtGui import QFont, QColor, QIcon
-import jdatetime
+from PySide6.QtGui import QFont, QIcon
 from datetime import datetime
 
 from .base_inventory_form import BaseInventoryForm
 from .widgets.currency_converter import CurrencyConverter
 from .widgets.inventory_date_input import InventoryDateInput
 from .widgets.enhanced_combo import EnhancedComboBox
+from ui.widgets.record_table import TableColumn, ROW_NUMBER
 
 class NewPartsForm(BaseInventoryForm):
     """فرم مدیریت انبار قطعات نو با کامبوباکس‌های پیشرفته"""
     
+    # رنگ ستون وضعیت
+    STATUS_COLORS = {
+        'موجود': '#27ae60',
+        'موجودی کم': '#f39c12',
+        'ناموجود': '#e74c3c',
+        'در حال سفارش': '#3498db',
+    }
+    
     def __init__(self, parent=None, data_manager=None):
         """سازنده فرم قطعات نو"""
         print("=" * 50)
@@ -421,31 +429,32 @@ class NewPartsForm(BaseInventoryForm):
         """ایجاد بخش جدول نمایش قطعات نو"""
         table_group, table_layout = self.create_form_group("📋 لیست قطعات نو")
         
-        self.table = self.create_table([
-            "ردیف",
-            "کد قطعه",
-            "نام قطعه",
-            "دسته‌بندی",
-            "برند",
-            "موجودی",
-            "قیمت خرید",
-            "قیمت فروش",
-            "وضعیت",
-            "تاریخ خرید",
-            "عملیات"
+        center = Qt.AlignCenter
+        self.table = self.create_record_table([
+            TableColumn("ردیف", ROW_NUMBER, align=center, width=60),
+            TableColumn("کد قطعه", 'part_code', width=120),
+            TableColumn("نام قطعه", 'part_name', width=180),
+            TableColumn("دسته‌بندی", 'category', width=120),
+            # برند - اگر خالی بود، "نامشخص"
+            TableColumn("برند", 'brand', text=lambda item: item.get('brand') or 'نامشخص', width=120),
+            TableColumn("موجودی", 'quantity', align=center, width=90,
+                        background=self.stock_color,
+                        foreground=lambda item: 'white' if self.stock_color(item) else None),
+            TableColumn("قیمت خرید", 'purchase_price', align=Qt.AlignLeft, width=140,
+                        text=lambda item: self.format_currency(item.get('purchase_price', 0))),
+            TableColumn("قیمت فروش", 'sale_price', align=Qt.AlignLeft, width=140,
+                        text=lambda item: self.format_currency(item.get('sale_price', 0))),
+            TableColumn("وضعیت", 'status', align=center, width=100,
+                        background=lambda item: self.STATUS_COLORS.get(item.get('status', '')),
+                        foreground=lambda item: 'white'),
+            TableColumn("تاریخ خرید", 'purchase_date', align=center, width=110),
+            TableColumn("عملیات", actions=[
+                ('edit', "✏️", "ویرایش قطعه"),
+                ('delete', "🗑️", "حذف با ثبت تراکنش"),
+                ('soft_delete', "📝", "حذف نرم (تغییر وضعیت)"),
+            ]),
         ])
-        
-        # تنظیم عرض ستون‌ها
-        self.table.setColumnWidth(0, 60)   # ردیف
-        self.table.setColumnWidth(1, 120)  # کد قطعه
-        self.table.setColumnWidth(2, 180)  # نام قطعه
-        self.table.setColumnWidth(3, 120)  # دسته‌بندی
-        self.table.setColumnWidth(4, 120)  # برند
-        self.table.setColumnWidth(5, 90)   # موجودی
-        self.table.setColumnWidth(6, 140)  # قیمت خرید
-        self.table.setColumnWidth(7, 140)  # قیمت فروش
-        self.table.setColumnWidth(8, 100)  # وضعیت
-        self.table.setColumnWidth(9, 110)  # تاریخ خرید
+        self.table.action_triggered.connect(self.on_table_action)
         
         # تنظیم حداقل ارتفاع
         self.table.setMinimumHeight(300)
@@ -501,7 +510,7 @@ class NewPartsForm(BaseInventoryForm):
         self.main_layout.addWidget(btn_group)
         
         # اتصال انتخاب جدول
-        self.table.itemSelectionChanged.connect(self.on_table_selection_changed)
+        self.table.selection_changed.connect(self.on_table_selection_changed)
     
     def create_summary_section(self):
         """ایجاد بخش خلاصه در پایین فرم"""
@@ -747,11 +756,14 @@ class NewPartsForm(BaseInventoryForm):
             
             if warehouse_items:
                 self.all_data = []
-                for item in warehouse_items:
-                    # تبدیل تاریخ میلادی به شمسی برای نمایش
-                    purchase_date_shamsi = self.miladi_to_shamsi(item.get('purchase_date', ''))
-                    expiration_date_shamsi = self.miladi_to_shamsi(item.get('expiration_date', ''))
-                    
+                # تبدیل دسته‌ای ستون‌های تاریخ میلادی به شمسی برای نمایش
+                purchase_dates = self.miladi_to_shamsi_many(
+                    item.get('purchase_date', '') for item in warehouse_items)
+                expiration_dates = self.miladi_to_shamsi_many(
+                    item.get('expiration_date', '') for item in warehouse_items)
+                
+                for item, purchase_date_shamsi, expiration_date_shamsi in zip(
+                        warehouse_items, purchase_dates, expiration_dates):
                     # 🔴 اصلاح شده: برند از فیلدهای مختلف دریافت می‌شود
                     brand = item.get('brand', '')  # ابتدا از جدول Parts
                     if not brand:
@@ -797,110 +809,26 @@ class NewPartsForm(BaseInventoryForm):
             self.populate_table([])
 
     def populate_table(self, data):
-        """پر کردن جدول با داده‌های قطعات نو"""
-        self.table.setRowCount(len(data))
-        
-        for row, item in enumerate(data):
-            # ردیف
-            self.table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            self.table.item(row, 0).setTextAlignment(Qt.AlignCenter)
-            
-            # کد قطعه
-            self.table.setItem(row, 1, QTableWidgetItem(item.get('part_code', '')))
-            
-            # نام قطعه
-            self.table.setItem(row, 2, QTableWidgetItem(item.get('part_name', '')))
-            
-            # دسته‌بندی
-            self.table.setItem(row, 3, QTableWidgetItem(item.get('category', '')))
-            
-            # برند - اگر خالی بود، "نامشخص" قرار بده
-            brand = item.get('brand', 'نامشخص')
-            if brand is None or brand == '':
-                brand = 'نامشخص'
-            
-            brand_item = QTableWidgetItem(brand)
-            self.table.setItem(row, 4, brand_item)
-            
-            # موجودی
-            quantity = item.get('quantity', 0)
-            stock_item = QTableWidgetItem(str(quantity))
-            stock_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ‌آمیزی موجودی کم
-            if quantity == 0:
-                stock_item.setBackground(QColor('#e74c3c'))
-                stock_item.setForeground(QColor('white'))
-            elif quantity <= 3:
-                stock_item.setBackground(QColor('#f39c12'))
-                stock_item.setForeground(QColor('white'))
-            
-            self.table.setItem(row, 5, stock_item)
-            
-            # قیمت خرید (تومان)
-            purchase_price = item.get('purchase_price', 0)
-            price_item = QTableWidgetItem(self.format_currency(purchase_price))
-            price_item.setTextAlignment(Qt.AlignLeft)
-            self.table.setItem(row, 6, price_item)
-            
-            # قیمت فروش (تومان)
-            sale_price = item.get('sale_price', 0)
-            sale_item = QTableWidgetItem(self.format_currency(sale_price))
-            sale_item.setTextAlignment(Qt.AlignLeft)
-            self.table.setItem(row, 7, sale_item)
-            
-            # وضعیت
-            status = item.get('status', '')
-            status_item = QTableWidgetItem(status)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ وضعیت
-            if status == 'موجود':
-                status_item.setBackground(QColor('#27ae60'))
-            elif status == 'موجودی کم':
-                status_item.setBackground(QColor('#f39c12'))
-            elif status == 'ناموجود':
-                status_item.setBackground(QColor('#e74c3c'))
-            elif status == 'در حال سفارش':
-                status_item.setBackground(QColor('#3498db'))
-            
-            status_item.setForeground(QColor('white'))
-            self.table.setItem(row, 8, status_item)
-            
-            # تاریخ خرید
-            date_item = QTableWidgetItem(item.get('purchase_date', ''))
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 9, date_item)
-            
-            # عملیات
-            btn_widget = QWidget()
-            btn_layout = QHBoxLayout()
-            btn_layout.setContentsMargins(2, 2, 2, 2)
-
-            btn_edit = QPushButton("✏️")
-            btn_edit.setFixedSize(35, 35)
-            btn_edit.setToolTip("ویرایش قطعه")
-            btn_edit.clicked.connect(lambda checked, idx=item['id']: self.edit_item(idx))
-
-            # دکمه حذف اصلی - حذف با تراکنش
-            btn_delete = QPushButton("🗑️")
-            btn_delete.setFixedSize(35, 35)
-            btn_delete.setToolTip("حذف با ثبت تراکنش")
-            btn_delete.clicked.connect(lambda checked, idx=item['id']: self.on_delete_with_transaction_for_item(idx))
-
-            # دکمه حذف نرم
-            btn_soft_delete = QPushButton("📝")
-            btn_soft_delete.setFixedSize(35, 35)
-            btn_soft_delete.setToolTip("حذف نرم (تغییر وضعیت)")
-            btn_soft_delete.clicked.connect(lambda checked, idx=item['id']: self.on_soft_delete_for_item(idx))
-
-            btn_layout.addWidget(btn_edit)
-            btn_layout.addWidget(btn_delete)
-            btn_layout.addWidget(btn_soft_delete)
-            btn_layout.addStretch()
-
-            btn_widget.setLayout(btn_layout)
-            self.table.setCellWidget(row, 10, btn_widget)
+        """پر کردن جدول با داده‌های قطعات نو (قالب‌بندی سلول‌ها هنگام نمایش انجام می‌شود)"""
+        self.table.set_rows(data)
+    
+    def stock_color(self, item):
+        """رنگ زمینه ستون موجودی (ناموجود یا موجودی کم)"""
+        quantity = item.get('quantity', 0)
+        if quantity == 0:
+            return '#e74c3c'
+        if quantity <= 3:
+            return '#f39c12'
+        return None
+    
+    def on_table_action(self, action, item):
+        """دکمه‌های عملیات هر ردیف جدول"""
+        if action == 'edit':
+            self.edit_item(item['id'])
+        elif action == 'delete':
+            self.on_delete_with_transaction_for_item(item['id'])
+        elif action == 'soft_delete':
+            self.on_soft_delete_for_item(item['id'])
     
     def update_stats(self, data):
         """به‌روزرسانی آمار"""
@@ -1365,66 +1293,6 @@ class NewPartsForm(BaseInventoryForm):
             self.show_error(f"خطا در ذخیره قطعه: {str(e)}")
 
 
-    def shamsi_to_miladi(self, shamsi_date_str):
-        """تبدیل تاریخ شمسی به میلادی"""
-        if not shamsi_date_str:
-            return None
-        
-        try:
-            # جدا کردن اجزای تاریخ
-            import re
-            numbers = re.findall(r'\d+', str(shamsi_date_str))
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                # اگر سال بین 1300-1500 است، یعنی شمسی است
-                if 1300 <= year <= 1500:
-                    jalali = jdatetime.date(year, month, day)
-                    gregorian = jalali.togregorian()
-                    return gregorian.strftime("%Y-%m-%d")
-                else:
-                    # احتمالاً میلادی است
-                    return f"{year:04d}-{month:02d}-{day:02d}"
-            else:
-                # تاریخ نامعتبر
-                from PySide6.QtCore import QDate
-                return QDate.currentDate().toString("yyyy-MM-dd")
-                
-        except Exception as e:
-            print(f"خطا در تبدیل شمسی به میلادی: {e}")
-            from PySide6.QtCore import QDate
-            return QDate.currentDate().toString("yyyy-MM-dd")
-    
-    def miladi_to_shamsi(self, miladi_date_str, format_str="%Y-%m-%d"):
-        """تبدیل تاریخ میلادی به شمسی"""
-        if not miladi_date_str:
-            return ""
-        
-        try:
-            # جدا کردن اجزای تاریخ
-            import re
-            numbers = re.findall(r'\d+', str(miladi_date_str))
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                # اگر سال بزرگتر از 1500 است، یعنی میلادی است
-                if year > 1500:
-                    from datetime import date
-                    gregorian_date = date(year, month, day)
-                    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
-                    return jalali.strftime("%Y/%m/%d")
-                else:
-                    # احتمالاً شمسی است
-                    return f"{year:04d}/{month:02d}/{day:02d}"
-            else:
-                return str(miladi_date_str)
-                
-        except Exception as e:
-            print(f"خطا در تبدیل میلادی به شمسی: {e}")
-            return str(miladi_date_str)
-    
     def validate_form(self):
         """اعتبارسنجی فرم"""
         errors = []
@@ -1705,41 +1573,13 @@ class NewPartsForm(BaseInventoryForm):
         print("🔴 on_delete_with_transaction فراخوانی شد")
         
         try:
-            selected_rows = self.table.selectionModel().selectedRows()
-            if not selected_rows:
+            selected = self.table.selected_record()
+            if not selected:
                 self.show_warning("لطفاً یک آیتم را از جدول انتخاب کنید.")
                 return
             
-            row = selected_rows[0].row()
-            print(f"🔴 ردیف انتخاب شده: {row}")
-            
-            # بررسی وجود داده در ردیف انتخاب شده
-            if row >= self.table.rowCount():
-                self.show_error("ردیف انتخاب شده معتبر نیست.")
-                return
-            
-            # گرفتن کد قطعه از ستون دوم (ستون 1)
-            part_code_item = self.table.item(row, 1)
-            if not part_code_item:
-                self.show_error("نمی‌توان کد قطعه را پیدا کرد.")
-                return
-            
-            part_code = part_code_item.text()
-            print(f"🔴 کد قطعه: {part_code}")
-            
-            # پیدا کردن آیتم در all_data
-            item_id = None
-            for item in self.all_data:
-                if str(item.get('part_code', '')) == part_code:
-                    item_id = item.get('id')
-                    print(f"🔴 یافتن item_id: {item_id}")
-                    break
-            
-            if not item_id:
-                # اگر از طریق کد پیدا نکردیم، از طریق شماره ردیف در جدول امتحان کنیم
-                if row < len(self.all_data):
-                    item_id = self.all_data[row].get('id')
-                    print(f"🔴 item_id از طریق ردیف: {item_id}")
+            item_id = selected.get('id')
+            print(f"🔴 کد قطعه: {selected.get('part_code', '')} - item_id: {item_id}")
             
             if not item_id:
                 self.show_error("آیتم انتخاب شده در داده‌ها یافت نشد.")
@@ -1836,47 +1676,35 @@ class NewPartsForm(BaseInventoryForm):
 
     def on_soft_delete(self):
         """حذف نرم آیتم انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
+        selected = self.table.selected_record()
+        if selected:
+            # حذف نرم
+            if self.soft_delete_item(selected['id']):
+                self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
                 
-                # حذف نرم
-                if self.soft_delete_item(item_id):
-                    self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
-                    
-                    # تازه‌سازی داده‌ها
-                    self.load_from_database()
-                    self.data_changed.emit()
+                # تازه‌سازی داده‌ها
+                self.load_from_database()
+                self.data_changed.emit()
 
     def log_action(self, log_data):
         """ثبت لاگ عملیات"""
         try:
-            if self.data_manager and hasattr(self.data_manager.db, 'execute_query'):
-                query = """
-                INSERT INTO Logs (user_id, action, table_name, record_id, details, ip_address)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """
-                
-                params = (
+            if self.data_manager and hasattr(self.data_manager, 'audit_log'):
+                self.data_manager.audit_log.log(
                     log_data.get('user_id', 1),
                     log_data.get('action', ''),
-                    log_data.get('table_name', ''),
-                    log_data.get('record_id', 0),
-                    log_data.get('details', ''),
-                    log_data.get('ip_address', '127.0.0.1')
+                    table_name=log_data.get('table_name', ''),
+                    record_id=log_data.get('record_id', 0),
+                    details=log_data.get('details', ''),
+                    ip_address=log_data.get('ip_address', '127.0.0.1')
                 )
-                
-                self.data_manager.db.execute_query(query, params)
                 print(f"📝 لاگ ثبت شد: {log_data.get('action')}")
         except Exception as e:
             print(f"⚠️ خطا در ثبت لاگ: {e}")
 
     def on_table_selection_changed(self):
         """هنگام تغییر انتخاب در جدول"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        has_selection = len(selected_rows) > 0
+        has_selection = self.table.has_selection()
         
         self.btn_edit.setEnabled(has_selection)
         self.btn_delete.setEnabled(has_selection)
@@ -1884,12 +1712,9 @@ class NewPartsForm(BaseInventoryForm):
 
     def on_edit(self):
         """ویرایش قطعه انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
-                self.edit_item(item_id)   
+        selected = self.table.selected_record()
+        if selected:
+            self.edit_item(selected['id'])
    
     def export_excel(self):
         """خروجی Excel"""
@@ -5,18 +5,22 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QLineEdit, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QGroupBox,
-    QFormLayout, QCheckBox, QMessageBox, QSpinBox, QFrame, QDialog
+    QPushButton, QLineEdit, QComboBox,
+    QHeaderView, QGroupBox,
+    QFormLayout, QCheckBox, QMessageBox, QSpinBox, QFrame, QDialog,
+    QAbstractItemView
 )
 from PySide6.QtCore import Qt, QDate, QDateTime, Signal
-from PySide6.QtGui import QColor, QFont, QIcon
+from PySide6.QtGui import QFont, QIcon
 
 from .base_inventory_form import BaseInventoryForm
 from .widgets.inventory_date_input import InventoryDateInput
 from .widgets.inventory_table import InventoryTable
+from ui.widgets.record_table import RecordTableView, TableColumn, ROW_NUMBER
 import jdatetime
 import locale
+import re
+from datetime import date as datetime_date
 
 # تنظیم لوکال فارسی
 try:
@@ -139,8 +143,30 @@ class AdvancedSearchDialog(QDialog):
 class StockTransactionForm(BaseInventoryForm):
     """فرم تراکنش‌های انبار - نسخه بهبود یافته"""
     
+    # نماد منبع تراکنش در ستون شناسه
+    SOURCE_SYMBOLS = {
+        'main': '📝',
+        'delete': '🗑️',
+        'soft_delete': '📄'
+    }
+    
+    # رنگ‌آمیزی بر اساس نوع تراکنش
+    TYPE_COLORS = {
+        'خرید': '#27ae60',
+        'فروش': '#3498db',
+        'استفاده در تعمیر': '#9b59b6',
+        'برگشت': '#f39c12',
+        'تعدیل': '#e67e22',
+        'ضایعات': '#e74c3c',
+        'انتقال': '#1abc9c',
+        'حذف': '#c0392b',
+        'حذف نرم': '#d35400',
+        'بازیابی': '#16a085'
+    }
+    
     def __init__(self, parent=None):
         super().__init__("تراکنش‌های انبار", parent)
+        self.item_name_cache = {}
         self.setup_ui()
         self.load_data()
         
@@ -460,19 +486,44 @@ class StockTransactionForm(BaseInventoryForm):
         
         layout.addLayout(table_header)
         
-        # ایجاد جدول
-        self.table = QTableWidget()
+        # ایجاد جدول (12 ستون برای نمایش اطلاعات کامل)
+        center = Qt.AlignCenter
+        right = Qt.AlignRight | Qt.AlignVCenter
+        self.table = RecordTableView([
+            TableColumn("ردیف", ROW_NUMBER, align=center, width=60),
+            TableColumn("شناسه", 'id', align=center, width=80,
+                        text=lambda trans: f"{self.SOURCE_SYMBOLS.get(trans.get('source', ''), '')}{trans.get('id', '')}"),
+            TableColumn("تاریخ تراکنش", 'transaction_date', align=center, width=120,
+                        text=self.transaction_date_text),
+            TableColumn("نوع تراکنش", 'transaction_type', align=center, width=120,
+                        background=lambda trans: self.TYPE_COLORS.get(trans.get('transaction_type', '')),
+                        foreground=lambda trans: 'white' if trans.get('transaction_type', '') in self.TYPE_COLORS else None),
+            TableColumn("نوع انبار", 'warehouse_type', align=center, width=120),
+            TableColumn("کد آیتم", 'item_id', align=center, width=100),
+            TableColumn("نام آیتم", text=self.transaction_item_name, width=150),
+            TableColumn("تعداد", 'quantity', align=center, width=80,
+                        text=lambda trans: self.format_number(trans.get('quantity', 0))),
+            TableColumn("قیمت واحد (تومان)", 'unit_price', align=right, width=120,
+                        text=lambda trans: self.format_currency(trans.get('unit_price', 0))),
+            TableColumn("قیمت کل (تومان)", 'total_price', align=right, width=120,
+                        text=lambda trans: self.format_currency(trans.get('total_price', 0)),
+                        foreground=self.total_price_color),
+            TableColumn("توضیحات", 'description', width=200),
+            TableColumn("کاربر ثبت کننده", 'employee', align=center, width=120,
+                        text=lambda trans: trans.get('employee', 'سیستم')),
+        ], self)
         self.table.setMinimumHeight(400)
-        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.verticalHeader().setDefaultSectionSize(30)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 font-family: 'B Nazanin';
                 font-size: 11px;
                 gridline-color: #ecf0f1;
                 selection-background-color: #3498db;
                 selection-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
             }
             QHeaderView::section {
@@ -484,33 +535,11 @@ class StockTransactionForm(BaseInventoryForm):
                 font-family: 'B Nazanin';
                 font-size: 11px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #2980b9;
             }
         """)
         
-        # تنظیم 12 ستون برای نمایش اطلاعات کامل
-        self.table.setColumnCount(12)
-        self.table.setHorizontalHeaderLabels([
-            "ردیف",
-            "شناسه",
-            "تاریخ تراکنش",
-            "نوع تراکنش",
-            "نوع انبار", 
-            "کد آیتم",
-            "نام آیتم",
-            "تعداد",
-            "قیمت واحد (تومان)",
-            "قیمت کل (تومان)",
-            "توضیحات",
-            "کاربر ثبت کننده"
-        ])
-        
-        # تنظیم عرض ستون‌ها به صورت دقیق
-        column_widths = [60, 80, 120, 120, 120, 100, 150, 80, 120, 120, 200, 120]
-        for i, width in enumerate(column_widths):
-            self.table.setColumnWidth(i, width)
-        
         # تنظیم هدر قابل تغییر اندازه
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(10, QHeaderView.Stretch)  # ستون توضیحات کشیده شود
@@ -592,28 +621,7 @@ class StockTransactionForm(BaseInventoryForm):
         
         try:
             if self.data_manager and hasattr(self.data_manager, 'warehouse'):
-                # دریافت پارامترهای فیلتر
-                limit = self.limit_spin.value()
-                
-                # بارگذاری از دیتابیس
-                transactions = self.data_manager.warehouse.get_inventory_transactions()
-                
-                if transactions:
-                    print(f"✅ {len(transactions)} تراکنش از دیتابیس بارگذاری شد")
-                    
-                    # محدود کردن تعداد ردیف‌ها
-                    if limit < len(transactions):
-                        transactions = transactions[:limit]
-                        self.table_info.setText(f"نمایش {limit} تراکنش از {len(transactions)} تراکنش (برای مشاهده بیشتر از فیلترها استفاده کنید)")
-                    else:
-                        self.table_info.setText(f"نمایش {len(transactions)} تراکنش")
-                    
-                    self.display_transactions(transactions)
-                    self.update_stats(transactions)
-                else:
-                    print("⚠️ دیتابیس تراکنش‌ها خالی است")
-                    self.table.setRowCount(0)
-                    self.table_info.setText("هیچ تراکنشی یافت نشد")
+                if not self.show_transactions({}):
                     self.show_info("هیچ تراکنشی در دیتابیس وجود ندارد.")
             else:
                 print("❌ data_manager یا warehouse موجود نیست")
@@ -625,176 +633,93 @@ class StockTransactionForm(BaseInventoryForm):
             traceback.print_exc()
             self.show_error(f"خطا در بارگذاری تراکنش‌ها: {str(e)}")
     
+    def show_transactions(self, filters):
+        """
+        نمایش تراکنش‌های فیلتر شده؛ خروجی: تعداد کل
+        
+        فیلتر و آمار در دیتابیس انجام می‌شود و ردیف‌ها صفحه به صفحه (به اندازه
+        «تعداد نمایش») و هنگام اسکرول خوانده می‌شوند.
+        """
+        warehouse = self.data_manager.warehouse
+        summary = warehouse.get_inventory_transactions_summary(filters)
+        self.display_transactions(warehouse.iter_inventory_transactions(
+            filters, page_size=self.limit_spin.value()
+        ))
+        
+        count = summary['count']
+        shown = self.table.record_count()
+        if count == 0:
+            self.table_info.setText("هیچ تراکنشی یافت نشد")
+        elif shown < count:
+            self.table_info.setText(f"نمایش {shown} تراکنش از {count} تراکنش (بقیه با اسکرول بارگذاری می‌شود)")
+        else:
+            self.table_info.setText(f"نمایش {count} تراکنش")
+        
+        print(f"✅ {count} تراکنش انبار یافت شد")
+        self.update_stats(summary)
+        return count
+    
     def display_transactions(self, transactions):
-        """نمایش تراکنش‌ها در جدول با فرمت صحیح"""
-        self.table.setRowCount(len(transactions))
-        
-        # کش برای ذخیره نام آیتم‌ها (برای جلوگیری از کوئری‌های تکراری)
-        item_name_cache = {}
-        
-        for row, trans in enumerate(transactions):
-            # ستون 0: ردیف
-            item = QTableWidgetItem(str(row + 1))
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 0, item)
-            
-            # ستون 1: شناسه تراکنش + منبع
-            trans_id = str(trans.get('id', ''))
-            source = trans.get('source', '')
-            source_symbol = {
-                'main': '📝',
-                'delete': '🗑️',
-                'soft_delete': '📄'
-            }.get(source, '')
-            
-            item = QTableWidgetItem(f"{source_symbol}{trans_id}")
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 1, item)
-            
-            # ستون 2: تاریخ تراکنش (شمسی)
-            trans_date = trans.get('transaction_date_shamsi', trans.get('transaction_date', ''))
-            
-            # اگر تاریخ میلادی است، به شمسی تبدیل کن
-            if trans_date and '/' not in str(trans_date):
-                try:
-                    import re
-                    numbers = re.findall(r'\d+', str(trans_date))
-                    if len(numbers) >= 3:
-                        year, month, day = map(int, numbers[:3])
-                        if year > 1500:  # میلادی است
-                            import datetime
-                            from datetime import date as datetime_date
-                            gdate = datetime_date(year, month, day)
-                            jdate = jdatetime.date.fromgregorian(date=gdate)
-                            trans_date = jdate.strftime("%Y/%m/%d")
-                except:
-                    pass
-            
-            item = QTableWidgetItem(str(trans_date))
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 2, item)
-            
-            # ستون 3: نوع تراکنش
-            trans_type = trans.get('transaction_type', '')
-            item = QTableWidgetItem(trans_type)
-            item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ‌آمیزی بر اساس نوع تراکنش
-            color_map = {
-                'خرید': QColor('#27ae60'),
-                'فروش': QColor('#3498db'),
-                'استفاده در تعمیر': QColor('#9b59b6'),
-                'برگشت': QColor('#f39c12'),
-                'تعدیل': QColor('#e67e22'),
-                'ضایعات': QColor('#e74c3c'),
-                'انتقال': QColor('#1abc9c'),
-                'حذف': QColor('#c0392b'),
-                'حذف نرم': QColor('#d35400'),
-                'بازیابی': QColor('#16a085')
-            }
-            
-            if trans_type in color_map:
-                item.setBackground(color_map[trans_type])
-                item.setForeground(QColor('white'))
-            
-            self.table.setItem(row, 3, item)
-            
-            # ستون 4: نوع انبار
-            warehouse_type = trans.get('warehouse_type', '')
-            item = QTableWidgetItem(warehouse_type)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 4, item)
-            
-            # ستون 5: کد آیتم
-            item_id = str(trans.get('item_id', ''))
-            item_widget = QTableWidgetItem(item_id)
-            item_widget.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 5, item_widget)
-            
-            # ستون 6: نام آیتم
-            item_name = "در حال بارگیری..."
-            warehouse_type_val = trans.get('warehouse_type', '')
-            item_id_val = trans.get('item_id', 0)
-
-            # کلید کش
-            cache_key = f"{warehouse_type_val}_{item_id_val}"
-
-            if cache_key in item_name_cache:
-                item_name = item_name_cache[cache_key]
-            else:
-                try:
-                    # استفاده از تابع جدید
-                    item_name = self.data_manager.warehouse.get_item_name(warehouse_type_val, item_id_val)
-                    # ذخیره در کش
-                    item_name_cache[cache_key] = item_name
-                except Exception as e:
-                    print(f"خطا در دریافت نام آیتم: {e}")
-                    item_name = f"آیتم #{item_id_val}"
-
-            item = QTableWidgetItem(item_name)
-            self.table.setItem(row, 6, item)
-                        
-            # ستون 7: تعداد
-            quantity = trans.get('quantity', 0)
-            item = QTableWidgetItem(self.format_number(quantity))
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 7, item)
-            
-            # ستون 8: قیمت واحد
-            unit_price = trans.get('unit_price', 0)
-            item = QTableWidgetItem(self.format_currency(unit_price))
-            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 8, item)
-            
-            # ستون 9: قیمت کل
-            total_price = trans.get('total_price', 0)
-            item = QTableWidgetItem(self.format_currency(total_price))
-            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # رنگ‌آمیزی قیمت کل بر اساس نوع تراکنش
-            if trans_type in ['فروش', 'بازیابی']:
-                item.setForeground(QColor('#27ae60'))
-            elif trans_type in ['خرید', 'حذف', 'حذف نرم', 'ضایعات']:
-                item.setForeground(QColor('#e74c3c'))
-            elif trans_type in ['انتقال', 'تعدیل']:
-                item.setForeground(QColor('#f39c12'))
-            
-            self.table.setItem(row, 9, item)
-            
-            # ستون 10: توضیحات
-            description = trans.get('description', '')
-            item = QTableWidgetItem(description)
-            self.table.setItem(row, 10, item)
-            
-            # ستون 11: کاربر ثبت کننده
-            employee = trans.get('employee', 'سیستم')
-            item = QTableWidgetItem(employee)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 11, item)
-        
-        # تنظیم ارتفاع ردیف‌ها
-        self.table.resizeRowsToContents()
+        """نمایش تراکنش‌ها در جدول (متن سلول‌ها هنگام نمایش ساخته می‌شود)"""
+        # کش نام آیتم‌ها (برای جلوگیری از کوئری‌های تکراری)
+        self.item_name_cache = {}
+        self.table.set_rows(transactions)
+    
+    def transaction_date_text(self, trans):
+        """تاریخ شمسی تراکنش"""
+        trans_date = trans.get('transaction_date_shamsi', trans.get('transaction_date', ''))
+        
+        # اگر تاریخ میلادی است، به شمسی تبدیل کن
+        if trans_date and '/' not in str(trans_date):
+            try:
+                numbers = re.findall(r'\d+', str(trans_date))
+                if len(numbers) >= 3:
+                    year, month, day = map(int, numbers[:3])
+                    if year > 1500:  # میلادی است
+                        gdate = datetime_date(year, month, day)
+                        jdate = jdatetime.date.fromgregorian(date=gdate)
+                        trans_date = jdate.strftime("%Y/%m/%d")
+            except:
+                pass
+        
+        return str(trans_date)
+    
+    def transaction_item_name(self, trans):
+        """نام آیتم تراکنش (فقط برای ردیف‌های نمایش داده شده از دیتابیس خوانده می‌شود)"""
+        warehouse_type = trans.get('warehouse_type', '')
+        item_id = trans.get('item_id', 0)
+        cache_key = f"{warehouse_type}_{item_id}"
+        
+        if cache_key not in self.item_name_cache:
+            try:
+                self.item_name_cache[cache_key] = self.data_manager.warehouse.get_item_name(warehouse_type, item_id)
+            except Exception as e:
+                print(f"خطا در دریافت نام آیتم: {e}")
+                return f"آیتم #{item_id}"
+        
+        return self.item_name_cache[cache_key]
+    
+    def total_price_color(self, trans):
+        """رنگ قیمت کل بر اساس نوع تراکنش"""
+        trans_type = trans.get('transaction_type', '')
+        if trans_type in ['فروش', 'بازیابی']:
+            return '#27ae60'
+        if trans_type in ['خرید', 'حذف', 'حذف نرم', 'ضایعات']:
+            return '#e74c3c'
+        if trans_type in ['انتقال', 'تعدیل']:
+            return '#f39c12'
+        return None
 
-    def update_stats(self, transactions):
-        """به‌روزرسانی آمار تراکنش‌ها - نسخه بهبود یافته"""
-        if not transactions:
+    def update_stats(self, summary):
+        """به‌روزرسانی آمار تراکنش‌ها از خروجی get_inventory_transactions_summary"""
+        total_count = summary.get('count', 0)
+        if not total_count:
             self.stats_label.setText("📊 آمار: هیچ تراکنشی یافت نشد")
             return
         
-        total_count = len(transactions)
-        total_amount = sum(t.get('total_price', 0) for t in transactions)
-        
-        # شمارش بر اساس نوع تراکنش با جزئیات بیشتر
-        type_counts = {}
-        type_amounts = {}
-        
-        for t in transactions:
-            trans_type = t.get('transaction_type', 'نامشخص')
-            amount = t.get('total_price', 0)
-            
-            type_counts[trans_type] = type_counts.get(trans_type, 0) + 1
-            type_amounts[trans_type] = type_amounts.get(trans_type, 0) + amount
+        total_amount = summary.get('total_amount', 0)
+        type_counts = {row['transaction_type']: row['count'] for row in summary.get('types', [])}
+        type_amounts = {row['transaction_type']: row['total_amount'] for row in summary.get('types', [])}
         
         # ایجاد متن آمار
         stats_text = f"📊 آمار: {total_count} تراکنش | جمع مبالغ: {self.format_currency(total_amount)}"
@@ -834,38 +759,16 @@ class StockTransactionForm(BaseInventoryForm):
                 from_date_miladi = from_date_shamsi.togregorian().strftime("%Y-%m-%d")
                 to_date_miladi = to_date_shamsi.togregorian().strftime("%Y-%m-%d")
                 
-                # دریافت تراکنش‌ها با فیلتر تاریخ
-                transactions = self.data_manager.warehouse.get_inventory_transactions(
-                    warehouse_type=warehouse_type,
-                    start_date=from_date_miladi,
-                    end_date=to_date_miladi
-                )
-                
-                # فیلتر بر اساس نوع تراکنش
+                # فیلتر نوع و جستجوی متن هم در دیتابیس انجام می‌شود
                 trans_type_filter = self.transaction_type.currentText()
-                if trans_type_filter != "همه انواع":
-                    transactions = [t for t in transactions if t.get('transaction_type') == trans_type_filter]
-                
-                # فیلتر بر اساس جستجوی متن
-                search_text = self.search_input.text().strip()
-                if search_text:
-                    search_text_lower = search_text.lower()
-                    transactions = [t for t in transactions if 
-                                   search_text_lower in str(t.get('description', '')).lower() or
-                                   search_text_lower in str(t.get('employee', '')).lower() or
-                                   search_text_lower in str(t.get('item_id', '')).lower()]
-                
-                # محدود کردن تعداد
-                limit = self.limit_spin.value()
-                if limit < len(transactions):
-                    transactions = transactions[:limit]
-                    self.table_info.setText(f"نمایش {limit} تراکنش از {len(transactions)} تراکنش یافت شده")
-                else:
-                    self.table_info.setText(f"نمایش {len(transactions)} تراکنش")
-                
-                print(f"✅ {len(transactions)} تراکنش پس از فیلتر یافت شد")
-                self.display_transactions(transactions)
-                self.update_stats(transactions)
+                filters = {
+                    'warehouse_type': warehouse_type,
+                    'start_date': from_date_miladi,
+                    'end_date': to_date_miladi,
+                    'transaction_type': trans_type_filter if trans_type_filter != "همه انواع" else None,
+                    'search': self.search_input.text().strip(),
+                }
+                self.show_transactions(filters)
                 
             else:
                 self.show_error("اتصال به دیتابیس برقرار نیست!")
@@ -893,7 +796,9 @@ class StockTransactionForm(BaseInventoryForm):
     def quick_export(self):
         """خروجی سریع به فایل متنی"""
         try:
-            row_count = self.table.rowCount()
+            text_rows = self.table.text_rows()
+            records = [self.table.record_at(row) for row in range(self.table.record_count())]
+            row_count = len(text_rows)
             if row_count == 0:
                 self.show_warning("هیچ تراکنشی برای خروجی وجود ندارد.")
                 return
@@ -920,35 +825,17 @@ class StockTransactionForm(BaseInventoryForm):
             report_lines.append("")
             
             # جمع کل مبالغ
-            total_amount = 0
-            for row in range(row_count):
-                try:
-                    amount_text = self.table.item(row, 9).text().replace('تومان', '').replace(',', '').strip()
-                    amount = float(amount_text) if amount_text else 0
-                    total_amount += amount
-                except:
-                    pass
+            total_amount = sum(record.get('total_price', 0) or 0 for record in records)
             
             report_lines.append(f"💰 جمع کل مبالغ: {self.format_currency(total_amount)}")
             report_lines.append("")
             
             # سرستون‌ها
-            headers = []
-            for col in range(self.table.columnCount()):
-                headers.append(self.table.horizontalHeaderItem(col).text())
-            
-            report_lines.append(" | ".join(headers))
+            report_lines.append(" | ".join(self.table.column_titles()))
             report_lines.append("-" * 80)
             
             # داده‌های هر ردیف
-            for row in range(row_count):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:
-                        row_data.append(item.text())
-                    else:
-                        row_data.append("")
+            for row_data in text_rows:
                 report_lines.append(" | ".join(row_data))
             
             report_lines.append("")
@@ -968,8 +855,7 @@ class StockTransactionForm(BaseInventoryForm):
     def export_to_excel(self):
         """خروجی به Excel"""
         try:
-            row_count = self.table.rowCount()
-            if row_count == 0:
+            if self.table.record_count() == 0:
                 self.show_warning("هیچ تراکنشی برای خروجی وجود ندارد.")
                 return
             
@@ -985,17 +871,12 @@ class StockTransactionForm(BaseInventoryForm):
     def print_selected(self):
         """چاپ تراکنش‌های انتخابی"""
         try:
-            selected_rows = self.table.selectedItems()
-            if not selected_rows:
+            selected_records = self.table.selected_records()
+            if not selected_records:
                 self.show_warning("لطفاً یک یا چند تراکنش را برای چاپ انتخاب کنید.")
                 return
             
-            # جمع‌آوری ردیف‌های انتخابی
-            unique_rows = set()
-            for item in selected_rows:
-                unique_rows.add(item.row())
-            
-            row_count = len(unique_rows)
+            row_count = len(selected_records)
             self.show_info(f"آماده‌سازی {row_count} تراکنش انتخابی برای چاپ...")
             
             # ایجاد گزارش انتخابی
@@ -1020,35 +901,17 @@ class StockTransactionForm(BaseInventoryForm):
             report_lines.append("")
             
             # جمع کل مبالغ انتخابی
-            total_amount = 0
-            for row in sorted(unique_rows):
-                try:
-                    amount_text = self.table.item(row, 9).text().replace('تومان', '').replace(',', '').strip()
-                    amount = float(amount_text) if amount_text else 0
-                    total_amount += amount
-                except:
-                    pass
+            total_amount = sum(record.get('total_price', 0) or 0 for record in selected_records)
             
             report_lines.append(f"💰 جمع کل مبالغ انتخابی: {self.format_currency(total_amount)}")
             report_lines.append("")
             
             # سرستون‌ها
-            headers = []
-            for col in range(self.table.columnCount()):
-                headers.append(self.table.horizontalHeaderItem(col).text())
-            
-            report_lines.append(" | ".join(headers))
+            report_lines.append(" | ".join(self.table.column_titles()))
             report_lines.append("-" * 80)
             
             # داده‌های ردیف‌های انتخابی
-            for row in sorted(unique_rows):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:
-                        row_data.append(item.text())
-                    else:
-                        row_data.append("")
+            for row_data in self.table.text_rows(selected_only=True):
                 report_lines.append(" | ".join(row_data))
             
             report_lines.append("")
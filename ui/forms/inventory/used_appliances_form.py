@@ -6,13 +6,13 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QLineEdit, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox,
+    QHeaderView, QMessageBox,
     QGroupBox, QFormLayout, QSpinBox, QDoubleSpinBox,
     QTextEdit, QFrame, QSizePolicy, QTabWidget,
     QStackedWidget, QCheckBox, QDateEdit, QFileDialog, QInputDialog
 )
 from PySide6.QtCore import Qt, QDate
-from PySide6.QtGui import QFont, QColor, QPixmap
+from PySide6.QtGui import QFont, QPixmap
 import jdatetime
 from datetime import datetime
 import os
@@ -23,11 +23,34 @@ from .widgets.currency_converter import CurrencyConverter
 from .widgets.inventory_date_input import InventoryDateInput
 from .widgets.enhanced_combo import EnhancedComboBox
 from .widgets.image_upload_widget import ImageUploadWidget
+from ui.widgets.record_table import TableColumn, ROW_NUMBER
 
 
 class UsedAppliancesForm(BaseInventoryForm):
     """فرم مدیریت انبار لوازم دست دوم - نسخه متصل به دیتابیس"""
     
+    # رنگ ستون وضعیت
+    STATUS_COLORS = {
+        'موجود': '#27ae60',
+        'فروخته شده': '#3498db',
+        'در حال تعمیر': '#f39c12',
+        'رزرو شده': '#9b59b6',
+        'اسقاط': '#7f8c8d',
+    }
+    
+    # رنگ ستون وضعیت فنی
+    CONDITION_COLORS = {
+        'در حد نو': '#27ae60',
+        'خیلی خوب': '#2ecc71',
+        'خوب': '#f39c12',
+        'متوسط': '#e67e22',
+    }
+    
+    # متن نمایشی منبع
+    SOURCE_TEXTS = {
+        'تامین کننده': 'تامین‌کننده',
+    }
+    
     def __init__(self, parent=None):
         super().__init__("انبار لوازم دست دوم", parent)
         self.current_edit_id = None
@@ -639,31 +662,35 @@ class UsedAppliancesForm(BaseInventoryForm):
         """ایجاد بخش جدول نمایش دستگاه‌ها"""
         table_group, table_layout = self.create_form_group("📋 لیست دستگاه‌های دست دوم")
         
-        self.table = self.create_table([
-            "ردیف",
-            "دسته‌بندی",
-            "برند/مدل",
-            "سریال",
-            "وضعیت فنی",
-            "منبع",
-            "قیمت خرید",
-            "قیمت فروش",
-            "سود",
-            "وضعیت",
-            "عملیات"
+        center = Qt.AlignCenter
+        self.table = self.create_record_table([
+            TableColumn("ردیف", ROW_NUMBER, align=center, width=60),
+            TableColumn("دسته‌بندی", 'device_type', width=120),
+            TableColumn("برند/مدل", text=lambda item: f"{item.get('brand', '')} - {item.get('model', '')}",
+                        sort_key=lambda item: f"{item.get('brand', '')} - {item.get('model', '')}", width=180),
+            TableColumn("سریال", 'serial_number', width=120),
+            TableColumn("وضعیت فنی", 'condition', align=center, width=120,
+                        background=self.condition_color, foreground=lambda item: 'white'),
+            TableColumn("منبع", 'source_type', align=center, width=100,
+                        text=lambda item: self.SOURCE_TEXTS.get(item.get('source_type', ''), item.get('source_type', ''))),
+            TableColumn("قیمت خرید", 'purchase_price', width=120,
+                        text=lambda item: self.format_currency(item.get('purchase_price', 0))),
+            TableColumn("قیمت فروش", 'sale_price', width=120,
+                        text=lambda item: self.format_currency(item.get('sale_price', 0))),
+            TableColumn("سود", align=center, width=120,
+                        text=lambda item: self.format_currency(self.item_profit(item)),
+                        sort_key=self.item_profit, foreground=self.profit_color),
+            TableColumn("وضعیت", 'status', align=center, width=100,
+                        background=lambda item: self.STATUS_COLORS.get(item.get('status', '')),
+                        foreground=lambda item: 'white'),
+            TableColumn("عملیات", actions=[
+                ('view', "👁️", "مشاهده جزئیات"),
+                ('edit', "✏️", "ویرایش دستگاه"),
+                ('delete', "🗑️", "حذف با ثبت تراکنش"),
+                ('soft_delete', "📝", "حذف نرم (تغییر وضعیت)"),
+            ]),
         ])
-        
-        # تنظیم عرض ستون‌ها
-        self.table.setColumnWidth(0, 60)   # ردیف
-        self.table.setColumnWidth(1, 120)  # دسته‌بندی
-        self.table.setColumnWidth(2, 180)  # برند/مدل
-        self.table.setColumnWidth(3, 120)  # سریال
-        self.table.setColumnWidth(4, 120)  # وضعیت فنی
-        self.table.setColumnWidth(5, 100)  # منبع
-        self.table.setColumnWidth(6, 120)  # قیمت خرید
-        self.table.setColumnWidth(7, 120)  # قیمت فروش
-        self.table.setColumnWidth(8, 120)  # سود
-        self.table.setColumnWidth(9, 100)  # وضعیت
+        self.table.action_triggered.connect(self.on_table_action)
         
         # تنظیم حداقل ارتفاع
         self.table.setMinimumHeight(350)
@@ -721,7 +748,7 @@ class UsedAppliancesForm(BaseInventoryForm):
         self.main_layout.addWidget(btn_group)
         
         # اتصال انتخاب جدول
-        self.table.itemSelectionChanged.connect(self.on_table_selection_changed)
+        self.table.selection_changed.connect(self.on_table_selection_changed)
     
     def create_summary_section(self):
         """ایجاد بخش خلاصه"""
@@ -904,133 +931,38 @@ class UsedAppliancesForm(BaseInventoryForm):
             self.update_stats([])
     
     def populate_table(self, data):
-        """پر کردن جدول با داده‌ها"""
-        self.table.setRowCount(len(data))
-        
-        for row, item in enumerate(data):
-            # ردیف
-            self.table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            self.table.item(row, 0).setTextAlignment(Qt.AlignCenter)
-            
-            # دسته‌بندی
-            self.table.setItem(row, 1, QTableWidgetItem(item.get('device_type', '')))
-            
-            # برند/مدل
-            brand_model = f"{item.get('brand', '')} - {item.get('model', '')}"
-            self.table.setItem(row, 2, QTableWidgetItem(brand_model))
-            
-            # شماره سریال
-            self.table.setItem(row, 3, QTableWidgetItem(item.get('serial_number', '')))
-            
-            # وضعیت فنی
-            condition_item = QTableWidgetItem(item.get('condition', ''))
-            condition_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ‌آمیزی وضعیت فنی
-            condition = item.get('condition', '')
-            if condition == 'در حد نو':
-                condition_item.setBackground(QColor('#27ae60'))
-            elif condition == 'خیلی خوب':
-                condition_item.setBackground(QColor('#2ecc71'))
-            elif condition == 'خوب':
-                condition_item.setBackground(QColor('#f39c12'))
-            elif condition == 'متوسط':
-                condition_item.setBackground(QColor('#e67e22'))
-            elif 'تعمیر' in condition:
-                condition_item.setBackground(QColor('#e74c3c'))
-            
-            condition_item.setForeground(QColor('white'))
-            self.table.setItem(row, 4, condition_item)
-            
-            # منبع
-            source_type = item.get('source_type', '')
-            source_text = source_type
-            if source_type == 'مشتری':
-                source_text = 'مشتری'
-            elif source_type == 'تامین کننده':
-                source_text = 'تامین‌کننده'
-            elif source_type == 'تعویض شده':
-                source_text = 'تعویض شده'
-            
-            source_item = QTableWidgetItem(source_text)
-            source_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 5, source_item)
-            
-            # قیمت خرید
-            purchase_price = item.get('purchase_price', 0)
-            self.table.setItem(row, 6, QTableWidgetItem(self.format_currency(purchase_price)))
-            
-            # قیمت فروش
-            sale_price = item.get('sale_price', 0)
-            self.table.setItem(row, 7, QTableWidgetItem(self.format_currency(sale_price)))
-            
-            # سود
-            profit = sale_price - purchase_price
-            profit_item = QTableWidgetItem(self.format_currency(profit))
-            profit_item.setTextAlignment(Qt.AlignCenter)
-            
-            if profit > 0:
-                profit_item.setForeground(QColor('#27ae60'))
-            elif profit < 0:
-                profit_item.setForeground(QColor('#e74c3c'))
-            
-            self.table.setItem(row, 8, profit_item)
-            
-            # وضعیت
-            status = item.get('status', '')
-            status_item = QTableWidgetItem(status)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            
-            # رنگ‌آمیزی وضعیت
-            if status == 'موجود':
-                status_item.setBackground(QColor('#27ae60'))
-            elif status == 'فروخته شده':
-                status_item.setBackground(QColor('#3498db'))
-            elif status == 'در حال تعمیر':
-                status_item.setBackground(QColor('#f39c12'))
-            elif status == 'رزرو شده':
-                status_item.setBackground(QColor('#9b59b6'))
-            elif status == 'اسقاط':
-                status_item.setBackground(QColor('#7f8c8d'))
-            
-            status_item.setForeground(QColor('white'))
-            self.table.setItem(row, 9, status_item)
-            
-            # عملیات
-            btn_widget = QWidget()
-            btn_layout = QHBoxLayout()
-            btn_layout.setContentsMargins(2, 2, 2, 2)
-
-            btn_view = QPushButton("👁️")
-            btn_view.setFixedSize(35, 35)
-            btn_view.setToolTip("مشاهده جزئیات")
-            btn_view.clicked.connect(lambda checked, idx=item['id']: self.view_item(idx))
-
-            btn_edit = QPushButton("✏️")
-            btn_edit.setFixedSize(35, 35)
-            btn_edit.setToolTip("ویرایش دستگاه")
-            btn_edit.clicked.connect(lambda checked, idx=item['id']: self.edit_item(idx))
-
-            # دکمه حذف اصلی - حذف با تراکنش
-            btn_delete = QPushButton("🗑️")
-            btn_delete.setFixedSize(35, 35)
-            btn_delete.setToolTip("حذف با ثبت تراکنش")
-            btn_delete.clicked.connect(lambda checked, idx=item['id']: self.on_delete_with_transaction_for_item(idx))
-
-            # دکمه حذف نرم
-            btn_soft_delete = QPushButton("📝")
-            btn_soft_delete.setFixedSize(35, 35)
-            btn_soft_delete.setToolTip("حذف نرم (تغییر وضعیت)")
-            btn_soft_delete.clicked.connect(lambda checked, idx=item['id']: self.on_soft_delete_for_item(idx))
-
-            btn_layout.addWidget(btn_view)
-            btn_layout.addWidget(btn_edit)
-            btn_layout.addWidget(btn_delete)
-            btn_layout.addWidget(btn_soft_delete)
-            btn_layout.addStretch()
-
-            btn_widget.setLayout(btn_layout)
-            self.table.setCellWidget(row, 10, btn_widget)
+        """پر کردن جدول با داده‌ها (قالب‌بندی سلول‌ها هنگام نمایش انجام می‌شود)"""
+        self.table.set_rows(data)
+    
+    def condition_color(self, item):
+        """رنگ زمینه ستون وضعیت فنی"""
+        condition = item.get('condition', '') or ''
+        if 'تعمیر' in condition:
+            return '#e74c3c'
+        return self.CONDITION_COLORS.get(condition)
+    
+    def item_profit(self, item):
+        """سود دستگاه (قیمت فروش منهای قیمت خرید)"""
+        return (item.get('sale_price', 0) or 0) - (item.get('purchase_price', 0) or 0)
+    
+    def profit_color(self, item):
+        profit = self.item_profit(item)
+        if profit > 0:
+            return '#27ae60'
+        if profit < 0:
+            return '#e74c3c'
+        return None
+    
+    def on_table_action(self, action, item):
+        """دکمه‌های عملیات هر ردیف جدول"""
+        if action == 'view':
+            self.view_item(item['id'])
+        elif action == 'edit':
+            self.edit_item(item['id'])
+        elif action == 'delete':
+            self.on_delete_with_transaction_for_item(item['id'])
+        elif action == 'soft_delete':
+            self.on_soft_delete_for_item(item['id'])
     
     def update_stats(self, data):
         """به‌روزرسانی آمار"""
@@ -1376,94 +1308,6 @@ class UsedAppliancesForm(BaseInventoryForm):
             traceback.print_exc()
             self.show_error(f"خطا در ذخیره دستگاه: {str(e)}")
 
-    def shamsi_to_miladi(self, shamsi_date_str, format_str="%Y-%m-%d"):
-        """تبدیل تاریخ شمسی به میلادی"""
-        if not shamsi_date_str:
-            return None
-        
-        try:
-            # وارد کردن jdatetime
-            import jdatetime
-            
-            # جدا کردن اجزای تاریخ شمسی
-            # فرمت می‌تواند YYYY-MM-DD یا YYYY/MM/DD باشد
-            shamsi_date_str = str(shamsi_date_str).strip()
-            
-            # حذف کاراکترهای غیرعددی
-            import re
-            numbers = re.findall(r'\d+', shamsi_date_str)
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                # اگر سال بین 1300-1500 است، یعنی شمسی است
-                if 1300 <= year <= 1500:
-                    # تبدیل شمسی به میلادی
-                    jalali = jdatetime.date(year, month, day)
-                    gregorian = jalali.togregorian()
-                    
-                    if format_str == "%Y-%m-%d":
-                        return gregorian.strftime("%Y-%m-%d")
-                    elif format_str == "%Y/%m/%d":
-                        return gregorian.strftime("%Y/%m/%d")
-                    else:
-                        return gregorian.strftime(format_str)
-                else:
-                    # احتمالاً میلادی است
-                    return f"{year:04d}-{month:02d}-{day:02d}"
-            else:
-                # اگر نمی‌توانیم تبدیل کنیم، تاریخ امروز را برگردان
-                from PySide6.QtCore import QDate
-                return QDate.currentDate().toString("yyyy-MM-dd")
-                
-        except Exception as e:
-            print(f"خطا در تبدیل تاریخ شمسی به میلادی: {e}")
-            # در صورت خطا، تاریخ امروز برگردان
-            from PySide6.QtCore import QDate
-            return QDate.currentDate().toString("yyyy-MM-dd")
-
-    def miladi_to_shamsi(self, miladi_date_str, format_str="%Y-%m-%d"):
-        """تبدیل تاریخ میلادی به شمسی"""
-        if not miladi_date_str:
-            return ""
-        
-        try:
-            import jdatetime
-            
-            # جدا کردن اجزای تاریخ میلادی
-            miladi_date_str = str(miladi_date_str).strip()
-            
-            # حذف کاراکترهای غیرعددی
-            import re
-            numbers = re.findall(r'\d+', miladi_date_str)
-            
-            if len(numbers) >= 3:
-                year, month, day = map(int, numbers[:3])
-                
-                # اگر سال بزرگتر از 1500 است، یعنی میلادی است
-                if year > 1500:
-                    # تبدیل میلادی به شمسی
-                    from datetime import date
-                    gregorian_date = date(year, month, day)
-                    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
-                    
-                    if format_str == "%Y-%m-%d":
-                        return jalali.strftime("%Y-%m-%d")
-                    elif format_str == "%Y/%m/%d":
-                        return jalali.strftime("%Y/%m/%d")
-                    else:
-                        return jalali.strftime(format_str)
-                else:
-                    # احتمالاً شمسی است
-                    return f"{year:04d}-{month:02d}-{day:02d}"
-            else:
-                return miladi_date_str
-                
-        except Exception as e:
-            print(f"خطا در تبدیل تاریخ میلادی به شمسی: {e}")
-            return miladi_date_str
-
-
     def view_item(self, item_id):
         """مشاهده جزئیات دستگاه"""
         try:
@@ -1612,12 +1456,9 @@ class UsedAppliancesForm(BaseInventoryForm):
  
     def on_edit(self):
         """ویرایش دستگاه انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
-                self.edit_item(item_id)
+        selected = self.table.selected_record()
+        if selected:
+            self.edit_item(selected['id'])
 
     def delete_item_with_transaction(self, item_id, reason="حذف دستی"):
         """حذف آیتم از انبار با ثبت تراکنش - نسخه اصلاح شده"""
@@ -1736,51 +1577,14 @@ class UsedAppliancesForm(BaseInventoryForm):
         print("🔴 on_delete_with_transaction فراخوانی شد")
         
         try:
-            selected_rows = self.table.selectionModel().selectedRows()
-            if not selected_rows:
+            selected = self.table.selected_record()
+            if not selected:
                 self.show_warning("لطفاً یک آیتم را از جدول انتخاب کنید.")
                 return
             
-            row = selected_rows[0].row()
-            print(f"🔴 ردیف انتخاب شده: {row}")
-            
-            # بررسی وجود داده در ردیف انتخاب شده
-            if row >= self.table.rowCount():
-                self.show_error("ردیف انتخاب شده معتبر نیست.")
-                return
-            
-            # گرفتن کد دستگاه از ستون دوم (دسته‌بندی) یا مدل
-            brand_model_item = self.table.item(row, 2)
-            serial_item = self.table.item(row, 3)
-            
-            if not brand_model_item:
-                self.show_error("نمی‌توان اطلاعات دستگاه را پیدا کرد.")
-                return
-            
-            brand_model = brand_model_item.text()
-            serial_number = serial_item.text() if serial_item else ""
-            
-            print(f"🔴 دستگاه: {brand_model}")
-            print(f"🔴 شماره سریال: {serial_number}")
-            
-            # پیدا کردن آیتم در all_data
-            item_id = None
-            for item in self.all_data:
-                # تلاش برای مطابقت با مدل یا شماره سریال
-                item_brand_model = f"{item.get('brand', '')} - {item.get('model', '')}"
-                item_serial = item.get('serial_number', '')
-                
-                if (serial_number and item_serial == serial_number) or \
-                (brand_model and item_brand_model == brand_model):
-                    item_id = item.get('id')
-                    print(f"🔴 یافتن item_id: {item_id}")
-                    break
-            
-            if not item_id:
-                # اگر از طریق روش بالا پیدا نکردیم، از طریق شماره ردیف در جدول امتحان کنیم
-                if row < len(self.all_data):
-                    item_id = self.all_data[row].get('id')
-                    print(f"🔴 item_id از طریق ردیف: {item_id}")
+            item_id = selected.get('id')
+            print(f"🔴 دستگاه: {selected.get('brand', '')} - {selected.get('model', '')}")
+            print(f"🔴 شماره سریال: {selected.get('serial_number', '')}")
             
             if not item_id:
                 self.show_error("آیتم انتخاب شده در داده‌ها یافت نشد.")
@@ -1877,48 +1681,36 @@ class UsedAppliancesForm(BaseInventoryForm):
 
     def on_soft_delete(self):
         """حذف نرم آیتم انتخاب شده"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if selected_rows:
-            row = selected_rows[0].row()
-            if row < len(self.all_data):
-                item_id = self.all_data[row]['id']
+        selected = self.table.selected_record()
+        if selected:
+            # حذف نرم
+            if self.soft_delete_item(selected['id']):
+                self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
                 
-                # حذف نرم
-                if self.soft_delete_item(item_id):
-                    self.show_success("حذف نرم با موفقیت انجام شد (وضعیت تغییر یافت).")
-                    
-                    # تازه‌سازی داده‌ها
-                    self.load_data()
-                    if hasattr(self, 'data_changed'):
-                        self.data_changed.emit()
+                # تازه‌سازی داده‌ها
+                self.load_data()
+                if hasattr(self, 'data_changed'):
+                    self.data_changed.emit()
 
     def log_action(self, log_data):
         """ثبت لاگ عملیات"""
         try:
-            if self.data_manager and hasattr(self.data_manager.db, 'execute_query'):
-                query = """
-                INSERT INTO Logs (user_id, action, table_name, record_id, details, ip_address)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """
-                
-                params = (
+            if self.data_manager and hasattr(self.data_manager, 'audit_log'):
+                self.data_manager.audit_log.log(
                     log_data.get('user_id', 1),
                     log_data.get('action', ''),
-                    log_data.get('table_name', ''),
-                    log_data.get('record_id', 0),
-                    log_data.get('details', ''),
-                    log_data.get('ip_address', '127.0.0.1')
+                    table_name=log_data.get('table_name', ''),
+                    record_id=log_data.get('record_id', 0),
+                    details=log_data.get('details', ''),
+                    ip_address=log_data.get('ip_address', '127.0.0.1')
                 )
-                
-                self.data_manager.db.execute_query(query, params)
                 print(f"📝 لاگ ثبت شد: {log_data.get('action')}")
         except Exception as e:
             print(f"⚠️ خطا در ثبت لاگ: {e}")
 
     def on_table_selection_changed(self):
         """هنگام تغییر انتخاب در جدول"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        has_selection = len(selected_rows) > 0
+        has_selection = self.table.has_selection()
         
         self.btn_edit.setEnabled(has_selection)
         self.btn_delete.setEnabled(has_selection)
@@ -1931,16 +1723,11 @@ class UsedAppliancesForm(BaseInventoryForm):
 
     def on_sell(self):
         """ثبت فروش دستگاه"""
-        selected_rows = self.table.selectionModel().selectedRows()
-        if not selected_rows:
-            return
-        
-        row = selected_rows[0].row()
-        if row >= len(self.all_data):
+        item = self.table.selected_record()
+        if not item:
             return
         
-        item_id = self.all_data[row]['id']
-        item = self.all_data[row]
+        item_id = item['id']
         
         if item.get('status') == 'فروخته شده':
             self.show_warning("این دستگاه قبلاً فروخته شده است.")
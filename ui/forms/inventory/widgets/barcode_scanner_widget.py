@@ -2,21 +2,20 @@
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
+from modules.lazy_imports import is_available, optional_module
+
+# cv2، pyzbar و numpy فقط هنگام روشن شدن دوربین ایمپورت می‌شوند
+cv2 = optional_module('cv2')
+CV2_AVAILABLE = is_available('cv2')
+if not CV2_AVAILABLE:
     print("⚠️ کتابخانه OpenCV (cv2) نصب نیست. امکان استفاده از دوربین وجود ندارد.")
 
-try:
-    from pyzbar.pyzbar import decode
-    PYZBAR_AVAILABLE = True
-except ImportError:
-    PYZBAR_AVAILABLE = False
+pyzbar = optional_module('pyzbar.pyzbar')
+PYZBAR_AVAILABLE = is_available('pyzbar')
+if not PYZBAR_AVAILABLE:
     print("⚠️ کتابخانه pyzbar نصب نیست. امکان اسکن بارکد وجود ندارد.")
 
-import numpy as np
+np = optional_module('numpy')
 
 class BarcodeScannerWidget(QWidget):
     """ویجت اسکن بارکد با استفاده از دوربین"""
@@ -142,7 +141,7 @@ class BarcodeScannerWidget(QWidget):
             ret, frame = self.camera.read()
             if ret:
                 # تشخیص بارکد
-                barcodes = decode(frame)
+                barcodes = pyzbar.decode(frame)
                 
                 # رسم مستطیل دور بارکدها
                 for barcode in barcodes:
@@ -9,6 +9,8 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QTimer
 
+from database.search_index import normalize
+
 class EnhancedComboBox(QWidget):
     """کامبوباکس پیشرفته با جستجوی زنده"""
     
@@ -205,7 +207,8 @@ class EnhancedComboBox(QWidget):
     
     def perform_search(self):
         """انجام جستجو"""
-        search_text = self.search_edit.text().strip().lower()
+        # مقایسه با نرمال‌سازی فارسی (ی/ک عربی، نیم‌فاصله و ارقام فارسی) مثل ایندکس جستجو
+        search_text = normalize(self.search_edit.text().strip()).lower()
         if not search_text:
             return
         
@@ -213,16 +216,16 @@ class EnhancedComboBox(QWidget):
         
         if self.combo_type == 'supplier':
             for item in self.items:
-                name = self.format_supplier_name(item).lower()
+                name = normalize(self.format_supplier_name(item)).lower()
                 if search_text in name:
                     filtered.append(item)
                     continue
-                mobile = item.get('mobile', '').lower()
+                mobile = normalize(item.get('mobile', '')).lower()
                 if search_text in mobile:
                     filtered.append(item)
         else:
             for item in self.items:
-                name = item.get('name', '').lower()
+                name = normalize(item.get('name', '')).lower()
                 if search_text in name:
                     filtered.append(item)
         
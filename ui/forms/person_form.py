@@ -566,16 +566,9 @@ class PersonForm(QWidget):
         # جستجو در دیتابیس
         results = []
         try:
-            if name:
-                # استفاده از متد search_persons موجود در models.py
-                results = self.data_manager.person.search_persons(name)
-            else:
-                # اگر فقط موبایل یا کد ملی وارد شده
-                all_persons = self.data_manager.person.get_all_persons()
-                for person in all_persons:
-                    if (mobile and mobile in str(person.get('mobile', ''))) or \
-                       (national_id and national_id in str(person.get('national_id', ''))):
-                        results.append(person)
+            # جستجوی تمام‌متن: نام، موبایل و کد ملی در یک ایندکس هستند و همه فیلدهای پر شده باید بخوانند
+            keyword = " ".join(text for text in (name, mobile, national_id) if text)
+            results = self.data_manager.person.search_persons(keyword)
         
         except Exception as e:
             print(f"خطا در جستجو: {e}")
@@ -47,8 +47,7 @@ class ReceptionForm(QWidget):
         # 🔴 اضافه کردن این خط (برای ذخیره فرم دستگاه)
         self.device_form = None
 
-        # لیست‌های کش شده
-        self.customers_cache = []
+        # لیست کش شده دستگاه‌ها (مشتریان با جستجوی تمام‌متن پیدا می‌شوند)
         self.devices_cache = []
         
         self.init_ui()
@@ -878,9 +877,6 @@ class ReceptionForm(QWidget):
     
     def load_initial_data(self):
         """بارگذاری داده‌های اولیه"""
-        # بارگذاری لیست مشتریان
-        self.load_customers()
-        
         # بارگذاری لیست دستگاه‌ها
         self.load_devices()
         
@@ -890,16 +886,6 @@ class ReceptionForm(QWidget):
         # بارگذاری آمار
         self.load_stats()
     
-    def load_customers(self):
-        """بارگذاری لیست مشتریان"""
-        try:
-            self.customers_cache = self.data_manager.person.get_all_persons()
-            # فقط مشتریان
-            self.customers_cache = [p for p in self.customers_cache if p.get('person_type') == 'مشتری']
-        except Exception as e:
-            print(f"خطا در بارگذاری مشتریان: {e}")
-            self.customers_cache = []
-    
     def load_devices(self):
         """بارگذاری لیست دستگاه‌ها"""
         try:
@@ -914,14 +900,11 @@ class ReceptionForm(QWidget):
             self.customer_list.clear()
             return
         
-        filtered = []
-        for customer in self.customers_cache:
-            search_text = f"{customer.get('first_name', '')} {customer.get('last_name', '')} {customer.get('mobile', '')}".lower()
-            if keyword.lower() in search_text:
-                filtered.append(customer)
+        # جستجوی تمام‌متن (نام یا موبایل) به ترتیب میزان تطابق
+        filtered = self.data_manager.person.search_persons(keyword, person_type='مشتری', limit=10)
         
         self.customer_list.clear()
-        for customer in filtered[:10]:  # حداکثر 10 نتیجه
+        for customer in filtered:  # حداکثر 10 نتیجه
             item = QListWidgetItem()
             item.setText(f"{customer.get('first_name', '')} {customer.get('last_name', '')} - {customer.get('mobile', '')}")
             item.setData(Qt.UserRole, customer)
@@ -939,15 +922,11 @@ class ReceptionForm(QWidget):
                 self.device_list.addItem(item)
             return
         
-        # 🔴 کد جستجوی قبلی...
-        filtered = []
-        for device in self.devices_cache:
-            search_text = f"{device.get('device_type', '')} {device.get('brand', '')} {device.get('model', '')} {device.get('serial_number', '')}".lower()
-            if keyword.lower() in search_text:
-                filtered.append(device)
+        # جستجوی تمام‌متن (نوع، برند، مدل یا سریال) به ترتیب میزان تطابق
+        filtered = self.data_manager.device.search_devices(keyword, limit=10)
         
         self.device_list.clear()
-        for device in filtered[:10]:  # حداکثر ۱۰ نتیجه
+        for device in filtered:  # حداکثر ۱۰ نتیجه
             item = QListWidgetItem()
             item.setText(f"{device.get('device_type', '')} {device.get('brand', '')} {device.get('model', '')} - سریال: {device.get('serial_number', '')}")
             item.setData(Qt.UserRole, device)
@@ -1035,36 +1014,19 @@ class ReceptionForm(QWidget):
             if status != "همه":
                 filters['status'] = status
             
-            # درخواست از دیتابیس
-            receptions = self.data_manager.reception.get_all_receptions()
-            
-            # اعمال فیلترها
-            filtered_receptions = []
-            for reception in receptions:
-                match = True
-                
-                if 'reception_number' in filters:
-                    if filters['reception_number'] not in reception.get('reception_number', ''):
-                        match = False
-                
-                if 'customer_name' in filters and match:
-                    customer_full = reception.get('customer_name', '')
-                    if filters['customer_name'].lower() not in customer_full.lower():
-                        match = False
-                
-                if 'mobile' in filters and match:
-                    # نیاز به JOIN با جدول Persons دارد
-                    pass  # فعلاً نادیده بگیر
-                
-                if 'status' in filters and match:
-                    if filters['status'] != reception.get('status', ''):
-                        match = False
-                
-                if match:
-                    filtered_receptions.append(reception)
+            # فیلتر در خود دیتابیس (حداکثر 50 نتیجه، جدیدترین اول)
+            page = self.data_manager.reception.get_receptions_page(
+                {
+                    'reception_number': filters.get('reception_number'),
+                    'name': filters.get('customer_name'),
+                    'mobile': filters.get('mobile'),
+                    'status': filters.get('status'),
+                },
+                page_size=50
+            )
             
             # نمایش نتایج
-            self.display_search_results(filtered_receptions[:50])  # حداکثر 50 نتیجه
+            self.display_search_results(page['rows'])
             
         except Exception as e:
             print(f"خطا در جستجو: {e}")
@@ -1180,9 +1142,8 @@ class ReceptionForm(QWidget):
     def load_recent_receptions(self):
         """بارگذاری پذیرش‌های اخیر"""
         try:
-            receptions = self.data_manager.reception.get_all_receptions()
-            # نمایش 10 مورد آخر
-            recent = receptions[:10] if len(receptions) > 10 else receptions
+            # 10 مورد آخر
+            recent = self.data_manager.reception.get_receptions_page(page_size=10)['rows']
             # می‌توانید این لیست را در یک ویجت دیگر نمایش دهید
         except Exception as e:
             print(f"خطا در بارگذاری پذیرش‌های اخیر: {e}")
@@ -1190,27 +1151,24 @@ class ReceptionForm(QWidget):
     def load_stats(self):
         """بارگذاری آمار پذیرش"""
         try:
-            all_receptions = self.data_manager.reception.get_all_receptions()
+            reception = self.data_manager.reception
+            status_counts = reception.count_receptions_by_status()
             
             # آمار کلی
-            total = len(all_receptions)
+            total = sum(status_counts.values())
             self.total_receptions_label.setText(str(total))
             
             # پذیرش‌های امروز
-            today = datetime.now().date()
-            today_str = today.strftime('%Y-%m-%d')
-            today_count = sum(1 for r in all_receptions 
-                            if str(r.get('reception_date', '')).startswith(today_str))
+            today_str = datetime.now().date().strftime('%Y-%m-%d')
+            today_count, _ = reception.count_receptions({'start_date': today_str, 'end_date': today_str})
             self.today_receptions_label.setText(str(today_count))
             
             # در حال تعمیر
-            repairing = sum(1 for r in all_receptions 
-                          if r.get('status') == 'در حال تعمیر')
+            repairing = status_counts.get('در حال تعمیر', 0)
             self.repairing_label.setText(str(repairing))
             
             # تعمیر شده
-            repaired = sum(1 for r in all_receptions 
-                         if r.get('status') == 'تعمیر شده')
+            repaired = status_counts.get('تعمیر شده', 0)
             self.repaired_label.setText(str(repaired))
             
         except Exception as e:
@@ -1610,15 +1568,11 @@ class ReceptionForm(QWidget):
     
     def on_customer_saved(self, person_data):
         """هنگام ذخیره مشتری جدید"""
-        # تازه‌سازی لیست مشتریان
-        self.load_customers()
-        
         # انتخاب مشتری جدید
-        for customer in self.customers_cache:
-            if customer.get('id') == person_data.get('id'):
-                self.customer_data = customer
-                self.display_customer_info()
-                break
+        customer = self.data_manager.person.get_person_by_id(person_data.get('id'))
+        if customer:
+            self.customer_data = customer
+            self.display_customer_info()
         
         # نمایش پیام
         QMessageBox.information(self, "عملیات موفق", 
@@ -504,18 +504,12 @@ class RepairForm(QWidget):
         """ذخیره خدمات تعمیر"""
         try:
             services = self.services_tab.get_services_data()
-            # حذف خدمات قبلی
-            self.data_manager.repair.delete_repair_services(self.repair_id)
-            
-            # اضافه کردن خدمات جدید
-            for service in services:
-                self.data_manager.repair.add_repair_service(
-                    repair_id=self.repair_id,
-                    service_id=service['service_id'],
-                    quantity=service['quantity'],
-                    unit_price=service['unit_price'],
-                    description=service.get('description', '')
-                )
+            with self.data_manager.db.transaction():
+                # حذف خدمات قبلی
+                self.data_manager.repair.delete_repair_services(self.repair_id)
+                
+                # اضافه کردن خدمات جدید (درج گروهی)
+                self.data_manager.repair.add_repair_services(self.repair_id, services)
             print(f"✅ خدمات تعمیر ذخیره شد: {len(services)} مورد")
         except Exception as e:
             print(f"❌ خطا در ذخیره خدمات: {e}")
@@ -529,29 +523,26 @@ class RepairForm(QWidget):
                 print("⚠️ هیچ قطعه‌ای برای ذخیره وجود ندارد")
                 return
             
-            # حذف قطعات قبلی
-            self.data_manager.repair.delete_repair_parts(self.repair_id)
-            
-            # اضافه کردن قطعات جدید
             saved_count = 0
-            for part in parts:
-                success = self.data_manager.repair.add_repair_part(
-                    repair_id=self.repair_id,
-                    part_id=part['part_id'],
-                    quantity=part['quantity'],
-                    unit_price=part['unit_price'],
-                    warehouse_type=part['warehouse_type'],
-                    description=f"{part['part_name']} - {part.get('brand', '')}"
-                )
-                if success:
-                    saved_count += 1
+            with self.data_manager.db.transaction():
+                # حذف قطعات قبلی
+                self.data_manager.repair.delete_repair_parts(self.repair_id)
+                
+                # اضافه کردن قطعات جدید (درج گروهی)
+                rows = [
+                    dict(part, description=f"{part['part_name']} - {part.get('brand', '')}")
+                    for part in parts
+                ]
+                if self.data_manager.repair.add_repair_parts(self.repair_id, rows):
+                    saved_count = len(rows)
                     
                     # کاهش موجودی انبار
-                    self.update_inventory(
-                        part['part_id'], 
-                        part['warehouse_type'], 
-                        -part['quantity']
-                    )
+                    for part in parts:
+                        self.update_inventory(
+                            part['part_id'], 
+                            part['warehouse_type'], 
+                            -part['quantity']
+                        )
             
             print(f"✅ {saved_count} قطعه با موفقیت ذخیره شد")
             
@@ -3,6 +3,8 @@ from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
+from database import search_index
+
 class RepairPartsTab(QWidget):
     parts_changed = Signal()
     
@@ -161,30 +163,29 @@ class RepairPartsTab(QWidget):
         search_term = self.txt_part_search.text()
         
         try:
+            # موجودی هر قطعه از PartStock و قیمت از آخرین ردیف موجود انبار
             if warehouse == "قطعات نو":
-                query = """
-                SELECT 
-                    p.id, p.part_code, p.part_name, p.category, p.brand, p.model,
-                    COALESCE(np.quantity, 0) as qty,
-                    COALESCE(np.sale_price, 0) as price
-                FROM Parts p
-                LEFT JOIN NewPartsWarehouse np ON p.id = np.part_id
-                WHERE np.status = 'موجود' AND COALESCE(np.quantity, 0) > 0
-                """
+                qty_column, table_name = "new_qty", "NewPartsWarehouse"
             else:  # قطعات دست دوم
-                query = """
-                SELECT 
-                    p.id, p.part_code, p.part_name, p.category, p.brand, p.model,
-                    COALESCE(up.quantity, 0) as qty,
-                    COALESCE(up.sale_price, 0) as price
-                FROM Parts p
-                LEFT JOIN UsedPartsWarehouse up ON p.id = up.part_id
-                WHERE up.status = 'موجود' AND COALESCE(up.quantity, 0) > 0
-                """
+                qty_column, table_name = "used_qty", "UsedPartsWarehouse"
+            
+            query = f"""
+            SELECT 
+                p.id, p.part_code, p.part_name, p.category, p.brand, p.model,
+                s.{qty_column} as qty,
+                COALESCE((
+                    SELECT w.sale_price FROM {table_name} w
+                    WHERE w.part_id = p.id AND w.status = 'موجود'
+                    ORDER BY w.id DESC LIMIT 1
+                ), 0) as price
+            FROM PartStock s
+            JOIN Parts p ON p.id = s.part_id
+            WHERE s.{qty_column} > 0
+            """
             
             if search_term and len(search_term) >= 2:
-                query += " AND (p.part_name LIKE ? OR p.part_code LIKE ? OR p.brand LIKE ?)"
-                params = [f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"]
+                match_sql, params = search_index.match_condition('Parts', 'p.id', search_term)
+                query += f" AND {match_sql}"
             else:
                 params = []
             
@@ -261,6 +262,15 @@ class RepairPartsTab(QWidget):
             QMessageBox.warning(self, "اخطار", "لطفاً قیمت واحد را وارد کنید.")
             return
         
+        # بررسی موجودی فعلی (یک جستجوی کلید اصلی در PartStock) با کسر مقدار قبلاً اضافه شده
+        available_qty = self.get_available_quantity(part_data['id'], part_data['warehouse'])
+        if quantity > available_qty:
+            QMessageBox.warning(
+                self, "اخطار",
+                f"موجودی کافی نیست. موجودی قابل استفاده: {available_qty} عدد"
+            )
+            return
+        
         # تبدیل به ریال برای ذخیره در دیتابیس
         unit_price = unit_price_toman * 10
         total_price = quantity * unit_price
@@ -276,7 +286,7 @@ class RepairPartsTab(QWidget):
             'quantity': quantity,
             'unit_price': unit_price,  # ریال
             'total_price': total_price,  # ریال
-            'available_qty': part_data['qty']
+            'available_qty': available_qty
         }
         
         self.parts.append(part_item)
@@ -284,6 +294,21 @@ class RepairPartsTab(QWidget):
         self.calculate_total()
         self.parts_changed.emit()
     
+    def get_available_quantity(self, part_id, warehouse):
+        """
+        موجودی قابل استفاده یک قطعه در انبار انتخابی منهای تعداد قبلاً افزوده شده
+        
+        قطعات بارگذاری شده از تعمیر ذخیره شده (set_parts) قبلاً از انبار کسر شده‌اند و حساب نمی‌شوند.
+        """
+        stock = self.data_manager.part.get_part_stock(part_id)
+        in_stock = stock['new_parts'] if warehouse == "قطعات نو" else stock['used_parts']
+        reserved = sum(
+            part['quantity'] for part in self.parts
+            if 'available_qty' in part
+            and part['part_id'] == part_id and part['warehouse_type'] == warehouse
+        )
+        return max(0, in_stock - reserved)
+    
     def update_parts_table(self):
         """بروزرسانی جدول قطعات"""
         self.table_parts.setRowCount(len(self.parts))
@@ -3,6 +3,8 @@ from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
+from database import search_index
+
 class RepairServicesTab(QWidget):
     services_changed = Signal()
     add_service_requested = Signal()
@@ -244,8 +246,9 @@ class RepairServicesTab(QWidget):
                 params.append(category)
             
             if search_term and len(search_term) >= 2:
-                query += " AND (service_name LIKE ? OR service_code LIKE ?)"
-                params.extend([f"%{search_term}%", f"%{search_term}%"])
+                match_sql, match_params = search_index.match_condition('ServiceFees', 'id', search_term)
+                query += f" AND {match_sql}"
+                params.extend(match_params)
             
             query += " ORDER BY service_name"
             
@@ -6,7 +6,8 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import Qt, Signal, QDate, QTimer
 from PySide6.QtGui import QFont, QColor, QPainter
-from utils.jalali_date_widget import get_current_jalali, gregorian_to_jalali
+from utils.jalali_date_widget import get_current_jalali, gregorian_to_jalali, format_jalali_date
+from database import date_filters, daily_summaries
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QBarSeries, QBarSet, QPieSeries, QPieSlice
 from PySide6.QtCharts import QValueAxis, QBarCategoryAxis
 import jdatetime
@@ -114,13 +115,13 @@ class MonthlyReportForm(QWidget):
         layout.addWidget(QLabel("ماه:"), 0, 0)
         self.month_combo = QComboBox()
         
-        # تولید لیست ماه‌های اخیر
-        current_date = QDate.currentDate()
+        # تولید لیست ماه‌های شمسی اخیر (کلید jalali_ym در داده هر گزینه)
+        current_key = date_filters.jalali_ym_of(jdatetime.date.today())
         for i in range(12):  # ۱۲ ماه اخیر
-            month_date = current_date.addMonths(-i)
-            month_name = self.get_month_name(month_date.month())
-            year = month_date.year()
-            self.month_combo.addItem(f"{month_name} {year}")
+            month_key = date_filters.shift_jalali_ym(current_key, -i)
+            year, month = date_filters.split_jalali_ym(month_key)
+            month_name = self.get_month_name(month)
+            self.month_combo.addItem(f"{month_name} {year}", month_key)
         
         layout.addWidget(self.month_combo, 0, 1)
         
@@ -546,61 +547,64 @@ class MonthlyReportForm(QWidget):
             print(f"خطا در load_monthly_data: {e}")
             self.load_sample_monthly_data()
     
+    def get_selected_month_key(self):
+        """کلید ماه شمسی انتخاب شده (jalali_ym)"""
+        month_key = self.month_combo.currentData()
+        if month_key is None:
+            month_key = date_filters.jalali_ym_of(jdatetime.date.today())
+        return month_key
+    
     def get_current_month_dates(self):
-        """دریافت تاریخ شروع و پایان ماه جاری"""
-        current_date = QDate.currentDate()
-        
-        # اول ماه
-        month_start = QDate(current_date.year(), current_date.month(), 1)
+        """دریافت تاریخ میلادی شروع و پایان ماه شمسی انتخاب شده"""
+        year, month = date_filters.split_jalali_ym(self.get_selected_month_key())
+        month_start, next_month_start = date_filters.jalali_month_bounds(year, month)
         
-        # آخر ماه
-        month_end = QDate(current_date.year(), current_date.month(), current_date.daysInMonth())
+        # آخر ماه (روز قبل از اول ماه بعد)
+        month_end = QDate.fromString(next_month_start, "yyyy-MM-dd").addDays(-1)
         
-        return (
-            month_start.toString("yyyy-MM-dd"),
-            month_end.toString("yyyy-MM-dd")
-        )
+        return month_start, month_end.toString("yyyy-MM-dd")
     
     def load_data_from_database(self, start_date, end_date):
         """بارگذاری داده‌ها از دیتابیس"""
         try:
+            month_key = self.get_selected_month_key()
+            
             # آمار کلی ماه
             query = """
             SELECT 
                 COUNT(r.id) as total_activities,
-                SUM(CASE WHEN r.status = 'تعمیر شده' THEN 1 ELSE 0 END) as completed_repairs,
-                SUM(CASE WHEN r.status = 'تحویل داده شده' THEN 1 ELSE 0 END) as delivered,
+                COALESCE(SUM(CASE WHEN r.status = 'تعمیر شده' THEN 1 ELSE 0 END), 0) as completed_repairs,
+                COALESCE(SUM(CASE WHEN r.status = 'تحویل داده شده' THEN 1 ELSE 0 END), 0) as delivered,
                 COUNT(DISTINCT r.customer_id) as unique_customers
             FROM Receptions r
-            WHERE r.reception_date BETWEEN ? AND ?
-            """
-            
-            activities_result = self.data_manager.db.fetch_one(query, (start_date, end_date))
-            
-            # آمار مالی ماه
-            query = """
-            SELECT 
-                SUM(CASE WHEN transaction_type = 'دریافت' THEN amount ELSE 0 END) as total_income,
-                SUM(CASE WHEN transaction_type = 'پرداخت' THEN amount ELSE 0 END) as total_expense,
-                COUNT(*) as total_transactions
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
+            WHERE r.jalali_ym = ?
             """
             
-            financial_result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            activities_result = self.data_manager.db.fetch_one(query, (month_key,))
             
-            # آمار فروش ماه
-            query = """
-            SELECT 
-                COUNT(*) as total_invoices,
-                SUM(total) as total_sales,
-                AVG(total) as avg_invoice_amount
-            FROM Invoices
-            WHERE invoice_date BETWEEN ? AND ?
-            AND invoice_type IN ('فروش', 'خدمات')
-            """
+            # آمار مالی ماه (از خلاصه روزانه)
+            month_range = date_filters.days_bounds(start_date, end_date)
+            totals = {
+                item['transaction_type']: item['total_amount'] or 0
+                for item in daily_summaries.transaction_summary(self.data_manager.db, *month_range)
+            }
+            financial_result = {
+                'total_income': totals.get('دریافت', 0),
+                'total_expense': totals.get('پرداخت', 0)
+            }
             
-            sales_result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            # آمار فروش ماه (از خلاصه روزانه فاکتورها)
+            sales = [
+                item for item in daily_summaries.invoice_summary(self.data_manager.db, *month_range)
+                if item['invoice_type'] in ('فروش', 'خدمات')
+            ]
+            total_invoices = sum(item['count'] or 0 for item in sales)
+            total_sales = sum(item['total_amount'] or 0 for item in sales)
+            sales_result = {
+                'total_invoices': total_invoices,
+                'total_sales': total_sales,
+                'avg_invoice_amount': total_sales / total_invoices if total_invoices else 0
+            }
             
             # پردازش داده‌ها
             self.monthly_data = {
@@ -622,7 +626,7 @@ class MonthlyReportForm(QWidget):
             }
             
             # محاسبات اضافی
-            days_in_month = QDate.fromString(end_date, "yyyy-MM-dd").day()
+            days_in_month = len(self.monthly_data['daily_data']) or 1
             self.monthly_data['summary']['avg_daily_income'] = self.monthly_data['summary']['total_income'] / days_in_month
             self.monthly_data['summary']['avg_daily_expense'] = self.monthly_data['summary']['total_expense'] / days_in_month
             
@@ -640,6 +644,26 @@ class MonthlyReportForm(QWidget):
         start_qdate = QDate.fromString(start_date, "yyyy-MM-dd")
         end_qdate = QDate.fromString(end_date, "yyyy-MM-dd")
         
+        # آمار همه روزهای ماه با سه کوئری (خلاصه‌های روزانه و تعداد پذیرش‌ها)
+        month_range = date_filters.days_bounds(start_date, end_date)
+        cash_by_day = {
+            item['date']: item
+            for item in daily_summaries.daily_cash_series(self.data_manager.db, *month_range)
+        }
+        invoices_by_day = {
+            item['date']: item['count']
+            for item in daily_summaries.daily_invoice_series(self.data_manager.db, *month_range)
+        }
+        activities_by_day = {
+            item['date']: item['activities']
+            for item in self.data_manager.db.fetch_all("""
+                SELECT reception_date as date, COUNT(*) as activities
+                FROM Receptions
+                WHERE reception_date >= ? AND reception_date < ?
+                GROUP BY reception_date
+            """, month_range)
+        }
+        
         current_date = start_qdate
         day_count = 1
         
@@ -648,23 +672,9 @@ class MonthlyReportForm(QWidget):
             day_of_week = current_date.dayOfWeek()
             day_name = self.get_day_name(day_of_week)
             
-            # دریافت آمار روز
-            query = """
-            SELECT 
-                COUNT(r.id) as activities,
-                SUM(CASE WHEN at.transaction_type = 'دریافت' THEN at.amount ELSE 0 END) as income,
-                SUM(CASE WHEN at.transaction_type = 'پرداخت' THEN at.amount ELSE 0 END) as expense,
-                COUNT(i.id) as invoices
-            FROM Receptions r
-            LEFT JOIN AccountingTransactions at ON DATE(at.transaction_date) = ?
-            LEFT JOIN Invoices i ON DATE(i.invoice_date) = ?
-            WHERE r.reception_date = ?
-            """
-            
-            result = self.data_manager.db.fetch_one(query, (date_str, date_str, date_str))
-            
-            income = result.get('income', 0) if result else 0
-            expense = result.get('expense', 0) if result else 0
+            cash = cash_by_day.get(date_str, {})
+            income = cash.get('income', 0) or 0
+            expense = cash.get('expense', 0) or 0
             profit = income - expense
             
             # محاسبه کارایی (درصد سود)
@@ -674,11 +684,11 @@ class MonthlyReportForm(QWidget):
                 'day_number': day_count,
                 'date': date_str,
                 'day_name': day_name,
-                'activities': result.get('activities', 0) if result else 0,
+                'activities': activities_by_day.get(date_str, 0),
                 'income': income,
                 'expense': expense,
                 'profit': profit,
-                'invoices': result.get('invoices', 0) if result else 0,
+                'invoices': invoices_by_day.get(date_str, 0),
                 'efficiency': efficiency
             })
             
@@ -709,12 +719,12 @@ class MonthlyReportForm(QWidget):
                 SUM(it.amount) as amount
             FROM AccountingTransactions it
             WHERE it.transaction_type = 'دریافت'
-            AND it.transaction_date BETWEEN ? AND ?
+            AND it.transaction_date >= ? AND it.transaction_date < ?
             GROUP BY it.description
             ORDER BY amount DESC
             """
             
-            results = self.data_manager.db.fetch_all(query, (start_date, end_date))
+            results = self.data_manager.db.fetch_all(query, date_filters.days_bounds(start_date, end_date))
             
             income_by_category = {}
             for result in results:
@@ -737,12 +747,12 @@ class MonthlyReportForm(QWidget):
                 SUM(it.amount) as amount
             FROM AccountingTransactions it
             WHERE it.transaction_type = 'پرداخت'
-            AND it.transaction_date BETWEEN ? AND ?
+            AND it.transaction_date >= ? AND it.transaction_date < ?
             GROUP BY it.description
             ORDER BY amount DESC
             """
             
-            results = self.data_manager.db.fetch_all(query, (start_date, end_date))
+            results = self.data_manager.db.fetch_all(query, date_filters.days_bounds(start_date, end_date))
             
             expense_by_category = {}
             for result in results:
@@ -811,7 +821,7 @@ class MonthlyReportForm(QWidget):
         """به‌روزرسانی جدول آمار روزانه"""
         for i, day in enumerate(daily_data):
             # تاریخ شمسی
-            date_shamsi = gregorian_to_jalali(day['date'])
+            date_shamsi = format_jalali_date(gregorian_to_jalali(day['date']))
             
             # فعالیت‌ها
             activities_item = QTableWidgetItem(str(day['activities']))
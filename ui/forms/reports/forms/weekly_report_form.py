@@ -6,7 +6,8 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import Qt, Signal, QDate, QTimer
 from PySide6.QtGui import QFont, QColor, QPainter
-from utils.jalali_date_widget import get_current_jalali, gregorian_to_jalali
+from utils.jalali_date_widget import get_current_jalali, gregorian_to_jalali, format_jalali_date
+from database import date_filters, daily_summaries
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QBarSeries, QBarSet
 from PySide6.QtCharts import QValueAxis, QBarCategoryAxis
 import datetime
@@ -517,22 +518,21 @@ class WeeklyReportForm(QWidget):
                 SUM(CASE WHEN r.status = 'تحویل داده شده' THEN 1 ELSE 0 END) as delivered,
                 SUM(r.estimated_cost) as total_estimated
             FROM Receptions r
-            WHERE r.reception_date BETWEEN ? AND ?
+            WHERE r.reception_date >= ? AND r.reception_date < ?
             """
             
-            activities_result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            week_range = date_filters.days_bounds(start_date, end_date)
+            activities_result = self.data_manager.db.fetch_one(query, week_range)
             
-            # آمار مالی هفته
-            query = """
-            SELECT 
-                SUM(CASE WHEN transaction_type = 'دریافت' THEN amount ELSE 0 END) as total_income,
-                SUM(CASE WHEN transaction_type = 'پرداخت' THEN amount ELSE 0 END) as total_expense,
-                COUNT(*) as total_transactions
-            FROM AccountingTransactions
-            WHERE transaction_date BETWEEN ? AND ?
-            """
-            
-            financial_result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            # آمار مالی هفته (از خلاصه روزانه)
+            totals = {
+                item['transaction_type']: item['total_amount'] or 0
+                for item in daily_summaries.transaction_summary(self.data_manager.db, *week_range)
+            }
+            financial_result = {
+                'total_income': totals.get('دریافت', 0),
+                'total_expense': totals.get('پرداخت', 0)
+            }
             
             # پردازش داده‌ها
             self.weekly_data = {
@@ -561,31 +561,36 @@ class WeeklyReportForm(QWidget):
         start_qdate = QDate.fromString(start_date, "yyyy-MM-dd")
         end_qdate = QDate.fromString(end_date, "yyyy-MM-dd")
         
+        # آمار همه روزهای هفته با دو کوئری (خلاصه روزانه تراکنش‌ها و تعداد پذیرش‌ها)
+        week_range = date_filters.days_bounds(start_date, end_date)
+        cash_by_day = {
+            item['date']: item
+            for item in daily_summaries.daily_cash_series(self.data_manager.db, *week_range)
+        }
+        activities_by_day = {
+            item['date']: item['activities']
+            for item in self.data_manager.db.fetch_all("""
+                SELECT reception_date as date, COUNT(*) as activities
+                FROM Receptions
+                WHERE reception_date >= ? AND reception_date < ?
+                GROUP BY reception_date
+            """, week_range)
+        }
+        
         current_date = start_qdate
         while current_date <= end_qdate:
             date_str = current_date.toString("yyyy-MM-dd")
-            
-            # دریافت آمار روز
-            query = """
-            SELECT 
-                COUNT(r.id) as activities,
-                SUM(CASE WHEN at.transaction_type = 'دریافت' THEN at.amount ELSE 0 END) as income,
-                SUM(CASE WHEN at.transaction_type = 'پرداخت' THEN at.amount ELSE 0 END) as expense
-            FROM Receptions r
-            LEFT JOIN AccountingTransactions at ON DATE(at.transaction_date) = ?
-            WHERE r.reception_date = ?
-            GROUP BY r.reception_date
-            """
-            
-            result = self.data_manager.db.fetch_one(query, (date_str, date_str))
+            cash = cash_by_day.get(date_str, {})
+            income = cash.get('income', 0) or 0
+            expense = cash.get('expense', 0) or 0
             
             daily_data.append({
                 'date': date_str,
                 'day_name': self.get_day_name(current_date.dayOfWeek()),
-                'activities': result.get('activities', 0) if result else 0,
-                'income': result.get('income', 0) if result else 0,
-                'expense': result.get('expense', 0) if result else 0,
-                'profit': (result.get('income', 0) - result.get('expense', 0)) if result else 0
+                'activities': activities_by_day.get(date_str, 0),
+                'income': income,
+                'expense': expense,
+                'profit': income - expense
             })
             
             current_date = current_date.addDays(1)
@@ -644,7 +649,7 @@ class WeeklyReportForm(QWidget):
         """به‌روزرسانی جدول روزها"""
         for i, day in enumerate(daily_data):
             # تاریخ شمسی
-            date_shamsi = gregorian_to_jalali(day['date'])
+            date_shamsi = format_jalali_date(gregorian_to_jalali(day['date']))
             
             # فعالیت‌ها
             activities_item = QTableWidgetItem(str(day['activities']))
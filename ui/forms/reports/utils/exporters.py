@@ -3,11 +3,15 @@
 ماژول خروجی اکسل برای گزارش‌ها
 """
 
-import pandas as pd
 from PySide6.QtWidgets import QFileDialog, QMessageBox
 from PySide6.QtCore import QDate
+from database import date_filters
+from modules.lazy_imports import optional_module
 import os
 
+# pandas (و openpyxl) فقط هنگام ساخت اولین فایل اکسل ایمپورت می‌شود
+pd = optional_module('pandas')
+
 
 class ExcelExporter:
     """کلاس خروجی اکسل برای گزارش‌های مختلف"""
@@ -95,11 +99,11 @@ class ExcelExporter:
             FROM AccountingTransactions at
             LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
             LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
-            WHERE DATE(at.transaction_date) BETWEEN ? AND ?
+            WHERE at.transaction_date >= ? AND at.transaction_date < ?
             ORDER BY at.transaction_date DESC
             """
             
-            transactions = self.data_manager.db.fetch_all(query, (start_date, end_date))
+            transactions = self.data_manager.db.fetch_all(query, date_filters.days_bounds(start_date, end_date))
             
             if transactions:
                 # تبدیل به DataFrame
@@ -196,11 +200,11 @@ class ExcelExporter:
                 i.description
             FROM Invoices i
             LEFT JOIN Persons p ON i.customer_id = p.id
-            WHERE DATE(i.invoice_date) BETWEEN ? AND ?
+            WHERE i.invoice_date >= ? AND i.invoice_date < ?
             ORDER BY i.invoice_date DESC
             """
             
-            invoices = self.data_manager.db.fetch_all(query, (start_date, end_date))
+            invoices = self.data_manager.db.fetch_all(query, date_filters.days_bounds(start_date, end_date))
             
             if invoices:
                 df = pd.DataFrame(invoices)
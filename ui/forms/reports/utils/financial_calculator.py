@@ -4,6 +4,7 @@
 """
 
 from PySide6.QtCore import QDate
+from database import date_filters
 from utils.jalali_date_widget import jalali_to_gregorian, gregorian_to_jalali
 
 
@@ -89,15 +90,10 @@ class FinancialCalculator:
             """
             
             params = []
-            if start_date and end_date:
-                query += " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
-            elif start_date:
-                query += " AND DATE(i.invoice_date) >= ?"
-                params.append(start_date)
-            elif end_date:
-                query += " AND DATE(i.invoice_date) <= ?"
-                params.append(end_date)
+            if start_date or end_date:
+                date_sql, date_params = date_filters.days_condition('i.invoice_date', start_date, end_date)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += " ORDER BY i.invoice_date DESC"
             
@@ -126,15 +122,10 @@ class FinancialCalculator:
             """
             
             params = []
-            if start_date and end_date:
-                query += " AND DATE(at.transaction_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
-            elif start_date:
-                query += " AND DATE(at.transaction_date) >= ?"
-                params.append(start_date)
-            elif end_date:
-                query += " AND DATE(at.transaction_date) <= ?"
-                params.append(end_date)
+            if start_date or end_date:
+                date_sql, date_params = date_filters.days_condition('at.transaction_date', start_date, end_date)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += " ORDER BY at.transaction_date DESC"
             
@@ -160,8 +151,8 @@ class FinancialCalculator:
             
             income_params = []
             if start_date and end_date:
-                income_query += " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                income_params.extend([start_date, end_date])
+                income_query += " AND i.invoice_date >= ? AND i.invoice_date < ?"
+                income_params.extend(date_filters.days_bounds(start_date, end_date))
             
             income_query += " GROUP BY DATE(i.invoice_date) ORDER BY date"
             
@@ -179,8 +170,8 @@ class FinancialCalculator:
             
             expense_params = []
             if start_date and end_date:
-                expense_query += " AND DATE(at.transaction_date) BETWEEN ? AND ?"
-                expense_params.extend([start_date, end_date])
+                expense_query += " AND at.transaction_date >= ? AND at.transaction_date < ?"
+                expense_params.extend(date_filters.days_bounds(start_date, end_date))
             
             expense_query += " GROUP BY DATE(at.transaction_date) ORDER BY date"
             
@@ -291,8 +282,8 @@ class FinancialCalculator:
             
             params = []
             if start_date and end_date:
-                query += " AND DATE(transaction_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
+                query += " AND transaction_date >= ? AND transaction_date < ?"
+                params.extend(date_filters.days_bounds(start_date, end_date))
             
             query += " GROUP BY category ORDER BY total_amount DESC"
             
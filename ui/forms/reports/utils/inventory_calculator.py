@@ -4,7 +4,8 @@
 """
 
 from PySide6.QtCore import QDate
-from utils.jalali_date_widget import jalali_to_gregorian, gregorian_to_jalali
+from database import date_filters, part_stock
+from utils.jalali_date_widget import gregorian_to_jalali
 
 
 class InventoryCalculator:
@@ -145,33 +146,35 @@ class InventoryCalculator:
         try:
             alerts = []
             
-            # بررسی قطعات نو با موجودی کم
-            query_parts = """
+            # قطعات زیر حداقل موجودی (موجودی کل هر قطعه از PartStock، بیشترین کسری اول)
+            shortage = part_stock.shortage_sql('s')
+            query_parts = f"""
             SELECT 
-                npw.id,
+                s.part_id,
                 p.part_name,
                 p.part_code,
-                npw.quantity,
-                p.min_stock,
-                npw.location
-            FROM NewPartsWarehouse npw
-            JOIN Parts p ON npw.part_id = p.id
-            WHERE npw.status = 'موجود' 
-            AND npw.quantity <= p.min_stock
+                s.new_qty,
+                s.used_qty,
+                s.min_stock
+            FROM PartStock s
+            JOIN Parts p ON s.part_id = p.id
+            WHERE {shortage} > 0
+            ORDER BY {shortage} DESC
+            LIMIT 10
             """
             
             low_parts = self.data_manager.db.fetch_all(query_parts)
             for part in low_parts:
+                quantity = part['new_qty'] + part['used_qty']
                 alerts.append({
-                    'type': 'قطعات نو',
+                    'type': 'قطعات دست دوم' if part['new_qty'] == 0 and part['used_qty'] > 0 else 'قطعات نو',
                     'item_name': part.get('part_name', ''),
-                    'current_stock': part.get('quantity', 0),
+                    'current_stock': quantity,
                     'min_stock': part.get('min_stock', 0),
-                    'location': part.get('location', ''),
-                    'severity': 'high' if part.get('quantity', 0) == 0 else 'medium'
+                    'severity': 'high' if quantity == 0 else 'medium'
                 })
             
-            return alerts[:10]  # فقط 10 هشدار اول
+            return alerts
             
         except Exception as e:
             print(f"❌ خطا در دریافت هشدارهای موجودی کم: {e}")
@@ -209,10 +212,8 @@ class InventoryCalculator:
             
             params = []
             if start_date and end_date:
-                start_greg = jalali_to_gregorian(start_date, "%Y-%m-%d")
-                end_greg = jalali_to_gregorian(end_date, "%Y-%m-%d")
-                query += " AND DATE(it.transaction_date) BETWEEN ? AND ?"
-                params.extend([start_greg, end_greg])
+                query += " AND it.transaction_date >= ? AND it.transaction_date < ?"
+                params.extend(date_filters.days_bounds(start_date, end_date))
             
             query += " ORDER BY it.transaction_date DESC LIMIT 50"
             
@@ -7,6 +7,8 @@ from PySide6.QtCore import QThread, Signal, QObject
 import time
 import threading
 
+from database import date_filters
+
 
 class ReportDataLoader(QThread):
     """لودر داده‌های گزارش در رشته جداگانه"""
@@ -28,14 +30,16 @@ class ReportDataLoader(QThread):
             
             data = {}
             
-            if self.report_type == 'financial':
-                data = self.load_financial_data()
-            elif self.report_type == 'sales':
-                data = self.load_sales_data()
-            elif self.report_type == 'inventory':
-                data = self.load_inventory_data()
-            elif self.report_type == 'customer':
-                data = self.load_customer_data()
+            # یک اتصال از استخر برای کل کار این نخ نگه داشته می‌شود
+            with self.data_manager.db.connection_scope(readonly=True):
+                if self.report_type == 'financial':
+                    data = self.load_financial_data()
+                elif self.report_type == 'sales':
+                    data = self.load_sales_data()
+                elif self.report_type == 'inventory':
+                    data = self.load_inventory_data()
+                elif self.report_type == 'customer':
+                    data = self.load_customer_data()
             
             if self.is_running:
                 self.progress_updated.emit("تکمیل شد", 100)
@@ -51,6 +55,7 @@ class ReportDataLoader(QThread):
         # دریافت تاریخ‌ها
         start_date = self.params.get('start_date')
         end_date = self.params.get('end_date')
+        date_range = date_filters.days_bounds(start_date, end_date)
         
         self.progress_updated.emit("در حال دریافت خلاصه مالی...", 30)
         
@@ -61,10 +66,10 @@ class ReportDataLoader(QThread):
             SUM(CASE WHEN transaction_type = 'پرداخت' THEN amount ELSE 0 END) as total_expense,
             COUNT(*) as total_transactions
         FROM AccountingTransactions
-        WHERE DATE(transaction_date) BETWEEN ? AND ?
+        WHERE transaction_date >= ? AND transaction_date < ?
         """
         
-        result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+        result = self.data_manager.db.fetch_one(query, date_range)
         data['summary'] = result or {}
         
         self.progress_updated.emit("در حال دریافت حساب‌ها...", 60)
@@ -87,12 +92,12 @@ class ReportDataLoader(QThread):
         FROM AccountingTransactions at
         LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
         LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
-        WHERE DATE(at.transaction_date) BETWEEN ? AND ?
+        WHERE at.transaction_date >= ? AND at.transaction_date < ?
         ORDER BY at.transaction_date DESC
         LIMIT 100
         """
         
-        data['transactions'] = self.data_manager.db.fetch_all(query, (start_date, end_date))
+        data['transactions'] = self.data_manager.db.fetch_all(query, date_range)
         
         return data
     
@@ -102,6 +107,7 @@ class ReportDataLoader(QThread):
         
         start_date = self.params.get('start_date')
         end_date = self.params.get('end_date')
+        date_range = date_filters.days_bounds(start_date, end_date)
         
         self.progress_updated.emit("در حال دریافت آمار فروش...", 20)
         
@@ -117,11 +123,11 @@ class ReportDataLoader(QThread):
             SUM(CASE WHEN payment_status = 'کارت' THEN total ELSE 0 END) as card_sales,
             SUM(CASE WHEN payment_status = 'نسیه' THEN total ELSE 0 END) as credit_sales
         FROM Invoices
-        WHERE DATE(invoice_date) BETWEEN ? AND ?
+        WHERE invoice_date >= ? AND invoice_date < ?
         AND invoice_type IN ('فروش', 'خدمات')
         """
         
-        result = self.data_manager.db.fetch_one(query, (start_date, end_date))
+        result = self.data_manager.db.fetch_one(query, date_range)
         data['general_stats'] = result or {}
         
         # محاسبه نرخ تکمیل پرداخت
@@ -145,14 +151,14 @@ class ReportDataLoader(QThread):
         FROM InvoiceItems ii
         JOIN Invoices i ON ii.invoice_id = i.id
         LEFT JOIN Parts p ON ii.item_id = p.id
-        WHERE DATE(i.invoice_date) BETWEEN ? AND ?
+        WHERE i.invoice_date >= ? AND i.invoice_date < ?
         AND ii.item_type = 'قطعه'
         GROUP BY p.id
         ORDER BY total_sales_amount DESC
         LIMIT 15
         """
         
-        data['top_products'] = self.data_manager.db.fetch_all(query, (start_date, end_date))
+        data['top_products'] = self.data_manager.db.fetch_all(query, date_range)
         
         self.progress_updated.emit("در حال دریافت مشتریان برتر...", 80)
         
@@ -171,14 +177,14 @@ class ReportDataLoader(QThread):
             (COUNT(i.id) * 10 + SUM(i.total) / 1000000) as loyalty_score
         FROM Invoices i
         JOIN Persons p ON i.customer_id = p.id
-        WHERE DATE(i.invoice_date) BETWEEN ? AND ?
+        WHERE i.invoice_date >= ? AND i.invoice_date < ?
         AND i.invoice_type IN ('فروش', 'خدمات')
         GROUP BY p.id
         ORDER BY total_purchases DESC
         LIMIT 12
         """
         
-        data['top_customers'] = self.data_manager.db.fetch_all(query, (start_date, end_date))
+        data['top_customers'] = self.data_manager.db.fetch_all(query, date_range)
         
         return data
     
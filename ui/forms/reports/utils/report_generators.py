@@ -4,6 +4,7 @@
 
 from datetime import datetime
 import jdatetime
+from database import date_filters
 from .report_templates import (
     FinancialReportTemplate,
     SalesReportTemplate,
@@ -128,12 +129,12 @@ class ReportGenerator:
             FROM AccountingTransactions at
             LEFT JOIN Accounts a1 ON at.from_account_id = a1.id
             LEFT JOIN Accounts a2 ON at.to_account_id = a2.id
-            WHERE DATE(at.transaction_date) BETWEEN ? AND ?
+            WHERE at.transaction_date >= ? AND at.transaction_date < ?
             ORDER BY at.transaction_date DESC
             LIMIT 50
             """
             
-            transactions = self.data_manager.db.fetch_all(query, (start_date, end_date))
+            transactions = self.data_manager.db.fetch_all(query, date_filters.days_bounds(start_date, end_date))
             
             # اگر داده‌ای وجود ندارد، نمونه برمی‌گردانیم
             if not transactions:
@@ -163,11 +164,11 @@ class ReportGenerator:
                 SUM(total) as total_sales,
                 SUM(paid_amount) as total_paid
             FROM Invoices
-            WHERE DATE(invoice_date) BETWEEN ? AND ?
+            WHERE invoice_date >= ? AND invoice_date < ?
             AND invoice_type IN ('فروش', 'خدمات')
             """
             
-            invoices = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            invoices = self.data_manager.db.fetch_one(query, date_filters.days_bounds(start_date, end_date))
             return invoices or {}
             
         except Exception as e:
@@ -293,11 +294,11 @@ class ReportGenerator:
                 SUM(CASE WHEN payment_status = 'کارت' THEN total ELSE 0 END) as card_sales,
                 SUM(CASE WHEN payment_status = 'نسیه' THEN total ELSE 0 END) as credit_sales
             FROM Invoices
-            WHERE DATE(invoice_date) BETWEEN ? AND ?
+            WHERE invoice_date >= ? AND invoice_date < ?
             AND invoice_type IN ('فروش', 'خدمات')
             """
             
-            stats = self.data_manager.db.fetch_one(query, (start_date, end_date))
+            stats = self.data_manager.db.fetch_one(query, date_filters.days_bounds(start_date, end_date))
             
             if stats:
                 # محاسبه نرخ تکمیل پرداخت
@@ -343,14 +344,14 @@ class ReportGenerator:
                 (SUM(ii.total_price) * 0.3) as estimated_profit
             FROM InvoiceItems ii
             JOIN Invoices i ON ii.invoice_id = i.id
-            WHERE DATE(i.invoice_date) BETWEEN ? AND ?
+            WHERE i.invoice_date >= ? AND i.invoice_date < ?
             AND ii.item_type IN ('قطعات نو', 'قطعات دست دوم', 'لوازم نو', 'لوازم دست دوم')
             GROUP BY ii.item_name, ii.item_type
             ORDER BY total_sales_amount DESC
             LIMIT ?
             """
             
-            products = self.data_manager.db.fetch_all(query, (start_date, end_date, limit))
+            products = self.data_manager.db.fetch_all(query, (*date_filters.days_bounds(start_date, end_date), limit))
             
             # اگر داده‌ای وجود ندارد، نمونه برمی‌گردانیم
             if not products:
@@ -393,14 +394,14 @@ class ReportGenerator:
                 (COUNT(DISTINCT i.id) * 10 + SUM(i.total) / 1000000) as loyalty_score
             FROM Invoices i
             JOIN Persons p ON i.customer_id = p.id
-            WHERE DATE(i.invoice_date) BETWEEN ? AND ?
+            WHERE i.invoice_date >= ? AND i.invoice_date < ?
             AND i.invoice_type IN ('فروش', 'خدمات')
             GROUP BY p.id, p.full_name, p.mobile
             ORDER BY total_purchases DESC
             LIMIT ?
             """
             
-            customers = self.data_manager.db.fetch_all(query, (start_date, end_date, limit))
+            customers = self.data_manager.db.fetch_all(query, (*date_filters.days_bounds(start_date, end_date), limit))
             
             # اگر داده‌ای وجود ندارد، نمونه برمی‌گردانیم
             if not customers:
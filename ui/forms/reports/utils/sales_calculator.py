@@ -4,6 +4,7 @@
 """
 
 from PySide6.QtCore import QDate
+from database import date_filters
 from utils.jalali_date_widget import jalali_to_gregorian, gregorian_to_jalali
 
 
@@ -78,15 +79,10 @@ class SalesCalculator:
             """
             
             params = []
-            if start_date and end_date:
-                query += " AND DATE(invoice_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
-            elif start_date:
-                query += " AND DATE(invoice_date) >= ?"
-                params.append(start_date)
-            elif end_date:
-                query += " AND DATE(invoice_date) <= ?"
-                params.append(end_date)
+            if start_date or end_date:
+                date_sql, date_params = date_filters.days_condition('invoice_date', start_date, end_date)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             result = self.data_manager.db.fetch_one(query, params)
             
@@ -197,8 +193,8 @@ class SalesCalculator:
             date_condition = ""
             params = []
             if start_date and end_date:
-                date_condition = " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
+                date_condition = " AND i.invoice_date >= ? AND i.invoice_date < ?"
+                params.extend(date_filters.days_bounds(start_date, end_date))
             
             # ترکیب تمام کوئری‌ها
             union_query = f"""
@@ -268,8 +264,8 @@ class SalesCalculator:
             
             params = []
             if start_date and end_date:
-                query += " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                params.extend([start_date, end_date])
+                query += " AND i.invoice_date >= ? AND i.invoice_date < ?"
+                params.extend(date_filters.days_bounds(start_date, end_date))
             
             query += """
             GROUP BY p.id, customer_name, p.mobile, p.person_type
@@ -417,11 +413,8 @@ class SalesCalculator:
             date_condition = ""
             params = []
             if start_date and end_date:
-                date_condition = " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                params = [start_date, end_date, start_date, end_date, start_date, end_date, 
-                         start_date, end_date, start_date, end_date, start_date, end_date,
-                         start_date, end_date, start_date, end_date, start_date, end_date,
-                         start_date, end_date, start_date, end_date]
+                date_condition = " AND i.invoice_date >= ? AND i.invoice_date < ?"
+                params = list(date_filters.days_bounds(start_date, end_date)) * query.count('{date_condition}')
             
             query = query.format(date_condition=date_condition)
             
@@ -539,11 +532,8 @@ class SalesCalculator:
                 # اضافه کردن شرط تاریخ
                 params = []
                 if start_date and end_date:
-                    if warehouse == 'خدمات':
-                        query += " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                    else:
-                        query += " AND DATE(i.invoice_date) BETWEEN ? AND ?"
-                    params.extend([start_date, end_date])
+                    query += " AND i.invoice_date >= ? AND i.invoice_date < ?"
+                    params.extend(date_filters.days_bounds(start_date, end_date))
                 
                 result = self.data_manager.db.fetch_one(query, params)
                 
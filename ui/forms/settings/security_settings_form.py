@@ -11,7 +11,7 @@ import hashlib
 import secrets
 import string
 import json
-from datetime import datetime, timedelta
+from database import audit_log, pagination
 
 
 class SecuritySettingsForm(QWidget):
@@ -19,11 +19,19 @@ class SecuritySettingsForm(QWidget):
 
 
     settings_saved = Signal()
+    LOG_PAGE_SIZE = 200  # تعداد لاگ‌های هر صفحه
 
     def __init__(self, data_manager, config_manager=None):
         super().__init__()
         self.data_manager = data_manager
 
+        # وضعیت صفحه‌بندی لاگ فعالیت
+        self.log_filters = {}
+        self.log_next_cursor = None
+        self.log_count = (0, False)
+        self.loaded_log_count = 0
+        self.today_log_count = 0
+        self.security_event_count = 0
         
         # 🔴 بررسی اینکه config_manager واقعاً یک ConfigManager است
         from modules.config_manager import ConfigManager
@@ -387,6 +395,12 @@ class SecuritySettingsForm(QWidget):
         
         layout.addWidget(self.table_activity)
         
+        # صفحه بعد لاگ‌ها با همان فیلترها
+        self.btn_load_more_logs = QPushButton("⬇️ نمایش بیشتر")
+        self.btn_load_more_logs.clicked.connect(self.load_more_activity_log)
+        self.btn_load_more_logs.setVisible(False)
+        layout.addWidget(self.btn_load_more_logs)
+        
         # آمار
         stats_layout = QHBoxLayout()
         
@@ -1254,123 +1268,36 @@ class SecuritySettingsForm(QWidget):
             print(f"⚠️ خطا در بارگذاری لیست کاربران: {e}")
 
     def load_activity_log(self):
-        """بارگذاری لاگ فعالیت از دیتابیس"""
+        """بارگذاری صفحه اول لاگ فعالیت از دیتابیس"""
         try:
-            # ساخت شرط‌های WHERE
-            where_conditions = []
-            params = []
-            
-            # فیلتر تاریخ
-            date_from = self.date_from.dateTime().toString("yyyy-MM-dd HH:mm:ss")
-            date_to = self.date_to.dateTime().toString("yyyy-MM-dd HH:mm:ss")
-            where_conditions.append("l.created_at BETWEEN ? AND ?")
-            params.extend([date_from, date_to])
+            # رویدادهای صف لاگ حسابرسی قبل از خواندن نوشته می‌شوند
+            self.data_manager.audit_log.flush()
             
-            # فیلتر کاربر
+            # فیلترها (بازه زمانی با ایندکس created_at خوانده می‌شود)
             selected_user = self.cmb_user_filter.currentText()
-            if selected_user != "همه کاربران":
-                where_conditions.append("u.username = ?")
-                params.append(selected_user)
-            
-            # فیلتر اقدام
             selected_action = self.cmb_action_filter.currentText()
-            if selected_action != "همه اقدامات":
-                where_conditions.append("l.action = ?")
-                params.append(selected_action)
-            
-            # ساخت کوئری
-            where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-            
-            query = f"""
-            SELECT 
-                l.id,
-                l.created_at,
-                u.username,
-                l.action,
-                l.table_name,
-                l.record_id,
-                l.ip_address,
-                l.details,
-                CASE 
-                    WHEN l.action LIKE '%ناموفق%' THEN 'ناموفق'
-                    WHEN l.action LIKE '%حذف%' THEN 'حذف'
-                    WHEN l.action LIKE '%ایجاد%' THEN 'ایجاد'
-                    WHEN l.action LIKE '%ویرایش%' THEN 'ویرایش'
-                    WHEN l.action LIKE '%ورود%' THEN 'ورود'
-                    WHEN l.action LIKE '%خروج%' THEN 'خروج'
-                    ELSE 'سایر'
-                END as action_type
-            FROM Logs l
-            LEFT JOIN Users u ON l.user_id = u.id
-            WHERE {where_clause}
-            ORDER BY l.created_at DESC
-            LIMIT 500
-            """
-            
-            logs = self.data_manager.db.fetch_all(query, params)
-            
-            # پر کردن جدول
-            self.table_activity.setRowCount(len(logs))
-            
-            security_events = 0
-            today_count = 0
-            today_date = self.data_manager.db.get_current_jalali_date()
+            self.log_filters = {
+                'from_time': self.date_from.dateTime().toString("yyyy-MM-dd HH:mm:ss"),
+                'to_time': self.date_to.dateTime().toString("yyyy-MM-dd HH:mm:ss"),
+                'username': selected_user if selected_user != "همه کاربران" else None,
+                'action': selected_action if selected_action != "همه اقدامات" else None,
+            }
             
-            for row, log in enumerate(logs):
-                # تبدیل تاریخ به شمسی
-                log_date = self.data_manager.db.gregorian_to_jalali(log['created_at'], "%Y/%m/%d %H:%M")
-                
-                # بررسی امروز
-                if today_date in log_date:
-                    today_count += 1
-                
-                # بررسی رویداد امنیتی
-                action_type = log.get('action_type', '')
-                if action_type in ['ناموفق', 'حذف']:
-                    security_events += 1
-                
-                items = [
-                    log_date,
-                    log['username'] or 'سیستم',
-                    log['action'],
-                    log['table_name'] or '',
-                    str(log['record_id']) if log['record_id'] else '',
-                    log['ip_address'] or '',
-                    log['details'] or ''
-                ]
-                
-                for col, value in enumerate(items):
-                    item = QTableWidgetItem(value)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    
-                    # رنگ‌بندی بر اساس نوع اقدام
-                    if col == 2:  # ستون اقدام
-                        if action_type == 'ناموفق':
-                            item.setForeground(Qt.red)
-                            item.setBackground(Qt.darkRed)
-                        elif action_type == 'حذف':
-                            item.setForeground(Qt.yellow)
-                        elif action_type == 'ایجاد':
-                            item.setForeground(Qt.green)
-                        elif action_type == 'ویرایش':
-                            item.setForeground(Qt.blue)
-                        elif action_type == 'ورود':
-                            item.setForeground(Qt.cyan)
-                        elif action_type == 'خروج':
-                            item.setForeground(Qt.magenta)
-                    
-                    self.table_activity.setItem(row, col, item)
+            db = self.data_manager.db
+            self.log_count = audit_log.count_logs(db, self.log_filters)
+            page = audit_log.get_logs_page(db, self.log_filters, page_size=self.LOG_PAGE_SIZE)
             
-            # به‌روزرسانی آمار
-            self.lbl_total_logs.setText(f"تعداد رکوردها: {len(logs)}")
-            self.lbl_today_logs.setText(f"امروز: {today_count}")
-            self.lbl_security_events.setText(f"رویدادهای امنیتی: {security_events}")
+            self.table_activity.setRowCount(0)
+            self.loaded_log_count = 0
+            self.today_log_count = 0
+            self.security_event_count = 0
+            self.append_activity_rows(page)
             
             # به‌روزرسانی زمان آخرین به‌روزرسانی
             now = QDateTime.currentDateTime().toString("HH:mm:ss")
             self.lbl_last_update.setText(f"آخرین به‌روزرسانی: {now}")
             
-            print(f"✅ {len(logs)} رکورد لاگ بارگذاری شد")
+            print(f"✅ {len(page['rows'])} رکورد لاگ بارگذاری شد")
             
         except Exception as e:
             print(f"❌ خطا در بارگذاری لاگ فعالیت: {e}")
@@ -1379,10 +1306,88 @@ class SecuritySettingsForm(QWidget):
             
             # در صورت خطا جدول را خالی کن
             self.table_activity.setRowCount(0)
+            self.log_next_cursor = None
+            self.btn_load_more_logs.setVisible(False)
             self.lbl_total_logs.setText("تعداد رکوردها: 0")
             self.lbl_today_logs.setText("امروز: 0")
             self.lbl_security_events.setText("رویدادهای امنیتی: 0")
 
+    def load_more_activity_log(self):
+        """بارگذاری صفحه بعد لاگ فعالیت با همان فیلترها"""
+        try:
+            page = audit_log.get_logs_page(
+                self.data_manager.db, self.log_filters, cursor=self.log_next_cursor,
+                page_size=self.LOG_PAGE_SIZE
+            )
+            self.append_activity_rows(page)
+            
+        except Exception as e:
+            print(f"❌ خطا در بارگذاری لاگ فعالیت: {e}")
+
+    def append_activity_rows(self, page):
+        """افزودن یک صفحه لاگ به انتهای جدول و به‌روزرسانی آمار"""
+        logs = page['rows']
+        self.log_next_cursor = page['next_cursor']
+        first_row = self.table_activity.rowCount()
+        self.table_activity.setRowCount(first_row + len(logs))
+        
+        today_date = self.data_manager.db.get_current_jalali_date()
+        
+        for row, log in enumerate(logs, first_row):
+            # تبدیل تاریخ به شمسی
+            log_date = self.data_manager.db.gregorian_to_jalali(log['created_at'], "%Y/%m/%d %H:%M")
+            
+            # بررسی امروز
+            if today_date in log_date:
+                self.today_log_count += 1
+            
+            # بررسی رویداد امنیتی
+            action_type = log.get('action_type', '')
+            if action_type in ['ناموفق', 'حذف']:
+                self.security_event_count += 1
+            
+            items = [
+                log_date,
+                log['username'] or 'سیستم',
+                log['action'],
+                log['table_name'] or '',
+                str(log['record_id']) if log['record_id'] else '',
+                log['ip_address'] or '',
+                log['details'] or ''
+            ]
+            
+            for col, value in enumerate(items):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignCenter)
+                
+                # رنگ‌بندی بر اساس نوع اقدام
+                if col == 2:  # ستون اقدام
+                    if action_type == 'ناموفق':
+                        item.setForeground(Qt.red)
+                        item.setBackground(Qt.darkRed)
+                    elif action_type == 'حذف':
+                        item.setForeground(Qt.yellow)
+                    elif action_type == 'ایجاد':
+                        item.setForeground(Qt.green)
+                    elif action_type == 'ویرایش':
+                        item.setForeground(Qt.blue)
+                    elif action_type == 'ورود':
+                        item.setForeground(Qt.cyan)
+                    elif action_type == 'خروج':
+                        item.setForeground(Qt.magenta)
+                
+                self.table_activity.setItem(row, col, item)
+        
+        # به‌روزرسانی آمار (امروز و رویدادهای امنیتی در لاگ‌های نمایش داده شده)
+        self.loaded_log_count += len(logs)
+        count_text = pagination.format_count(*self.log_count)
+        if self.log_next_cursor is not None:
+            count_text += f" (نمایش {self.loaded_log_count})"
+        self.lbl_total_logs.setText(f"تعداد رکوردها: {count_text}")
+        self.lbl_today_logs.setText(f"امروز: {self.today_log_count}")
+        self.lbl_security_events.setText(f"رویدادهای امنیتی: {self.security_event_count}")
+        self.btn_load_more_logs.setVisible(self.log_next_cursor is not None)
+
     def filter_activity_log(self):
         """اعمال فیلتر بر روی لاگ‌ها"""
         self.load_activity_log()
@@ -1457,17 +1462,15 @@ class SecuritySettingsForm(QWidget):
             )
             
             if reply == QMessageBox.Yes:
-                # محاسبه تاریخ
-                cutoff_date = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
-                
-                query = "DELETE FROM Logs WHERE date(created_at) < ?"
-                deleted = self.data_manager.db.execute_query(query, (cutoff_date,))
+                # حذف تکه‌تکه از قدیمی‌ترین لاگ‌ها (با ایندکس created_at)
+                cutoff_date = audit_log.retention_cutoff(retention_days)
+                deleted = self.data_manager.audit_log.purge_before(cutoff_date)
                 
-                if deleted:
+                if deleted is not None:
                     QMessageBox.information(
                         self,
                         "پاکسازی موفق",
-                        f"✅ لاگ‌های قدیمی‌تر از {retention_days} روز پاک شدند.\n"
+                        f"✅ {deleted:,} لاگ قدیمی‌تر از {retention_days} روز پاک شد.\n"
                         "لاگ‌ها دوباره بارگذاری می‌شوند."
                     )
                     self.load_activity_log()
@@ -27,74 +27,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
-# حالا می‌توانیم فرم‌ها را ایمپورت کنیم
-try:
-    from ui.forms.person_form import PersonForm
-    PERSON_FORM_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری فرم اشخاص: {e}")
-    PERSON_FORM_AVAILABLE = False
-
-
-try:
-    from ui.forms.reports.reports_window import ReportsWindow
-    from ui.forms.reports.reports_main_form import ReportsMainForm
-    REPORTS_WINDOW_AVAILABLE = True
-    print("✅ ماژول گزارش‌گیری در main_window بارگذاری شد")
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری ماژول گزارش‌گیری در main_window: {e}")
-    import traceback
-    traceback.print_exc()
-    REPORTS_WINDOW_AVAILABLE = False
-
-
-
-try:
-    from ui.forms.reception_form import ReceptionForm
-    RECEPTION_FORM_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری فرم پذیرش: {e}")
-    RECEPTION_FORM_AVAILABLE = False
-
-try:
-    from ui.forms.device_form import DeviceForm
-    DEVICE_FORM_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری فرم دستگاه‌ها: {e}")
-    DEVICE_FORM_AVAILABLE = False
-
-try:
-    from ui.forms.repair_form import RepairForm
-    REPAIR_FORM_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری فرم تعمیرات: {e}")
-    REPAIR_FORM_AVAILABLE = False
-
-try:
-    from ui.forms.service_fee_form import ServiceFeeForm
-    SERVICE_FEE_FORM_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری فرم اجرت‌ها: {e}")
-    SERVICE_FEE_FORM_AVAILABLE = False
-
-
-try:
-    from ui.forms.inventory.inventory_window import InventoryWindow
-    INVENTORY_WINDOW_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری پنجره انبار: {e}")
-    INVENTORY_WINDOW_AVAILABLE = False
-    InventoryWindow = None
-
-try:
-    from ui.forms.accounting.accounting_window import AccountingWindow
-    ACCOUNTING_WINDOW_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ خطا در بارگذاری پنجره حسابداری: {e}")
-    import traceback
-    traceback.print_exc()  # نمایش جزییات خطا
-    ACCOUNTING_WINDOW_AVAILABLE = False
-    AccountingWindow = None
+# فرم‌ها و پنجره‌ها در اولین باز شدن بارگذاری می‌شوند (ui.form_registry)
+from ui.form_registry import FORMS
 
 try:
     from utils.jalali_date_widget import JalaliDateWidget, JalaliDateEdit, JalaliDateTimeWidget
@@ -173,6 +107,8 @@ class MainWindow(QMainWindow):
         try:
             from modules.dashboard_manager import DashboardManager
             self.dashboard_manager = DashboardManager(data_manager)
+            # داشبورد پس از تغییر داده‌ها (سیگنال data_changed مدل‌ها) خودکار بروز می‌شود
+            self.dashboard_manager.dashboard_data_updated.connect(self.apply_dashboard_data)
             print(f"✅ DashboardManager ایجاد شد")
         except ImportError as e:
             print(f"⚠️ خطا در بارگذاری DashboardManager: {e}")
@@ -414,7 +350,7 @@ class MainWindow(QMainWindow):
         content_widget.setMinimumHeight(1800)  # ارتفاع زیاد برای فعال کردن اسکرول
         
         # بارگذاری اولیه داده‌ها
-        self.refresh_dashboard_data()
+        self.activate_dashboard()
 
 
 #هر سه تا برای تست 
@@ -593,26 +529,9 @@ class MainWindow(QMainWindow):
                 layout.addWidget(urgent_label)
             
             # موجودی کم
-            query = """
-            SELECT COUNT(*) as count
-            FROM Parts p
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM NewPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) np ON p.id = np.part_id
-            LEFT JOIN (
-                SELECT part_id, SUM(quantity) as total_qty 
-                FROM UsedPartsWarehouse 
-                WHERE status = 'موجود'
-                GROUP BY part_id
-            ) up ON p.id = up.part_id
-            WHERE COALESCE(np.total_qty, 0) + COALESCE(up.total_qty, 0) < p.min_stock
-            """
-            low_stock = self.data_manager.db.fetch_one(query)
-            if low_stock and low_stock['count'] > 0:
-                stock_label = QLabel(f"📦 {low_stock['count']} قطعه با موجودی کم")
+            low_stock_count = self.data_manager.part.count_low_stock_parts()
+            if low_stock_count > 0:
+                stock_label = QLabel(f"📦 {low_stock_count} قطعه با موجودی کم")
                 stock_label.setStyleSheet("color: #d35400; font-weight: bold;")
                 layout.addWidget(stock_label)
             
@@ -687,10 +606,32 @@ class MainWindow(QMainWindow):
                 self.refresh_old_dashboard_data()
                 return
             
-            print("🔄 بروزرسانی داشبورد...")
+            # داده‌ها در نخ کارگر محاسبه می‌شوند و قسمت‌های تغییر کرده از طریق سیگنال
+            # dashboard_data_updated به ویجت‌ها می‌رسند؛ اگر داده‌ای تغییر نکرده باشد
+            # هیچ کوئری‌ای اجرا نمی‌شود
+            self.dashboard_manager.request_refresh()
             
-            # دریافت داده‌های داشبورد
-            dashboard_data = self.dashboard_manager.get_dashboard_data()
+        except Exception as e:
+            print(f"❌ خطا در بروزرسانی داشبورد: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    def activate_dashboard(self):
+        """نمایش داشبورد: داده‌های کش فوراً نمایش و تغییرات در پس‌زمینه بروز می‌شوند"""
+        if getattr(self, 'dashboard_manager', None):
+            self.dashboard_manager.set_active(True)
+        else:
+            self.refresh_dashboard_data()
+    
+    def deactivate_dashboard(self):
+        """ترک داشبورد: لغو محاسبات قدیمی تا بازگشت به داشبورد"""
+        if getattr(self, 'dashboard_manager', None):
+            self.dashboard_manager.set_active(False)
+    
+    def apply_dashboard_data(self, dashboard_data):
+        """نمایش داده‌های داشبورد در ویجت‌ها (فقط قسمت‌های تغییر کرده)"""
+        try:
+            print("🔄 بروزرسانی داشبورد...")
             
             # 🔴 بررسی معتبر بودن داده‌ها
             if not dashboard_data:
@@ -707,9 +648,11 @@ class MainWindow(QMainWindow):
             if 'quick_lists' not in dashboard_data:
                 dashboard_data['quick_lists'] = {}
             
+            changed = dashboard_data.get('changed') or ['stats', 'charts', 'alerts', 'quick_lists']
+            
             # 🔴 بروزرسانی فقط اگر ویجت‌ها موجود باشند
             # 🔴 و با بررسی blockSignals برای جلوگیری از خطاهای dataChanged
-            if hasattr(self, 'stats_widget'):
+            if 'stats' in changed and hasattr(self, 'stats_widget'):
                 try:
                     # 🔴 بررسی وجود مدل
                     if hasattr(self.stats_widget, 'model'):
@@ -730,19 +673,19 @@ class MainWindow(QMainWindow):
                 except Exception as e:
                     print(f"❌ خطا در بروزرسانی آمار: {e}")
             
-            if hasattr(self, 'charts_widget'):
+            if 'charts' in changed and hasattr(self, 'charts_widget'):
                 try:
                     self.charts_widget.update_charts(dashboard_data['charts'])
                 except Exception as e:
                     print(f"❌ خطا در بروزرسانی نمودارها: {e}")
             
-            if hasattr(self, 'alerts_widget'):
+            if 'alerts' in changed and hasattr(self, 'alerts_widget'):
                 try:
                     self.alerts_widget.update_alerts(dashboard_data['alerts'])
                 except Exception as e:
                     print(f"❌ خطا در بروزرسانی هشدارها: {e}")
             
-            if hasattr(self, 'quick_lists_widget'):
+            if 'quick_lists' in changed and hasattr(self, 'quick_lists_widget'):
                 try:
                     self.quick_lists_widget.update_lists(dashboard_data['quick_lists'])
                 except Exception as e:
@@ -751,7 +694,7 @@ class MainWindow(QMainWindow):
             print("✅ داشبورد بروزرسانی شد")
             
         except Exception as e:
-            print(f"❌ خطا در بروزرسانی داشبورد: {e}")
+            print(f"❌ خطا در نمایش داده‌های داشبورد: {e}")
             import traceback
             traceback.print_exc()
 
@@ -786,8 +729,7 @@ class MainWindow(QMainWindow):
                     repairing_count += 1
             
             # 🔴 **قطعات با موجودی کم**
-            low_stock_parts = self.data_manager.part.get_low_stock_parts()
-            low_stock_count = len(low_stock_parts)
+            low_stock_count = self.data_manager.part.count_low_stock_parts()
             
             # 🔴 **چک‌های در سررسید**
             due_checks = self.data_manager.check_manager.get_checks_due_soon(days=7)
@@ -864,6 +806,7 @@ class MainWindow(QMainWindow):
 
     def clear_central_widget(self):
         """پاک کردن ویجت مرکزی فعلی"""
+        self.deactivate_dashboard()
         old_widget = self.centralWidget()
         if old_widget:
             old_widget.setParent(None)
@@ -919,7 +862,7 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(main_layout)
         
         # تازه‌سازی داده‌ها
-        self.refresh_dashboard_data()
+        self.activate_dashboard()
         
         # تنظیم عنوان
         self.setWindowTitle("سیستم مدیریت تعمیرگاه لوازم خانگی شیروین")
@@ -1519,6 +1462,13 @@ class MainWindow(QMainWindow):
         act_security_settings = QAction("🔐 تنظیمات امنیتی", self)
         act_security_settings.triggered.connect(lambda: self.open_settings_window("security"))
         settings_menu.addAction(act_security_settings)
+
+        settings_menu.addSeparator()
+
+        # پنل عملکرد (پروفایلر کوئری‌ها)
+        act_performance_panel = QAction("⏱️ پنل عملکرد", self)
+        act_performance_panel.triggered.connect(self.open_performance_panel)
+        settings_menu.addAction(act_performance_panel)
         
         # منوی راهنما
         help_menu = menubar.addMenu("❓ راهنما")
@@ -2150,9 +2100,12 @@ class MainWindow(QMainWindow):
     
     def new_customer(self):
         """مشتری جدید - باز کردن فرم اشخاص برای ثبت مشتری"""
+        PersonForm = FORMS.get('PersonForm')
+        if PersonForm is None:
+            QMessageBox.warning(self, "خطا", "فرم مدیریت اشخاص در دسترس نیست.")
+            return
+        
         try:
-            from ui.forms.person_form import PersonForm
-            
             # ایجاد فرم برای ثبت مشتری جدید
             self.person_form = PersonForm(self.data_manager)
             self.person_form.setWindowTitle("ثبت مشتری جدید")
@@ -2193,7 +2146,8 @@ class MainWindow(QMainWindow):
 
     def open_persons_management(self):
         """مدیریت اشخاص"""
-        if not PERSON_FORM_AVAILABLE:
+        PersonForm = FORMS.get('PersonForm')
+        if PersonForm is None:
             QMessageBox.warning(self, "خطا", "فرم مدیریت اشخاص در دسترس نیست.")
             return
         
@@ -2239,7 +2193,8 @@ class MainWindow(QMainWindow):
 
     def open_devices_management(self):
         """باز کردن فرم مدیریت دستگاه‌ها"""
-        if not DEVICE_FORM_AVAILABLE:
+        DeviceForm = FORMS.get('DeviceForm')
+        if DeviceForm is None:
             QMessageBox.warning(self, "خطا", "فرم مدیریت دستگاه‌ها در دسترس نیست.")
             return
         
@@ -2295,7 +2250,8 @@ class MainWindow(QMainWindow):
 
     def open_reception_management(self):
         """باز کردن فرم مدیریت پذیرش"""
-        if not RECEPTION_FORM_AVAILABLE:
+        ReceptionForm = FORMS.get('ReceptionForm')
+        if ReceptionForm is None:
             QMessageBox.warning(self, "خطا", "فرم مدیریت پذیرش در دسترس نیست.")
             return
         
@@ -2454,12 +2410,12 @@ class MainWindow(QMainWindow):
     
     def manage_service_fees(self):
         """مدیریت اجرت‌های استاندارد"""
-        if not SERVICE_FEE_FORM_AVAILABLE:
+        ServiceFeeForm = FORMS.get('ServiceFeeForm')
+        if ServiceFeeForm is None:
             QMessageBox.warning(self, "خطا", "فرم مدیریت اجرت‌ها در دسترس نیست.")
             return
         
         try:
-            from ui.forms.service_fee_form import ServiceFeeForm
             self.service_fee_form = ServiceFeeForm(self.data_manager)
             self.service_fee_form.setWindowTitle("💰 مدیریت اجرت‌های استاندارد")
             self.service_fee_form.setMinimumSize(800, 600)
@@ -2935,26 +2891,12 @@ class MainWindow(QMainWindow):
       
     def open_repairs_management(self):
         """باز کردن فرم تعمیرات"""
+        RepairForm = FORMS.get('RepairForm')
+        if RepairForm is None:
+            QMessageBox.warning(self, "خطا", "فرم تعمیرات در دسترس نیست.")
+            return
+        
         try:
-            # ایمپورت Lazy برای جلوگیری از circular import
-            try:
-                from ui.forms.repair_form import RepairForm
-            except ImportError as import_error:
-                print(f"❌ خطای ایمپورت در open_repair_form: {import_error}")
-                
-                # تلاش برای ایمپورت با مسیر کامل
-                import sys
-                import os
-                
-                # افزودن مسیر پروژه به sys.path
-                project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                if project_root not in sys.path:
-                    sys.path.insert(0, project_root)
-                
-                # دوباره تلاش کن
-                from ui.forms.repair_form import RepairForm
-                print("✅ ایمپورت موفق بعد از تنظیم sys.path")
-            
             # ایجاد فرم
             self.repair_form = RepairForm(self.data_manager)
             
@@ -2983,7 +2925,8 @@ class MainWindow(QMainWindow):
 
     def open_inventory_main(self):
         """باز کردن پنجره مستقل مدیریت انبار"""
-        if not INVENTORY_WINDOW_AVAILABLE or InventoryWindow is None:
+        InventoryWindow = FORMS.get('InventoryWindow')
+        if InventoryWindow is None:
             QMessageBox.warning(self, "خطا", "پنجره انبار در دسترس نیست.")
             return
         
@@ -3021,7 +2964,7 @@ class MainWindow(QMainWindow):
 
     def open_inventory_tab(self, tab_index):
         """باز کردن تب خاصی از انبار در پنجره مستقل"""
-        if not INVENTORY_WINDOW_AVAILABLE:
+        if FORMS.get('InventoryWindow') is None:
             QMessageBox.warning(self, "خطا", "پنجره انبار در دسترس نیست.")
             return
         
@@ -3106,6 +3049,9 @@ class MainWindow(QMainWindow):
     def show_form_in_central(self, widget, title):
         """نمایش یک ویجت در قسمت مرکزی پنجره اصلی"""
         try:
+            # داشبورد دیگر نمایش داده نمی‌شود
+            self.deactivate_dashboard()
+            
             # حذف ویجت قبلی از central widget
             old_widget = self.centralWidget()
             if old_widget:
@@ -3192,16 +3138,12 @@ class MainWindow(QMainWindow):
     
     def open_accounting_window(self):
         """باز کردن پنجره مستقل حسابداری"""
+        AccountingWindow = FORMS.get('AccountingWindow')
+        if AccountingWindow is None:
+            QMessageBox.warning(self, "خطا", "پنجره حسابداری در دسترس نیست.")
+            return
+        
         try:
-            # ایمپورت درون تابع برای جلوگیری از مشکلات import
-            try:
-                from ui.forms.accounting.accounting_window import AccountingWindow
-            except ImportError as e:
-                print(f"⚠️ خطای ایمپورت حسابداری: {e}")
-                QMessageBox.warning(self, "خطا", 
-                    f"خطا در بارگذاری ماژول حسابداری:\n\n{str(e)}")
-                return
-            
             # اگر پنجره قبلاً باز است، آن را فعال کن
             if hasattr(self, 'accounting_window') and self.accounting_window:
                 try:
@@ -3245,7 +3187,7 @@ class MainWindow(QMainWindow):
     def show_low_stock(self):
         """نمایش اقلام با موجودی کم"""
         try:
-            from ui.forms.inventory.dialogs import LowStockDialog
+            from ui.forms.inventory.dialogs.low_stock_dialog import LowStockDialog
             self.low_stock_dialog = LowStockDialog(self.data_manager, self)
             self.low_stock_dialog.exec()
         except Exception as e:
@@ -3256,7 +3198,8 @@ class MainWindow(QMainWindow):
 
     def open_reports_window(self):
         """باز کردن پنجره مستقل گزارش‌گیری"""
-        if not REPORTS_WINDOW_AVAILABLE:
+        ReportsWindow = FORMS.get('ReportsWindow')
+        if ReportsWindow is None:
             QMessageBox.warning(self, "خطا", 
                 "پنجره گزارش‌گیری در دسترس نیست.\n"
                 "لطفا مطمئن شوید فایل‌های گزارش‌گیری وجود دارند.")
@@ -3461,15 +3404,20 @@ class MainWindow(QMainWindow):
     def setup_sms_module(self):
         """راه‌اندازی ماژول پیامکی"""
         try:
-            from modules.sms_manager import SMSManager
-            from services.sms_service import SMSService
+            from services.sms_service import SMSService, load_sms_settings
             
-            # ایجاد مدیر پیامک
-            api_key = self.get_setting('sms_api_key', '')  # از تنظیمات بخوان
-            self.sms_manager = SMSManager(self.data_manager, api_key=api_key)
+            # ایجاد مدیر پیامک (یا ارائه‌دهنده محلی برای تست)
+            sms_settings = load_sms_settings()
+            if sms_settings['provider'] == 'stub':
+                from services.sms_stub import StubSMSProvider
+                self.sms_manager = StubSMSProvider()
+            else:
+                from modules.sms_manager import SMSManager
+                api_key = self.get_setting('sms_api_key', '')  # از تنظیمات بخوان
+                self.sms_manager = SMSManager(self.data_manager, api_key=api_key)
             
-            # ایجاد سرویس خودکار
-            self.sms_service = SMSService(self.sms_manager, self.data_manager)
+            # ایجاد سرویس خودکار (صف ماندگار SMSOutbox)
+            self.sms_service = SMSService(self.sms_manager, self.data_manager, sms_settings)
             
             # شروع سرویس
             if self.get_setting('auto_sms_enabled', False):
@@ -3501,6 +3449,22 @@ class MainWindow(QMainWindow):
         """تنظیمات برنامه"""
         QMessageBox.information(self, "تنظیمات برنامه", "تنظیمات برنامه باز خواهد شد.")
     
+    def open_performance_panel(self):
+        """باز کردن پنل عملکرد (نتایج پروفایلر کوئری‌ها)"""
+        try:
+            from ui.dialogs.performance_dialog import PerformanceDialog
+            
+            if not hasattr(self, 'performance_dialog') or self.performance_dialog is None:
+                self.performance_dialog = PerformanceDialog(self.data_manager, self)
+            
+            self.performance_dialog.show()
+            self.performance_dialog.raise_()
+            self.performance_dialog.activateWindow()
+            self.performance_dialog.refresh()
+            self.performance_dialog.refresh_timer.start()
+        except Exception as e:
+            QMessageBox.critical(self, "خطا", f"خطا در باز کردن پنل عملکرد: {str(e)}")
+    
     def open_sms_settings(self):
         """تنظیمات پیامکی"""
         QMessageBox.information(self, "تنظیمات پیامکی", "تنظیمات پیامکی باز خواهد شد.")
@@ -3586,6 +3550,8 @@ class MainWindow(QMainWindow):
             # ذخیره تنظیمات و انجام عملیات پایانی
             self.timer.stop()
             self.data_timer.stop()
+            if getattr(self, 'dashboard_manager', None):
+                self.dashboard_manager.shutdown()
             event.accept()
         else:
             event.ignore()
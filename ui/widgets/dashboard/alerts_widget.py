@@ -561,7 +561,13 @@ class AlertsWidget(QWidget):
     
     def refresh_alerts(self):
         """بروزرسانی هشدارها"""
-        if self.dashboard_manager:
+        if not self.dashboard_manager:
+            return
+        
+        # سرویس داشبورد در پس‌زمینه محاسبه می‌کند و نتیجه با update_alerts می‌رسد
+        if hasattr(self.dashboard_manager, 'request_refresh'):
+            self.dashboard_manager.request_refresh()
+        else:
             alerts_data = self.dashboard_manager.get_alerts()
             self.update_alerts(alerts_data)
 
@@ -248,6 +248,7 @@ class ChartsWidget(QWidget):
         super().__init__(parent)
         self.dashboard_manager = None
         self.charts = {}
+        self.charts_data = None  # آخرین داده‌های دریافتی از سرویس داشبورد
         self.setup_ui()
     
     def setup_ui(self):
@@ -293,7 +294,7 @@ class ChartsWidget(QWidget):
         refresh_btn = QLabel("🔄")
         refresh_btn.setCursor(Qt.PointingHandCursor)
         refresh_btn.setStyleSheet("font-size: 20px; padding: 5px;")
-        refresh_btn.mousePressEvent = lambda e: self.refresh_charts()
+        refresh_btn.mousePressEvent = lambda e: self.request_refresh()
         
         controls_layout.addWidget(QLabel("نمودار:"))
         controls_layout.addWidget(self.chart_type_combo)
@@ -343,12 +344,14 @@ class ChartsWidget(QWidget):
             self.current_chart.setParent(None)
             self.current_chart.deleteLater()
         
-        # دریافت داده‌ها
-        if not self.dashboard_manager:
+        # دریافت داده‌ها (آخرین داده‌های رسیده از سرویس داشبورد، بدون کوئری در نخ اصلی)
+        if self.charts_data is not None:
+            charts_data = self.charts_data
+        elif self.dashboard_manager and not hasattr(self.dashboard_manager, 'request_refresh'):
+            charts_data = self.dashboard_manager.get_charts_data()
+        else:
             return
         
-        charts_data = self.dashboard_manager.get_charts_data()
-        
         if chart_type == 'reception_status':
             self.show_reception_chart(charts_data.get('reception_status', {}))
         elif chart_type == 'daily_income':
@@ -440,8 +443,17 @@ class ChartsWidget(QWidget):
         if not charts_data:
             return
         
+        self.charts_data = charts_data
+        
         # بروزرسانی نمودار فعلی
         self.refresh_charts()
+    
+    def request_refresh(self):
+        """درخواست داده‌های تازه از سرویس داشبورد (نتیجه با update_charts می‌رسد)"""
+        if self.dashboard_manager and hasattr(self.dashboard_manager, 'request_refresh'):
+            self.dashboard_manager.request_refresh(force_refresh=True)
+        else:
+            self.refresh_charts()
 
 
 if __name__ == "__main__":
@@ -317,7 +317,13 @@ class QuickListsWidget(QWidget):
     
     def refresh_lists(self):
         """بروزرسانی لیست‌ها"""
-        if self.dashboard_manager:
+        if not self.dashboard_manager:
+            return
+        
+        # سرویس داشبورد در پس‌زمینه محاسبه می‌کند و نتیجه با update_lists می‌رسد
+        if hasattr(self.dashboard_manager, 'request_refresh'):
+            self.dashboard_manager.request_refresh()
+        else:
             lists_data = self.dashboard_manager.get_quick_lists()
             self.update_lists(lists_data)
     
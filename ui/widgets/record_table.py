@@ -0,0 +1,515 @@
+# ui/widgets/record_table.py - جدول مبتنی بر مدل برای لیست‌های بزرگ
+"""
+لایه مدل/نمای مشترک برای جدول‌های پرردیف (انبار، تراکنش‌ها، جستجو)
+
+به جای ساختن QTableWidgetItem برای تک‌تک سلول‌ها (و QWidget برای دکمه‌های هر
+ردیف)، نتیجه کوئری (لیست دیکشنری‌ها) مستقیماً به RecordTableModel داده می‌شود:
+
+- متن، تراز و رنگ هر سلول فقط هنگام نمایش و از روی تعریف ستون (TableColumn)
+  محاسبه می‌شود؛ حافظه جدول با تعداد ردیف‌ها تقریباً ثابت می‌ماند.
+- ردیف‌ها دسته‌ای با canFetchMore/fetchMore به نما داده می‌شوند، پس باز شدن
+  جدول 20 هزار ردیفی به اندازه یک دسته هزینه دارد. ورودی می‌تواند لیست یا
+  iterator (مثلاً خواندن تدریجی از cursor) باشد.
+- مرتب‌سازی و فیلتر با RecordFilterProxyModel روی مقدار خام ستون انجام می‌شود؛
+  برای لیست‌های صفحه‌بندی شده (database.pagination) با set_sort_handler مرتب‌سازی
+  به کوئری سپرده می‌شود.
+- دکمه‌های عملیات هر ردیف با ActionButtonsDelegate نقاشی می‌شوند و کلیک آن‌ها
+  سیگنال action_triggered(نام عملیات، ردیف) جدول را می‌فرستد.
+
+نمونه:
+
+    table = RecordTableView([
+        TableColumn("ردیف", ROW_NUMBER, align=Qt.AlignCenter, width=60),
+        TableColumn("نام", 'name'),
+        TableColumn("عملیات", actions=[('edit', "✏️", "ویرایش")]),
+    ])
+    table.action_triggered.connect(on_action)
+    table.set_rows(rows)
+"""
+
+from itertools import islice
+
+from PySide6.QtWidgets import (
+    QTableView, QAbstractItemView, QStyledItemDelegate,
+    QStyle, QStyleOptionButton, QApplication, QToolTip
+)
+from PySide6.QtCore import (
+    Qt, Signal, QAbstractTableModel, QSortFilterProxyModel, QModelIndex,
+    QRect, QEvent, QItemSelectionModel
+)
+from PySide6.QtGui import QColor
+
+
+# نقش‌های اختصاصی مدل
+SORT_ROLE = Qt.UserRole
+RECORD_ROLE = Qt.UserRole + 1
+
+# کلید ویژه ستون شماره ردیف
+ROW_NUMBER = '__row_number__'
+
+DEFAULT_BATCH_SIZE = 200
+
+
+class TableColumn:
+    """
+    تعریف یک ستون جدول
+    
+    key: کلید مقدار در دیکشنری ردیف (یا ROW_NUMBER)
+    text: تابع ردیف ← متن نمایشی (پیش‌فرض مقدار key)
+    sort_key: تابع ردیف ← مقدار مرتب‌سازی (پیش‌فرض مقدار خام key)
+    background / foreground: تابع ردیف ← رنگ (نام یا کد رنگ) یا None
+    actions: لیست (نام، متن دکمه، راهنما) برای ستون دکمه‌های عملیات
+    """
+    
+    __slots__ = ('title', 'key', 'text', 'align', 'background', 'foreground',
+                 'sort_key', 'tooltip', 'width', 'actions')
+    
+    def __init__(self, title, key=None, text=None, align=None, background=None,
+                 foreground=None, sort_key=None, tooltip=None, width=None, actions=None):
+        self.title = title
+        self.key = key
+        self.text = text
+        self.align = align
+        self.background = background
+        self.foreground = foreground
+        self.sort_key = sort_key
+        self.tooltip = tooltip
+        self.width = width
+        self.actions = actions or []
+    
+    def display(self, row, row_number):
+        if self.actions:
+            return None
+        if self.key == ROW_NUMBER:
+            return str(row_number + 1)
+        if self.text is not None:
+            return self.text(row)
+        value = row.get(self.key) if self.key else None
+        return '' if value is None else str(value)
+    
+    def sort_value(self, row, row_number):
+        if self.sort_key is not None:
+            return self.sort_key(row)
+        if self.key == ROW_NUMBER:
+            return row_number
+        return row.get(self.key) if self.key else None
+
+
+class RecordTableModel(QAbstractTableModel):
+    """مدل جدول روی لیست دیکشنری‌ها با بارگذاری تدریجی"""
+    
+    def __init__(self, columns, batch_size=DEFAULT_BATCH_SIZE, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self._rows = []
+        self._visible = 0
+        self._pending = None
+        self._colors = {}
+    
+    # ---------- داده ----------
+    
+    def set_rows(self, rows):
+        """
+        جایگزینی داده‌ها (لیست یا iterator از دیکشنری‌ها)
+        
+        لیست کپی نمی‌شود؛ iterator فقط به اندازه دسته‌هایی که نما می‌خواهد خوانده می‌شود.
+        """
+        self.beginResetModel()
+        if isinstance(rows, list):
+            self._rows = rows
+            self._pending = None
+        else:
+            self._rows = []
+            self._pending = iter(rows) if rows is not None else None
+        self._visible = 0
+        self._load_batch()
+        self.endResetModel()
+    
+    def append_rows(self, rows):
+        """افزودن ردیف‌ها به انتهای داده‌ها (مثلاً صفحه بعدی نتایج جستجو)"""
+        self.fetch_all()
+        # لیست داده شده به set_rows تغییر نمی‌کند
+        self._rows = self._rows + list(rows)
+        self._show(len(self._rows) - self._visible)
+    
+    def rows(self):
+        """ردیف‌های خوانده شده تا این لحظه"""
+        return self._rows
+    
+    def all_rows(self):
+        """همه ردیف‌ها (iterator باقی‌مانده هم خوانده می‌شود)"""
+        self.fetch_all()
+        return self._rows
+    
+    def record(self, row):
+        """دیکشنری ردیف row از مدل منبع"""
+        if 0 <= row < self._visible:
+            return self._rows[row]
+        return None
+    
+    def sort_value(self, row, column):
+        """مقدار مرتب‌سازی یک سلول"""
+        return self.columns[column].sort_value(self._rows[row], row)
+    
+    def fetch_all(self):
+        """نمایش همه ردیف‌ها در یک مرحله (برای مرتب‌سازی، فیلتر یا خروجی کامل)"""
+        if self._pending is not None:
+            self._rows.extend(self._pending)
+            self._pending = None
+        self._show(len(self._rows) - self._visible)
+    
+    def _show(self, count):
+        """اعلام count ردیف بعدی به نما"""
+        if count <= 0:
+            return
+        start = self._visible
+        self.beginInsertRows(QModelIndex(), start, start + count - 1)
+        self._visible += count
+        self.endInsertRows()
+    
+    def _load_batch(self):
+        """افزایش ردیف‌های قابل نمایش به اندازه یک دسته؛ خروجی: تعداد ردیف‌های جدید"""
+        target = self._visible + self.batch_size
+        if self._pending is not None and len(self._rows) < target:
+            self._rows.extend(islice(self._pending, target - len(self._rows)))
+            if len(self._rows) < target:
+                self._pending = None
+        
+        added = min(target, len(self._rows)) - self._visible
+        self._visible += added
+        return added
+    
+    # ---------- بارگذاری تدریجی ----------
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._visible < len(self._rows) or self._pending is not None
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        start = self._visible
+        available = len(self._rows) - start
+        if available <= 0 and self._pending is None:
+            return
+        
+        if available < self.batch_size and self._pending is not None:
+            # ردیف‌های جدید را قبل از اعلام به نما از iterator بخوان
+            self._rows.extend(islice(self._pending, self.batch_size - available))
+            if len(self._rows) - start < self.batch_size:
+                self._pending = None
+            available = len(self._rows) - start
+        
+        self._show(min(self.batch_size, available))
+    
+    # ---------- رابط QAbstractTableModel ----------
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visible
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row_number = index.row()
+        row = self._rows[row_number]
+        column = self.columns[index.column()]
+        
+        if role == Qt.DisplayRole:
+            return column.display(row, row_number)
+        if role == Qt.TextAlignmentRole:
+            return column.align
+        if role == Qt.BackgroundRole:
+            return self._color(column.background, row)
+        if role == Qt.ForegroundRole:
+            return self._color(column.foreground, row)
+        if role == Qt.ToolTipRole:
+            return column.tooltip(row) if column.tooltip else None
+        if role == SORT_ROLE:
+            return column.sort_value(row, row_number)
+        if role == RECORD_ROLE:
+            return row
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section].title if section < len(self.columns) else None
+        return str(section + 1)
+    
+    def _color(self, color_fn, row):
+        if color_fn is None:
+            return None
+        name = color_fn(row)
+        if not name:
+            return None
+        color = self._colors.get(name)
+        if color is None:
+            color = self._colors[name] = QColor(name)
+        return color
+
+
+class RecordFilterProxyModel(QSortFilterProxyModel):
+    """مرتب‌سازی روی مقدار خام ستون‌ها و فیلتر با تابع شرط روی دیکشنری ردیف"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._predicate = None
+        self.setSortRole(SORT_ROLE)
+    
+    def set_predicate(self, predicate):
+        """تابع ردیف ← bool برای فیلتر ردیف‌ها (None: بدون فیلتر)"""
+        self._predicate = predicate
+        self.invalidateFilter()
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._predicate is None:
+            return True
+        return bool(self._predicate(self.sourceModel().record(source_row)))
+    
+    def lessThan(self, left, right):
+        # مقدار مستقیماً از مدل منبع خوانده می‌شود (بدون تبدیل QVariant در هر مقایسه)
+        model = self.sourceModel()
+        left_value = model.sort_value(left.row(), left.column())
+        right_value = model.sort_value(right.row(), right.column())
+        if left_value is None or right_value is None:
+            return left_value is None and right_value is not None
+        try:
+            return left_value < right_value
+        except TypeError:
+            return str(left_value) < str(right_value)
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """نقاشی دکمه‌های عملیات یک ستون بدون ساختن ویجت برای هر ردیف"""
+    
+    clicked = Signal(str, QModelIndex)
+    
+    BUTTON_SIZE = 32
+    SPACING = 3
+    
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = actions
+    
+    def _button_rects(self, rect):
+        size = min(self.BUTTON_SIZE, rect.height() - 4)
+        top = rect.top() + (rect.height() - size) // 2
+        x = rect.left() + self.SPACING
+        rects = []
+        for _ in self.actions:
+            rects.append(QRect(x, top, size, size))
+            x += size + self.SPACING
+        return rects
+    
+    def _action_at(self, rect, pos):
+        for action, button_rect in zip(self.actions, self._button_rects(rect)):
+            if button_rect.contains(pos):
+                return action
+        return None
+    
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+        
+        for (_, text, _), button_rect in zip(self.actions, self._button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = button_rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+    
+    def sizeHint(self, option, index):
+        hint = super().sizeHint(option, index)
+        hint.setWidth(len(self.actions) * (self.BUTTON_SIZE + self.SPACING) + self.SPACING)
+        return hint
+    
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            action = self._action_at(option.rect, event.position().toPoint())
+            if action is not None:
+                self.clicked.emit(action[0], index)
+                return True
+        return super().editorEvent(event, model, option, index)
+    
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            action = self._action_at(option.rect, event.pos())
+            if action is not None and action[2]:
+                QToolTip.showText(event.globalPos(), action[2], view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
+
+class RecordTableView(QTableView):
+    """
+    جدول فقط‌خواندنی روی RecordTableModel و RecordFilterProxyModel
+    
+    تنظیمات ظاهری همان جدول‌های QTableWidget فرم‌ها (انتخاب تک ردیف، ارتفاع
+    ردیف 40 و تراز راست هدر) است.
+    """
+    
+    record_activated = Signal(dict)        # دابل کلیک روی ردیف
+    selection_changed = Signal()           # تغییر ردیف انتخاب شده
+    action_triggered = Signal(str, dict)   # کلیک دکمه عملیات (نام عملیات، ردیف)
+    
+    def __init__(self, columns, parent=None, batch_size=DEFAULT_BATCH_SIZE, sortable=True):
+        super().__init__(parent)
+        self.source_model = RecordTableModel(columns, batch_size, self)
+        self.proxy_model = RecordFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.source_model)
+        self.setModel(self.proxy_model)
+        
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setWordWrap(False)
+        
+        header = self.horizontalHeader()
+        header.setStretchLastSection(True)
+        header.setDefaultAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.verticalHeader().setDefaultSectionSize(40)
+        
+        if sortable:
+            # بدون ستون مرتب‌سازی، ترتیب اصلی داده (مثلاً ORDER BY کوئری) حفظ می‌شود
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+            self.setSortingEnabled(True)
+            # مرتب‌سازی باید همه ردیف‌ها را ببیند، نه فقط دسته‌های نمایش داده شده
+            header.sortIndicatorChanged.connect(self._on_sort_changed)
+        
+        self._sort_handler = None
+        self._action_delegates = []
+        for column_index, column in enumerate(self.source_model.columns):
+            if column.width:
+                self.setColumnWidth(column_index, column.width)
+            if column.actions:
+                delegate = ActionButtonsDelegate(column.actions, self)
+                delegate.clicked.connect(self._on_action_clicked)
+                self.setItemDelegateForColumn(column_index, delegate)
+                self._action_delegates.append(delegate)
+        
+        self.doubleClicked.connect(self._on_double_clicked)
+        self.selectionModel().selectionChanged.connect(lambda *_: self.selection_changed.emit())
+        self.proxy_model.modelReset.connect(self.selection_changed.emit)
+    
+    # ---------- داده ----------
+    
+    def set_rows(self, rows):
+        """نمایش ردیف‌های جدید (لیست یا iterator از دیکشنری‌ها)"""
+        self.source_model.set_rows(rows)
+    
+    def append_rows(self, rows):
+        """افزودن ردیف‌ها به انتهای جدول بدون از دست رفتن انتخاب فعلی"""
+        self.source_model.append_rows(rows)
+    
+    def rows(self):
+        """ردیف‌های داده شده به جدول (بدون فیلتر proxy)"""
+        return self.source_model.rows()
+    
+    def set_sort_handler(self, handler):
+        """
+        مرتب‌سازی سمت دیتابیس برای داده‌های صفحه‌بندی شده
+        
+        با کلیک سرستون handler(کلید ستون، descending) صدا زده می‌شود؛ اگر True
+        برگرداند خودش ردیف‌های مرتب شده را با set_rows می‌دهد. ستون‌های دیگر فقط
+        ردیف‌های بارگذاری شده تا این لحظه را مرتب می‌کنند (بقیه صفحه‌ها خوانده نمی‌شوند).
+        """
+        self._sort_handler = handler
+    
+    def set_filter(self, predicate):
+        """فیلتر ردیف‌ها با تابع شرط روی دیکشنری ردیف (همه ردیف‌ها بررسی می‌شوند)"""
+        if predicate is not None:
+            self.source_model.fetch_all()
+        self.proxy_model.set_predicate(predicate)
+    
+    def record_count(self):
+        """تعداد ردیف‌های قابل مشاهده (پس از فیلتر)"""
+        return self.proxy_model.rowCount()
+    
+    def record_at(self, view_row):
+        """دیکشنری ردیف view_row نما"""
+        return self._record(self.proxy_model.index(view_row, 0))
+    
+    def selected_record(self):
+        """دیکشنری ردیف انتخاب شده یا None"""
+        rows = self.selectionModel().selectedRows()
+        return self._record(rows[0]) if rows else None
+    
+    def selected_records(self):
+        return [self._record(index) for index in self.selectionModel().selectedRows()]
+    
+    def has_selection(self):
+        return self.selectionModel().hasSelection()
+    
+    def select_first(self):
+        if self.record_count() > 0:
+            self.select_view_row(0)
+    
+    def select_view_row(self, view_row):
+        """انتخاب ردیف view_row نما (selectRow در جدول راست‌به‌چپ گاهی ستونی پیدا نمی‌کند)"""
+        index = self.proxy_model.index(view_row, 0)
+        if index.isValid():
+            self.selectionModel().setCurrentIndex(
+                index, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+    
+    def column_titles(self):
+        """عنوان ستون‌های داده (بدون ستون دکمه‌ها)"""
+        return [column.title for column in self.source_model.columns if not column.actions]
+    
+    def text_rows(self, selected_only=False):
+        """
+        متن نمایشی ردیف‌ها به ترتیب نما (برای خروجی و چاپ)
+        
+        بدون selected_only همه ردیف‌های فیلتر شده (نه فقط دسته‌های نمایش داده
+        شده) برگردانده می‌شوند.
+        """
+        if selected_only:
+            indexes = sorted(self.selectionModel().selectedRows(), key=lambda index: index.row())
+        else:
+            self.source_model.fetch_all()
+            indexes = [self.proxy_model.index(row, 0) for row in range(self.proxy_model.rowCount())]
+        
+        columns = [column for column in self.source_model.columns if not column.actions]
+        result = []
+        for index in indexes:
+            source_row = self.proxy_model.mapToSource(index).row()
+            record = self.source_model.record(source_row)
+            result.append([column.display(record, source_row) for column in columns])
+        return result
+    
+    def _record(self, index):
+        """دیکشنری ردیف یک index نما (بدون عبور از QVariant)"""
+        if not index.isValid():
+            return None
+        return self.source_model.record(self.proxy_model.mapToSource(index).row())
+    
+    # ---------- رویدادها ----------
+    
+    def _on_sort_changed(self, section, order):
+        if section < 0:
+            return
+        if self._sort_handler is None:
+            self.source_model.fetch_all()
+            return
+        
+        key = self.source_model.columns[section].key
+        if key and key != ROW_NUMBER and self._sort_handler(key, order == Qt.DescendingOrder):
+            # ردیف‌ها از کوئری مرتب می‌آیند؛ proxy ترتیب منبع را نگه دارد
+            self.proxy_model.sort(-1)
+    
+    def _on_double_clicked(self, index):
+        record = self._record(index)
+        if record is not None:
+            self.record_activated.emit(record)
+    
+    def _on_action_clicked(self, action, index):
+        record = self._record(index)
+        if record is not None:
+            self.action_triggered.emit(action, record)
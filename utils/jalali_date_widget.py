@@ -11,7 +11,7 @@ from PySide6.QtGui import QFont, QPalette, QColor, QIcon
 import jdatetime
 import locale
 from datetime import datetime
-from database import DatabaseManager
+from database import DatabaseManager, jalali_calendar
 
 class JalaliCalendarDialog(QDialog):
     """دیالوگ تقویم شمسی"""
@@ -880,11 +880,7 @@ class JalaliDateDelegate:
     def display_text(value, role):
         """متن نمایشی برای تاریخ"""
         if role == Qt.DisplayRole and value:
-            try:
-                db = DatabaseManager()
-                return db.gregorian_to_jalali(str(value))
-            except:
-                return str(value)
+            return jalali_calendar.to_jalali(str(value))
         return None
 
 
@@ -1148,54 +1144,17 @@ def get_current_jalali_date():
 
 
 def gregorian_to_jalali(gregorian_date):
-    """تبدیل تاریخ میلادی به شمسی"""
-    if isinstance(gregorian_date, datetime):
-        try:
-            return jdatetime.datetime.fromgregorian(
-                year=gregorian_date.year,
-                month=gregorian_date.month,
-                day=gregorian_date.day
-            )
-        except:
-            return jdatetime.date.fromgregorian(date=gregorian_date.date())
-    elif isinstance(gregorian_date, str):
-        # فرض بر این که فرمت yyyy-mm-dd است
-        try:
-            # حذف بخش زمانی اگر وجود دارد
-            gregorian_date = gregorian_date.split(' ')[0]
-            year, month, day = map(int, gregorian_date.split('-'))
-            return jdatetime.date.fromgregorian(year=year, month=month, day=day)
-        except:
-            try:
-                # فرمت yyyy/mm/dd
-                year, month, day = map(int, gregorian_date.split('/'))
-                return jdatetime.date.fromgregorian(year=year, month=month, day=day)
-            except:
-                return jdatetime.date.today()
-    return None
+    """تبدیل تاریخ میلادی به شمسی (شیء jdatetime.date)"""
+    if gregorian_date is None or gregorian_date == "":
+        return None
+    return jalali_calendar.to_jalali_date(gregorian_date) or jdatetime.date.today()
 
 
 def jalali_to_gregorian(jalali_date):
-    """تبدیل تاریخ شمسی به میلادی"""
-    if isinstance(jalali_date, jdatetime.datetime):
-        return jalali_date.togregorian()
-    elif isinstance(jalali_date, jdatetime.date):
-        return jalali_date.togregorian()
-    elif isinstance(jalali_date, str):
-        try:
-            # فرمت yyyy/mm/dd
-            year, month, day = map(int, jalali_date.split('/'))
-            jalali = jdatetime.date(year, month, day)
-            return jalali.togregorian()
-        except:
-            try:
-                # فرمت yyyy-mm-dd
-                year, month, day = map(int, jalali_date.split('-'))
-                jalali = jdatetime.date(year, month, day)
-                return jalali.togregorian()
-            except:
-                return datetime.now().date()
-    return None
+    """تبدیل تاریخ شمسی به میلادی (شیء datetime.date)"""
+    if jalali_date is None or jalali_date == "":
+        return None
+    return jalali_calendar.to_gregorian_date(jalali_date) or datetime.now().date()
 
 
 def format_jalali_date(jalali_date, format_str="%Y/%m/%d"):
@@ -1277,30 +1236,7 @@ def get_current_persian_month_name():
 
 def convert_to_jalali_display(date_str):
     """تبدیل رشته تاریخ میلادی به شمسی برای نمایش (همنام با تابع main_window)"""
-    if not date_str:
-        return ""
-    
-    try:
-        # فرمت‌های مختلف تاریخ
-        date_formats = ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y']
-        
-        miladi_date = None
-        for fmt in date_formats:
-            try:
-                miladi_date = datetime.strptime(str(date_str).split(' ')[0], fmt).date()
-                break
-            except:
-                continue
-        
-        if miladi_date:
-            jalali_date = jdatetime.date.fromgregorian(date=miladi_date)
-            return jalali_date.strftime('%Y/%m/%d')
-        else:
-            return str(date_str)  # اگر تبدیل نشد، تاریخ اصلی را برگردان
-            
-    except Exception as e:
-        print(f"⚠️ خطا در تبدیل تاریخ {date_str}: {e}")
-        return str(date_str)
+    return jalali_calendar.to_jalali(date_str)
 
 
 # توابع کمکی برای ویجت JalaliDateInput